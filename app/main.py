@@ -1,6 +1,10 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
+from prometheus_client import CONTENT_TYPE_LATEST
+import asyncio
+import math
 import os
 
 # Load environment variables
@@ -20,12 +24,66 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Tag-Version"],
 )
 
 # Import and include routes
-from app.routes import plc
+from app.routes import plc, history
+from app.services.metrics import exposition, monitor_event_loop, process_exited
+from app.services.controller_executor import ControllerBusy, current_client
+from app.services.controller_health import ControllerUnavailable
+from app.poller.client import PollerClient
+
+@app.middleware("http")
+async def identify_client(request: Request, call_next):
+    """Charge PLC calls made for a request to its client, for fair queueing per controller"""
+    current_client.set(request.headers.get("X-Client-Id") or (request.client.host if request.client else "unknown"))
+    return await call_next(request)
+
+def retry_after(seconds: float) -> dict:
+    """Retry-After header for a controller that should not be asked again for a while"""
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+@app.exception_handler(ControllerUnavailable)
+async def controller_unavailable(request: Request, e: ControllerUnavailable):
+    """Answer a request to a controller whose circuit breaker is open"""
+    return JSONResponse(status_code=503, content={"detail": str(e)}, headers=retry_after(e.retry_after))
+
+@app.exception_handler(ControllerBusy)
+async def controller_busy(request: Request, e: ControllerBusy):
+    """Answer a request turned away by a controller's full queue"""
+    return JSONResponse(status_code=429, content={"detail": str(e)}, headers=retry_after(e.retry_after))
+
+@app.exception_handler(asyncio.TimeoutError)
+async def deadline_exceeded(request: Request, e: asyncio.TimeoutError):
+    """Answer a PLC request that ran past its deadline"""
+    return JSONResponse(status_code=504, content={"detail": "PLC did not respond before the request deadline"})
 
 app.include_router(plc.router, prefix="/api", tags=["PLC"])
+app.include_router(history.router, prefix="/api", tags=["History"])
+
+@app.on_event("startup")
+async def startup_event():
+    """Start the historian unless it is disabled or the poller records, the event loop lag monitor and the controller prober"""
+    # behind a poller, reads are recorded there and this worker only queries the history
+    recording = not isinstance(plc.tag_reader, PollerClient)
+    if recording and os.getenv("SIGNALTAP_HISTORIAN_ENABLED", "true").lower() not in ("0", "false", "no"):
+        plc.historian.start()
+    app.state.loop_monitor = asyncio.create_task(monitor_event_loop())
+    app.state.prober = asyncio.create_task(plc.controller_health.probe_loop(plc.probe_controller))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop scan loops, flush the historian and close pooled PLC sessions (or the poller connection) on shutdown"""
+    app.state.loop_monitor.cancel()
+    app.state.prober.cancel()
+    await plc.scan_engine.stop()
+    plc.historian.stop()
+    if isinstance(plc.tag_reader, PollerClient):
+        await plc.tag_reader.close()
+    plc.plc_executor.shutdown()
+    plc.plc_service.pool.close_all()
+    process_exited()
 
 @app.get("/")
 async def root():
@@ -41,6 +99,11 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "SignalTap API"}
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics for PLC I/O, scan loops and the event loop, of all processes in multiprocess mode"""
+    return Response(exposition(), media_type=CONTENT_TYPE_LATEST)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
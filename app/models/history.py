@@ -0,0 +1,33 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from enum import Enum
+
+class HistoryMode(str, Enum):
+    """How stored samples are reduced before they are returned"""
+    RAW = "raw"
+    AGGREGATE = "aggregate"
+    LTTB = "lttb"
+
+class TagHistory(BaseModel):
+    """Model for one tag's history over the requested range"""
+    name: str
+    timestamps: List[float]
+    values: Optional[List[Optional[float]]] = None
+    min: Optional[List[float]] = None
+    max: Optional[List[float]] = None
+    avg: Optional[List[float]] = None
+    count: Optional[List[int]] = None
+    raw_points: int
+    truncated: bool = False
+    next_start: Optional[float] = None
+
+class HistoryResponse(BaseModel):
+    """Model for history query response"""
+    success: bool
+    ip: str
+    slot: int
+    start: float
+    end: float
+    mode: HistoryMode
+    tags: List[TagHistory]
+    message: Optional[str] = None
@@ -47,7 +47,7 @@ class TagScanResponse(BaseModel):
     message: Optional[str] = None
     error: Optional[str] = None
 
-class TagReadRequest(BaseModel):
+class PLCTagReadRequest(BaseModel):
     """Model for reading specific tags"""
     tags: List[str]
     ip_address: str
@@ -66,15 +66,124 @@ class Tag(BaseModel):
     name: str
     type: str
 
+class TagIndexEntry(BaseModel):
+    """Model for a tag, program or UDT member found by tag search"""
+    name: str
+    type: str
+    kind: str  # "tag", "program" or "member"
+    parent: Optional[str] = None  # program or structure the entry belongs to
+    array_size: Optional[int] = None
+    has_children: bool = False
+
+class TagSearchResponse(BaseModel):
+    """Model for one page of tag search results"""
+    total: int
+    offset: int
+    limit: int
+    items: List[TagIndexEntry]
+
 class TagReadRequest(BaseModel):
     """Model for reading specific tags with live values"""
     ip: str
     slot: Optional[int] = 0
     tags: List[str]
+    timeout: Optional[int] = 10
+    since: Optional[str] = None
+    max_age_ms: Optional[int] = None
+    micro800: Optional[bool] = False
 
 class TagReadResult(BaseModel):
     """Model for individual tag read result"""
     name: str
-    value: Union[str, int, float, bool, None]
+    value: Union[str, int, float, bool, List[Any], dict[str, Any], None]
     status: str
-    timestamp: str 
\ No newline at end of file
+    timestamp: str 
+
+class CompactTagReadRequest(BaseModel):
+    """Model for a compact read: tags by name, or by the ids issued on an earlier read"""
+    ip: str
+    slot: Optional[int] = 0
+    tags: List[Union[int, str]]
+    timeout: Optional[int] = 10
+    since: Optional[str] = None
+    max_age_ms: Optional[int] = None
+    micro800: Optional[bool] = False
+
+class TagSubscriptionRequest(BaseModel):
+    """Model for subscribing to pushed tag value changes"""
+    ip: str
+    slot: Optional[int] = 0
+    tags: List[str]
+    rate_ms: Optional[int] = None  # None scans each tag at its scan class period
+    deadband: float = 0.0
+
+class TagWriteItem(BaseModel):
+    """Model for one value to write in a multi-tag write"""
+    tag: str
+    value: Any
+
+class TagWriteRequest(BaseModel):
+    """Model for writing many tags in one request"""
+    ip: str
+    slot: Optional[int] = 0
+    writes: List[TagWriteItem]
+    timeout: Optional[int] = 10
+    micro800: Optional[bool] = False
+    verify: bool = False  # read the tags back and compare
+    rollback_on_error: bool = False  # restore previous values if any write fails
+
+class TagWriteResult(BaseModel):
+    """Model for the outcome of one tag write"""
+    name: str
+    value: Any
+    status: str  # Success, Error, Invalid, Skipped, Mismatch or Rolled back
+    error: Optional[str] = None
+    read_back: Optional[Any] = None
+
+class TagWriteResponse(BaseModel):
+    """Model for multi-tag write response"""
+    success: bool
+    results: List[TagWriteResult]
+    elapsed_ms: float
+
+class ScanClassAssignment(BaseModel):
+    """Model for a rule assigning tags to a scan class"""
+    pattern: str  # tag name or fnmatch pattern, e.g. "Motor_*.Speed"
+    scan_class: str
+    ip: Optional[str] = None  # None applies to every controller
+    slot: Optional[int] = None
+
+class ScanClassConfig(BaseModel):
+    """Model for the scan class configuration"""
+    classes: dict[str, int]
+    assignments: List[ScanClassAssignment] = []
+    default_class: str = "normal"
+
+class ControllerReadRequest(BaseModel):
+    """Model for the tags to read from one controller in a bulk read"""
+    ip: str
+    slot: Optional[int] = 0
+    tags: List[str]
+    timeout: Optional[int] = 10
+    max_age_ms: Optional[int] = None
+    micro800: Optional[bool] = False
+
+class BulkTagReadRequest(BaseModel):
+    """Model for reading tags from many controllers at once"""
+    controllers: List[ControllerReadRequest]
+    max_concurrency_per_segment: int = 8
+
+class ControllerReadResult(BaseModel):
+    """Model for one controller's part of a bulk read"""
+    ip: str
+    slot: int
+    success: bool
+    latency_ms: float
+    results: List[TagReadResult]
+    error: Optional[str] = None
+
+class BulkTagReadResponse(BaseModel):
+    """Model for bulk read response"""
+    success: bool
+    results: List[ControllerReadResult]
+    elapsed_ms: float
\ No newline at end of file
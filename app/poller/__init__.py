@@ -0,0 +1 @@
+# Poller Package
\ No newline at end of file
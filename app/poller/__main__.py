@@ -0,0 +1,66 @@
+"""
+Run the poller that owns all PLC sessions, for multi-worker API deployments:
+
+    python -m app.poller
+    SIGNALTAP_POLLER_ADDRESS=127.0.0.1:8790 uvicorn app.main:app --workers 4
+
+Workers started with SIGNALTAP_POLLER_ADDRESS set send live reads here and
+read the values from the shared memory table instead of opening their own
+PLC sessions.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+from dotenv import load_dotenv
+from app.poller.server import Poller
+from app.services.cached_reader import CachedTagReader
+from app.services.controller_executor import ControllerExecutor
+from app.services.historian import Historian
+from app.services.last_values import LastValueCache
+from app.services.metrics import process_exited
+from app.services.pylogix_service import PylogixService
+from app.services.shared_values import SharedValueTable
+
+async def run(args):
+    service = PylogixService()
+    historian = Historian()
+    if os.getenv("SIGNALTAP_HISTORIAN_ENABLED", "true").lower() not in ("0", "false", "no"):
+        historian.start()
+    reader = CachedTagReader(service, ControllerExecutor(), LastValueCache(), historian)
+    table = SharedValueTable.create(args.table, args.capacity, args.slot_size)
+    poller = Poller(reader, table, args.idle_seconds)
+
+    server = await poller.serve(args.address)
+    prober = asyncio.create_task(service.pool.health.probe_loop(poller.probe))
+    try:
+        await server.serve_forever()
+    finally:
+        prober.cancel()
+        server.close()
+        await poller.stop()
+        historian.stop()
+        reader.executor.shutdown()
+        service.pool.close_all()
+        table.close()
+        process_exited()
+
+def main():
+    parser = argparse.ArgumentParser(description="SignalTap poller: PLC sessions shared by all API workers")
+    parser.add_argument("--address", default=None, help="host:port to listen on (default: SIGNALTAP_POLLER_ADDRESS or 127.0.0.1:8790)")
+    parser.add_argument("--table", default=None, help="Shared value table file (default: SIGNALTAP_SHARED_VALUES_PATH or /dev/shm/signaltap-values)")
+    parser.add_argument("--capacity", type=int, default=65536, help="Number of tags the table holds; slots of idle tags are reused once it is full")
+    parser.add_argument("--slot-size", type=int, default=512, help="Bytes per tag; larger values are sent to workers directly")
+    parser.add_argument("--idle-seconds", type=float, default=60.0, help="Stop polling tags no worker asked for in this long, and reuse their slots")
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
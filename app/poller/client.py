@@ -0,0 +1,237 @@
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import itertools
+import logging
+import time
+import orjson
+from datetime import datetime
+from app.poller.server import MESSAGE_LIMIT, parse_address
+from app.services.cached_reader import assemble_columns
+from app.services.controller_executor import ControllerBusy, INTERACTIVE, current_client
+from app.services.controller_health import ControllerUnavailable
+from app.services.last_values import LastValueCache
+from app.services.pylogix_service import TagReadColumns
+from app.services.shared_values import SharedValueTable, iso_timestamp
+from app.services import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Extra time the poller gets to answer beyond the read's own deadline
+REPLY_GRACE_SECONDS = 5.0
+
+class PollerClient:
+    """
+    Live reads for an API worker, served by the poller process
+
+    A drop-in for ``CachedTagReader`` when several workers share one poller
+    (SIGNALTAP_POLLER_ADDRESS): no worker talks to a PLC itself. Reads that
+    accept cached values (``max_age_ms``) are served straight from the shared
+    value table when every tag has a fresh enough value there; everything
+    else is sent to the poller, which reads the controller (or joins a read
+    already in flight), writes the table and replies with the tags' slot ids.
+
+    Results are also recorded in the worker's ``LastValueCache`` so delta
+    reads (``since``) keep working per worker.
+    """
+
+    def __init__(self, address: Optional[str] = None, cache: Optional[LastValueCache] = None, table_path: Optional[str] = None):
+        self.address = parse_address(address)
+        self.cache = cache or LastValueCache()
+        self.table_path = table_path
+        # reads are recorded by the poller
+        self.historian = None
+        self._table: Optional[SharedValueTable] = None
+        self._generation: Optional[int] = None
+        # controller -> tag name -> slot id and slot generation
+        self._ids: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._receiver: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._request_ids = itertools.count()
+
+    async def read(
+        self,
+        ip: str,
+        tags: List[str],
+        slot: int = 0,
+        timeout: int = 10,
+        max_age_ms: int = 0,
+        priority: str = INTERACTIVE,
+        client: Optional[str] = None,
+        micro800: bool = False
+    ) -> TagReadColumns:
+        """
+        Read tags through the poller, or from the shared table when fresh enough
+
+        Takes the same arguments as ``CachedTagReader.read``.
+
+        Raises:
+            ControllerUnavailable: If the controller's circuit breaker is open
+            ControllerBusy: If the controller's queue for the priority class is full
+            asyncio.TimeoutError: If the controller read passes its deadline
+            ConnectionError: If the poller is not running
+        """
+        controller = metrics.controller_label(ip, slot)
+        if max_age_ms > 0:
+            found = self._lookup(controller, tags, max_age_ms / 1000.0)
+            if found is not None:
+                metrics.TAG_CACHE_LOOKUPS.labels(controller, "hit").inc(len(found))
+                columns = assemble_columns(tags, found)
+                columns.version = self.cache.update(controller, columns)
+                return columns
+
+        reply = await self._request(
+            {
+                "ip": ip,
+                "slot": slot,
+                "tags": tags,
+                "timeout": timeout,
+                "max_age_ms": max_age_ms,
+                "priority": priority,
+                "client": client or current_client.get(),
+                "micro800": micro800
+            },
+            timeout + REPLY_GRACE_SECONDS
+        )
+        if "error" in reply:
+            raise self._error((ip, slot, micro800), reply)
+
+        table = self._table_for(reply["generation"])
+        ids = self._ids.setdefault(controller, {})
+        found = {}
+        for tag_name, tag_id, slot_generation in zip(tags, reply["ids"], reply["slot_generations"]):
+            ids[tag_name] = (tag_id, slot_generation)
+            overflowed = reply["overflow"].get(tag_name)
+            if overflowed is not None:
+                found[tag_name] = (overflowed["value"], overflowed["status"], overflowed["timestamp"])
+                continue
+            slot_value = table.read(tag_id, slot_generation)
+            if slot_value is None:
+                # the poller was restarted, or gave the slot to another tag,
+                # between its reply and this read
+                found[tag_name] = (None, "Error", datetime.utcnow().isoformat())
+                continue
+            value, status, read_at, _ = slot_value
+            found[tag_name] = (value, status, iso_timestamp(read_at))
+
+        columns = assemble_columns(tags, found)
+        columns.version = self.cache.update(controller, columns)
+        return columns
+
+    async def expire(self, ip: str, tags: List[str], slot: int = 0):
+        """
+        Stop serving cached values for tags, e.g. after writing them
+
+        Expires them in this worker, and in the poller's cache and the shared
+        table for every other worker. If the poller cannot be reached, this
+        worker still stops reading the tags from the table.
+        """
+        controller = metrics.controller_label(ip, slot)
+        self.cache.expire(controller, tags)
+        ids = self._ids.get(controller, {})
+        for tag_name in tags:
+            ids.pop(tag_name, None)
+        try:
+            reply = await self._request({"op": "expire", "ip": ip, "slot": slot, "tags": tags}, REPLY_GRACE_SECONDS)
+        except (ConnectionError, asyncio.TimeoutError) as e:
+            logger.warning(f"Could not expire written tags in the poller: {str(e) or 'no reply'}")
+            return
+        if "error" in reply:
+            logger.warning(f"Could not expire written tags in the poller: {reply['error']}")
+
+    async def close(self):
+        """Disconnect from the poller and unmap the table"""
+        if self._writer is not None:
+            self._writer.close()
+        if self._receiver is not None:
+            self._receiver.cancel()
+        if self._table is not None:
+            self._table.close()
+            self._table = None
+
+    def _lookup(self, controller: str, tags: List[str], max_age: float) -> Optional[Dict[str, Tuple[Any, str, str]]]:
+        table = self._table
+        ids = self._ids.get(controller)
+        if table is None or ids is None or not table.is_current() or table.generation != self._generation:
+            return None
+        oldest = time.time() - max_age
+        found = {}
+        for tag_name in tags:
+            tag_slot = ids.get(tag_name)
+            slot = table.read(*tag_slot) if tag_slot is not None else None
+            if slot is None or slot[3] or slot[2] < oldest:
+                return None
+            value, status, read_at, _ = slot
+            found[tag_name] = (value, status, iso_timestamp(read_at))
+        return found
+
+    def _table_for(self, generation: int) -> SharedValueTable:
+        if self._table is not None and (not self._table.is_current() or self._table.generation != generation):
+            self._table.close()
+            self._table = None
+        if self._table is None:
+            self._table = SharedValueTable.open(self.table_path)
+        if generation != self._generation:
+            # the poller restarted: the slot ids handed out before mean nothing now
+            self._ids.clear()
+            self._generation = generation
+        return self._table
+
+    async def _request(self, message: Dict[str, Any], deadline: float) -> Dict[str, Any]:
+        writer = await self._connection()
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            writer.write(orjson.dumps(dict(message, id=request_id)) + b"\n")
+
+            async def reply():
+                # a poller that stops reading holds the request up here, within the deadline
+                await writer.drain()
+                return await future
+
+            return await asyncio.wait_for(reply(), deadline)
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _connection(self) -> asyncio.StreamWriter:
+        async with self._connect_lock:
+            if self._writer is None or self._writer.is_closing():
+                host, port = self.address
+                try:
+                    reader, self._writer = await asyncio.open_connection(host, port, limit=MESSAGE_LIMIT)
+                except OSError as e:
+                    raise ConnectionError(f"Poller at {host}:{port} is not running ({str(e)})")
+                self._receiver = asyncio.create_task(self._receive(reader, self._writer))
+            return self._writer
+
+    async def _receive(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply = orjson.loads(line)
+                future = self._pending.get(reply.get("id"))
+                if future is not None and not future.done():
+                    future.set_result(reply)
+        except (ConnectionError, ValueError) as e:
+            logger.warning(f"Lost connection to the poller: {str(e)}")
+        finally:
+            writer.close()
+            host, port = self.address
+            for future in list(self._pending.values()):
+                if not future.done():
+                    future.set_exception(ConnectionError(f"Poller at {host}:{port} closed the connection"))
+
+    @staticmethod
+    def _error(key: Tuple[str, int, bool], reply: Dict[str, Any]) -> Exception:
+        if reply["kind"] == "unavailable":
+            return ControllerUnavailable(key, reply["last_error"], reply["retry_after"])
+        if reply["kind"] == "busy":
+            return ControllerBusy(key, reply["priority"], reply["queued"], reply["retry_after"])
+        if reply["kind"] == "timeout":
+            return asyncio.TimeoutError()
+        return Exception(reply["error"])
@@ -0,0 +1,293 @@
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import time
+import orjson
+from app.models.tag import PLCConnectionConfig
+from app.services.cached_reader import CachedTagReader
+from app.services.controller_executor import ControllerBusy, INTERACTIVE, SCAN
+from app.services.controller_health import ControllerUnavailable
+from app.services.shared_values import SharedValueTable
+from app.services import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Where the poller listens for worker requests unless SIGNALTAP_POLLER_ADDRESS says otherwise
+DEFAULT_ADDRESS = "127.0.0.1:8790"
+
+# Fastest period a tag is polled at, whatever max age the workers ask for
+MIN_POLL_RATE_MS = 100
+
+# Socket timeout and deadline of background polls
+POLL_TIMEOUT_SECONDS = 10
+
+# Longest request or reply line; a read of many tags or large arrays is one line
+MESSAGE_LIMIT = 16 * 1024 * 1024
+
+# How long a worker may leave replies unread before its connection is dropped
+DRAIN_TIMEOUT_SECONDS = 10.0
+
+def parse_address(address: Optional[str] = None) -> Tuple[str, int]:
+    """Host and port of the poller, from ``host:port`` or SIGNALTAP_POLLER_ADDRESS"""
+    host, _, port = (address or os.getenv("SIGNALTAP_POLLER_ADDRESS") or DEFAULT_ADDRESS).rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+class PollGroup:
+    """Tags of one controller kept fresh in the value table at one period"""
+
+    def __init__(self, poller: "Poller", ip: str, slot: int, rate_ms: int, micro800: bool = False):
+        self.poller = poller
+        self.key = (ip, slot, rate_ms)
+        self.micro800 = micro800
+        # tag name -> monotonic time a worker last asked for it
+        self.tags: Dict[str, float] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    async def run(self):
+        ip, slot, rate_ms = self.key
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                started = loop.time()
+                idle_since = time.monotonic() - self.poller.idle_seconds
+                for tag_name in [name for name, requested in self.tags.items() if requested < idle_since]:
+                    del self.tags[tag_name]
+                if not self.tags:
+                    logger.info(f"Stopped polling PLC at {ip} (slot {slot}) every {rate_ms} ms, no tags requested lately")
+                    return
+
+                tags = list(self.tags)
+                try:
+                    columns = await self.poller.reader.read(
+                        ip,
+                        tags,
+                        slot,
+                        POLL_TIMEOUT_SECONDS,
+                        priority=SCAN,
+                        client=f"poller:{rate_ms}",
+                        micro800=self.micro800
+                    )
+                    self.poller.publish(metrics.controller_label(ip, slot), columns)
+                except (ControllerBusy, ControllerUnavailable):
+                    # workers asking for these tags get the reason from their own read
+                    pass
+                except Exception as e:
+                    logger.error(f"Poll of PLC at {ip} failed: {str(e)}")
+
+                await asyncio.sleep(max(rate_ms / 1000.0 - (loop.time() - started), 0.0))
+        finally:
+            if self.poller.groups.get(self.key) is self:
+                del self.poller.groups[self.key]
+
+class Poller:
+    """
+    Owns every controller session and publishes tag values to a shared table
+
+    Run as its own process (``python -m app.poller``) when the API runs with
+    several uvicorn workers: each worker would otherwise open its own PLC
+    sessions and read the same tags again. Workers send read requests here
+    over a local socket, as newline-delimited JSON; reads go through one
+    ``CachedTagReader``, so requests from all workers share the last-value
+    cache, in-flight reads and per-controller queues. Every tag is given a
+    slot in the ``SharedValueTable`` and its values are written there, and
+    the reply only carries the slot ids.
+
+    Workers write tags themselves and then send an ``expire`` request, so
+    neither the cache nor the table serves the values from before the write.
+
+    Tags read with a ``max_age_ms`` keep being polled at half that period
+    until no worker has asked for them for ``idle_seconds``, so workers can
+    serve them from the table without asking the poller at all.
+
+    Once the table is full, slots of tags nobody has read or polled for
+    ``idle_seconds`` are handed to new tags. Each hand-over changes the
+    slot's generation, which the reply carries next to the slot id, so a
+    worker still holding the old tag's id reads an empty slot and asks the
+    poller again.
+    """
+
+    def __init__(self, reader: CachedTagReader, table: SharedValueTable, idle_seconds: float = 60.0):
+        self.reader = reader
+        self.table = table
+        self.idle_seconds = idle_seconds
+        self.tag_ids: Dict[Tuple[str, str], int] = {}
+        # when each tag was last read or polled, so idle tags can give up their slot
+        self.tag_used: Dict[Tuple[str, str], float] = {}
+        # slot id -> generation it was last handed out with
+        self.slot_generations: Dict[int, int] = {}
+        self.free_ids: List[int] = []
+        self.groups: Dict[Tuple[str, int, int], PollGroup] = {}
+
+    async def serve(self, address: Optional[str] = None) -> asyncio.AbstractServer:
+        """Start listening for workers"""
+        host, port = parse_address(address)
+        server = await asyncio.start_server(self._handle, host, port, limit=MESSAGE_LIMIT)
+        logger.info(f"Poller serving {self.table.capacity} value slots from {self.table.path} on {host}:{port}")
+        return server
+
+    async def probe(self, key):
+        """Try to reach a controller whose circuit breaker is open, on its executor"""
+        ip, slot, micro800 = key
+        config = PLCConnectionConfig(ip_address=ip, slot=slot, micro800=micro800)
+        await self.reader.executor.run(key, self.reader.service.pool.probe, config, deadline=config.timeout)
+
+    async def read(
+        self,
+        ip: str,
+        tags: List[str],
+        slot: int = 0,
+        timeout: int = 10,
+        max_age_ms: int = 0,
+        priority: str = INTERACTIVE,
+        client: Optional[str] = None,
+        micro800: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Read tags for a worker and publish them to the value table
+
+        Returns:
+            Dict[str, Any]: The table generation, each tag's slot id and slot
+            generation, and the results of tags whose value was too large for
+            their slot
+
+        Raises:
+            ValueError: If the value table has no free or idle slots left
+        """
+        controller = metrics.controller_label(ip, slot)
+        ids = [self._tag_id(controller, tag_name) for tag_name in tags]
+        if max_age_ms > 0:
+            self._watch(ip, slot, tags, max(max_age_ms // 2, MIN_POLL_RATE_MS), micro800)
+
+        columns = await self.reader.read(ip, tags, slot, timeout, max_age_ms, priority=priority, client=client, micro800=micro800)
+        overflowed = set(self.publish(controller, columns))
+        return {
+            "generation": self.table.generation,
+            "ids": ids,
+            "slot_generations": [self.slot_generations[tag_id] for tag_id in ids],
+            "overflow": {row["name"]: row for row in columns if row["name"] in overflowed}
+        }
+
+    def expire(self, ip: str, tags: List[str], slot: int = 0) -> Dict[str, Any]:
+        """Stop serving cached values for tags a worker wrote, from the cache and the table"""
+        controller = metrics.controller_label(ip, slot)
+        self.reader.cache.expire(controller, tags)
+        for tag_name in tags:
+            tag_id = self.tag_ids.get((controller, tag_name))
+            if tag_id is not None:
+                self.table.expire(tag_id)
+        return {"generation": self.table.generation}
+
+    def publish(self, controller: str, columns) -> List[str]:
+        """
+        Write read results to the value table
+
+        Returns:
+            List[str]: Tags whose value did not fit their slot
+        """
+        overflowed = []
+        timestamps = columns.timestamps or [columns.timestamp] * len(columns)
+        for name, value, status, timestamp in zip(columns.names, columns.values, columns.statuses, timestamps):
+            if not self.table.write(self._tag_id(controller, name), value, status, timestamp):
+                overflowed.append(name)
+        return overflowed
+
+    async def stop(self):
+        """Stop every poll loop"""
+        groups = list(self.groups.values())
+        for group in groups:
+            group.task.cancel()
+        await asyncio.gather(*(group.task for group in groups), return_exceptions=True)
+
+    def _tag_id(self, controller: str, tag_name: str) -> int:
+        key = (controller, tag_name)
+        tag_id = self.tag_ids.get(key)
+        if tag_id is None:
+            if not self.free_ids and len(self.slot_generations) >= self.table.capacity:
+                self._release_idle()
+            if self.free_ids:
+                tag_id = self.free_ids.pop()
+            elif len(self.slot_generations) < self.table.capacity:
+                tag_id = len(self.slot_generations)
+            else:
+                raise ValueError(f"Shared value table is full ({self.table.capacity} tags)")
+            self.slot_generations[tag_id] = self.table.assign(tag_id)
+            self.tag_ids[key] = tag_id
+        self.tag_used[key] = time.monotonic()
+        return tag_id
+
+    def _release_idle(self):
+        idle_since = time.monotonic() - self.idle_seconds
+        idle = [key for key, used in self.tag_used.items() if used < idle_since]
+        for key in idle:
+            del self.tag_used[key]
+            self.free_ids.append(self.tag_ids.pop(key))
+        if idle:
+            logger.info(f"Released the value slots of {len(idle)} idle tags")
+
+    def _watch(self, ip: str, slot: int, tags: List[str], rate_ms: int, micro800: bool = False):
+        key = (ip, slot, rate_ms)
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = PollGroup(self, ip, slot, rate_ms, micro800)
+            group.task = asyncio.create_task(group.run())
+            logger.info(f"Polling PLC at {ip} (slot {slot}) every {rate_ms} ms")
+        now = time.monotonic()
+        for tag_name in tags:
+            group.tags[tag_name] = now
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # answered concurrently, in whatever order the reads finish
+        requests = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.create_task(self._answer(orjson.loads(line), writer))
+                requests.add(task)
+                task.add_done_callback(requests.discard)
+        except (ConnectionError, ValueError) as e:
+            logger.warning(f"Dropping worker connection: {str(e)}")
+        finally:
+            for task in requests:
+                task.cancel()
+            writer.close()
+
+    async def _answer(self, request: Dict[str, Any], writer: asyncio.StreamWriter):
+        try:
+            if request.get("op") == "expire":
+                reply = self.expire(request["ip"], request["tags"], request.get("slot", 0))
+            else:
+                reply = await self.read(
+                    request["ip"],
+                    request["tags"],
+                    request.get("slot", 0),
+                    request.get("timeout", 10),
+                    request.get("max_age_ms", 0),
+                    request.get("priority", INTERACTIVE),
+                    request.get("client"),
+                    request.get("micro800", False)
+                )
+        except ControllerUnavailable as e:
+            reply = {"error": str(e), "kind": "unavailable", "last_error": e.last_error, "retry_after": e.retry_after}
+        except ControllerBusy as e:
+            reply = {"error": str(e), "kind": "busy", "priority": e.priority, "queued": e.queued, "retry_after": e.retry_after}
+        except asyncio.TimeoutError:
+            reply = {"error": "deadline exceeded", "kind": "timeout"}
+        except Exception as e:
+            logger.error(f"Error reading tags for a worker: {str(e)}")
+            reply = {"error": str(e), "kind": "error"}
+        reply["id"] = request.get("id")
+        if writer.is_closing():
+            return
+        writer.write(orjson.dumps(reply, default=str) + b"\n")
+        try:
+            # replies to a worker that stopped reading would pile up here without bound
+            await asyncio.wait_for(writer.drain(), DRAIN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping worker connection: replies unread for {DRAIN_TIMEOUT_SECONDS:.0f} s")
+            writer.close()
+        except ConnectionError:
+            pass
@@ -0,0 +1,122 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+from datetime import datetime, timezone
+import asyncio
+import logging
+import time
+import numpy as np
+from app.models.history import HistoryMode, HistoryResponse, TagHistory
+from app.routes.plc import historian
+from app.services.downsampling import aggregate_buckets, lttb
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Create router
+router = APIRouter()
+
+# Largest number of points or buckets a single tag may return
+MAX_POINTS_PER_TAG = 10000
+
+def parse_time(value: Optional[str], default: float) -> float:
+    """Parse an ISO-8601 string (UTC if no zone is given) or epoch seconds"""
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def build_history(name: str, timestamps: np.ndarray, values: np.ndarray, start: float, end: float, mode: HistoryMode, max_points: int) -> TagHistory:
+    """Reduce one tag's stored samples according to the requested mode"""
+    raw_points = len(timestamps)
+    
+    if mode == HistoryMode.AGGREGATE:
+        buckets = aggregate_buckets(timestamps, values, start, end, max_points)
+        return TagHistory(
+            name=name,
+            timestamps=buckets["timestamps"].tolist(),
+            min=buckets["min"].tolist(),
+            max=buckets["max"].tolist(),
+            avg=buckets["avg"].tolist(),
+            count=buckets["count"].tolist(),
+            raw_points=raw_points
+        )
+    
+    truncated, next_start = False, None
+    if mode == HistoryMode.LTTB:
+        timestamps, values = lttb(timestamps, values, max_points)
+    elif raw_points > max_points:
+        # raw samples are paged from the start; the next page starts at the first one left out
+        truncated, next_start = True, float(timestamps[max_points])
+        timestamps, values = timestamps[:max_points], values[:max_points]
+    
+    # NaN is not valid JSON, so samples without a numeric value become null
+    return TagHistory(
+        name=name,
+        timestamps=timestamps.tolist(),
+        values=[None if np.isnan(value) else value for value in values.tolist()],
+        raw_points=raw_points,
+        truncated=truncated,
+        next_start=next_start
+    )
+
+@router.get("/history", response_model=HistoryResponse)
+async def get_tag_history(
+    ip: str = Query(..., description="PLC IP address"),
+    tags: List[str] = Query(..., description="Tag names (repeat the parameter for several tags)"),
+    slot: int = Query(0, description="PLC processor slot"),
+    start: Optional[str] = Query(None, description="Range start, ISO-8601 or epoch seconds (default: one hour ago)"),
+    end: Optional[str] = Query(None, description="Range end, ISO-8601 or epoch seconds (default: now)"),
+    mode: HistoryMode = Query(HistoryMode.LTTB, description="raw, aggregate (min/max/avg per bucket) or lttb"),
+    max_points: int = Query(1000, description="Points (raw, lttb) or buckets (aggregate) per tag")
+):
+    """
+    Get recorded tag history for a time range
+    
+    Samples are loaded from the historian and reduced on the server, so long
+    ranges can be charted without sending every stored point to the browser.
+    
+    Raw mode returns at most max_points samples per tag from the start of the
+    range; a tag with more is marked truncated, and its next_start is the
+    start to request for the next page.
+    """
+    try:
+        end_ts = parse_time(end, time.time())
+        start_ts = parse_time(start, end_ts - 3600)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid time range: {str(e)}")
+    
+    if start_ts >= end_ts:
+        raise HTTPException(status_code=400, detail="Range start must be before range end")
+    max_points = min(max(max_points, 3), MAX_POINTS_PER_TAG)
+    
+    try:
+        series = await asyncio.to_thread(historian.query, f"{ip}/{slot}", tags, start_ts, end_ts)
+        
+        history = [
+            build_history(name, *series[name], start_ts, end_ts, mode, max_points)
+            for name in tags if name in series
+        ]
+        
+        return HistoryResponse(
+            success=True,
+            ip=ip,
+            slot=slot,
+            start=start_ts,
+            end=end_ts,
+            mode=mode,
+            tags=history,
+            message=f"Loaded history for {len(history)} of {len(tags)} tags"
+        )
+        
+    except Exception as e:
+        logger.error(f"Error querying tag history: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error querying tag history: {str(e)}"
+        )
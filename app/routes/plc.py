@@ -1,16 +1,42 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Header, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from typing import List, Optional, Any
+import asyncio
+import ipaddress
 import logging
+import orjson
+import os
+import time
 from app.services.pylogix_service import PylogixService
+from app.services.controller_executor import ControllerExecutor, ControllerBusy, WRITE, INTERACTIVE, UPLOAD
+from app.services.controller_health import ControllerUnavailable
+from app.services.scan_engine import ScanEngine
+from app.services.scan_classes import ScanClassRegistry
+from app.services.historian import Historian
+from app.services import compact
+from app.services.last_values import LastValueCache
+from app.services.cached_reader import CachedTagReader
+from app.poller.client import PollerClient
+from app.services.tag_index import TagIndex
 from app.models.tag import (
     PLCConnectionConfig, 
     TagScanResponse, 
-    PLCTag, 
-    TagReadRequest, 
+    PLCTagReadRequest, 
     TagReadResponse,
     Tag,
+    TagSearchResponse,
     TagReadRequest as TagReadRequestNew,
-    TagReadResult
+    TagReadResult,
+    CompactTagReadRequest,
+    TagSubscriptionRequest,
+    ControllerReadRequest,
+    ControllerReadResult,
+    BulkTagReadRequest,
+    BulkTagReadResponse,
+    TagWriteRequest,
+    TagWriteResponse,
+    ScanClassConfig
 )
 
 # Configure logging
@@ -22,18 +48,145 @@ router = APIRouter()
 # Global service instance (in production, consider dependency injection)
 plc_service = PylogixService()
 
+# Blocking PLC I/O runs here, one bounded pool per controller, never on the event loop
+plc_executor = ControllerExecutor()
+
+# Per-controller circuit breakers fed by the pool's connects; probed in the background
+controller_health = plc_service.pool.health
+
+# Records polled and subscribed tag values; started with the app
+historian = Historian()
+
+
+# Last value of every tag read, for max-age reads and delta responses
+last_values = LastValueCache()
+
+# Every live read goes through here: served from cache, coalesced or read.
+# With several API workers, SIGNALTAP_POLLER_ADDRESS points them at one
+# poller process (python -m app.poller) that does the reading for all of them.
+if os.getenv("SIGNALTAP_POLLER_ADDRESS"):
+    tag_reader = PollerClient(os.getenv("SIGNALTAP_POLLER_ADDRESS"), last_values)
+else:
+    tag_reader = CachedTagReader(plc_service, plc_executor, last_values, historian)
+
+# Named scan periods and the rules assigning tags to them
+scan_classes = ScanClassRegistry()
+
+# Shared scan loops feeding subscribed WebSocket clients; behind a poller
+# they are served from the shared table while the poller polls the tags
+scan_engine = ScanEngine(tag_reader, scan_classes, max_age_periods=2 if isinstance(tag_reader, PollerClient) else 0)
+
+# Response header carrying the version token for delta reads
+VERSION_HEADER = "X-Tag-Version"
+
+# Stable tag ids handed out by compact reads
+tag_ids = compact.TagIdRegistry()
+
+# Fastest scan period a subscriber may request
+MIN_SUBSCRIPTION_RATE_MS = 100
+
+# Full tag list uploads legitimately take far longer than a read
+TAG_UPLOAD_DEADLINE_SECONDS = 120
+
+async def run_on_controller(
+    config: PLCConnectionConfig,
+    func,
+    *args,
+    deadline: Optional[float] = None,
+    priority: str = INTERACTIVE,
+    **kwargs
+):
+    """
+    Run a blocking PLC call on the controller's executor
+    
+    Args:
+        config: PLCConnectionConfig identifying the controller
+        func: Blocking callable to run
+        deadline: Seconds before the request gives up (default: config.timeout)
+        priority: Priority class of the call on the controller's queue
+    
+    Raises:
+        ControllerUnavailable: If the controller's circuit breaker is open
+        ControllerBusy: If the controller's queue for the priority class is full
+        asyncio.TimeoutError: If the deadline passes first
+    """
+    key = plc_service.pool.make_key(config)
+    # fail before queueing on the executor if the controller is known to be down
+    controller_health.check(key)
+    return await plc_executor.run(
+        key,
+        func,
+        *args,
+        deadline=deadline or config.timeout,
+        priority=priority,
+        **kwargs
+    )
+
+def to_tag_read_results(results_data: List[dict]) -> List[TagReadResult]:
+    """Convert service read results to TagReadResult models"""
+    results = []
+    for result_data in results_data:
+        value = result_data["value"]
+        # If value is not a valid type, mark as 'Unreadable'
+        # (arrays and UDTs arrive already decoded as lists and dicts)
+        if not isinstance(value, (str, int, float, bool, list, dict)):
+            value = "Unreadable"
+        result = TagReadResult(
+            name=result_data["name"],
+            value=value,
+            status=result_data["status"],
+            timestamp=result_data["timestamp"]
+        )
+        results.append(result)
+    return results
+
+async def probe_controller(key):
+    """Try to reach a controller whose circuit breaker is open, on its executor"""
+    ip, slot, micro800 = key
+    config = PLCConnectionConfig(ip_address=ip, slot=slot, micro800=micro800)
+    await plc_executor.run(key, plc_service.pool.probe, config, deadline=config.timeout)
+
+def plc_error(e: Exception, action: str) -> Exception:
+    """
+    Get the exception an endpoint raises for a failed PLC request
+    
+    Open breakers, full queues and missed deadlines are passed on unchanged
+    to the exception handlers registered in app.main (503, 429 and 504), as
+    are HTTPExceptions the endpoint raised itself. Connection failures
+    become 400 and anything else 500.
+    
+    Args:
+        e: The exception the request failed with
+        action: What the endpoint was doing, e.g. "reading tags"
+    """
+    if isinstance(e, (ControllerUnavailable, ControllerBusy, asyncio.TimeoutError, HTTPException)):
+        return e
+    
+    logger.error(f"Error {action}: {str(e)}")
+    if "Failed to connect" in str(e) or "unreachable" in str(e).lower():
+        return HTTPException(
+            status_code=400,
+            detail=f"PLC connection failed: {str(e)}"
+        )
+    return HTTPException(
+        status_code=500,
+        detail=f"Error {action}: {str(e)}"
+    )
+
 @router.get("/scan", response_model=TagScanResponse)
 async def scan_plc_tags(
     ip_address: str = Query(..., description="PLC IP address"),
     slot: int = Query(0, description="PLC processor slot"),
     timeout: int = Query(10, description="Connection timeout in seconds"),
-    micro800: bool = Query(False, description="Whether this is a Micro800 PLC")
+    micro800: bool = Query(False, description="Whether this is a Micro800 PLC"),
+    refresh: bool = Query(False, description="Upload the tag list again even if the cached copy is current")
 ):
     """
     Scan and retrieve all tags from a PLC
     
     This endpoint connects to the specified PLC and returns all available tags
-    with their names, types, and other metadata.
+    with their names, types, and other metadata. The tag list is served from
+    the tag cache unless the controller reports a change or refresh is set.
     """
     try:
         # Create connection config
@@ -44,18 +197,12 @@ async def scan_plc_tags(
             micro800=micro800
         )
         
-        # Connect to PLC
-        if not plc_service.connect(config):
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to connect to PLC at {ip_address}"
-            )
-        
-        # Get all tags
-        tags = plc_service.get_all_tags()
+        def scan():
+            # Get all tags over a request-scoped session
+            with plc_service.session(config) as session:
+                return session.get_all_tags(refresh=refresh)
         
-        # Disconnect from PLC
-        plc_service.disconnect()
+        tags = await run_on_controller(config, scan, deadline=max(timeout, TAG_UPLOAD_DEADLINE_SECONDS), priority=UPLOAD)
         
         return TagScanResponse(
             success=True,
@@ -65,19 +212,13 @@ async def scan_plc_tags(
         )
         
     except Exception as e:
-        logger.error(f"Error scanning PLC tags: {str(e)}")
-        # Ensure we disconnect on error
-        plc_service.disconnect()
-        
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error scanning PLC tags: {str(e)}"
-        )
+        raise plc_error(e, "scanning PLC tags")
 
 @router.get("/scan-simple", response_model=List[Tag])
 async def scan_plc_tags_simple(
     ip: str = Query(..., description="PLC IP address"),
-    slot: int = Query(0, description="PLC processor slot")
+    slot: int = Query(0, description="PLC processor slot"),
+    refresh: bool = Query(False, description="Upload the tag list again even if the cached copy is current")
 ):
     """
     Scan and retrieve all tags from a PLC (simplified version)
@@ -87,7 +228,16 @@ async def scan_plc_tags_simple(
     """
     try:
         # Get all tags using the simplified service method
-        tags_data = plc_service.get_all_tags_simple(ip, slot)
+        config = PLCConnectionConfig(ip_address=ip, slot=slot)
+        tags_data = await run_on_controller(
+            config,
+            plc_service.get_all_tags_simple,
+            ip,
+            slot,
+            refresh=refresh,
+            deadline=TAG_UPLOAD_DEADLINE_SECONDS,
+            priority=UPLOAD
+        )
         
         # Convert to Tag models
         tags = [Tag(name=tag["name"], type=tag["type"]) for tag in tags_data]
@@ -95,23 +245,113 @@ async def scan_plc_tags_simple(
         return tags
         
     except Exception as e:
-        logger.error(f"Error scanning PLC tags: {str(e)}")
+        raise plc_error(e, "scanning PLC tags")
+
+@router.get("/scan-stream")
+async def scan_plc_tags_stream(
+    ip: str = Query(..., description="PLC IP address"),
+    slot: int = Query(0, description="PLC processor slot"),
+    refresh: bool = Query(False, description="Upload the tag list again even if the cached copy is current")
+):
+    """
+    Stream all tags from a PLC as newline-delimited JSON
+    
+    Each line is a tag ({"name", "type"}, as in /scan-simple), sent as soon
+    as the controller's tag list reply containing it arrives, so clients can
+    render large controllers progressively. The last line is
+    {"done": true, "total": n}, or {"error": "..."} if the scan failed after
+    the response had started.
+    """
+    config = PLCConnectionConfig(ip_address=ip, slot=slot)
+    loop = asyncio.get_running_loop()
+    pages: asyncio.Queue = asyncio.Queue()
+    
+    def on_page(records: List[dict]):
+        # called on the controller's worker thread
+        lines = b"".join(orjson.dumps({"name": record["name"], "type": record["type"]}) + b"\n" for record in records)
+        loop.call_soon_threadsafe(pages.put_nowait, lines)
+    
+    upload = asyncio.ensure_future(run_on_controller(
+        config,
+        plc_service.tag_cache.stream,
+        config,
+        on_page,
+        refresh=refresh,
+        deadline=TAG_UPLOAD_DEADLINE_SECONDS,
+        priority=UPLOAD
+    ))
+    # wakes the reader below once the last page is queued
+    upload.add_done_callback(lambda _: pages.put_nowait(None))
+    
+    def upload_error() -> Optional[BaseException]:
+        # a cancelled future raises CancelledError when asked for its exception
+        if upload.cancelled():
+            return asyncio.CancelledError("the tag upload was cancelled")
+        return upload.exception()
+    
+    # Fail with a proper status if nothing arrives before the scan fails
+    first_page = await pages.get()
+    if first_page is None and upload_error() is not None:
+        raise plc_error(upload_error(), "scanning PLC tags")
+    
+    async def lines():
+        page = first_page
+        while page is not None:
+            yield page
+            page = await pages.get()
+        
+        e = upload_error()
+        if e is None:
+            yield orjson.dumps({"done": True, "total": len(upload.result().tags)}) + b"\n"
+        elif isinstance(e, asyncio.TimeoutError):
+            yield orjson.dumps({"error": f"PLC at {ip} did not respond before the request deadline"}) + b"\n"
+        else:
+            logger.error(f"Error streaming PLC tags: {str(e)}")
+            yield orjson.dumps({"error": f"Error scanning PLC tags: {str(e)}"}) + b"\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.get("/tags/search", response_model=TagSearchResponse)
+async def search_tags(
+    ip: str = Query(..., description="PLC IP address"),
+    slot: int = Query(0, description="PLC processor slot"),
+    q: Optional[str] = Query(None, description="Case-insensitive substring of the tag name"),
+    prefix: Optional[str] = Query(None, description="Case-insensitive start of the tag name"),
+    type: Optional[List[str]] = Query(None, description="Data types to include, e.g. DINT (repeatable)"),
+    parent: Optional[str] = Query(None, description="Only direct children of this program or tag; empty for top level"),
+    members: bool = Query(True, description="Include UDT members in the results"),
+    offset: int = Query(0, ge=0, description="Number of matches to skip"),
+    limit: int = Query(100, ge=1, le=5000, description="Maximum number of matches to return")
+):
+    """
+    Search a controller's tags one page at a time
+    
+    Queries an index built over the cached tag database, including programs
+    and UDT members, so clients can browse and filter large controllers
+    without downloading the whole tag list.
+    """
+    try:
+        config = PLCConnectionConfig(ip_address=ip, slot=slot)
+        database = await run_on_controller(
+            config,
+            plc_service.tag_cache.get,
+            config,
+            deadline=TAG_UPLOAD_DEADLINE_SECONDS,
+            priority=UPLOAD
+        )
         
-        # Return HTTP 400 for connection failures
-        if "Failed to connect" in str(e) or "unreachable" in str(e).lower():
-            raise HTTPException(
-                status_code=400,
-                detail=f"PLC connection failed: {str(e)}"
-            )
+        def search():
+            index = TagIndex.for_database(database)
+            return index.search(q, prefix, type, parent, members, offset, limit)
         
-        # Return HTTP 500 for other errors
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error scanning PLC tags: {str(e)}"
-        )
+        # Building the index for a fresh upload takes a moment on large controllers
+        return await asyncio.to_thread(search)
+        
+    except Exception as e:
+        raise plc_error(e, "searching PLC tags")
 
 @router.post("/read", response_model=TagReadResponse)
-async def read_plc_tags(request: TagReadRequest):
+async def read_plc_tags(request: PLCTagReadRequest):
     """
     Read specific tags from a PLC
     
@@ -126,18 +366,12 @@ async def read_plc_tags(request: TagReadRequest):
             timeout=request.timeout
         )
         
-        # Connect to PLC
-        if not plc_service.connect(config):
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to connect to PLC at {request.ip_address}"
-            )
+        def read():
+            # Read tags over a request-scoped session
+            with plc_service.session(config) as session:
+                return session.read_tags(request.tags)
         
-        # Read tags
-        values = plc_service.read_tags(request.tags)
-        
-        # Disconnect from PLC
-        plc_service.disconnect()
+        values = await run_on_controller(config, read)
         
         return TagReadResponse(
             success=True,
@@ -146,59 +380,157 @@ async def read_plc_tags(request: TagReadRequest):
         )
         
     except Exception as e:
-        logger.error(f"Error reading PLC tags: {str(e)}")
-        # Ensure we disconnect on error
-        plc_service.disconnect()
-        
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error reading PLC tags: {str(e)}"
-        )
+        raise plc_error(e, "reading PLC tags")
 
 @router.post("/read-tags", response_model=List[TagReadResult])
-async def read_tags_live(request: TagReadRequestNew):
+async def read_tags_live(request: TagReadRequestNew, response: Response):
     """
     Read live values for a list of selected PLC tags
     
     This endpoint connects to the specified PLC and reads the current values
     of the requested tags, returning them with timestamps and status information.
+    
+    Set ``max_age_ms`` to accept values another reader fetched within that
+    window instead of reading the PLC again; reads of the same tags that are
+    already in flight are shared either way.
+    
+    Every response carries a version token in the X-Tag-Version header. Send
+    it back as ``since`` with the same tag list to receive only the tags
+    whose value or status changed in between.
     """
     try:
         # Read tags using the service method
-        results_data = plc_service.read_tags(request.ip, request.tags, request.slot)
+        config = PLCConnectionConfig(ip_address=request.ip, slot=request.slot or 0, timeout=request.timeout or 10, micro800=bool(request.micro800))
+        columns = await tag_reader.read(
+            request.ip,
+            request.tags,
+            config.slot,
+            timeout=config.timeout,
+            max_age_ms=request.max_age_ms or 0,
+            micro800=config.micro800
+        )
+        controller = f"{request.ip}/{config.slot}"
         
-        # Convert to TagReadResult models
-        results = []
-        for result_data in results_data:
-            value = result_data["value"]
-            # If value is not a valid type, mark as 'Unreadable'
-            if not isinstance(value, (str, int, float, bool)):
-                value = "Unreadable"
-            result = TagReadResult(
-                name=result_data["name"],
-                value=value,
-                status=result_data["status"],
-                timestamp=result_data["timestamp"]
-            )
-            results.append(result)
+        # the version the returned values are current with, not whatever it is by now
+        response.headers[VERSION_HEADER] = last_values.token(request.tags, columns.version)
+        changed = last_values.changed_since(controller, request.tags, request.since)
+        results_data = list(columns) if changed is None else [
+            result for result, keep in zip(columns, changed) if keep
+        ]
         
-        return results
+        # Convert to TagReadResult models
+        return to_tag_read_results(results_data)
         
     except Exception as e:
-        logger.error(f"Error reading tags: {str(e)}")
+        raise plc_error(e, "reading tags")
+
+@router.post("/read-tags/compact")
+async def read_tags_compact(request: CompactTagReadRequest, accept: str = Header(default="")):
+    """
+    Read live values as one columnar, pre-serialized payload
+    
+    Built for large polls: values and status codes (0 = Success, 1 = Error)
+    come back as parallel arrays with a single timestamp, encoded with
+    orjson, or msgpack when the Accept header asks for it. Tags requested by
+    name are assigned stable ids (returned in ``names``) which later
+    requests can send instead of the names. Passing the previous response's
+    ``version`` as ``since`` returns only the tags that changed.
+    """
+    controller = f"{request.ip}/{request.slot or 0}"
+    try:
+        names, ids, issued = tag_ids.resolve(controller, request.tags)
+    except compact.UnknownTagIdError as e:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Unknown tag ids {e.tag_ids} for {controller}, request these tags by name"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        config = PLCConnectionConfig(ip_address=request.ip, slot=request.slot or 0, timeout=request.timeout or 10, micro800=bool(request.micro800))
+        columns = await tag_reader.read(
+            request.ip,
+            names,
+            config.slot,
+            timeout=config.timeout,
+            max_age_ms=request.max_age_ms or 0,
+            micro800=config.micro800
+        )
         
-        # Return HTTP 400 for connection failures
-        if "Failed to connect" in str(e) or "unreachable" in str(e).lower():
-            raise HTTPException(
-                status_code=400,
-                detail=f"PLC connection failed: {str(e)}"
-            )
+        changed = last_values.changed_since(controller, names, request.since)
+        payload = compact.compact_payload(controller, columns, ids, issued, changed)
+        payload["version"] = last_values.token(names, columns.version)
         
-        # Return HTTP 500 for other errors
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error reading tags: {str(e)}"
+        body, media_type = compact.encode(payload, accept)
+        return Response(content=body, media_type=media_type)
+        
+    except Exception as e:
+        raise plc_error(e, "reading tags")
+
+@router.post("/read-tags/bulk", response_model=BulkTagReadResponse)
+async def read_tags_bulk(request: BulkTagReadRequest):
+    """
+    Read live values from many PLCs at once
+    
+    Every controller in the request is read concurrently on its own executor,
+    with at most max_concurrency_per_segment controllers in flight per /24
+    network segment. Each controller reports its own status and latency, so
+    one unreachable PLC does not fail the rest, and the whole request takes
+    roughly as long as the slowest controller.
+    """
+    started = time.perf_counter()
+    segments = {}
+    
+    def segment_of(ip: str) -> str:
+        try:
+            return str(ipaddress.ip_network(f"{ip}/24", strict=False))
+        except ValueError:
+            return ip
+    
+    for controller in request.controllers:
+        segment = segment_of(controller.ip)
+        if segment not in segments:
+            segments[segment] = asyncio.Semaphore(max(request.max_concurrency_per_segment, 1))
+    
+    async def read_controller(controller: ControllerReadRequest) -> ControllerReadResult:
+        config = PLCConnectionConfig(ip_address=controller.ip, slot=controller.slot or 0, timeout=controller.timeout or 10, micro800=bool(controller.micro800))
+        async with segments[segment_of(controller.ip)]:
+            controller_started = time.perf_counter()
+            try:
+                results_data = list(await tag_reader.read(
+                    controller.ip,
+                    controller.tags,
+                    config.slot,
+                    timeout=config.timeout,
+                    max_age_ms=controller.max_age_ms or 0,
+                    micro800=config.micro800
+                ))
+                error = None
+            except asyncio.TimeoutError:
+                results_data, error = [], f"PLC at {controller.ip} did not respond before the request deadline"
+            except Exception as e:
+                results_data, error = [], str(e)
+            latency_ms = (time.perf_counter() - controller_started) * 1000
+        
+        if error:
+            logger.error(f"Bulk read from PLC at {controller.ip} failed: {error}")
+        return ControllerReadResult(
+            ip=controller.ip,
+            slot=config.slot,
+            success=error is None,
+            latency_ms=round(latency_ms, 3),
+            results=to_tag_read_results(results_data),
+            error=error
         )
+    
+    results = await asyncio.gather(*(read_controller(controller) for controller in request.controllers))
+    
+    return BulkTagReadResponse(
+        success=all(result.success for result in results),
+        results=results,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 3)
+    )
 
 @router.post("/write/{tag_name}")
 async def write_plc_tag(
@@ -206,7 +538,8 @@ async def write_plc_tag(
     value: Any,
     ip_address: str = Query(..., description="PLC IP address"),
     slot: int = Query(0, description="PLC processor slot"),
-    timeout: int = Query(10, description="Connection timeout in seconds")
+    timeout: int = Query(10, description="Connection timeout in seconds"),
+    micro800: bool = Query(False, description="Whether this is a Micro800 PLC")
 ):
     """
     Write a value to a specific tag in the PLC
@@ -219,21 +552,17 @@ async def write_plc_tag(
         config = PLCConnectionConfig(
             ip_address=ip_address,
             slot=slot,
-            timeout=timeout
+            timeout=timeout,
+            micro800=micro800
         )
         
-        # Connect to PLC
-        if not plc_service.connect(config):
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to connect to PLC at {ip_address}"
-            )
+        def write():
+            # Write to tag over a request-scoped session
+            with plc_service.session(config) as session:
+                return session.write_tag(tag_name, value)
         
-        # Write to tag
-        success = plc_service.write_tag(tag_name, value)
-        
-        # Disconnect from PLC
-        plc_service.disconnect()
+        success = await run_on_controller(config, write, priority=WRITE)
+        await tag_reader.expire(ip_address, [tag_name], slot)
         
         if success:
             return {
@@ -247,14 +576,47 @@ async def write_plc_tag(
             )
         
     except Exception as e:
-        logger.error(f"Error writing to PLC tag: {str(e)}")
-        # Ensure we disconnect on error
-        plc_service.disconnect()
+        raise plc_error(e, "writing to PLC tag")
+
+@router.post("/write-tags", response_model=TagWriteResponse)
+async def write_plc_tags(request: TagWriteRequest):
+    """
+    Write many tags to a PLC in one request
+    
+    Values are checked against the controller's tag database first and
+    nothing is written if any of them is invalid. Scalar writes are packed
+    into Multiple Service Packets; set verify to read the tags back, and
+    rollback_on_error to restore the previous values if any write fails.
+    Each tag's outcome is reported in the results.
+    """
+    try:
+        started = time.perf_counter()
+        config = PLCConnectionConfig(ip_address=request.ip, slot=request.slot or 0, timeout=request.timeout or 10, micro800=bool(request.micro800))
+        results = await run_on_controller(
+            config,
+            plc_service.write_tags,
+            request.ip,
+            [(item.tag, item.value) for item in request.writes],
+            config.slot,
+            config.timeout,
+            micro800=config.micro800,
+            verify=request.verify,
+            rollback_on_error=request.rollback_on_error,
+            # the first write to a controller may have to upload its tag database
+            deadline=TAG_UPLOAD_DEADLINE_SECONDS,
+            priority=WRITE
+        )
+        # readers must not be served the values from before the write
+        await tag_reader.expire(request.ip, [result["name"] for result in results], config.slot)
         
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error writing to PLC tag: {str(e)}"
+        return TagWriteResponse(
+            success=all(result["status"] == "Success" for result in results),
+            results=results,
+            elapsed_ms=(time.perf_counter() - started) * 1000
         )
+        
+    except Exception as e:
+        raise plc_error(e, "writing PLC tags")
 
 @router.get("/info")
 async def get_plc_info(
@@ -276,18 +638,12 @@ async def get_plc_info(
             timeout=timeout
         )
         
-        # Connect to PLC
-        if not plc_service.connect(config):
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to connect to PLC at {ip_address}"
-            )
-        
-        # Get PLC info
-        info = plc_service.get_plc_info()
+        def get_info():
+            # Get PLC info over a request-scoped session
+            with plc_service.session(config) as session:
+                return session.get_plc_info()
         
-        # Disconnect from PLC
-        plc_service.disconnect()
+        info = await run_on_controller(config, get_info)
         
         return {
             "success": True,
@@ -295,14 +651,7 @@ async def get_plc_info(
         }
         
     except Exception as e:
-        logger.error(f"Error getting PLC info: {str(e)}")
-        # Ensure we disconnect on error
-        plc_service.disconnect()
-        
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error getting PLC info: {str(e)}"
-        )
+        raise plc_error(e, "getting PLC info")
 
 @router.get("/test-connection")
 async def test_plc_connection(
@@ -325,15 +674,13 @@ async def test_plc_connection(
         )
         
         # Test connection
-        success = plc_service.connect(config)
-        
-        # Disconnect from PLC
-        plc_service.disconnect()
+        success = await run_on_controller(config, plc_service.test_connection, config)
         
         if success:
             return {
                 "success": True,
-                "message": f"Successfully connected to PLC at {ip_address}"
+                "message": f"Successfully connected to PLC at {ip_address}",
+                "connection_size": plc_service.pool.negotiated_size(config)
             }
         else:
             raise HTTPException(
@@ -342,11 +689,127 @@ async def test_plc_connection(
             )
         
     except Exception as e:
-        logger.error(f"Error testing PLC connection: {str(e)}")
-        # Ensure we disconnect on error
-        plc_service.disconnect()
-        
+        raise plc_error(e, "testing PLC connection")
+
+@router.get("/scan-classes", response_model=ScanClassConfig)
+async def get_scan_classes():
+    """Get the scan classes and the rules assigning tags to them"""
+    return scan_classes.to_dict()
+
+@router.put("/scan-classes", response_model=ScanClassConfig)
+async def update_scan_classes(config: ScanClassConfig):
+    """
+    Replace the scan classes and tag assignment rules
+    
+    Active scan class subscriptions are re-split right away.
+    """
+    too_fast = [name for name, period_ms in config.classes.items() if period_ms < MIN_SUBSCRIPTION_RATE_MS]
+    if too_fast:
         raise HTTPException(
-            status_code=500,
-            detail=f"Error testing PLC connection: {str(e)}"
-        ) 
\ No newline at end of file
+            status_code=400,
+            detail=f"Scan classes {too_fast} are faster than the {MIN_SUBSCRIPTION_RATE_MS} ms minimum"
+        )
+    try:
+        scan_classes.configure(
+            config.classes,
+            [assignment.model_dump() for assignment in config.assignments],
+            config.default_class
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    await scan_engine.reassign()
+    return scan_classes.to_dict()
+
+@router.get("/scan-groups")
+async def get_scan_groups():
+    """
+    Describe the active scan loops
+    
+    Reports each loop's configured rate, the rate it backed off to after
+    overruns and the rate it actually achieved.
+    """
+    return scan_engine.stats()
+
+@router.get("/controllers/health")
+async def get_controller_health():
+    """
+    Describe the circuit breaker of every controller contacted so far
+    
+    A controller whose state is "open" or "probing" is failing requests fast
+    (503 with Retry-After) until a background probe reaches it again.
+    """
+    return controller_health.stats()
+
+@router.get("/controllers/load")
+async def get_controller_load():
+    """
+    Describe the request queue of every controller contacted so far
+    
+    Shows the calls running and waiting per priority class (write,
+    interactive, scan, upload) and how many were turned away with 429
+    because their class's queue was full.
+    """
+    return plc_executor.stats()
+
+@router.websocket("/ws/tags")
+async def stream_tag_values(websocket: WebSocket):
+    """
+    Push live tag value changes over a WebSocket
+    
+    The client sends a subscription message with ip, slot, tags, rate_ms and
+    deadband, and receives an "update" message with every tag on the first
+    scan and afterwards only the tags whose value or status changed. Without
+    rate_ms each tag is scanned at the period of its scan class. Sending
+    another subscription message replaces the current one.
+    """
+    await websocket.accept()
+    subscription = None
+    forwarder = None
+    
+    async def forward_updates(queue: asyncio.Queue):
+        while True:
+            await websocket.send_json(await queue.get())
+    
+    try:
+        while True:
+            message = await websocket.receive_json()
+            try:
+                request = TagSubscriptionRequest(**message)
+            except ValidationError as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+                continue
+            
+            # Replace any previous subscription on this socket
+            if forwarder:
+                forwarder.cancel()
+            if subscription:
+                await scan_engine.unsubscribe(subscription)
+            
+            subscription = await scan_engine.subscribe(
+                request.ip,
+                request.tags,
+                slot=request.slot or 0,
+                rate_ms=max(request.rate_ms, MIN_SUBSCRIPTION_RATE_MS) if request.rate_ms else None,
+                deadband=request.deadband
+            )
+            await websocket.send_json({
+                "type": "subscribed",
+                "subscription_id": subscription.id,
+                "rate_ms": subscription.rate_ms,
+                "tags": len(subscription.tags),
+                "scan_classes": {
+                    scan_class: len(tags) for scan_class, tags in subscription.scan_classes.items()
+                }
+            })
+            forwarder = asyncio.create_task(forward_updates(subscription.queue))
+    
+    except WebSocketDisconnect:
+        logger.info("Tag stream client disconnected")
+    except Exception as e:
+        logger.error(f"Error streaming tag values: {str(e)}")
+    finally:
+        if forwarder:
+            forwarder.cancel()
+        if subscription:
+            await scan_engine.unsubscribe(subscription)
\ No newline at end of file
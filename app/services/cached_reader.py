@@ -0,0 +1,161 @@
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+from datetime import datetime
+from app.models.tag import PLCConnectionConfig
+from app.services.pylogix_service import PylogixService, TagReadColumns
+from app.services.controller_executor import ControllerExecutor, INTERACTIVE
+from app.services.historian import Historian
+from app.services.last_values import LastValueCache
+from app.services import metrics
+
+class CachedTagReader:
+    """
+    Shared read path for every caller that wants live tag values
+
+    Reads are served from the last-value cache when the caller accepts values
+    up to ``max_age_ms`` old, and coalesced otherwise: a tag that is already
+    being read for another caller is not requested again, the caller waits
+    for that read instead. Only the remaining tags go to the controller, in
+    one batched read on its executor. Every read refreshes the cache and is
+    recorded in the historian.
+    """
+
+    def __init__(
+        self,
+        service: PylogixService,
+        executor: ControllerExecutor,
+        cache: Optional[LastValueCache] = None,
+        historian: Optional[Historian] = None
+    ):
+        self.service = service
+        self.executor = executor
+        self.cache = cache or LastValueCache()
+        self.historian = historian
+        self._inflight: Dict[str, Dict[str, asyncio.Future]] = {}
+
+    async def read(
+        self,
+        ip: str,
+        tags: List[str],
+        slot: int = 0,
+        timeout: int = 10,
+        max_age_ms: int = 0,
+        priority: str = INTERACTIVE,
+        client: Optional[str] = None,
+        micro800: bool = False
+    ) -> TagReadColumns:
+        """
+        Read tags, reusing cached and in-flight reads where allowed
+
+        Args:
+            ip: PLC IP address
+            tags: List of tag names to read
+            slot: PLC processor slot (default: 0)
+            timeout: Socket timeout and deadline in seconds (default: 10)
+            max_age_ms: Oldest cached value the caller accepts (0 always reads)
+            priority: Priority class of the controller read
+            client: Client the read is queued for (default: the current request's)
+            micro800: Whether the PLC is a Micro800
+
+        Returns:
+            TagReadColumns: Results in request order, with per-tag timestamps
+            when some of them came from the cache, and the last-value version
+            they are current with
+
+        Raises:
+            ControllerUnavailable: If the controller's circuit breaker is open
+            ControllerBusy: If the controller's queue for the priority class is full
+            asyncio.TimeoutError: If the controller read passes its deadline
+        """
+        controller = metrics.controller_label(ip, slot)
+        inflight = self._inflight.setdefault(controller, {})
+        max_age = max_age_ms / 1000.0
+
+        found: Dict[str, Tuple[Any, str, str]] = {}
+        waiting: Dict[asyncio.Future, List[str]] = {}
+        misses = []
+        for tag_name in dict.fromkeys(tags):
+            cached = self.cache.lookup(controller, tag_name, max_age) if max_age_ms > 0 else None
+            if cached is not None:
+                found[tag_name] = cached
+            elif tag_name in inflight:
+                waiting.setdefault(inflight[tag_name], []).append(tag_name)
+            else:
+                misses.append(tag_name)
+
+        metrics.TAG_CACHE_LOOKUPS.labels(controller, "hit").inc(len(found))
+        metrics.TAG_CACHE_LOOKUPS.labels(controller, "coalesced").inc(sum(len(names) for names in waiting.values()))
+        metrics.TAG_CACHE_LOOKUPS.labels(controller, "miss").inc(len(misses))
+
+        if misses:
+            # a controller known to be down fails here instead of queueing on its executor
+            key = self.service.pool.make_key(PLCConnectionConfig(ip_address=ip, slot=slot, timeout=timeout, micro800=micro800))
+            self.service.pool.health.check(key)
+            future = asyncio.get_running_loop().create_future()
+            for tag_name in misses:
+                inflight[tag_name] = future
+            try:
+                columns = await self.executor.run(
+                    key,
+                    self.service.read_tag_columns,
+                    ip,
+                    misses,
+                    slot,
+                    timeout=timeout,
+                    micro800=micro800,
+                    deadline=timeout,
+                    priority=priority,
+                    client=client
+                )
+                self.cache.update(controller, columns)
+                if self.historian:
+                    self.historian.record(controller, columns)
+                future.set_result(columns)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                # raised below when the future is awaited, for us and any waiters
+                future.set_exception(e)
+            finally:
+                for tag_name in misses:
+                    if inflight.get(tag_name) is future:
+                        del inflight[tag_name]
+            waiting[future] = misses
+
+        for future, names in waiting.items():
+            try:
+                # shielded so a waiter giving up does not cancel the read for everyone else
+                columns = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # the caller that owned the read went away before it finished
+                columns = await self.read(ip, names, slot, timeout, priority=priority, client=client, micro800=micro800)
+            positions = {name: index for index, name in enumerate(columns.names)}
+            timestamps = columns.timestamps or [columns.timestamp] * len(columns)
+            for name in names:
+                index = positions[name]
+                found[name] = (columns.values[index], columns.statuses[index], timestamps[index])
+
+        columns = assemble_columns(tags, found)
+        # taken with the results, before anything else can update the cache
+        columns.version = self.cache.version_of(controller, columns)
+        return columns
+
+    async def expire(self, ip: str, tags: List[str], slot: int = 0):
+        """Stop serving cached values for tags, e.g. after writing them"""
+        self.cache.expire(metrics.controller_label(ip, slot), tags)
+
+def assemble_columns(tags: List[str], found: Dict[str, Tuple[Any, str, str]]) -> TagReadColumns:
+    """Build read results in request order from each tag's value, status and timestamp"""
+    rows = [found[tag_name] for tag_name in tags]
+    timestamps = [timestamp for _, _, timestamp in rows]
+    oldest = min(timestamps) if timestamps else datetime.utcnow().isoformat()
+    return TagReadColumns(
+        list(tags),
+        [value for value, _, _ in rows],
+        [status for _, status, _ in rows],
+        oldest,
+        None if all(timestamp == oldest for timestamp in timestamps) else timestamps
+    )
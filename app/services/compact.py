@@ -0,0 +1,172 @@
+from typing import Any, Dict, List, Optional, Tuple, Union
+from collections import OrderedDict
+import orjson
+import msgpack
+from app.services.pylogix_service import TagReadColumns
+
+# Status column codes in compact responses
+STATUS_CODES = {"Success": 0, "Error": 1}
+
+# Value types that serialize as-is; anything else is reported as "Unreadable"
+SERIALIZABLE_TYPES = (str, int, float, bool, list, dict, type(None))
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+class UnknownTagIdError(KeyError):
+    """Raised when a client refers to tag ids this server never handed out"""
+
+    def __init__(self, tag_ids: List[int]):
+        super().__init__(tag_ids)
+        self.tag_ids = tag_ids
+
+class TagIdRegistry:
+    """
+    Stable small integer ids for tag names, per controller
+
+    The first compact read of a tag returns its id alongside the name; after
+    that clients request and receive only ids, which keeps names out of every
+    poll. Each controller keeps the ``max_tags_per_controller`` most recently
+    requested tags and the registry the ``max_controllers`` most recently
+    polled controllers, so clients cannot grow it without limit. Ids are not
+    reused while the process runs. A client that sends an id the registry does
+    not know (e.g. after a restart or an eviction) gets an
+    ``UnknownTagIdError`` and should resend names.
+    """
+
+    def __init__(self, max_tags_per_controller: int = 10000, max_controllers: int = 256):
+        self.max_tags_per_controller = max_tags_per_controller
+        self.max_controllers = max_controllers
+        self._ids: "OrderedDict[str, OrderedDict[str, int]]" = OrderedDict()
+        self._names: Dict[str, Dict[int, str]] = {}
+        # shared by all controllers and never reset, so a stale id never names another tag
+        self._next_id = 0
+
+    def resolve(self, controller: str, tags: List[Union[str, int]]) -> Tuple[List[str], List[int], Dict[int, str]]:
+        """
+        Map a mix of tag names and ids to names and ids
+
+        Args:
+            controller: Controller identity, e.g. "192.168.1.10/0"
+            tags: Tag names or previously issued ids
+
+        Returns:
+            Tuple[List[str], List[int], Dict[int, str]]: Names and ids in
+            request order, plus the id of every tag requested by name
+
+        Raises:
+            UnknownTagIdError: If any id was not issued for this controller,
+                or has been evicted since
+            ValueError: If the request names more tags than a controller keeps
+        """
+        if len(set(tags)) > self.max_tags_per_controller:
+            raise ValueError(f"At most {self.max_tags_per_controller} tags can be read in one compact request")
+
+        ids = self._controller(controller)
+        names = self._names[controller]
+
+        resolved_names, resolved_ids, issued = [], [], {}
+        unknown = []
+        for tag in tags:
+            if isinstance(tag, int):
+                name = names.get(tag)
+                if name is None:
+                    unknown.append(tag)
+                    continue
+                ids.move_to_end(name)
+                resolved_names.append(name)
+                resolved_ids.append(tag)
+                continue
+
+            tag_id = ids.get(tag)
+            if tag_id is None:
+                tag_id = ids[tag] = self._next_id
+                self._next_id += 1
+                names[tag_id] = tag
+            else:
+                ids.move_to_end(tag)
+            resolved_names.append(tag)
+            resolved_ids.append(tag_id)
+            issued[tag_id] = tag
+
+        while len(ids) > self.max_tags_per_controller:
+            _, evicted_id = ids.popitem(last=False)
+            del names[evicted_id]
+
+        if unknown:
+            raise UnknownTagIdError(unknown)
+        return resolved_names, resolved_ids, issued
+
+    def _controller(self, controller: str) -> "OrderedDict[str, int]":
+        """Name to id map of one controller, evicting the least recently polled controller when full"""
+        ids = self._ids.get(controller)
+        if ids is not None:
+            self._ids.move_to_end(controller)
+            return ids
+
+        ids = self._ids[controller] = OrderedDict()
+        self._names[controller] = {}
+        if len(self._ids) > self.max_controllers:
+            evicted, _ = self._ids.popitem(last=False)
+            del self._names[evicted]
+        return ids
+
+def compact_payload(
+    controller: str,
+    columns: TagReadColumns,
+    ids: List[int],
+    issued: Dict[int, str],
+    changed: Optional[List[bool]] = None
+) -> Dict[str, Any]:
+    """
+    Build the columnar body of a compact read response
+
+    Args:
+        controller: Controller identity, e.g. "192.168.1.10/0"
+        columns: Read results
+        ids: Tag id for each result, in order
+        issued: Names for ids the client asked for by name
+        changed: Which results to include, for delta responses (default: all)
+
+    Returns:
+        Dict[str, Any]: Body with one timestamp (the oldest) and parallel id,
+        value and status columns, plus per-tag timestamps when they differ
+    """
+    values, statuses, timestamps = columns.values, columns.statuses, columns.timestamps
+    if changed is not None:
+        ids = [tag_id for tag_id, keep in zip(ids, changed) if keep]
+        values = [value for value, keep in zip(values, changed) if keep]
+        statuses = [status for status, keep in zip(statuses, changed) if keep]
+        if timestamps:
+            timestamps = [timestamp for timestamp, keep in zip(timestamps, changed) if keep]
+
+    payload = {
+        "controller": controller,
+        "timestamp": columns.timestamp,
+        "delta": changed is not None,
+        "ids": ids,
+        "names": {str(tag_id): name for tag_id, name in issued.items()},
+        "values": [
+            value if isinstance(value, SERIALIZABLE_TYPES) else "Unreadable"
+            for value in values
+        ],
+        "status": [STATUS_CODES.get(status, 1) for status in statuses]
+    }
+    if timestamps:
+        # some values came from the cache, so they were read at different times
+        payload["timestamps"] = timestamps
+    return payload
+
+def encode(payload: Dict[str, Any], accept: str = "") -> Tuple[bytes, str]:
+    """
+    Serialize a compact payload as msgpack if the client accepts it, JSON otherwise
+
+    Args:
+        payload: Response body
+        accept: The request's Accept header
+
+    Returns:
+        Tuple[bytes, str]: Encoded body and its media type
+    """
+    if any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES):
+        return msgpack.packb(payload, use_bin_type=True), "application/msgpack"
+    return orjson.dumps(payload), "application/json"
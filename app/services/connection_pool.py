@@ -0,0 +1,372 @@
+from pylogix import PLC
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+from contextlib import contextmanager
+import logging
+import os
+import threading
+import time
+from app.models.tag import PLCConnectionConfig
+from app.services.controller_health import ControllerHealth
+from app.services import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# pylogix reports transport problems through these status strings rather than
+# raising, so they are the signal that a pooled session has gone stale
+CONNECTION_ERROR_STATUSES = {
+    "Connection failure",
+    "Connection lost",
+    "Register session failed",
+    "Forward open failed",
+}
+
+# CIP connection sizes in bytes: the Large Forward Open most current Logix
+# controllers accept, and the classic Forward Open every controller accepts
+LARGE_CONNECTION_SIZE = 4002
+STANDARD_CONNECTION_SIZE = 504
+
+ConnectionKey = Tuple[str, int, bool]
+
+class PooledConnection:
+    """A long-lived pylogix session to a single controller"""
+
+    def __init__(self, key: ConnectionKey, plc: PLC):
+        self.key = key
+        self.plc = plc
+        self.lock = threading.RLock()
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.last_checked = self.created_at
+        self.use_count = 0
+
+    @property
+    def socket_connected(self) -> bool:
+        """Whether pylogix still holds an open, registered socket"""
+        return bool(getattr(self.plc.conn, "SocketConnected", False))
+
+class PLCConnectionPool:
+    """
+    Pool of registered CIP sessions keyed by (ip, slot, micro800)
+
+    pylogix keeps its socket, session registration and Forward Open alive until
+    ``Close()`` is called, so holding on to the ``PLC`` object between requests
+    means steady-state reads only pay for the read itself. Sessions that sat
+    idle longer than ``health_check_interval`` are probed with a cheap clock
+    read before reuse, sessions idle longer than ``idle_timeout`` are closed,
+    and operations that fail with a transport error are retried once on a
+    fresh session.
+
+    Connect outcomes feed the per-controller circuit breakers in ``health``:
+    once a controller's breaker is open, ``acquire`` fails at once with
+    ``ControllerUnavailable`` rather than waiting out another connect timeout,
+    and only ``probe`` tries to reach it.
+
+    Each session is a connected (class 3) one. The first open negotiates the
+    connection size: pylogix tries a Large Forward Open and falls back to a
+    standard one if the controller refuses it. The size that worked is
+    remembered per controller so reconnects go straight to it, and Micro800
+    controllers start at the standard size. pylogix packs multi-tag reads and
+    writes and fragments large replies to this size, so a large connection
+    carries several times more tag data per round trip.
+    """
+
+    def __init__(
+        self,
+        idle_timeout: float = 300.0,
+        health_check_interval: float = 30.0,
+        plc_factory: Callable[[], PLC] = PLC,
+        connection_size: Optional[int] = None,
+        health: Optional[ControllerHealth] = None
+    ):
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.plc_factory = plc_factory
+        # a fixed connection size for every controller instead of negotiating one
+        self.connection_size = connection_size or int(os.getenv("SIGNALTAP_CONNECTION_SIZE", "0")) or None
+        self.health = health or ControllerHealth()
+        self._connections: Dict[ConnectionKey, PooledConnection] = {}
+        self._connection_sizes: Dict[ConnectionKey, int] = {}
+        self._lock = threading.Lock()
+        # separate from _lock, which is held while new sessions are created
+        self._sizes_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(config: PLCConnectionConfig) -> ConnectionKey:
+        """Build the pool key for a connection config"""
+        return (config.ip_address, config.slot, config.micro800)
+
+    def acquire(self, config: PLCConnectionConfig, probe: bool = False) -> PooledConnection:
+        """
+        Get a healthy pooled connection for the given controller
+
+        Args:
+            config: PLCConnectionConfig object with connection details
+            probe: Try the controller even if its circuit breaker is open
+
+        Returns:
+            PooledConnection: Open session for the controller
+
+        Raises:
+            ControllerUnavailable: If the controller's circuit breaker is open
+            Exception: If the controller cannot be reached
+        """
+        self.evict_idle()
+        key = self.make_key(config)
+        if not probe:
+            self.health.check(key)
+
+        with self._lock:
+            connection = self._connections.get(key)
+            if connection is None:
+                connection = PooledConnection(key, self._create_plc(config))
+                self._connections[key] = connection
+            # not idle any more, so evict_idle leaves it alone until it is locked below
+            connection.last_used = time.monotonic()
+
+        with connection.lock:
+            connection.plc.SocketTimeout = config.timeout
+            if self._ensure_healthy(connection):
+                outcome = "reused"
+            else:
+                outcome = "opened" if connection.use_count == 0 else "reconnected"
+                self._reopen(connection, config)
+            metrics.POOL_ACQUISITIONS.labels(metrics.key_label(key), outcome).inc()
+
+            connection.last_used = time.monotonic()
+            connection.use_count += 1
+
+        return connection
+
+    @contextmanager
+    def session(self, config: PLCConnectionConfig):
+        """
+        Context manager yielding an exclusive pooled connection
+
+        Args:
+            config: PLCConnectionConfig object with connection details
+        """
+        connection = self.acquire(config)
+        with connection.lock:
+            try:
+                yield connection
+            finally:
+                connection.last_used = time.monotonic()
+
+    def run(self, config: PLCConnectionConfig, operation: Callable[[PLC], T]) -> T:
+        """
+        Run an operation against a pooled PLC, reconnecting once on transport errors
+
+        Args:
+            config: PLCConnectionConfig object with connection details
+            operation: Callable receiving the pylogix PLC object
+
+        Returns:
+            The operation's result
+        """
+        with self.session(config) as connection:
+            try:
+                result = operation(connection.plc)
+                if not self.is_connection_error(result):
+                    return result
+                logger.warning(f"Lost session to PLC at {config.ip_address}, reconnecting")
+            except OSError as e:
+                logger.warning(f"Socket error on PLC at {config.ip_address}: {str(e)}, reconnecting")
+
+            self._reopen(connection, config)
+            metrics.POOL_ACQUISITIONS.labels(metrics.key_label(connection.key), "reconnected").inc()
+            return operation(connection.plc)
+
+    def probe(self, config: PLCConnectionConfig):
+        """
+        Try to reach a controller whose circuit breaker is open
+
+        Raises:
+            Exception: If the controller still cannot be reached
+        """
+        self.acquire(config, probe=True)
+        # a session that was still open is reused without a connect to report
+        self.health.record_success(self.make_key(config))
+
+    def invalidate(self, config: PLCConnectionConfig):
+        """Close and forget the pooled session for a controller"""
+        with self._lock:
+            connection = self._connections.pop(self.make_key(config), None)
+        if connection:
+            self._close(connection)
+
+    def negotiated_size(self, config: PLCConnectionConfig) -> Optional[int]:
+        """Connection size negotiated with a controller, or None before its first session"""
+        with self._sizes_lock:
+            return self._connection_sizes.get(self.make_key(config))
+
+    def evict_idle(self):
+        """Close sessions that have been idle longer than idle_timeout, skipping any in use"""
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            for key, connection in list(self._connections.items()):
+                if now - connection.last_used <= self.idle_timeout:
+                    continue
+                # held by another thread: in use, however long ago it was acquired
+                if not connection.lock.acquire(blocking=False):
+                    continue
+                del self._connections[key]
+                evicted.append(connection)
+
+        for connection in evicted:
+            try:
+                logger.info(f"Evicting idle PLC session {connection.key}")
+                self._close(connection)
+            finally:
+                connection.lock.release()
+
+    def close_all(self):
+        """Close every pooled session"""
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+
+        for connection in connections:
+            self._close(connection)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        Describe the pooled sessions
+
+        Returns:
+            List[Dict[str, Any]]: One entry per pooled controller session
+        """
+        now = time.monotonic()
+        with self._lock:
+            connections = list(self._connections.values())
+
+        return [
+            {
+                "ip_address": connection.key[0],
+                "slot": connection.key[1],
+                "micro800": connection.key[2],
+                "connected": connection.socket_connected,
+                "connection_size": connection.plc.conn.ConnectionSize,
+                "use_count": connection.use_count,
+                "idle_seconds": round(now - connection.last_used, 3),
+                "age_seconds": round(now - connection.created_at, 3)
+            }
+            for connection in connections
+        ]
+
+    @staticmethod
+    def is_connection_error(result: Any) -> bool:
+        """
+        Check whether a pylogix response (or list of responses) reports a lost session
+
+        Args:
+            result: pylogix Response, list of Responses, or any other value
+
+        Returns:
+            bool: True if the result carries a transport-level failure
+        """
+        responses = result if isinstance(result, list) else [result]
+        for response in responses:
+            status = getattr(response, "Status", None)
+            if isinstance(status, str) and status in CONNECTION_ERROR_STATUSES:
+                return True
+            # pylogix passes socket exceptions through as the status value
+            if isinstance(status, OSError):
+                return True
+        return False
+
+    def _create_plc(self, config: PLCConnectionConfig) -> PLC:
+        """Create a pylogix PLC object for a controller"""
+        plc = self.plc_factory()
+        plc.IPAddress = config.ip_address
+        plc.ProcessorSlot = config.slot
+        plc.Micro800 = config.micro800
+        plc.SocketTimeout = config.timeout
+        plc.ConnectionSize = self._requested_size(config)
+        metrics.instrument_plc(plc, metrics.controller_label(config.ip_address, config.slot))
+        return plc
+
+    def _requested_size(self, config: PLCConnectionConfig) -> Optional[int]:
+        """
+        Connection size to ask for when opening a session
+
+        Returns:
+            Optional[int]: Size in bytes, or None to let pylogix try a Large
+            Forward Open before a standard one
+        """
+        if config.micro800:
+            # Micro800 controllers only take the standard Forward Open
+            return min(self.connection_size or STANDARD_CONNECTION_SIZE, STANDARD_CONNECTION_SIZE)
+        if self.connection_size:
+            return self.connection_size
+        with self._sizes_lock:
+            return self._connection_sizes.get(self.make_key(config))
+
+    def _ensure_healthy(self, connection: PooledConnection) -> bool:
+        """
+        Cheaply verify a pooled session, probing only when it has been idle a while
+
+        Returns:
+            bool: True if the session can be reused as-is
+        """
+        if not connection.socket_connected:
+            return False
+
+        now = time.monotonic()
+        if now - connection.last_checked < self.health_check_interval:
+            return True
+
+        try:
+            # A single wall clock attribute read; any CIP reply (even an error
+            # status on controllers without a clock object) proves the session is alive
+            response = connection.plc.GetPLCTime(raw=True)
+        except OSError:
+            return False
+
+        connection.last_checked = now
+        return not self.is_connection_error(response)
+
+    def _reopen(self, connection: PooledConnection, config: PLCConnectionConfig):
+        """
+        Replace a stale session with a freshly registered one
+
+        Raises:
+            Exception: If the controller cannot be reached
+        """
+        self._close(connection)
+        connection.plc = self._create_plc(config)
+        controller = metrics.controller_label(config.ip_address, config.slot)
+
+        started = time.perf_counter()
+        try:
+            opened, status = connection.plc.conn.connect()
+        except OSError as e:
+            opened, status = False, e
+        metrics.PLC_CONNECT_SECONDS.labels(controller).observe(time.perf_counter() - started)
+
+        if not opened:
+            metrics.PLC_CONNECT_FAILURES.labels(controller).inc()
+            self.health.record_failure(connection.key, status)
+            # renegotiate next time, the controller may have been replaced or updated
+            with self._sizes_lock:
+                self._connection_sizes.pop(connection.key, None)
+            raise Exception(f"Failed to connect to PLC at {config.ip_address}: {status}")
+
+        connection_size = connection.plc.conn.ConnectionSize
+        with self._sizes_lock:
+            self._connection_sizes[connection.key] = connection_size
+        metrics.PLC_CONNECTION_SIZE.labels(controller).set(connection_size)
+        self.health.record_success(connection.key)
+
+        connection.created_at = connection.last_checked = time.monotonic()
+        logger.info(f"Opened PLC session to {config.ip_address} (slot {config.slot}, connection size {connection_size})")
+
+    def _close(self, connection: PooledConnection):
+        """Close a pooled session, ignoring errors from an already dead socket"""
+        try:
+            connection.plc.Close()
+        except Exception as e:
+            logger.debug(f"Error closing PLC session {connection.key}: {str(e)}")
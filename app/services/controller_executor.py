@@ -0,0 +1,258 @@
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, TypeVar
+import asyncio
+import logging
+import os
+import threading
+import time
+from app.services import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Priority classes, most urgent first
+WRITE, INTERACTIVE, SCAN, UPLOAD = "write", "interactive", "scan", "upload"
+PRIORITIES = (WRITE, INTERACTIVE, SCAN, UPLOAD)
+
+# Calls allowed to wait per controller and priority class before new ones are turned away
+DEFAULT_QUEUE_LIMITS = {WRITE: 100, INTERACTIVE: 50, SCAN: 20, UPLOAD: 4}
+
+# Smoothing factor for the average call duration used to estimate Retry-After
+RUN_SMOOTHING = 0.2
+
+# Client on whose behalf PLC calls are made; set per request by the API middleware
+current_client: ContextVar[str] = ContextVar("current_client", default="local")
+
+class ControllerBusy(Exception):
+    """Raised when a controller's queue for a priority class is full"""
+
+    def __init__(self, key: Hashable, priority: str, queued: int, retry_after: float):
+        self.key = key
+        self.priority = priority
+        self.queued = queued
+        self.retry_after = retry_after
+        super().__init__(f"PLC at {metrics.key_label(key)} is busy ({queued} {priority} requests waiting)")
+
+class ControllerQueue:
+    """
+    Admission control for one controller
+
+    At most ``max_in_flight`` calls run at once. The rest wait in one queue
+    per priority class; a finishing call hands its slot to the most urgent
+    class with anyone waiting, and within a class to the clients in turn, so
+    one client's burst does not hold up another's requests. A class whose
+    queue is full turns new calls away. Lives on the event loop, so it needs
+    no lock.
+    """
+
+    def __init__(self, key: Hashable, max_in_flight: int, queue_limits: Dict[str, int]):
+        self.key = key
+        self.max_in_flight = max_in_flight
+        self.queue_limits = queue_limits
+        self.in_flight = 0
+        self.waiting: Dict[str, "OrderedDict[str, Deque[asyncio.Future]]"] = {priority: OrderedDict() for priority in PRIORITIES}
+        self.queued = {priority: 0 for priority in PRIORITIES}
+        self.rejected = {priority: 0 for priority in PRIORITIES}
+        self.run_seconds = 0.0
+
+    async def acquire(self, priority: str, client: str):
+        """
+        Wait for a slot to run a call
+
+        Raises:
+            ControllerBusy: If the priority class already has its limit of waiting calls
+        """
+        if self.in_flight < self.max_in_flight:
+            self.in_flight += 1
+            return
+
+        if self.queued[priority] >= self.queue_limits.get(priority, 0):
+            self.rejected[priority] += 1
+            metrics.EXECUTOR_REJECTED.labels(metrics.key_label(self.key), priority).inc()
+            raise ControllerBusy(self.key, priority, self.queued[priority], self.retry_after(priority))
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[priority].setdefault(client, deque()).append(future)
+        self._queued(priority, 1)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                self._forget(priority, client, future)
+            else:
+                # the slot was handed over just as the caller gave up
+                self.release()
+            raise
+
+    def release(self):
+        """Hand a finished call's slot to the next waiting call, if any"""
+        for priority in PRIORITIES:
+            clients = self.waiting[priority]
+            while clients:
+                client, futures = next(iter(clients.items()))
+                future = futures.popleft()
+                if futures:
+                    clients.move_to_end(client)
+                else:
+                    del clients[client]
+                self._queued(priority, -1)
+                if not future.done():
+                    future.set_result(None)
+                    return
+        self.in_flight -= 1
+
+    def retry_after(self, priority: str) -> float:
+        """Rough seconds until a call of this priority would get a slot"""
+        ahead = sum(self.queued[p] for p in PRIORITIES[:PRIORITIES.index(priority) + 1])
+        return self.run_seconds * (ahead + 1) / self.max_in_flight
+
+    def observe(self, seconds: float):
+        """Fold a finished call's duration into the running average"""
+        self.run_seconds += RUN_SMOOTHING * (seconds - self.run_seconds)
+
+    def _forget(self, priority: str, client: str, future: asyncio.Future):
+        futures = self.waiting[priority].get(client)
+        if futures is None or future not in futures:
+            return
+        futures.remove(future)
+        if not futures:
+            del self.waiting[priority][client]
+        self._queued(priority, -1)
+
+    def _queued(self, priority: str, delta: int):
+        self.queued[priority] += delta
+        metrics.EXECUTOR_QUEUE_DEPTH.labels(metrics.key_label(self.key), priority).set(self.queued[priority])
+
+class ControllerExecutor:
+    """
+    Runs blocking pylogix calls off the event loop, one bounded pool per controller
+
+    Each controller gets its own small thread pool, so a controller that is
+    off the network only ties up its own workers while requests to healthy
+    controllers (and endpoints like /health) carry on. Every call carries a
+    deadline; when it passes the caller gets ``asyncio.TimeoutError`` even
+    though the socket call may still be finishing in the background.
+
+    Calls are admitted through a ``ControllerQueue`` per controller rather
+    than the thread pool's own FIFO queue: operator writes go ahead of
+    interactive reads, which go ahead of background scans and tag list
+    uploads, clients take turns within a class, and a full class queue makes
+    ``run`` raise ``ControllerBusy`` at once instead of growing without bound.
+    Time spent queued counts against the deadline.
+    """
+
+    def __init__(self, max_workers_per_controller: int = 1, queue_limits: Optional[Dict[str, int]] = None):
+        self.max_workers_per_controller = max_workers_per_controller
+        self.queue_limits = {
+            priority: int(os.getenv(f"SIGNALTAP_QUEUE_LIMIT_{priority.upper()}", DEFAULT_QUEUE_LIMITS[priority]))
+            for priority in PRIORITIES
+        }
+        self.queue_limits.update(queue_limits or {})
+        self._executors: Dict[Hashable, ThreadPoolExecutor] = {}
+        self._queues: Dict[Hashable, ControllerQueue] = {}
+        self._lock = threading.Lock()
+
+    async def run(
+        self,
+        key: Hashable,
+        func: Callable[..., T],
+        *args: Any,
+        deadline: Optional[float] = None,
+        priority: str = INTERACTIVE,
+        client: Optional[str] = None,
+        **kwargs: Any
+    ) -> T:
+        """
+        Run a blocking call on the controller's executor
+
+        Args:
+            key: Controller identity, e.g. the connection pool key
+            func: Blocking callable to run
+            deadline: Seconds to wait for the result, queueing included (None waits indefinitely)
+            priority: Priority class, one of ``PRIORITIES``
+            client: Client to charge the call to (default: ``current_client``)
+
+        Returns:
+            The callable's result
+
+        Raises:
+            ControllerBusy: If the controller's queue for the priority class is full
+            asyncio.TimeoutError: If the deadline passes first
+        """
+        loop = asyncio.get_running_loop()
+        controller = metrics.key_label(key)
+        queue = self._queue_for(key)
+        submitted = time.perf_counter()
+
+        def call():
+            started = time.perf_counter()
+            metrics.EXECUTOR_WAIT_SECONDS.labels(controller).observe(started - submitted)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                metrics.EXECUTOR_RUN_SECONDS.labels(controller).observe(elapsed)
+                loop.call_soon_threadsafe(queue.observe, elapsed)
+
+        async def admitted():
+            await queue.acquire(priority, client or current_client.get())
+            future = loop.run_in_executor(self._executor_for(key), call)
+            # the slot is only free once the thread is, even if the caller gave up
+            future.add_done_callback(lambda _: queue.release())
+            return await asyncio.shield(future)
+
+        try:
+            return await asyncio.wait_for(admitted(), deadline)
+        except asyncio.TimeoutError:
+            metrics.EXECUTOR_DEADLINES_EXCEEDED.labels(controller).inc()
+            logger.warning(f"PLC operation on {key} exceeded its {deadline} s deadline")
+            raise
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        Describe each controller's admission queue
+
+        Returns:
+            List[Dict[str, Any]]: One entry per controller
+        """
+        return [
+            {
+                "ip_address": key[0] if isinstance(key, tuple) else str(key),
+                "slot": key[1] if isinstance(key, tuple) else 0,
+                "in_flight": queue.in_flight,
+                "max_in_flight": queue.max_in_flight,
+                "queued": dict(queue.queued),
+                "rejected": dict(queue.rejected),
+                "clients_waiting": len({client for clients in queue.waiting.values() for client in clients}),
+                "average_run_ms": round(queue.run_seconds * 1000, 3)
+            }
+            for key, queue in list(self._queues.items())
+        ]
+
+    def shutdown(self):
+        """Stop every controller executor without waiting for stuck calls"""
+        with self._lock:
+            executors = list(self._executors.values())
+            self._executors.clear()
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _queue_for(self, key: Hashable) -> ControllerQueue:
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = ControllerQueue(key, self.max_workers_per_controller, self.queue_limits)
+        return queue
+
+    def _executor_for(self, key: Hashable) -> ThreadPoolExecutor:
+        with self._lock:
+            executor = self._executors.get(key)
+            if executor is None:
+                executor = self._executors[key] = ThreadPoolExecutor(
+                    max_workers=self.max_workers_per_controller,
+                    thread_name_prefix=f"plc-{key[0] if isinstance(key, tuple) else key}"
+                )
+            return executor
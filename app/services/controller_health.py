@@ -0,0 +1,212 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+import asyncio
+import logging
+import threading
+import time
+from app.services import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Circuit breaker states
+CLOSED, OPEN, PROBING = "closed", "open", "probing"
+
+# Numeric value of each state for the state gauge
+STATE_VALUES = {CLOSED: 0, PROBING: 1, OPEN: 2}
+
+class ControllerUnavailable(Exception):
+    """Raised instead of contacting a controller whose circuit breaker is open"""
+
+    def __init__(self, key: Hashable, last_error: Optional[str], retry_after: float):
+        self.key = key
+        self.last_error = last_error
+        self.retry_after = retry_after
+        super().__init__(
+            f"PLC at {metrics.key_label(key)} is unreachable ({last_error or 'repeated failures'}), "
+            f"next check in {retry_after:.0f} s"
+        )
+
+class ControllerState:
+    """Health of one controller as seen by its circuit breaker"""
+
+    __slots__ = (
+        "state", "consecutive_failures", "last_error", "last_failure_at", "last_success_at",
+        "opened_at", "next_probe_at", "probe_interval", "probe_count"
+    )
+
+    def __init__(self):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.last_failure_at: Optional[float] = None
+        self.last_success_at: Optional[float] = None
+        self.opened_at: Optional[float] = None
+        self.next_probe_at = 0.0
+        self.probe_interval = 0.0
+        self.probe_count = 0
+
+class ControllerHealth:
+    """
+    Per-controller circuit breakers
+
+    A controller that is off the network makes every request wait out the
+    full socket timeout in ``connect()``. After ``failure_threshold``
+    consecutive failed connects its breaker opens: requests then fail at
+    once with ``ControllerUnavailable`` instead of queueing behind each
+    other, and only the background prober keeps trying to reach it, backing
+    off exponentially from ``initial_backoff`` to ``max_backoff`` seconds.
+    The first successful probe (or connect) closes the breaker again.
+
+    State is keyed like the connection pool, by (ip, slot, micro800), and is
+    updated from the pool's worker threads, hence the lock.
+    """
+
+    def __init__(self, failure_threshold: int = 2, initial_backoff: float = 1.0, max_backoff: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self._states: Dict[Hashable, ControllerState] = {}
+        self._lock = threading.Lock()
+
+    def check(self, key: Hashable):
+        """
+        Fail fast if a controller's breaker is open
+
+        Raises:
+            ControllerUnavailable: If the controller is considered unreachable
+        """
+        with self._lock:
+            state = self._states.get(key)
+            if state is None or state.state == CLOSED:
+                return
+            retry_after = max(state.next_probe_at - time.monotonic(), 0.0)
+            last_error = state.last_error
+        raise ControllerUnavailable(key, last_error, retry_after)
+
+    def is_available(self, key: Hashable) -> bool:
+        """Whether requests to a controller are let through"""
+        with self._lock:
+            state = self._states.get(key)
+            return state is None or state.state == CLOSED
+
+    def record_success(self, key: Hashable):
+        """Note a successful connect, closing the controller's breaker"""
+        with self._lock:
+            state = self._states.setdefault(key, ControllerState())
+            reopened = state.state != CLOSED
+            state.state = CLOSED
+            state.consecutive_failures = 0
+            state.last_success_at = time.monotonic()
+            state.opened_at = None
+        self._export(key, CLOSED)
+        if reopened:
+            logger.info(f"PLC at {metrics.key_label(key)} is reachable again, closing its circuit breaker")
+
+    def record_failure(self, key: Hashable, error: Any):
+        """Note a failed connect; opens the breaker after enough of them in a row"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.setdefault(key, ControllerState())
+            state.consecutive_failures += 1
+            state.last_error = str(error)
+            state.last_failure_at = now
+            if state.state == CLOSED:
+                if state.consecutive_failures < self.failure_threshold:
+                    return
+                state.opened_at = now
+                state.probe_interval = self.initial_backoff
+                logger.warning(
+                    f"PLC at {metrics.key_label(key)} failed {state.consecutive_failures} times in a row, "
+                    f"failing requests fast until it answers again"
+                )
+            elif state.state == PROBING:
+                # a failed probe: wait longer before the next one
+                state.probe_interval = min(state.probe_interval * 2, self.max_backoff)
+            else:
+                # a request that started before the breaker opened
+                return
+            state.state = OPEN
+            state.next_probe_at = now + state.probe_interval
+        self._export(key, OPEN)
+
+    def due_probes(self) -> List[Hashable]:
+        """Controllers whose next probe is due, marked as being probed"""
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for key, state in self._states.items():
+                if state.state == OPEN and now >= state.next_probe_at:
+                    state.state = PROBING
+                    state.probe_count += 1
+                    due.append(key)
+        for key in due:
+            self._export(key, PROBING)
+        return due
+
+    async def probe_loop(self, probe: Callable[[Hashable], Awaitable[Any]], interval: float = 0.5):
+        """
+        Keep probing controllers with open breakers
+
+        Each due controller is probed concurrently; the probe is expected to
+        attempt a connect, which reports its outcome through
+        ``record_success``/``record_failure``. A probe that raises without
+        reporting (e.g. it ran past its deadline) counts as a failure.
+
+        Args:
+            probe: Coroutine function attempting to reach one controller
+            interval: Seconds between checks for due probes
+        """
+        # a controller is only due again once its last probe has reported back
+        probes: Set[asyncio.Task] = set()
+        while True:
+            for key in self.due_probes():
+                task = asyncio.create_task(self._probe(key, probe))
+                probes.add(task)
+                task.add_done_callback(probes.discard)
+            await asyncio.sleep(interval)
+
+    async def _probe(self, key: Hashable, probe: Callable[[Hashable], Awaitable[Any]]):
+        try:
+            await probe(key)
+        except Exception as e:
+            logger.debug(f"Probe of PLC at {metrics.key_label(key)} failed: {str(e)}")
+            with self._lock:
+                state = self._states.get(key)
+                unreported = state is not None and state.state == PROBING
+            if unreported:
+                self.record_failure(key, e if str(e) else type(e).__name__)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        Describe every controller the breakers have seen
+
+        Returns:
+            List[Dict[str, Any]]: One entry per controller
+        """
+        now = time.monotonic()
+        with self._lock:
+            states = list(self._states.items())
+
+        def ago(moment: Optional[float]) -> Optional[float]:
+            return round(now - moment, 3) if moment is not None else None
+
+        return [
+            {
+                "ip_address": key[0] if isinstance(key, tuple) else str(key),
+                "slot": key[1] if isinstance(key, tuple) else 0,
+                "state": state.state,
+                "available": state.state == CLOSED,
+                "consecutive_failures": state.consecutive_failures,
+                "last_error": state.last_error,
+                "seconds_since_failure": ago(state.last_failure_at),
+                "seconds_since_success": ago(state.last_success_at),
+                "open_seconds": ago(state.opened_at),
+                "next_probe_seconds": round(max(state.next_probe_at - now, 0.0), 3) if state.state == OPEN else None,
+                "probes": state.probe_count
+            }
+            for key, state in states
+        ]
+
+    @staticmethod
+    def _export(key: Hashable, state: str):
+        metrics.CONTROLLER_BREAKER_STATE.labels(metrics.key_label(key)).set(STATE_VALUES[state])
@@ -0,0 +1,89 @@
+from typing import Dict, Tuple
+import numpy as np
+
+def aggregate_buckets(
+    timestamps: np.ndarray,
+    values: np.ndarray,
+    start: float,
+    end: float,
+    buckets: int
+) -> Dict[str, np.ndarray]:
+    """
+    Reduce a series to min/max/avg/count per fixed-width time bucket
+
+    Args:
+        timestamps: Sorted sample times (epoch seconds)
+        values: Sample values, NaN for samples without a numeric value
+        start: Start of the range (epoch seconds)
+        end: End of the range (epoch seconds)
+        buckets: Number of buckets to split the range into
+
+    Returns:
+        Dict[str, np.ndarray]: Bucket start times plus min, max, avg and
+        count for every bucket that holds at least one sample
+    """
+    keep = ~np.isnan(values)
+    timestamps, values = timestamps[keep], values[keep]
+    width = (end - start) / buckets if end > start else 1.0
+
+    if len(values) == 0:
+        empty = np.empty(0)
+        return {"timestamps": empty, "min": empty, "max": empty, "avg": empty, "count": np.empty(0, dtype=np.int64)}
+
+    index = np.clip(((timestamps - start) // width).astype(np.int64), 0, buckets - 1)
+    # Samples are sorted by time, so each bucket is one contiguous run
+    bucket_ids, run_starts, counts = np.unique(index, return_index=True, return_counts=True)
+
+    return {
+        "timestamps": start + bucket_ids * width,
+        "min": np.minimum.reduceat(values, run_starts),
+        "max": np.maximum.reduceat(values, run_starts),
+        "avg": np.add.reduceat(values, run_starts) / counts,
+        "count": counts
+    }
+
+def lttb(timestamps: np.ndarray, values: np.ndarray, threshold: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets downsampling for charts
+
+    Keeps the first and last point and, for each of ``threshold - 2`` equal
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the average of the next bucket. The triangle
+    areas within a bucket are computed in one vectorized step.
+
+    Args:
+        timestamps: Sorted sample times (epoch seconds)
+        values: Sample values, NaN for samples without a numeric value
+        threshold: Maximum number of points to return
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Downsampled timestamps and values
+    """
+    keep = ~np.isnan(values)
+    timestamps, values = timestamps[keep], values[keep]
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return timestamps, values
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        next_lo, next_hi = edges[i + 1], (edges[i + 2] if i + 2 < len(edges) else n)
+        next_hi = max(next_hi, next_lo + 1)
+
+        avg_t = timestamps[next_lo:next_hi].mean()
+        avg_v = values[next_lo:next_hi].mean()
+        prev_t, prev_v = timestamps[previous], values[previous]
+
+        areas = np.abs(
+            (prev_t - avg_t) * (values[lo:hi] - prev_v)
+            - (prev_t - timestamps[lo:hi]) * (avg_v - prev_v)
+        )
+        previous = lo + int(np.argmax(areas))
+        selected[i + 1] = previous
+
+    return timestamps[selected], values[selected]
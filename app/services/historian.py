@@ -0,0 +1,384 @@
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+from fnmatch import fnmatchcase
+import logging
+import os
+import itertools
+import queue
+import sqlite3
+import threading
+import time
+import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY,
+    controller TEXT NOT NULL,
+    name TEXT NOT NULL,
+    UNIQUE (controller, name)
+);
+CREATE TABLE IF NOT EXISTS samples (
+    tag_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    value REAL,
+    text_value TEXT,
+    good INTEGER NOT NULL,
+    PRIMARY KEY (tag_id, ts)
+) WITHOUT ROWID;
+"""
+
+# Upper bound on queued scan results folded into one write transaction
+MAX_BATCHES_PER_FLUSH = 1000
+
+# Rows fetched from SQLite per step while loading a query into numpy
+QUERY_CHUNK_ROWS = 65536
+
+# Compression deviation (engineering units) when neither the environment nor
+# a per-tag rule sets one: small enough to keep integer steps exact, large
+# enough that sensor noise on analog tags does not defeat compression
+DEFAULT_DEVIATION = 0.05
+
+# A stored sample: (timestamp, numeric value, text value, good quality)
+Sample = Tuple[float, Optional[float], Optional[str], bool]
+
+class SwingingDoor:
+    """
+    Swinging-door trending compression for one tag
+
+    A point is only archived when the straight line from the last archived
+    point can no longer represent every point seen since within
+    ``deviation``, when the value stops being numeric or changes quality,
+    or when ``max_interval`` seconds pass without an archived point.
+    """
+
+    def __init__(self, deviation: float, max_interval: float):
+        self.deviation = deviation
+        self.max_interval = max_interval
+        self.archived: Optional[Sample] = None
+        self.snapshot: Optional[Sample] = None
+        self.upper_slope = float("-inf")
+        self.lower_slope = float("inf")
+
+    def add(self, sample: Sample) -> List[Sample]:
+        """
+        Feed a new sample
+
+        Args:
+            sample: (timestamp, numeric value, text value, good quality)
+
+        Returns:
+            List[Sample]: Samples that must be written to storage
+        """
+        if self.archived is None:
+            return self._archive(sample)
+
+        ts, value, text_value, good = sample
+        archived_ts, archived_value, archived_text, archived_good = self.archived
+
+        # Non-numeric values and quality changes are stored on change only
+        if value is None or archived_value is None or good != archived_good:
+            if (value, text_value, good) == (archived_value, archived_text, archived_good):
+                return []
+            return self._flush_snapshot() + self._archive(sample)
+
+        if ts <= archived_ts:
+            return []
+
+        if ts - archived_ts >= self.max_interval:
+            return self._flush_snapshot() + self._archive(sample)
+
+        dt = ts - archived_ts
+        upper_slope = max(self.upper_slope, (value - archived_value - self.deviation) / dt)
+        lower_slope = min(self.lower_slope, (value - archived_value + self.deviation) / dt)
+        slope = (value - archived_value) / dt
+
+        if not upper_slope <= slope <= lower_slope:
+            # Doors opened, or a segment ending at this sample would pass a
+            # point in between by more than the deviation: the previous
+            # snapshot ends the current segment
+            written = self._flush_snapshot()
+            if written:
+                return written + self.add(sample)
+            return self._archive(sample)
+
+        self.upper_slope, self.lower_slope = upper_slope, lower_slope
+        self.snapshot = sample
+        return []
+
+    def flush(self) -> List[Sample]:
+        """Archive the pending snapshot, e.g. on shutdown"""
+        return self._flush_snapshot()
+
+    def _flush_snapshot(self) -> List[Sample]:
+        if self.snapshot is None:
+            return []
+        return self._archive(self.snapshot)
+
+    def _archive(self, sample: Sample) -> List[Sample]:
+        self.archived = sample
+        self.snapshot = None
+        self.upper_slope = float("-inf")
+        self.lower_slope = float("inf")
+        return [sample]
+
+class Historian:
+    """
+    Embedded time-series historian backed by SQLite
+
+    ``record()`` only queues the scan results, so the scan loop never waits
+    on disk. A writer thread applies swinging-door compression per tag and
+    inserts whatever survives in one transaction per flush interval.
+
+    The compression deviation defaults to ``SIGNALTAP_HISTORIAN_DEVIATION``
+    and can be set per tag with rules mapping a tag name or fnmatch-style
+    pattern to a deviation, e.g. ``SIGNALTAP_HISTORIAN_DEVIATIONS=
+    "Level_*=0.5,Counter_0=0"``; exact names win over patterns.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        deviation: Optional[float] = None,
+        max_interval: float = 600.0,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000,
+        deviations: Optional[Dict[str, float]] = None
+    ):
+        self.path = path or os.getenv("SIGNALTAP_HISTORIAN_PATH", os.path.join(".cache", "historian.db"))
+        if deviation is None:
+            deviation = float(os.getenv("SIGNALTAP_HISTORIAN_DEVIATION", DEFAULT_DEVIATION))
+        self.deviation = deviation
+        if deviations is None:
+            deviations = parse_deviations(os.getenv("SIGNALTAP_HISTORIAN_DEVIATIONS", ""))
+        self.deviations = deviations
+        self.max_interval = max_interval
+        self.flush_interval = flush_interval
+        self.dropped_batches = 0
+        self.written_samples = 0
+        self._pending: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._doors: Dict[int, SwingingDoor] = {}
+        self._tag_ids: Dict[Tuple[str, str], int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def start(self):
+        """Open the database and start the writer thread"""
+        if self._thread is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="historian-writer", daemon=True)
+        self._thread.start()
+        logger.info(f"Historian recording to {self.path}")
+
+    def stop(self):
+        """Write everything still pending and close the database"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        with self._db_lock:
+            self._db.close()
+            self._db = None
+
+    def record(self, controller: str, results: List[Dict[str, Any]]):
+        """
+        Queue scan results for storage without blocking the caller
+
+        Args:
+            controller: Controller identity, e.g. "192.168.1.10/0"
+            results: Tag read results with name, value, status, and timestamp
+        """
+        if self._thread is None or not results:
+            return
+        try:
+            self._pending.put_nowait((controller, results))
+        except queue.Full:
+            self.dropped_batches += 1
+            logger.warning(f"Historian is behind, dropped {len(results)} samples from {controller}")
+
+    def deviation_for(self, tag_name: str) -> float:
+        """Compression deviation for a tag: its exact rule, else the first matching pattern, else the default"""
+        if tag_name in self.deviations:
+            return self.deviations[tag_name]
+        for pattern, deviation in self.deviations.items():
+            if fnmatchcase(tag_name, pattern):
+                return deviation
+        return self.deviation
+
+    def query(self, controller: str, tags: List[str], start: float, end: float) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Load stored samples for tags in a time range
+
+        Each query uses its own read-only connection, so it runs alongside the
+        writer thread (the database is in WAL mode), and reads all tags from
+        one snapshot. Rows are fetched in chunks and unpacked straight into
+        preallocated numpy arrays, without building a list of every row.
+
+        Args:
+            controller: Controller identity, e.g. "192.168.1.10/0"
+            tags: Tag names to load
+            start: Start of the range (epoch seconds)
+            end: End of the range (epoch seconds)
+
+        Returns:
+            Dict[str, Tuple[np.ndarray, np.ndarray]]: Timestamps and numeric
+            values (NaN where the sample had none) per tag with stored data
+        """
+        if not os.path.exists(self.path):
+            return {}
+
+        series = {}
+        db = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, isolation_level=None)
+        try:
+            db.execute("BEGIN")
+            for name in tags:
+                row = db.execute("SELECT id FROM tags WHERE controller = ? AND name = ?", (controller, name)).fetchone()
+                if row is None:
+                    continue
+                loaded = self._load(db, row[0], start, end)
+                if loaded is not None:
+                    series[name] = loaded
+            db.execute("COMMIT")
+        finally:
+            db.close()
+        return series
+
+    @staticmethod
+    def _load(db: sqlite3.Connection, tag_id: int, start: float, end: float) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        count = db.execute(
+            "SELECT COUNT(*) FROM samples WHERE tag_id = ? AND ts >= ? AND ts <= ?", (tag_id, start, end)
+        ).fetchone()[0]
+        if not count:
+            return None
+
+        # NULL values come back as 0 with a flag, so every row is three floats
+        data = np.empty((count, 3), dtype=np.float64)
+        cursor = db.execute(
+            "SELECT ts, IFNULL(value, 0.0), value IS NULL FROM samples "
+            "WHERE tag_id = ? AND ts >= ? AND ts <= ? ORDER BY ts",
+            (tag_id, start, end)
+        )
+        filled = 0
+        while filled < count:
+            rows = cursor.fetchmany(min(QUERY_CHUNK_ROWS, count - filled))
+            if not rows:
+                break
+            data[filled:filled + len(rows)] = np.fromiter(
+                itertools.chain.from_iterable(rows), dtype=np.float64, count=len(rows) * 3
+            ).reshape(-1, 3)
+            filled += len(rows)
+
+        timestamps, values = data[:filled, 0], data[:filled, 1]
+        values[data[:filled, 2] != 0] = np.nan
+        return timestamps, values
+
+    def _run(self):
+        while True:
+            stopping = self._stop.is_set()
+            batches = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batches) < MAX_BATCHES_PER_FLUSH:
+                timeout = deadline - time.monotonic()
+                try:
+                    if timeout > 0:
+                        batch = self._pending.get(timeout=timeout)
+                    else:
+                        batch = self._pending.get_nowait()
+                except queue.Empty:
+                    break
+                batches.append(batch)
+
+            rows = []
+            for controller, results in batches:
+                rows.extend(self._compress(controller, results))
+            # Keep going after stop() until everything queued has been written
+            drained = stopping and self._pending.empty()
+            if drained:
+                for tag_id, door in self._doors.items():
+                    rows.extend(self._row(tag_id, sample) for sample in door.flush())
+
+            if rows:
+                try:
+                    with self._db_lock, self._db:
+                        self._db.executemany(
+                            "INSERT OR REPLACE INTO samples (tag_id, ts, value, text_value, good) VALUES (?, ?, ?, ?, ?)",
+                            rows
+                        )
+                    self.written_samples += len(rows)
+                except sqlite3.Error as e:
+                    logger.error(f"Historian failed to write {len(rows)} samples: {str(e)}")
+
+            if drained:
+                return
+
+    def _compress(self, controller: str, results: List[Dict[str, Any]]) -> List[tuple]:
+        rows = []
+        for result in results:
+            tag_id = self._tag_id(controller, result["name"])
+            door = self._doors.get(tag_id)
+            if door is None:
+                door = self._doors[tag_id] = SwingingDoor(self.deviation_for(result["name"]), self.max_interval)
+            for sample in door.add(self._sample(result)):
+                rows.append(self._row(tag_id, sample))
+        return rows
+
+    @staticmethod
+    def _sample(result: Dict[str, Any]) -> Sample:
+        timestamp = result.get("timestamp")
+        if isinstance(timestamp, str):
+            ts = datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc).timestamp()
+        else:
+            ts = time.time()
+
+        value = result["value"]
+        good = result["status"] == "Success"
+        if isinstance(value, (bool, int, float)):
+            return (ts, float(value), None, good)
+        if isinstance(value, str):
+            return (ts, None, value, good)
+        return (ts, None, None, good)
+
+    @staticmethod
+    def _row(tag_id: int, sample: Sample) -> tuple:
+        ts, value, text_value, good = sample
+        return (tag_id, ts, value, text_value, int(good))
+
+    def _tag_id(self, controller: str, name: str) -> int:
+        key = (controller, name)
+        tag_id = self._tag_ids.get(key)
+        if tag_id is None:
+            with self._db_lock, self._db:
+                self._db.execute("INSERT OR IGNORE INTO tags (controller, name) VALUES (?, ?)", key)
+                tag_id = self._db.execute(
+                    "SELECT id FROM tags WHERE controller = ? AND name = ?", key
+                ).fetchone()[0]
+            self._tag_ids[key] = tag_id
+        return tag_id
+
+def parse_deviations(rules: str) -> Dict[str, float]:
+    """
+    Parse per-tag deviation rules, e.g. "Level_*=0.5,Counter_0=0"
+
+    Raises:
+        ValueError: If a rule is not ``pattern=number``
+    """
+    deviations = {}
+    for rule in filter(None, (rule.strip() for rule in rules.split(","))):
+        pattern, separator, deviation = rule.rpartition("=")
+        if not separator or not pattern.strip():
+            raise ValueError(f"Invalid historian deviation rule {rule!r}, expected pattern=deviation")
+        deviations[pattern.strip()] = float(deviation)
+    return deviations
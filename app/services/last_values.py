@@ -0,0 +1,169 @@
+from typing import Any, Dict, List, Optional, Tuple
+import time
+import uuid
+import zlib
+from app.services.pylogix_service import TagReadColumns
+
+# Entry fields: value, status, version it last changed at, ISO timestamp of the
+# read, and monotonic time of the read (for max-age checks)
+VALUE, STATUS, CHANGED, TIMESTAMP, READ_AT = range(5)
+
+class _ControllerValues:
+    """Last value, status and the version it last changed at, per tag of one controller"""
+
+    def __init__(self):
+        self.version = 0
+        self.entries: Dict[str, List[Any]] = {}
+
+class LastValueCache:
+    """
+    Server-side last known value of every tag read, per controller
+
+    Each controller has a version number that increases whenever a read
+    changes any tag's value or status, and every tag remembers the version it
+    last changed at. Clients echo back the version token from their previous
+    read and get only the tags that changed after it.
+
+    The same entries serve reads that accept slightly stale values: see
+    ``lookup`` and ``CachedTagReader``.
+
+    Tokens embed a per-process epoch and a hash of the requested tag list, so
+    a token from before a restart, or one issued for a different tag list,
+    simply yields a full response instead of a wrong delta.
+    """
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._controllers: Dict[str, _ControllerValues] = {}
+
+    def update(self, controller: str, columns: TagReadColumns) -> int:
+        """
+        Record read results
+
+        Args:
+            controller: Controller identity, e.g. "192.168.1.10/0"
+            columns: Read results
+
+        Returns:
+            int: The controller's version after the update
+        """
+        values = self._controllers.setdefault(controller, _ControllerValues())
+        next_version = values.version + 1
+        changed = False
+        read_at = time.monotonic()
+
+        for name, value, status in zip(columns.names, columns.values, columns.statuses):
+            entry = values.entries.get(name)
+            if entry is None:
+                values.entries[name] = [value, status, next_version, columns.timestamp, read_at]
+                changed = True
+            elif entry[STATUS] != status or not _same_value(entry[VALUE], value):
+                entry[:] = [value, status, next_version, columns.timestamp, read_at]
+                changed = True
+            else:
+                entry[TIMESTAMP], entry[READ_AT] = columns.timestamp, read_at
+
+        if changed:
+            values.version = next_version
+        return values.version
+
+    def lookup(self, controller: str, tag_name: str, max_age: float) -> Optional[Tuple[Any, str, str]]:
+        """
+        Get a tag's last value if it was read recently enough
+
+        Args:
+            controller: Controller identity, e.g. "192.168.1.10/0"
+            tag_name: Tag name
+            max_age: Oldest acceptable read, in seconds
+
+        Returns:
+            Optional[Tuple[Any, str, str]]: Value, status and timestamp, or
+            None if the tag was never read or its value is too old
+        """
+        values = self._controllers.get(controller)
+        entry = values.entries.get(tag_name) if values else None
+        if entry is None or time.monotonic() - entry[READ_AT] > max_age:
+            return None
+        return entry[VALUE], entry[STATUS], entry[TIMESTAMP]
+
+    def expire(self, controller: str, tags: List[str]):
+        """Stop serving cached values for tags, e.g. after writing them"""
+        values = self._controllers.get(controller)
+        for tag_name in tags:
+            entry = values.entries.get(tag_name) if values else None
+            if entry is not None:
+                entry[READ_AT] = float("-inf")
+
+    def version(self, controller: str) -> int:
+        """Current version of a controller's values"""
+        values = self._controllers.get(controller)
+        return values.version if values else 0
+
+    def version_of(self, controller: str, columns: TagReadColumns) -> int:
+        """
+        Newest version a client holding these results is up to date with
+
+        Results can be older than the cache by the time they are returned,
+        e.g. a coalesced read that another read overtook. For every tag whose
+        cached value differs from the result, the version is held back to
+        just before that value changed, so a delta read with the token still
+        sends the tag.
+
+        Args:
+            controller: Controller identity, e.g. "192.168.1.10/0"
+            columns: Read results about to be returned
+
+        Returns:
+            int: Version to build the client's token from
+        """
+        values = self._controllers.get(controller)
+        if values is None:
+            return 0
+        version = values.version
+        for name, value, status in zip(columns.names, columns.values, columns.statuses):
+            entry = values.entries.get(name)
+            if entry is None:
+                return 0
+            if entry[STATUS] != status or not _same_value(entry[VALUE], value):
+                version = min(version, entry[CHANGED] - 1)
+        return version
+
+    def token(self, tags: List[str], version: int) -> str:
+        """Version token to hand back to the client for a tag list"""
+        return f"{self.epoch}.{version}.{_tags_hash(tags)}"
+
+    def changed_since(self, controller: str, tags: List[str], token: Optional[str]) -> Optional[List[bool]]:
+        """
+        Work out which tags changed after a client's version token
+
+        Args:
+            controller: Controller identity, e.g. "192.168.1.10/0"
+            tags: Tag names of the current request, in order
+            token: Token returned with the client's previous read
+
+        Returns:
+            Optional[List[bool]]: Whether each tag changed, or None when the
+            token cannot be honoured and the full result should be sent
+        """
+        since = self._parse(token, tags)
+        values = self._controllers.get(controller)
+        if since is None or values is None or since > values.version:
+            return None
+
+        entries = values.entries
+        return [name not in entries or entries[name][CHANGED] > since for name in tags]
+
+    def _parse(self, token: Optional[str], tags: List[str]) -> Optional[int]:
+        if not token:
+            return None
+        parts = token.split(".")
+        if len(parts) != 3 or parts[0] != self.epoch or parts[2] != _tags_hash(tags) or not parts[1].isdigit():
+            return None
+        return int(parts[1])
+
+def _tags_hash(tags: List[str]) -> str:
+    return format(zlib.crc32("\n".join(tags).encode("utf-8")), "08x")
+
+def _same_value(previous: Any, current: Any) -> bool:
+    # True == 1 in Python, but a client renders them differently
+    return type(previous) is type(current) and previous == current
@@ -0,0 +1,231 @@
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from pylogix.lgx_response import Response
+from typing import Any, Optional, Tuple
+import asyncio
+import functools
+import logging
+import os
+import time
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# CIP general statuses not counted as errors per reply: success, the partial
+# transfer status of a fragmented read, and the embedded service error of a
+# Multiple Service Packet whose per-tag errors are counted by record_tag_reads
+CIP_OK_STATUSES = {0x00, 0x06, 0x1e}
+
+# With several processes (uvicorn workers and the poller), each one writes
+# its metrics to files in this directory and /metrics adds them all up.
+# prometheus_client reads it at import time; gauges say how to combine the
+# values of the processes still alive.
+MULTIPROCESS_DIR_VARIABLE = "PROMETHEUS_MULTIPROC_DIR"
+
+# Latency buckets sized for PLC I/O: sub-millisecond loopback up to timeouts
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PLC_CONNECT_SECONDS = Histogram(
+    "signaltap_plc_connect_seconds",
+    "Time to open a PLC session (TCP connect, register session, Forward Open)",
+    ["controller"],
+    buckets=LATENCY_BUCKETS
+)
+PLC_CONNECT_FAILURES = Counter(
+    "signaltap_plc_connect_failures_total",
+    "PLC session opens that failed",
+    ["controller"]
+)
+PLC_CONNECTION_SIZE = Gauge(
+    "signaltap_plc_connection_size_bytes",
+    "CIP connection size negotiated by the Forward Open of the pooled session",
+    ["controller"],
+    multiprocess_mode="livemax"
+)
+CONTROLLER_BREAKER_STATE = Gauge(
+    "signaltap_controller_breaker_state",
+    "Circuit breaker state per controller: 0 closed, 1 probing, 2 open (failing fast)",
+    ["controller"],
+    multiprocess_mode="livemax"
+)
+PLC_ROUND_TRIP_SECONDS = Histogram(
+    "signaltap_plc_round_trip_seconds",
+    "Time from sending a CIP request to receiving its reply",
+    ["controller"],
+    buckets=LATENCY_BUCKETS
+)
+PLC_CIP_ERRORS = Counter(
+    "signaltap_plc_cip_errors_total",
+    "CIP replies with an error general status, by status",
+    ["controller", "status"]
+)
+TAGS_READ = Counter(
+    "signaltap_tags_read_total",
+    "Tag values read from PLCs",
+    ["controller"]
+)
+TAG_READ_ERRORS = Counter(
+    "signaltap_tag_read_errors_total",
+    "Tag reads that came back with an error, by status",
+    ["controller", "status"]
+)
+TAGS_WRITTEN = Counter(
+    "signaltap_tags_written_total",
+    "Tag writes, by outcome",
+    ["controller", "status"]
+)
+TAG_CACHE_LOOKUPS = Counter(
+    "signaltap_tag_cache_lookups_total",
+    "Tags requested through the shared reader, by whether they were served from cache, joined an in-flight read or read",
+    ["controller", "result"]
+)
+POOL_ACQUISITIONS = Counter(
+    "signaltap_pool_acquisitions_total",
+    "Pooled PLC session checkouts, by whether the session was reused or (re)opened",
+    ["controller", "outcome"]
+)
+EXECUTOR_WAIT_SECONDS = Histogram(
+    "signaltap_plc_executor_wait_seconds",
+    "Time a PLC operation waited for a controller worker thread",
+    ["controller"],
+    buckets=LATENCY_BUCKETS
+)
+EXECUTOR_RUN_SECONDS = Histogram(
+    "signaltap_plc_executor_run_seconds",
+    "Time a PLC operation spent running on a controller worker thread",
+    ["controller"],
+    buckets=LATENCY_BUCKETS
+)
+EXECUTOR_DEADLINES_EXCEEDED = Counter(
+    "signaltap_plc_deadline_exceeded_total",
+    "PLC operations abandoned because their deadline passed",
+    ["controller"]
+)
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "signaltap_plc_queue_depth",
+    "PLC operations waiting for a controller slot, by priority class",
+    ["controller", "priority"],
+    multiprocess_mode="livesum"
+)
+EXECUTOR_REJECTED = Counter(
+    "signaltap_plc_rejected_total",
+    "PLC operations turned away because their priority class queue was full",
+    ["controller", "priority"]
+)
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "signaltap_event_loop_lag_seconds",
+    "How late the event loop woke up a timer, i.e. time spent blocked",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+SCAN_CYCLE_SECONDS = Histogram(
+    "signaltap_scan_cycle_seconds",
+    "Duration of one subscription scan cycle",
+    ["controller", "rate_ms"],
+    buckets=LATENCY_BUCKETS
+)
+SCAN_OVERRUNS = Counter(
+    "signaltap_scan_overruns_total",
+    "Scan cycles that took longer than their period",
+    ["controller", "rate_ms"]
+)
+SCAN_ACHIEVED_PERIOD_SECONDS = Gauge(
+    "signaltap_scan_achieved_period_seconds",
+    "Smoothed time between the starts of consecutive scan cycles",
+    ["controller", "rate_ms"],
+    multiprocess_mode="livemax"
+)
+
+def exposition() -> bytes:
+    """
+    Current metrics in the Prometheus text format
+
+    In multiprocess mode (``PROMETHEUS_MULTIPROC_DIR`` set for every
+    process), these are the metrics of all processes combined, whichever
+    worker answers the scrape; otherwise those of this process only.
+    """
+    if not os.getenv(MULTIPROCESS_DIR_VARIABLE):
+        return generate_latest()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+def process_exited():
+    """Drop this process's live gauges from the combined metrics; call on shutdown"""
+    if os.getenv(MULTIPROCESS_DIR_VARIABLE):
+        multiprocess.mark_process_dead(os.getpid())
+
+def controller_label(ip: str, slot: int) -> str:
+    """Label value identifying a controller, matching the historian's naming"""
+    return f"{ip}/{slot}"
+
+def key_label(key: Any) -> str:
+    """Controller label for a connection pool or executor key"""
+    if isinstance(key, tuple) and len(key) >= 2:
+        return controller_label(key[0], key[1])
+    return str(key)
+
+def cip_status_name(status: Any) -> str:
+    """Readable name for a CIP general status as pylogix reports it"""
+    if isinstance(status, int):
+        return Response.get_error_code(status)
+    return type(status).__name__ if isinstance(status, Exception) else str(status)
+
+def instrument_plc(plc, controller: str):
+    """
+    Time every CIP round trip a pylogix PLC object makes
+
+    pylogix funnels every request, connected or not, through ``conn.send``,
+    which returns the reply's general status alongside its data. Wrapping it
+    on the instance gives per-request latency and error codes for reads,
+    writes, tag list uploads and health probes alike without touching pylogix.
+
+    Args:
+        plc: pylogix PLC object
+        controller: Controller label, see ``controller_label``
+    """
+    send = plc.conn.send
+    round_trip = PLC_ROUND_TRIP_SECONDS.labels(controller)
+
+    @functools.wraps(send)
+    def timed_send(*args, **kwargs) -> Tuple[Any, Optional[bytes]]:
+        started = time.perf_counter()
+        status, data = send(*args, **kwargs)
+        round_trip.observe(time.perf_counter() - started)
+        if status not in CIP_OK_STATUSES:
+            PLC_CIP_ERRORS.labels(controller, cip_status_name(status)).inc()
+        return status, data
+
+    plc.conn.send = timed_send
+
+def record_tag_reads(controller: str, responses: list):
+    """
+    Count tag values read and per-tag error statuses
+
+    Args:
+        controller: Controller label, see ``controller_label``
+        responses: pylogix Responses for the tags that were read
+    """
+    TAGS_READ.labels(controller).inc(len(responses))
+    for response in responses:
+        if response.Status != "Success":
+            TAG_READ_ERRORS.labels(controller, cip_status_name(response.Status)).inc()
+
+async def monitor_event_loop(interval: float = 0.25):
+    """
+    Measure how long the event loop is blocked
+
+    Sleeps for ``interval`` in a loop and records how much later than asked
+    it actually woke up. Anything doing blocking work on the loop thread
+    (a pylogix call that escaped the executor, heavy serialization) shows up
+    as lag.
+
+    Args:
+        interval: Seconds between samples
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag = loop.time() - started - interval
+        EVENT_LOOP_LAG_SECONDS.observe(max(lag, 0.0))
+        if lag > 1.0:
+            logger.warning(f"Event loop was blocked for {lag * 1000:.0f} ms")
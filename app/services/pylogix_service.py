@@ -1,94 +1,80 @@
 from pylogix import PLC
-from typing import List, Dict, Any, Optional
+from pylogix.lgx_response import Response
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from contextlib import contextmanager
+import copy
+import itertools
 import logging
 from datetime import datetime
 from app.models.tag import PLCTag, TagDataType, PLCConnectionConfig
+from app.services.connection_pool import PLCConnectionPool, PooledConnection
+from app.services.tag_cache import TagCache, TagDatabase
+from app.services.tag_decoder import TagDecoder
+from app.services.read_planner import ReadPlanner
+from app.services.tag_writer import TagWrite, TagWriteValidator, read_back_matches
+from app.services import tag_metadata
+from app.services import metrics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class PylogixService:
-    """Service class for handling PLC operations using pylogix"""
+class PLCSession:
+    """
+    Request-scoped handle on one controller's pooled session
     
-    def __init__(self):
-        self.plc = None
-        self.connected = False
+    Handles are created by ``PylogixService.session()`` and hold that
+    controller's connection lock for the duration of the ``with`` block, so
+    concurrent requests never share or clobber each other's PLC state.
+    """
     
-    def connect(self, config: PLCConnectionConfig) -> bool:
-        """
-        Connect to a PLC using the provided configuration
-        
-        Args:
-            config: PLCConnectionConfig object with connection details
-            
-        Returns:
-            bool: True if connection successful, False otherwise
-        """
-        try:
-            self.plc = PLC()
-            self.plc.IPAddress = config.ip_address
-            self.plc.ProcessorSlot = config.slot
-            self.plc.Micro800 = config.micro800
-            
-            # Test connection
-            response = self.plc.GetTagList()
-            if response.Status == "Success":
-                self.connected = True
-                logger.info(f"Successfully connected to PLC at {config.ip_address}")
-                return True
-            else:
-                logger.error(f"Failed to connect to PLC: {response.Status}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Error connecting to PLC: {str(e)}")
-            return False
+    def __init__(self, service: "PylogixService", config: PLCConnectionConfig, connection: PooledConnection):
+        self.service = service
+        self.config = config
+        self.connection = connection
     
-    def disconnect(self):
-        """Disconnect from the PLC"""
-        if self.plc:
-            self.plc.Close()
-            self.connected = False
-            logger.info("Disconnected from PLC")
+    @property
+    def plc(self):
+        return self.connection.plc
     
-    def get_all_tags(self) -> List[PLCTag]:
+    def get_all_tags(self, refresh: bool = False) -> List[PLCTag]:
         """
         Get all tags from the connected PLC
         
+        The tag list comes from the tag cache and is only uploaded again when
+        the controller reports a program/tag change or a refresh is requested.
+        
+        Args:
+            refresh: Force a fresh tag list upload (default: False)
+        
         Returns:
             List[PLCTag]: List of all PLC tags
         """
-        if not self.connected or not self.plc:
-            raise Exception("Not connected to PLC")
-        
         try:
-            response = self.plc.GetTagList()
-            
-            if response.Status != "Success":
-                raise Exception(f"Failed to get tag list: {response.Status}")
+            database = self.service.tag_cache.get(self.config, refresh=refresh)
             
             tags = []
-            for tag_info in response.Value:
-                # Convert pylogix tag info to our PLCTag model
+            for tag_info in database.tags:
+                # Convert cached tag info to our PLCTag model
+                tag_type = self.service._map_tag_type(tag_info["type"])
+                if tag_info["struct"] and tag_type == TagDataType.UNKNOWN:
+                    tag_type = TagDataType.STRUCT
                 tag = PLCTag(
-                    name=tag_info.TagName,
-                    tag_type=self._map_tag_type(tag_info.DataType),
-                    description=getattr(tag_info, 'Description', None),
-                    address=getattr(tag_info, 'Address', None),
-                    is_array=hasattr(tag_info, 'ArrayDimensions') and tag_info.ArrayDimensions is not None,
-                    is_struct=tag_info.DataType == 'STRUCT'
+                    name=tag_info["name"],
+                    tag_type=tag_type,
+                    is_array=bool(tag_info["array"]),
+                    is_struct=bool(tag_info["struct"])
                 )
                 
                 # Handle array dimensions if present
-                if hasattr(tag_info, 'ArrayDimensions') and tag_info.ArrayDimensions:
-                    tag.array_dimensions = tag_info.ArrayDimensions
+                if tag_info["array"]:
+                    tag.array_dimensions = [tag_info["size"]]
                 
                 tags.append(tag)
             
             logger.info(f"Retrieved {len(tags)} tags from PLC")
             return tags
-            
+        
         except Exception as e:
             logger.error(f"Error getting tags: {str(e)}")
             raise
@@ -99,19 +85,17 @@ class PylogixService:
         
         Args:
             tag_names: List of tag names to read
-            
+        
         Returns:
             Dict[str, Any]: Dictionary mapping tag names to their values
         """
-        if not self.connected or not self.plc:
-            raise Exception("Not connected to PLC")
-        
         try:
+            database = self.service.tag_cache.peek(self.config)
+            responses = self.service.pool.run(self.config, lambda plc: self.service._read_typed(plc, tag_names, database))
+            metrics.record_tag_reads(metrics.controller_label(self.config.ip_address, self.config.slot), responses)
             results = {}
             
-            for tag_name in tag_names:
-                response = self.plc.Read(tag_name)
-                
+            for tag_name, response in zip(tag_names, responses):
                 if response.Status == "Success":
                     results[tag_name] = response.Value
                 else:
@@ -119,7 +103,7 @@ class PylogixService:
                     logger.warning(f"Failed to read tag {tag_name}: {response.Status}")
             
             return results
-            
+        
         except Exception as e:
             logger.error(f"Error reading tags: {str(e)}")
             raise
@@ -131,15 +115,12 @@ class PylogixService:
         Args:
             tag_name: Name of the tag to write to
             value: Value to write
-            
+        
         Returns:
             bool: True if write successful, False otherwise
         """
-        if not self.connected or not self.plc:
-            raise Exception("Not connected to PLC")
-        
         try:
-            response = self.plc.Write(tag_name, value)
+            response = self.service.pool.run(self.config, lambda plc: plc.Write(tag_name, value))
             
             if response.Status == "Success":
                 logger.info(f"Successfully wrote {value} to tag {tag_name}")
@@ -147,11 +128,132 @@ class PylogixService:
             else:
                 logger.error(f"Failed to write to tag {tag_name}: {response.Status}")
                 return False
-                
+        
         except Exception as e:
             logger.error(f"Error writing to tag {tag_name}: {str(e)}")
             return False
     
+    def get_plc_info(self) -> Dict[str, Any]:
+        """
+        Get information about the connected PLC
+        
+        Returns:
+            Dict[str, Any]: PLC information
+        """
+        try:
+            # Device properties use unconnected messaging, which would tear down
+            # the pooled Forward Open, so they go over a short-lived session
+            with PLC(self.config.ip_address, self.config.slot, self.config.timeout, self.config.micro800) as plc:
+                response = plc.GetDeviceProperties()
+            
+            if response.Status == "Success":
+                return {
+                    "ip_address": self.config.ip_address,
+                    "slot": self.config.slot,
+                    "device_name": getattr(response.Value, 'DeviceName', 'Unknown'),
+                    "product_name": getattr(response.Value, 'ProductName', 'Unknown'),
+                    "revision": getattr(response.Value, 'Revision', 'Unknown'),
+                    "serial_number": getattr(response.Value, 'SerialNumber', 'Unknown')
+                }
+            else:
+                return {
+                    "ip_address": self.config.ip_address,
+                    "slot": self.config.slot,
+                    "error": response.Status
+                }
+        
+        except Exception as e:
+            logger.error(f"Error getting PLC info: {str(e)}")
+            return {
+                "ip_address": self.config.ip_address,
+                "slot": self.config.slot,
+                "error": str(e)
+            }
+
+class TagReadColumns:
+    """
+    Tag read results as parallel name, value and status lists with one timestamp
+    
+    Iterating yields the usual per-tag result dicts, so consumers of
+    ``read_tags`` results (like the historian) accept it as-is and only build
+    the dicts when they actually need them. Results assembled from several
+    reads (e.g. partly served from a cache) carry per-tag ``timestamps``, and
+    ``timestamp`` is then the oldest of them. Results returned by the shared
+    reader carry the last-value ``version`` they are current with.
+    """
+    
+    __slots__ = ("names", "values", "statuses", "timestamp", "timestamps", "version")
+    
+    def __init__(
+        self,
+        names: List[str],
+        values: List[Any],
+        statuses: List[str],
+        timestamp: str,
+        timestamps: Optional[List[str]] = None,
+        version: Optional[int] = None
+    ):
+        self.names = names
+        self.values = values
+        self.statuses = statuses
+        self.timestamp = timestamp
+        self.timestamps = timestamps
+        self.version = version
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        timestamps = self.timestamps or itertools.repeat(self.timestamp)
+        for name, value, status, timestamp in zip(self.names, self.values, self.statuses, timestamps):
+            yield {"name": name, "value": value, "status": status, "timestamp": timestamp}
+
+class PylogixService:
+    """
+    Service class for handling PLC operations using pylogix
+    
+    The service holds no per-request state: sessions live in the connection
+    pool (one per controller, each with its own lock) and requests work on
+    them through ``session()`` handles or the ip-based helper methods.
+    """
+    
+    def __init__(self, pool: Optional[PLCConnectionPool] = None, tag_cache: Optional[TagCache] = None):
+        self.pool = pool or PLCConnectionPool()
+        self.tag_cache = tag_cache or TagCache(self.pool)
+    
+    @contextmanager
+    def session(self, config: PLCConnectionConfig) -> Iterator[PLCSession]:
+        """
+        Open a request-scoped handle on a controller's pooled session
+        
+        Args:
+            config: PLCConnectionConfig object with connection details
+        
+        Raises:
+            Exception: If the controller cannot be reached
+        """
+        with self.pool.session(config) as connection:
+            yield PLCSession(self, config, connection)
+    
+    def test_connection(self, config: PLCConnectionConfig) -> bool:
+        """
+        Check that a PLC can be reached
+        
+        Args:
+            config: PLCConnectionConfig object with connection details
+        
+        Returns:
+            bool: True if connection successful, False otherwise
+        """
+        try:
+            self.pool.acquire(config)
+            logger.info(f"Successfully connected to PLC at {config.ip_address}")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Error connecting to PLC: {str(e)}")
+            return False
+    
     def _map_tag_type(self, pylogix_type: str) -> TagDataType:
         """
         Map pylogix data types to our TagDataType enum
@@ -181,51 +283,15 @@ class PylogixService:
         
         return type_mapping.get(pylogix_type.upper(), TagDataType.UNKNOWN)
     
-    def get_plc_info(self) -> Dict[str, Any]:
-        """
-        Get information about the connected PLC
-        
-        Returns:
-            Dict[str, Any]: PLC information
-        """
-        if not self.connected or not self.plc:
-            raise Exception("Not connected to PLC")
-        
-        try:
-            # Get device properties
-            response = self.plc.GetDeviceProperties()
-            
-            if response.Status == "Success":
-                return {
-                    "ip_address": self.plc.IPAddress,
-                    "slot": self.plc.ProcessorSlot,
-                    "device_name": getattr(response.Value, 'DeviceName', 'Unknown'),
-                    "product_name": getattr(response.Value, 'ProductName', 'Unknown'),
-                    "revision": getattr(response.Value, 'Revision', 'Unknown'),
-                    "serial_number": getattr(response.Value, 'SerialNumber', 'Unknown')
-                }
-            else:
-                return {
-                    "ip_address": self.plc.IPAddress,
-                    "slot": self.plc.ProcessorSlot,
-                    "error": response.Status
-                }
-                
-        except Exception as e:
-            logger.error(f"Error getting PLC info: {str(e)}")
-            return {
-                "ip_address": self.plc.IPAddress if self.plc else None,
-                "slot": self.plc.ProcessorSlot if self.plc else None,
-                "error": str(e)
-            }
-    
-    def get_all_tags_simple(self, ip: str, slot: int = 0) -> List[Dict[str, str]]:
+    def get_all_tags_simple(self, ip: str, slot: int = 0, refresh: bool = False, timeout: int = 10) -> List[Dict[str, str]]:
         """
         Get all tags from a PLC and return them in a simple format
         
         Args:
             ip: PLC IP address
             slot: PLC processor slot (default: 0)
+            refresh: Force a fresh tag list upload (default: False)
+            timeout: Socket timeout in seconds (default: 10)
             
         Returns:
             List[Dict[str, str]]: List of tags with name and type
@@ -235,40 +301,28 @@ class PylogixService:
             config = PLCConnectionConfig(
                 ip_address=ip,
                 slot=slot,
-                timeout=10
+                timeout=timeout
             )
             
-            # Connect to PLC
-            if not self.connect(config):
-                raise Exception(f"Failed to connect to PLC at {ip}")
-            
-            # Get all tags
-            response = self.plc.GetTagList()
-            
-            if response.Status != "Success":
-                raise Exception(f"Failed to get tag list: {response.Status}")
+            # Get all tags from the tag cache
+            database = self.tag_cache.get(config, refresh=refresh)
             
             tags = []
-            for tag_info in response.Value:
+            for tag_info in database.tags:
                 tag = {
-                    "name": tag_info.TagName,
-                    "type": tag_info.DataType
+                    "name": tag_info["name"],
+                    "type": tag_info["type"]
                 }
                 tags.append(tag)
             
-            # Disconnect from PLC
-            self.disconnect()
-            
             logger.info(f"Retrieved {len(tags)} tags from PLC at {ip}")
             return tags
             
         except Exception as e:
             logger.error(f"Error getting tags from PLC at {ip}: {str(e)}")
-            # Ensure we disconnect on error
-            self.disconnect()
             raise
     
-    def read_tags(self, ip: str, tags: List[str], slot: int = 0) -> List[Dict[str, Any]]:
+    def read_tags(self, ip: str, tags: List[str], slot: int = 0, timeout: int = 10) -> List[Dict[str, Any]]:
         """
         Read live values for a list of tags from a PLC
         
@@ -276,66 +330,341 @@ class PylogixService:
             ip: PLC IP address
             tags: List of tag names to read
             slot: PLC processor slot (default: 0)
+            timeout: Socket timeout in seconds (default: 10)
             
         Returns:
             List[Dict[str, Any]]: List of tag read results with name, value, status, and timestamp
         """
+        return list(self.read_tag_columns(ip, tags, slot, timeout))
+    
+    def read_tag_columns(
+        self,
+        ip: str,
+        tags: List[str],
+        slot: int = 0,
+        timeout: int = 10,
+        micro800: bool = False
+    ) -> TagReadColumns:
+        """
+        Read live values for a list of tags from a PLC into parallel columns
+        
+        Same read as ``read_tags`` without building a dict per tag, for
+        callers that serialize large results column by column.
+        
+        Args:
+            ip: PLC IP address
+            tags: List of tag names to read
+            slot: PLC processor slot (default: 0)
+            timeout: Socket timeout in seconds (default: 10)
+            micro800: Whether the PLC is a Micro800 (default: False)
+            
+        Returns:
+            TagReadColumns: Names, values and statuses sharing one timestamp
+        """
         try:
             # Create connection config
             config = PLCConnectionConfig(
                 ip_address=ip,
                 slot=slot,
-                timeout=10
+                timeout=timeout,
+                micro800=micro800
             )
             
-            # Connect to PLC
-            if not self.connect(config):
-                raise Exception(f"Failed to connect to PLC at {ip}")
+            # Read all tags over a pooled session, packed into Multiple Service Packets,
+            # with arrays and UDTs decoded from the cached tag database when we have one
+            database = self.tag_cache.peek(config)
+            
+            def read(plc):
+                self._prime(plc, config, database, tags)
+                return self._read_typed(plc, tags, database)
+            
+            responses = self.pool.run(config, read)
+            metrics.record_tag_reads(metrics.controller_label(ip, slot), responses)
             
-            results = []
             timestamp = datetime.utcnow().isoformat()
+            values = []
+            statuses = []
             
-            # Read each tag individually
-            for tag_name in tags:
-                try:
-                    response = self.plc.Read(tag_name)
-                    
-                    if response.Status == "Success":
-                        result = {
-                            "name": tag_name,
-                            "value": response.Value,
-                            "status": "Success",
-                            "timestamp": timestamp
-                        }
-                    else:
-                        result = {
-                            "name": tag_name,
-                            "value": None,
-                            "status": "Error",
-                            "timestamp": timestamp
-                        }
-                        logger.warning(f"Failed to read tag {tag_name}: {response.Status}")
-                    
-                    results.append(result)
-                    
-                except Exception as e:
-                    logger.error(f"Error reading tag {tag_name}: {str(e)}")
-                    result = {
-                        "name": tag_name,
-                        "value": None,
-                        "status": "Error",
-                        "timestamp": timestamp
-                    }
-                    results.append(result)
+            for tag_name, response in zip(tags, responses):
+                if response.Status == "Success":
+                    values.append(response.Value)
+                    statuses.append("Success")
+                else:
+                    values.append(None)
+                    statuses.append("Error")
+                    logger.warning(f"Failed to read tag {tag_name}: {response.Status}")
+            
+            logger.info(f"Read {len(values)} tags from PLC at {ip}")
+            return TagReadColumns(list(tags), values, statuses, timestamp)
+            
+        except Exception as e:
+            logger.error(f"Error reading tags from PLC at {ip}: {str(e)}")
+            raise 
+    
+    def write_tags(
+        self,
+        ip: str,
+        writes: List[Tuple[str, Any]],
+        slot: int = 0,
+        timeout: int = 10,
+        micro800: bool = False,
+        verify: bool = False,
+        rollback_on_error: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Write many tags at once, checked against the cached tag database
+        
+        Every value is validated before anything is sent; if any write is
+        invalid, nothing is written. Scalar writes are packed into Multiple
+        Service Packets, so a recipe of hundreds of parameters takes a few
+        round trips. With ``rollback_on_error`` the current values are read
+        first and restored if any write fails; with ``verify`` the tags are
+        read back and compared with what was written.
+        
+        Args:
+            ip: PLC IP address
+            writes: (tag name, value) pairs, in order
+            slot: PLC processor slot (default: 0)
+            timeout: Socket timeout in seconds (default: 10)
+            micro800: Whether the PLC is a Micro800 (default: False)
+            verify: Read the tags back after writing (default: False)
+            rollback_on_error: Restore the previous values if any write fails (default: False)
+            
+        Returns:
+            List[Dict[str, Any]]: Per-tag name, value, status, error and read_back
+        """
+        config = PLCConnectionConfig(
+            ip_address=ip,
+            slot=slot,
+            timeout=timeout,
+            micro800=micro800
+        )
+        database = self.tag_cache.get(config)
+        validator = TagWriteValidator(database)
+        
+        checked: List[Optional[TagWrite]] = []
+        errors: List[Optional[str]] = []
+        seen = set()
+        for tag_name, value in writes:
+            try:
+                if tag_name in seen:
+                    raise ValueError(f"{tag_name} is written more than once")
+                seen.add(tag_name)
+                checked.append(validator.check(tag_name, value))
+                errors.append(None)
+            except ValueError as e:
+                checked.append(None)
+                errors.append(str(e))
+        
+        if any(errors):
+            return [
+                self._write_result(tag_name, value, "Invalid" if error else "Skipped", error)
+                for (tag_name, value), error in zip(writes, errors)
+            ]
+        
+        def write(plc):
+            self._prime(plc, config, database, [w.name for w in checked])
+            previous = self._read_typed(plc, [w.name for w in checked], database) if rollback_on_error else None
+            responses = self._write_batched(plc, checked)
+            failed = any(response.Status != "Success" for response in responses)
             
-            # Disconnect from PLC
-            self.disconnect()
+            results = []
+            for w, response in zip(checked, responses):
+                if response.Status == "Success":
+                    results.append(self._write_result(w.name, w.value, "Success"))
+                else:
+                    results.append(self._write_result(w.name, w.value, "Error", str(response.Status)))
             
-            logger.info(f"Read {len(results)} tags from PLC at {ip}")
+            if failed and previous is not None:
+                self._roll_back(plc, checked, responses, previous, results)
+            elif verify:
+                read_back = self._read_back(plc, checked, database)
+                for w, response, result in zip(checked, read_back, results):
+                    if result["status"] != "Success":
+                        continue
+                    result["read_back"] = response.Value if response.Status == "Success" else None
+                    if response.Status != "Success" or not read_back_matches(w, response.Value):
+                        result["status"] = "Mismatch"
+                        result["error"] = f"Read back {result['read_back']!r}"
             return results
+        
+        results = self.pool.run(config, write)
+        controller = metrics.controller_label(ip, slot)
+        for result in results:
+            metrics.TAGS_WRITTEN.labels(controller, result["status"]).inc()
+        logger.info(f"Wrote {sum(result['status'] == 'Success' for result in results)} of {len(results)} tags to PLC at {ip}")
+        return results
+    
+    def _write_batched(self, plc, writes: List[TagWrite]) -> list:
+        """
+        Write validated values, scalars packed into Multiple Service Packets
+        
+        Args:
+            plc: pylogix PLC object with an open session
+            writes: Validated writes
+            
+        Returns:
+            list: One pylogix Response per write, in order
+        """
+        batch = [w for w in writes if w.batchable and not plc.Micro800]
+        responses = {}
+        if len(batch) > 1:
+            # pylogix splits the list into as many packets as the connection size needs
+            batch_responses = plc.Write([(w.name, w.value) for w in batch])
+            if len(batch_responses) != len(batch):
+                raise Exception(f"Expected {len(batch)} write replies, got {len(batch_responses)}")
+            responses.update(zip((w.name for w in batch), batch_responses))
+        
+        for w in writes:
+            if w.name not in responses:
+                responses[w.name] = plc.Write(w.name, w.value)
+        return [responses[w.name] for w in writes]
+    
+    def _read_back(self, plc, writes: List[TagWrite], database: TagDatabase) -> list:
+        """Read written tags, with as many elements as were written to each"""
+        # a list written from an element onwards is read back from that element
+        ranges = {w.name: len(w.value) for w in writes if isinstance(w.value, list) and w.name.endswith("]")}
+        responses = dict(zip(
+            [w.name for w in writes if w.name not in ranges],
+            self._read_typed(plc, [w.name for w in writes if w.name not in ranges], database)
+        ))
+        for tag_name, count in ranges.items():
+            responses[tag_name] = plc.Read(tag_name, count=count)
+        return [responses[w.name] for w in writes]
+    
+    def _roll_back(self, plc, writes: List[TagWrite], responses: list, previous: list, results: List[Dict[str, Any]]):
+        """Restore the values read before a partly failed write"""
+        restore = [
+            TagWrite(w.name, before.Value, w.type_name, w.batchable)
+            for w, response, before in zip(writes, responses, previous)
+            if response.Status == "Success" and before.Status == "Success"
+        ]
+        restored = {
+            w.name: response.Status == "Success"
+            for w, response in zip(restore, self._write_batched(plc, restore))
+        }
+        
+        for w, response, result in zip(writes, responses, results):
+            if response.Status != "Success":
+                continue
+            if restored.get(w.name):
+                result["status"] = "Rolled back"
+            else:
+                result["error"] = "Could not restore the previous value"
+        logger.warning(f"Rolled back {sum(restored.values())} tag writes after a failed write")
+    
+    @staticmethod
+    def _write_result(name: str, value: Any, status: str, error: Optional[str] = None) -> Dict[str, Any]:
+        return {"name": name, "value": value, "status": status, "error": error, "read_back": None}
+    
+    def _prime(self, plc, config: PLCConnectionConfig, database: Optional[TagDatabase], tags: List[str]):
+        """
+        Give pylogix the cached types and, while they are trusted, symbol instance ids
+        
+        Args:
+            plc: pylogix PLC object with an open session
+            config: PLCConnectionConfig for the controller
+            database: Cached tag database for the controller, if any
+            tags: Tag names about to be read or written
+        """
+        if database is None:
+            return
+        tag_metadata.prime(plc, database, tags, self.tag_cache.verified(config, plc))
+    
+    def _read_typed(self, plc, tags: List[str], database: Optional[TagDatabase]) -> list:
+        """
+        Read tags, fetching whole arrays and UDTs in one request each
+        
+        Scalars go through the batched multi-read. Arrays are requested with
+        their element count (pylogix fragments the reply if it is too large
+        for the connection) and UDTs are read as raw structures, then both are
+        decoded locally from the tag database templates. The read planner also
+        folds members, elements and bits that share a parent into one read of
+        the parent when that is cheaper, and slices their values out of it.
+        
+        Args:
+            plc: pylogix PLC object with an open session
+            tags: List of tag names to read
+            database: Cached tag database for the controller, if any
             
+        Returns:
+            list: One pylogix Response per requested tag, in request order
+        """
+        if database is None:
+            return self._read_batched(plc, tags)
+        
+        plan = ReadPlanner(TagDecoder(database)).plan(plc, tags)
+        batched, single = plan.batched, plan.single
+        replies = dict(zip([(tag_name, 0) for tag_name in batched], self._read_batched(plc, batched)))
+        for key in single:
+            replies[key] = plc.Read(key[0], count=key[1])
+        logger.debug(f"Planned {len(tags)} tags as {len(batched)} batched and {len(single)} single reads")
+        
+        responses = []
+        for tag_name in tags:
+            key, extract = plan.sources[tag_name]
+            # a reply can serve several tags, so each gets its own Response
+            response = copy.copy(replies[key])
+            response.TagName = tag_name
+            if extract is not None and response.Status == "Success":
+                try:
+                    response.Value = extract(response.Value)
+                except Exception as e:
+                    logger.warning(f"Could not decode tag {tag_name}: {str(e)}")
+                    response.Value = None
+                    response.Status = f"Decode error: {str(e)}"
+            responses.append(response)
+        
+        return responses
+    
+    def _read_batched(self, plc, tags: List[str]) -> list:
+        """
+        Read tags in as few round trips as the connection size allows
+        
+        The whole list goes to pylogix as one list read, which packs the tags
+        into Multiple Service Packets sized for the negotiated connection. If
+        the reply fails to parse (e.g. a UDT that pylogix cannot decode inside
+        a multi-read reply), the tags are read one by one so one bad tag does
+        not fail its neighbours.
+        
+        Args:
+            plc: pylogix PLC object with an open session
+            tags: List of tag names to read
+            
+        Returns:
+            list: One pylogix Response per requested tag, in request order
+        """
+        if not tags:
+            return []
+        
+        # Micro800 controllers do not support Multiple Service Packets
+        if plc.Micro800:
+            return [self._read_one(plc, tag_name) for tag_name in tags]
+        
+        try:
+            responses = plc.Read(tags)
+            if len(responses) != len(tags):
+                raise Exception(f"Expected {len(tags)} replies, got {len(responses)}")
+            return responses
+        except OSError:
+            # transport errors are handled by the pool's reconnect
+            raise
         except Exception as e:
-            logger.error(f"Error reading tags from PLC at {ip}: {str(e)}")
-            # Ensure we disconnect on error
-            self.disconnect()
-            raise 
\ No newline at end of file
+            logger.warning(f"Batched read of {len(tags)} tags failed, reading individually: {str(e)}")
+            return [self._read_one(plc, tag_name) for tag_name in tags]
+    
+    @staticmethod
+    def _read_one(plc, tag_name: str):
+        """
+        Read one tag, reporting a tag pylogix cannot handle as a failed read
+        
+        pylogix raises for some names instead of returning an error status,
+        e.g. a bit of a REAL array element.
+        """
+        try:
+            return plc.Read(tag_name)
+        except OSError:
+            raise
+        except Exception as e:
+            logger.warning(f"Could not read tag {tag_name}: {str(e)}")
+            return Response(tag_name, None, f"Read error: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,331 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import math
+import re
+from app.services.tag_decoder import TagDecoder, ATOMIC_TYPES, BOOL_TYPE, BOOL_ARRAY_TYPE
+from app.services import tag_metadata
+
+# Multiple Service Packet framing of one tag: offset word, service header and
+# element count in the request; offset word, reply header and type in the reply
+SERVICE_ITEM_SIZE = 8
+
+# Integer types whose bits can be addressed as "Word.3"
+WORD_TYPES = {0xc2, 0xc3, 0xc4, 0xc5, 0xc6, 0xc7, 0xc8, 0xc9, 0xd1, 0xd2, 0xd3}
+
+_INDEX_PATTERN = re.compile(r"\[[^\]]*\]$")
+_SINGLE_INDEX_PATTERN = re.compile(r"\[\s*(\d+)\s*\]")
+_MEMBER_PATTERN = re.compile(r"^([^\[\]]+)(?:\[\s*(\d+)\s*\])?$")
+
+# (tag name to request, element count); a count of 0 goes in a Multiple Service Packet
+ReadKey = Tuple[str, int]
+
+class ReadPlan:
+    """
+    The requests to send for a list of tags and how to get each tag's value back
+
+    ``sources`` maps every requested tag to the read that carries it and a
+    function extracting its value from that read's reply (None when the reply
+    value is the tag's value as-is).
+    """
+
+    __slots__ = ("sources",)
+
+    def __init__(self):
+        self.sources: Dict[str, Tuple[ReadKey, Optional[Callable[[Any], Any]]]] = {}
+
+    @property
+    def batched(self) -> List[str]:
+        """Names to read in Multiple Service Packets, in request order"""
+        return list(dict.fromkeys(key[0] for key, _ in self.sources.values() if not key[1]))
+
+    @property
+    def single(self) -> List[ReadKey]:
+        """Reads sent on their own (arrays, structures, slices), in request order"""
+        return list(dict.fromkeys(key for key, _ in self.sources.values() if key[1]))
+
+class ReadPlanner:
+    """
+    Decides how to read a list of tags using the cached tag and UDT layout
+
+    By default each tag is its own read: scalars ride in Multiple Service
+    Packets, whole arrays and structures are read on their own and decoded.
+    On top of that, requested tags that live in the same place are folded
+    into one read of their parent and sliced out locally:
+
+    - members of one structure instance (``Motor1.Speed``, ``Motor1.Fault``)
+      from a raw read of the structure,
+    - elements of one array (``Data[0]`` .. ``Data[99]``, BOOL arrays
+      included) from a read of the slice that spans them,
+    - bits of one integer (``Status.3``, ``Status.5``) from a single read of
+      the word.
+
+    Bits of a word are always read through the word. Structures and slices
+    cost a request of their own, so they are only read when that is cheaper
+    than the member reads they replace: those are charged the share of a
+    packet they take up, a parent read the whole packets it needs. A parent
+    that is requested anyway serves its members for free.
+    """
+
+    def __init__(self, decoder: TagDecoder):
+        self.decoder = decoder
+        self.database = decoder.database
+
+    def plan(self, plc, tags: List[str]) -> ReadPlan:
+        """
+        Plan the reads for a list of tags
+
+        Args:
+            plc: pylogix PLC object, for the connection size and request path sizes
+            tags: Tag names as requested by the client
+
+        Returns:
+            ReadPlan: Reads to send and where each tag's value comes from
+        """
+        plan = ReadPlan()
+        for tag_name in dict.fromkeys(tags):
+            plan.sources[tag_name] = self._default_source(tag_name)
+        requested = {key for key, _ in plan.sources.values()}
+
+        structures: Dict[str, List[Tuple[str, Dict[str, Any], int]]] = {}
+        structure_reads: Dict[str, Tuple[ReadKey, int, int]] = {}
+        arrays: Dict[str, List[Tuple[str, int, Optional[int]]]] = {}
+        for tag_name in plan.sources:
+            split = self._split(tag_name)
+            if split is None:
+                continue
+            record, base, index, members = split
+
+            if record["struct"] and members and (index is not None or not record["array"]):
+                location = self._locate(record, members)
+                if location is None:
+                    continue
+                instance = base if index is None else f"{base}[{index}]"
+                structures.setdefault(instance, []).append((tag_name, location[0], location[1]))
+                structure_reads.setdefault(instance, self._structure_read(record, base, index, requested))
+            elif not record["struct"] and record["array"] and index is not None and index < record["size"]:
+                bit = self._bit(record, members)
+                if members and bit is None:
+                    continue
+                arrays.setdefault(base, []).append((tag_name, index, bit))
+
+        connection_size = plc.ConnectionSize
+        for instance, items in structures.items():
+            key, base_offset, size = structure_reads[instance]
+            separate = self._separate_cost(plc, [
+                (tag_name, self.decoder.field_size(field)[0], plan.sources[tag_name][0]) for tag_name, field, _ in items
+            ])
+            if key in requested or self._read_cost(connection_size, size) < separate:
+                for tag_name, field, offset in items:
+                    plan.sources[tag_name] = (key, self._member_extractor(field, base_offset + offset))
+
+        for base, items in arrays.items():
+            record = self.database.tags_by_name[base]
+            for cluster in self._clusters(record, items, connection_size):
+                self._plan_slice(plc, plan, record, base, cluster, requested)
+
+        return plan
+
+    def _default_source(self, tag_name: str) -> Tuple[ReadKey, Optional[Callable[[Any], Any]]]:
+        word = self._word_bit(tag_name)
+        if word is not None:
+            word_name, bit = word
+            return (word_name, 0), lambda value: bool(value >> bit & 1)
+
+        read_plan = self.decoder.plan(tag_name)
+        if read_plan is None:
+            return (tag_name, 0), None
+        request_name, count = read_plan
+        return (request_name, count), lambda value: self.decoder.decode(tag_name, value, count)
+
+    def _word_bit(self, tag_name: str) -> Optional[Tuple[str, int]]:
+        """The integer word and bit a "Word.3" tag name refers to, if it is one"""
+        word_name, _, bit = tag_name.rpartition(".")
+        if not bit.isdigit() or not word_name:
+            return None
+        resolved = self.decoder.resolve(word_name)
+        if resolved is None:
+            return None
+        record, indexed = resolved
+        if record["struct"] or (record["array"] and not indexed) or record["symbol_type"] not in WORD_TYPES:
+            return None
+        if record["symbol_type"] == BOOL_ARRAY_TYPE and record["array"]:
+            # element of a BOOL array, not a word
+            return None
+        if int(bit) >= ATOMIC_TYPES[record["symbol_type"]][1] * 8:
+            return None
+        return word_name, int(bit)
+
+    def _split(self, tag_name: str) -> Optional[Tuple[Dict[str, Any], str, Optional[int], List[str]]]:
+        """Split a tag name into its tag record, base name, single index and member segments"""
+        segments = tag_name.split(".")
+        tags_by_name = self.database.tags_by_name
+
+        # Program-scoped names contain a dot, so match the longest known prefix
+        for split in range(len(segments), 0, -1):
+            head = ".".join(segments[:split])
+            base = _INDEX_PATTERN.sub("", head)
+            record = tags_by_name.get(base)
+            if record is None:
+                continue
+            if head == base:
+                return record, base, None, segments[split:]
+            match = _SINGLE_INDEX_PATTERN.fullmatch(head[len(base):])
+            if match is None:
+                return None
+            return record, base, int(match.group(1)), segments[split:]
+        return None
+
+    def _locate(self, record: Dict[str, Any], members: List[str]) -> Optional[Tuple[Dict[str, Any], int]]:
+        """Field record and byte offset of a member path within one structure instance"""
+        field, offset = dict(record, array=0, size=0), 0
+        for position, segment in enumerate(members):
+            if segment.isdigit():
+                # bit of an integer member, only as the last segment
+                if position != len(members) - 1 or field["struct"] or field["array"]:
+                    return None
+                if field["symbol_type"] not in WORD_TYPES:
+                    return None
+                bit = int(segment)
+                if bit >= ATOMIC_TYPES[field["symbol_type"]][1] * 8:
+                    return None
+                return self._bool_field(bit % 8), offset + bit // 8
+
+            if not field["struct"] or field["array"]:
+                return None
+            template = self.database.templates.get(field["data_type_value"])
+            if template is None or self.decoder._is_string_template(template):
+                return None
+            match = _MEMBER_PATTERN.match(segment)
+            if match is None:
+                return None
+            name, index = match.group(1), match.group(2)
+            member = next((f for f in template["fields"] if f["name"] == name), None)
+            if member is None:
+                return None
+            offset += member["offset"]
+            field = member
+
+            if index is not None:
+                index = int(index)
+                if not member["array"] or index >= member["size"]:
+                    return None
+                if member["struct"]:
+                    offset += index * self.decoder.structure_size(member["data_type_value"])
+                    field = dict(member, array=0, size=0)
+                elif member["symbol_type"] == BOOL_ARRAY_TYPE:
+                    offset += index // 8
+                    field = self._bool_field(index % 8)
+                else:
+                    offset += index * ATOMIC_TYPES.get(member["symbol_type"], ("", 0))[1]
+                    field = dict(member, array=0, size=0)
+        return field, offset
+
+    def _structure_read(
+        self,
+        record: Dict[str, Any],
+        base: str,
+        index: Optional[int],
+        requested: set
+    ) -> Tuple[ReadKey, int, int]:
+        """Read serving a structure instance: its key, the instance's offset in the reply and the size to read"""
+        size = self.decoder.structure_size(record["data_type_value"])
+        if index is None:
+            return (base, 1), 0, size
+        whole_array = (f"{base}[0]", max(1, record["size"] or 1))
+        if whole_array in requested:
+            return whole_array, index * size, size * whole_array[1]
+        return (f"{base}[{index}]", 1), 0, size
+
+    @staticmethod
+    def _bit(record: Dict[str, Any], members: List[str]) -> Optional[int]:
+        """Bit number of an "Array[3].5" reference, or None for plain elements"""
+        if not members:
+            return None
+        if len(members) != 1 or not members[0].isdigit() or record["symbol_type"] not in WORD_TYPES:
+            return None
+        if record["symbol_type"] == BOOL_ARRAY_TYPE:
+            return None
+        bit = int(members[0])
+        return bit if bit < ATOMIC_TYPES[record["symbol_type"]][1] * 8 else None
+
+    @staticmethod
+    def _clusters(record: Dict[str, Any], items: List[Tuple[str, int, Optional[int]]], connection_size: int) -> List[list]:
+        """Group requested elements into runs with no gap wider than a packet"""
+        element_size = ReadPlanner._element_size(record)
+        items = sorted(items, key=lambda item: item[1])
+        clusters = [[items[0]]]
+        for item in items[1:]:
+            if (item[1] - clusters[-1][-1][1]) * element_size > connection_size:
+                clusters.append([])
+            clusters[-1].append(item)
+        return clusters
+
+    def _plan_slice(self, plc, plan: ReadPlan, record: Dict[str, Any], base: str, cluster: list, requested: set):
+        """Read a run of array elements as one slice when that is cheaper than reading them one by one"""
+        first, last = cluster[0][1], cluster[-1][1]
+        whole_array = (f"{base}[0]", max(1, record["size"] or 1))
+        if whole_array in requested:
+            key, start = whole_array, 0
+        elif last > first:
+            key, start = (f"{base}[{first}]", last - first + 1), first
+            element_size = self._element_size(record)
+            if record["symbol_type"] == BOOL_ARRAY_TYPE:
+                size = -(-(first % 32 + key[1]) // 32) * 4
+            else:
+                size = key[1] * element_size
+            separate = self._separate_cost(plc, [
+                (tag_name, element_size, plan.sources[tag_name][0]) for tag_name, _, _ in cluster
+            ])
+            if self._read_cost(plc.ConnectionSize, size) >= separate:
+                return
+        else:
+            return
+
+        for tag_name, index, bit in cluster:
+            plan.sources[tag_name] = (key, self._element_extractor(index - start, bit))
+
+    def _separate_cost(self, plc, items: List[Tuple[str, int, ReadKey]]) -> int:
+        """
+        Bytes of connection capacity the items take when read on their own
+
+        Items in Multiple Service Packets are charged what they add to the
+        request and the reply (whichever is larger); items needing a request
+        of their own, and every item on Micro800 controllers, a whole packet.
+        """
+        connection_size = plc.ConnectionSize
+        request = reply = single = 0
+        for tag_name, data_size, key in items:
+            if key[1] or plc.Micro800:
+                single += self._read_cost(connection_size, data_size * max(key[1], 1))
+            else:
+                request += SERVICE_ITEM_SIZE + tag_metadata.path_size(plc, tag_name)
+                reply += SERVICE_ITEM_SIZE + data_size
+        return max(request, reply) + single
+
+    @staticmethod
+    def _read_cost(connection_size: int, size: int) -> int:
+        """Connection capacity used by a read of its own: the whole packets its reply needs"""
+        return max(1, math.ceil((size + SERVICE_ITEM_SIZE) / connection_size)) * connection_size
+
+    def _member_extractor(self, field: Dict[str, Any], offset: int) -> Callable[[Any], Any]:
+        def extract(raw: Any) -> Any:
+            if not isinstance(raw, (bytes, bytearray)):
+                raise ValueError(f"Expected raw structure data, got {type(raw).__name__}")
+            return self.decoder.decode_field(field, bytes(raw), offset)
+        return extract
+
+    @staticmethod
+    def _element_extractor(position: int, bit: Optional[int]) -> Callable[[Any], Any]:
+        def extract(values: Any) -> Any:
+            value = values[position] if isinstance(values, list) else values
+            return value if bit is None else bool(value >> bit & 1)
+        return extract
+
+    @staticmethod
+    def _element_size(record: Dict[str, Any]) -> int:
+        if record["symbol_type"] == BOOL_ARRAY_TYPE:
+            return 4
+        return ATOMIC_TYPES.get(record["symbol_type"], ("", 4))[1]
+
+    @staticmethod
+    def _bool_field(bit: int) -> Dict[str, Any]:
+        return {"symbol_type": BOOL_TYPE, "struct": 0, "array": 0, "size": 0, "bit": bit}
@@ -0,0 +1,138 @@
+from typing import Any, Dict, List, Optional
+from fnmatch import fnmatchcase
+import json
+import logging
+import os
+import threading
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Scan classes every installation starts with: name -> period in milliseconds
+DEFAULT_SCAN_CLASSES = {"fast": 100, "normal": 1000, "slow": 10000}
+DEFAULT_SCAN_CLASS = "normal"
+
+class ScanClassRegistry:
+    """
+    Named scan classes and the rules assigning tags to them
+
+    A rule maps a tag name or fnmatch-style pattern (``Motor_*.Speed``,
+    ``Program:Main.*``) to a scan class, optionally only for one controller.
+    The first matching rule wins, with exact names checked before patterns
+    and controller-specific rules before global ones; tags no rule matches
+    get the default class. The configuration is kept in a small JSON file so
+    it survives restarts.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("SIGNALTAP_SCAN_CLASSES_PATH", os.path.join(".cache", "scan_classes.json"))
+        self.classes: Dict[str, int] = dict(DEFAULT_SCAN_CLASSES)
+        self.default_class = DEFAULT_SCAN_CLASS
+        self.assignments: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._load()
+
+    def configure(self, classes: Dict[str, int], assignments: List[Dict[str, Any]], default_class: str):
+        """
+        Replace the scan classes and assignment rules
+
+        Args:
+            classes: Scan class name -> period in milliseconds
+            assignments: Rules with "pattern", "scan_class" and optional "ip"/"slot"
+            default_class: Class for tags no rule matches
+
+        Raises:
+            ValueError: If a rule or the default refers to an unknown class
+        """
+        self._apply(classes, assignments, default_class)
+        self._save()
+
+    def class_for(self, ip: str, slot: int, tag_name: str) -> str:
+        """
+        Find the scan class of a tag
+
+        Args:
+            ip: PLC IP address
+            slot: PLC processor slot
+            tag_name: Tag name
+
+        Returns:
+            str: Name of the scan class
+        """
+        with self._lock:
+            rules = [
+                rule for rule in self.assignments
+                if rule.get("ip") in (None, ip) and rule.get("slot") in (None, slot)
+            ]
+            default_class = self.default_class
+
+        # exact names first, then patterns; controller-specific rules win over global ones
+        rules.sort(key=lambda rule: (rule["pattern"] != tag_name, rule.get("ip") is None))
+        for rule in rules:
+            if rule["pattern"] == tag_name or fnmatchcase(tag_name, rule["pattern"]):
+                return rule["scan_class"]
+        return default_class
+
+    def period_ms(self, scan_class: str) -> int:
+        """Period of a scan class in milliseconds"""
+        with self._lock:
+            return self.classes.get(scan_class) or self.classes[self.default_class]
+
+    def partition(self, ip: str, slot: int, tags: List[str]) -> Dict[str, List[str]]:
+        """
+        Split tags by scan class
+
+        Args:
+            ip: PLC IP address
+            slot: PLC processor slot
+            tags: Tag names
+
+        Returns:
+            Dict[str, List[str]]: Tags per scan class name, in request order
+        """
+        partitions: Dict[str, List[str]] = {}
+        for tag_name in tags:
+            partitions.setdefault(self.class_for(ip, slot, tag_name), []).append(tag_name)
+        return partitions
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The configuration as stored and returned by the API"""
+        with self._lock:
+            return {
+                "classes": dict(self.classes),
+                "assignments": [dict(rule) for rule in self.assignments],
+                "default_class": self.default_class
+            }
+
+    def _apply(self, classes: Dict[str, int], assignments: List[Dict[str, Any]], default_class: str):
+        for name in [default_class] + [rule["scan_class"] for rule in assignments]:
+            if name not in classes:
+                raise ValueError(f"Unknown scan class '{name}'")
+        for name, period_ms in classes.items():
+            if period_ms <= 0:
+                raise ValueError(f"Scan class '{name}' needs a positive period")
+
+        with self._lock:
+            self.classes = dict(classes)
+            self.assignments = [dict(rule) for rule in assignments]
+            self.default_class = default_class
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                config = json.load(f)
+            self._apply(config["classes"], config.get("assignments", []), config.get("default_class", DEFAULT_SCAN_CLASS))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable scan class configuration {self.path}: {str(e)}")
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(self.to_dict(), f, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save scan class configuration to {self.path}: {str(e)}")
@@ -0,0 +1,448 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import itertools
+import logging
+import math
+from datetime import datetime
+from app.services.cached_reader import CachedTagReader
+from app.services.controller_executor import ControllerBusy, SCAN
+from app.services.controller_health import ControllerUnavailable
+from app.services.scan_classes import ScanClassRegistry
+from app.services import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+ScanGroupKey = Tuple[str, int, int]
+
+# Scan loops of one controller are spread over their periods by golden ratio steps
+STAGGER_STEP = (math.sqrt(5) - 1) / 2
+# Overrunning loops stretch their period up to this factor of the configured one
+MAX_BACKOFF = 8.0
+# Weight of the latest cycle in the achieved period average
+ACHIEVED_SMOOTHING = 0.2
+
+class Subscription:
+    """A client's interest in a set of tags on one controller"""
+
+    def __init__(
+        self,
+        subscription_id: int,
+        ip: str,
+        slot: int,
+        tags: List[str],
+        rate_ms: Optional[int],
+        deadband: float = 0.0,
+        queue_size: int = 100
+    ):
+        self.id = subscription_id
+        self.ip = ip
+        self.slot = slot
+        self.tags = list(dict.fromkeys(tags))
+        self.rate_ms = rate_ms
+        self.deadband = deadband
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.last_sent: Dict[str, Dict[str, Any]] = {}
+        # Tags per scan group; one group at rate_ms, or one per scan class period
+        self.groups: Dict[ScanGroupKey, List[str]] = {}
+        self.scan_classes: Dict[str, List[str]] = {}
+
+    def changes(self, results: Dict[str, Dict[str, Any]], tags: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Pick the results this subscriber has not seen yet
+
+        Numeric values only count as changed when they move by more than the
+        subscription deadband; any other value or status change is always sent.
+
+        Args:
+            results: Latest scan results keyed by tag name
+            tags: Tags to check (default: all of the subscription's tags)
+
+        Returns:
+            List[Dict[str, Any]]: Changed tag results
+        """
+        changed = []
+        for tag_name in tags if tags is not None else self.tags:
+            result = results.get(tag_name)
+            if result is None:
+                continue
+            previous = self.last_sent.get(tag_name)
+            if previous is None or self._has_changed(previous, result):
+                self.last_sent[tag_name] = result
+                changed.append(result)
+        return changed
+
+    def _has_changed(self, previous: Dict[str, Any], current: Dict[str, Any]) -> bool:
+        if previous["status"] != current["status"]:
+            return True
+        old, new = previous["value"], current["value"]
+        numeric = (int, float)
+        if (
+            isinstance(old, numeric) and isinstance(new, numeric)
+            and not isinstance(old, bool) and not isinstance(new, bool)
+        ):
+            return abs(new - old) > self.deadband
+        return old != new
+
+class ScanGroup:
+    """
+    One shared scan loop for every subscription to a controller at a given rate
+
+    Cycles run on a fixed timeline offset by ``phase``, so loops of the same
+    controller with related periods do not all fire at once. A loop whose
+    cycles overrun stretches its period (up to ``MAX_BACKOFF`` times the
+    configured one) and eases back once cycles fit again; ``achieved_period``
+    tracks the rate it actually delivers. A cycle that fails unexpectedly is
+    logged and reported to subscribers as an error message, and the loop
+    keeps scanning.
+    """
+
+    def __init__(self, key: ScanGroupKey, engine: "ScanEngine", phase: float = 0.0):
+        self.key = key
+        self.engine = engine
+        self.phase = phase
+        self.subscriptions: Dict[int, Subscription] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.cycle_count = 0
+        self.overrun_count = 0
+        self.backoff = 1.0
+        self.achieved_period: Optional[float] = None
+        # Last unexpected scan failure reported to subscribers, until a cycle succeeds
+        self.last_error: Optional[str] = None
+        self._wake = asyncio.Event()
+
+    @property
+    def period(self) -> float:
+        """Configured period in seconds"""
+        return self.key[2] / 1000.0
+
+    @property
+    def effective_period(self) -> float:
+        """Period in seconds after back-off"""
+        return self.period * self.backoff
+
+    @property
+    def tags(self) -> List[str]:
+        """Union of the tags every subscriber wants from this group, each listed once"""
+        seen: Set[str] = set()
+        tags = []
+        for subscription in self.subscriptions.values():
+            for tag_name in subscription.groups.get(self.key, ()):
+                if tag_name not in seen:
+                    seen.add(tag_name)
+                    tags.append(tag_name)
+        return tags
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    def wake(self):
+        """Scan right away, e.g. so a new subscriber gets its first values without waiting a period"""
+        self._wake.set()
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def _run(self):
+        ip, slot, rate_ms = self.key
+        loop = asyncio.get_running_loop()
+        controller = metrics.controller_label(ip, slot)
+        cycle_seconds = metrics.SCAN_CYCLE_SECONDS.labels(controller, str(rate_ms))
+        overruns = metrics.SCAN_OVERRUNS.labels(controller, str(rate_ms))
+        achieved = metrics.SCAN_ACHIEVED_PERIOD_SECONDS.labels(controller, str(rate_ms))
+        logger.info(f"Starting scan loop for PLC at {ip} (slot {slot}) every {rate_ms} ms")
+
+        epoch = self.engine.epoch(ip, slot)
+        # Only the interval between two cycles that both ran on schedule counts
+        # towards the achieved rate, not the first cycle or ones woken early
+        scheduled, last_scheduled = False, None
+        while self.subscriptions:
+            self._wake.clear()
+            started = loop.time()
+            if scheduled and last_scheduled is not None:
+                interval = started - last_scheduled
+                self.achieved_period = (
+                    interval if self.achieved_period is None
+                    else self.achieved_period + ACHIEVED_SMOOTHING * (interval - self.achieved_period)
+                )
+                achieved.set(self.achieved_period)
+            last_scheduled = started if scheduled else None
+
+            try:
+                await self._scan_once()
+                self.last_error = None
+            except Exception as e:
+                # keep scanning: ending the task would silently stop every subscriber's updates
+                logger.exception(f"Scan of PLC at {ip} failed unexpectedly")
+                detail = f"Scan of PLC at {ip} failed: {str(e)}"
+                if detail != self.last_error:
+                    self.last_error = detail
+                    for subscription in list(self.subscriptions.values()):
+                        self.engine.report(subscription, detail)
+            self.cycle_count += 1
+
+            elapsed = loop.time() - started
+            cycle_seconds.observe(elapsed)
+            if elapsed > self.effective_period:
+                self.overrun_count += 1
+                overruns.inc()
+                logger.warning(f"Scan of PLC at {ip} overran its {self.effective_period * 1000:.0f} ms period ({elapsed * 1000:.0f} ms)")
+            self._adapt(elapsed)
+
+            # Next slot on this loop's staggered timeline
+            period = self.effective_period
+            now = loop.time()
+            next_start = epoch + self.phase + math.ceil((now - epoch - self.phase) / period) * period
+            try:
+                await asyncio.wait_for(self._wake.wait(), max(next_start - now, 0))
+                scheduled = False
+            except asyncio.TimeoutError:
+                scheduled = True
+
+    def _adapt(self, elapsed: float):
+        """Back off after an overrun, recover gradually once cycles fit comfortably"""
+        previous = self.backoff
+        if elapsed > self.effective_period:
+            self.backoff = min(max(self.backoff * 1.5, elapsed * 1.2 / self.period), MAX_BACKOFF)
+        elif self.backoff > 1.0 and elapsed < self.effective_period / 2:
+            self.backoff = max(self.backoff * 0.9, 1.0)
+
+        if previous == 1.0 and self.backoff > 1.0:
+            ip, slot, rate_ms = self.key
+            logger.warning(f"Backing off {rate_ms} ms scan of PLC at {ip} (slot {slot}) to {self.effective_period * 1000:.0f} ms")
+        elif previous > 1.0 and self.backoff == 1.0:
+            ip, slot, rate_ms = self.key
+            logger.info(f"Scan of PLC at {ip} (slot {slot}) is back at its {rate_ms} ms period")
+
+    async def _scan_once(self):
+        ip, slot, rate_ms = self.key
+        tags = self.tags
+        if not tags:
+            return
+
+        try:
+            results = await self.engine.read(
+                ip,
+                tags,
+                slot,
+                client=f"scan:{rate_ms}",
+                max_age_ms=rate_ms * self.engine.max_age_periods
+            )
+        except ControllerBusy:
+            # the controller is saturated by more urgent requests: skip this
+            # cycle and keep the values subscribers already have
+            logger.debug(f"Scan of PLC at {ip} skipped a cycle, controller queue is full")
+            return
+        except Exception as e:
+            # a controller whose circuit breaker is open was not contacted at all
+            unavailable = isinstance(e, ControllerUnavailable)
+            if not unavailable:
+                logger.error(f"Scan of PLC at {ip} failed: {str(e)}")
+            timestamp = datetime.utcnow().isoformat()
+            results = [
+                {"name": tag_name, "value": None, "status": "Error", "timestamp": timestamp}
+                for tag_name in tags
+            ]
+            # successful reads are recorded by the reader; a controller whose
+            # breaker is open is not recorded again on every cycle
+            if self.engine.reader.historian and not unavailable:
+                self.engine.reader.historian.record(f"{ip}/{slot}", results)
+
+        by_name = {result["name"]: self.engine.normalize(result) for result in results}
+        for subscription in list(self.subscriptions.values()):
+            changed = subscription.changes(by_name, subscription.groups.get(self.key, []))
+            if changed:
+                self.engine.publish(subscription, changed)
+
+class ScanEngine:
+    """
+    Server-side subscription engine that shares PLC reads between viewers
+
+    Subscriptions to the same controller at the same rate are served by one
+    scan loop, so each tag is read once per period no matter how many clients
+    watch it, and each client only receives values that changed since the
+    last update it was sent.
+
+    A subscription without a fixed rate is split by scan class: each tag is
+    scanned at the period of the class the ``ScanClassRegistry`` assigns it,
+    with the tags of one class and controller batched into one loop.
+
+    With ``max_age_periods`` set, scans accept values that many periods old.
+    Behind a poller this keeps the tags polled once per period for every API
+    worker, and the workers' scan loops only read the shared value table.
+    """
+
+    def __init__(self, reader: CachedTagReader, scan_classes: Optional[ScanClassRegistry] = None, max_age_periods: int = 0):
+        self.reader = reader
+        self.scan_classes = scan_classes or ScanClassRegistry()
+        self.max_age_periods = max_age_periods
+        self.groups: Dict[ScanGroupKey, ScanGroup] = {}
+        self.subscriptions: Dict[int, Subscription] = {}
+        self._ids = itertools.count(1)
+        self._epochs: Dict[Tuple[str, int], float] = {}
+
+    async def subscribe(
+        self,
+        ip: str,
+        tags: List[str],
+        slot: int = 0,
+        rate_ms: Optional[int] = None,
+        deadband: float = 0.0
+    ) -> Subscription:
+        """
+        Register interest in a set of tags
+
+        Args:
+            ip: PLC IP address
+            tags: List of tag names to watch
+            slot: PLC processor slot (default: 0)
+            rate_ms: Scan period in milliseconds (default: per tag scan class)
+            deadband: Minimum numeric change that triggers an update
+
+        Returns:
+            Subscription: Handle whose queue receives changed values
+        """
+        subscription = Subscription(next(self._ids), ip, slot, tags, rate_ms, deadband)
+        self.subscriptions[subscription.id] = subscription
+        self._join_groups(subscription)
+        logger.info(f"Subscription {subscription.id} to {len(subscription.tags)} tags on PLC at {ip}")
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription):
+        """Remove a subscription, stopping scan loops nobody else uses"""
+        self.subscriptions.pop(subscription.id, None)
+        await self._leave_groups(subscription)
+        logger.info(f"Subscription {subscription.id} closed")
+
+    async def reassign(self):
+        """Re-split scan class subscriptions after the scan class configuration changed"""
+        for subscription in list(self.subscriptions.values()):
+            if subscription.rate_ms is None:
+                await self._leave_groups(subscription)
+                self._join_groups(subscription)
+
+    def epoch(self, ip: str, slot: int) -> float:
+        """Reference time the scan timelines of one controller are staggered against"""
+        return self._epochs.setdefault((ip, slot), asyncio.get_running_loop().time())
+
+    def _join_groups(self, subscription: Subscription):
+        ip, slot = subscription.ip, subscription.slot
+        if subscription.rate_ms is not None:
+            subscription.scan_classes = {}
+            subscription.groups = {(ip, slot, subscription.rate_ms): list(subscription.tags)}
+        else:
+            subscription.scan_classes = self.scan_classes.partition(ip, slot, subscription.tags)
+            subscription.groups = {}
+            for scan_class, tags in subscription.scan_classes.items():
+                key = (ip, slot, self.scan_classes.period_ms(scan_class))
+                subscription.groups.setdefault(key, []).extend(tags)
+
+        for key in subscription.groups:
+            group = self.groups.get(key)
+            if group is None:
+                siblings = sum(1 for other in self.groups if other[:2] == (ip, slot))
+                phase = (siblings * STAGGER_STEP % 1.0) * key[2] / 1000.0
+                group = self.groups[key] = ScanGroup(key, self, phase)
+            group.subscriptions[subscription.id] = subscription
+            group.start()
+            group.wake()
+
+    async def _leave_groups(self, subscription: Subscription):
+        for key in subscription.groups:
+            group = self.groups.get(key)
+            if group is None:
+                continue
+            group.subscriptions.pop(subscription.id, None)
+            if not group.subscriptions:
+                del self.groups[key]
+                await group.stop()
+        subscription.groups = {}
+
+    async def stop(self):
+        """Stop every scan loop"""
+        groups = list(self.groups.values())
+        self.groups.clear()
+        self.subscriptions.clear()
+        for group in groups:
+            await group.stop()
+
+    async def read(
+        self,
+        ip: str,
+        tags: List[str],
+        slot: int,
+        timeout: int = 10,
+        client: Optional[str] = None,
+        max_age_ms: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        Read tags through the shared reader, so scans and polls of the same tags coalesce
+
+        Scan reads queue behind writes and interactive reads on the controller.
+        """
+        return list(await self.reader.read(ip, tags, slot, timeout, max_age_ms, priority=SCAN, client=client))
+
+    def publish(self, subscription: Subscription, changed: List[Dict[str, Any]]):
+        """Queue an update for a subscriber, forcing a full resend if it has fallen behind"""
+        update = {
+            "type": "update",
+            "timestamp": changed[0]["timestamp"],
+            "values": [
+                {"name": result["name"], "value": result["value"], "status": result["status"]}
+                for result in changed
+            ]
+        }
+        try:
+            subscription.queue.put_nowait(update)
+        except asyncio.QueueFull:
+            logger.warning(f"Subscription {subscription.id} is not keeping up, dropping update")
+            subscription.last_sent.clear()
+
+    def report(self, subscription: Subscription, detail: str):
+        """Tell a subscriber its scan is failing; a subscriber that has fallen behind gets a full resend anyway"""
+        try:
+            subscription.queue.put_nowait({"type": "error", "detail": detail})
+        except asyncio.QueueFull:
+            subscription.last_sent.clear()
+
+    @staticmethod
+    def normalize(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Mark values that are not JSON values as 'Unreadable', as /read-tags does"""
+        if not isinstance(result["value"], (str, int, float, bool, list, dict)):
+            result = dict(result, value="Unreadable")
+        return result
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        Describe the active scan loops
+
+        Returns:
+            List[Dict[str, Any]]: One entry per scan group
+        """
+        return [
+            {
+                "ip_address": ip,
+                "slot": slot,
+                "rate_ms": rate_ms,
+                "scan_classes": sorted({
+                    scan_class
+                    for subscription in group.subscriptions.values()
+                    for scan_class in subscription.scan_classes
+                    if self.scan_classes.period_ms(scan_class) == rate_ms
+                }),
+                "subscriptions": len(group.subscriptions),
+                "tags": len(group.tags),
+                "cycles": group.cycle_count,
+                "overruns": group.overrun_count,
+                "effective_rate_ms": round(group.effective_period * 1000, 1),
+                "achieved_rate_ms": round(group.achieved_period * 1000, 1) if group.achieved_period else None
+            }
+            for (ip, slot, rate_ms), group in self.groups.items()
+        ]
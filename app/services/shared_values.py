@@ -0,0 +1,284 @@
+from datetime import datetime, timezone
+from struct import Struct
+from typing import Any, Optional, Tuple
+import mmap
+import os
+import tempfile
+import time
+import orjson
+
+# Table header: magic, layout version, slot size, capacity, generation
+HEADER = Struct("<4sIIIQ")
+HEADER_SIZE = 64
+MAGIC = b"STV1"
+LAYOUT_VERSION = 2
+
+# Slot header: sequence, value kind, status length, value length, read time
+# (UNIX seconds), slot generation
+SLOT_HEADER = Struct("<IBBHdI")
+SEQUENCE = Struct("<I")
+
+# How a slot's value bytes are encoded
+EMPTY, NONE, BOOL, INT, FLOAT, TEXT, JSON, OVERFLOW = range(8)
+
+INT_VALUE = Struct("<q")
+FLOAT_VALUE = Struct("<d")
+
+# A writer never holds a slot for long; give up on one that stays torn
+MAX_READ_ATTEMPTS = 1000
+
+# Retries before a reader starts yielding, so a writer that was descheduled
+# mid-update gets to finish it
+SPIN_READ_ATTEMPTS = 50
+
+def default_path() -> str:
+    """Table location: shared memory where the OS has it, the temp directory otherwise"""
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, "signaltap-values")
+
+class SharedValueTable:
+    """
+    Current tag values in a memory-mapped file, one fixed-size slot per tag id
+
+    The poller process creates the table and is its only writer; API worker
+    processes map the same file and read slots straight out of shared memory,
+    without a round trip to the poller. Each slot is guarded by a sequence
+    number (a seqlock): the writer makes it odd while it rewrites the slot and
+    even again afterwards, and a reader retries until it sees the same even
+    number before and after copying the slot, so it never returns a torn
+    value.
+
+    Booleans, integers and floats are stored natively; strings as UTF-8 and
+    arrays and structures as JSON. A value that does not fit its slot is
+    marked as overflowed and has to be fetched from the poller instead.
+
+    The header carries a generation that changes every time the poller
+    (re)creates the table, so readers know when the tag ids they were handed
+    out no longer apply. Each slot carries a generation of its own that
+    changes whenever the poller hands the slot to another tag; readers pass
+    the slot generation they were given along with the tag id, so they never
+    take one tag's value for another's.
+    """
+
+    def __init__(self, path: str, buffer: mmap.mmap, slot_size: int, capacity: int):
+        self.path = path
+        self.slot_size = slot_size
+        self.capacity = capacity
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+
+    @classmethod
+    def create(cls, path: Optional[str] = None, capacity: int = 65536, slot_size: int = 512) -> "SharedValueTable":
+        """
+        Create the table, replacing one from a previous run; called by the poller
+
+        A previous table is marked as retired before it is unlinked, so
+        workers that still have it mapped know to map the new one (shrinking
+        a file others have mapped would crash them instead).
+
+        Args:
+            path: File to map (default: ``SIGNALTAP_SHARED_VALUES_PATH`` or ``default_path()``)
+            capacity: Number of tag slots
+            slot_size: Bytes per slot, headers included
+        """
+        path = path or os.getenv("SIGNALTAP_SHARED_VALUES_PATH") or default_path()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        cls._retire(path)
+        size = HEADER_SIZE + capacity * slot_size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            buffer = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        HEADER.pack_into(buffer, 0, MAGIC, LAYOUT_VERSION, slot_size, capacity, time.time_ns())
+        return cls(path, buffer, slot_size, capacity)
+
+    @classmethod
+    def open(cls, path: Optional[str] = None) -> "SharedValueTable":
+        """
+        Map a table the poller created; called by API workers
+
+        Raises:
+            FileNotFoundError: If the poller has not created the table
+            ValueError: If the file is not a value table of this layout
+        """
+        path = path or os.getenv("SIGNALTAP_SHARED_VALUES_PATH") or default_path()
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            buffer = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        magic, version, slot_size, capacity, _ = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            buffer.close()
+            raise ValueError(f"{path} is not a SignalTap value table")
+        if len(buffer) < HEADER_SIZE + capacity * slot_size:
+            buffer.close()
+            raise ValueError(f"{path} is shorter than its header says, the poller may be recreating it")
+        return cls(path, buffer, slot_size, capacity)
+
+    @property
+    def generation(self) -> int:
+        """Changes whenever the poller recreates the table"""
+        return HEADER.unpack_from(self._buffer, 0)[4]
+
+    def is_current(self) -> bool:
+        """Whether the poller still writes to this mapping, i.e. it has not created a new table"""
+        return HEADER.unpack_from(self._buffer, 0)[0] == MAGIC
+
+    def write(self, tag_id: int, value: Any, status: str, timestamp: str) -> bool:
+        """
+        Store a tag's latest value; only the poller calls this
+
+        Args:
+            tag_id: Slot index
+            value: Decoded tag value
+            status: Read status, e.g. "Success"
+            timestamp: ISO timestamp of the read (UTC, as the service reports it)
+
+        Returns:
+            bool: False if the value did not fit the slot and was marked as overflowed
+        """
+        offset = self._offset(tag_id)
+        kind, encoded = self._encode(value)
+        status_bytes = status.encode("utf-8")[:255]
+        room = self.slot_size - SLOT_HEADER.size - len(status_bytes)
+        if len(encoded) > room:
+            kind, encoded = OVERFLOW, b""
+        read_at = datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc).timestamp()
+
+        sequence, *_, slot_generation = SLOT_HEADER.unpack_from(self._buffer, offset)
+        SEQUENCE.pack_into(self._buffer, offset, (sequence + 1) & 0xffffffff)
+        start = offset + SLOT_HEADER.size
+        self._buffer[start:start + len(status_bytes)] = status_bytes
+        start += len(status_bytes)
+        self._buffer[start:start + len(encoded)] = encoded
+        SLOT_HEADER.pack_into(
+            self._buffer, offset, (sequence + 1) & 0xffffffff, kind, len(status_bytes), len(encoded), read_at, slot_generation
+        )
+        SEQUENCE.pack_into(self._buffer, offset, (sequence + 2) & 0xffffffff)
+        return kind != OVERFLOW
+
+    def assign(self, tag_id: int) -> int:
+        """
+        Hand a slot to a new tag, emptying it; only the poller calls this
+
+        Returns:
+            int: The slot's new generation, which readers of the new tag pass to ``read``
+        """
+        offset = self._offset(tag_id)
+        sequence, *_, slot_generation = SLOT_HEADER.unpack_from(self._buffer, offset)
+        slot_generation = (slot_generation + 1) & 0xffffffff
+        SEQUENCE.pack_into(self._buffer, offset, (sequence + 1) & 0xffffffff)
+        SLOT_HEADER.pack_into(self._buffer, offset, (sequence + 1) & 0xffffffff, EMPTY, 0, 0, 0.0, slot_generation)
+        SEQUENCE.pack_into(self._buffer, offset, (sequence + 2) & 0xffffffff)
+        return slot_generation
+
+    def expire(self, tag_id: int):
+        """
+        Keep a tag's value from being served as fresh, e.g. after it was written;
+        only the poller calls this
+
+        The value stays in the slot with its read time set to zero, so no
+        ``max_age_ms`` accepts it until the tag is read again.
+        """
+        offset = self._offset(tag_id)
+        sequence, kind, status_length, value_length, _, slot_generation = SLOT_HEADER.unpack_from(self._buffer, offset)
+        if kind == EMPTY:
+            return
+        SEQUENCE.pack_into(self._buffer, offset, (sequence + 1) & 0xffffffff)
+        SLOT_HEADER.pack_into(
+            self._buffer, offset, (sequence + 1) & 0xffffffff, kind, status_length, value_length, 0.0, slot_generation
+        )
+        SEQUENCE.pack_into(self._buffer, offset, (sequence + 2) & 0xffffffff)
+
+    def read(self, tag_id: int, slot_generation: Optional[int] = None) -> Optional[Tuple[Any, str, float, bool]]:
+        """
+        Get a tag's latest value
+
+        Args:
+            tag_id: Slot index
+            slot_generation: Slot generation the tag id was handed out with;
+                if given, a slot that has since gone to another tag reads as
+                empty
+
+        Returns:
+            Optional[Tuple[Any, str, float, bool]]: Value, status, read time
+            (UNIX seconds) and whether the value overflowed its slot, or None
+            if the tag has not been read yet
+        """
+        offset = self._offset(tag_id)
+        for attempt in range(MAX_READ_ATTEMPTS):
+            if attempt >= SPIN_READ_ATTEMPTS:
+                time.sleep(0)
+            sequence, kind, status_length, value_length, read_at, current_generation = SLOT_HEADER.unpack_from(self._view, offset)
+            if sequence & 1:
+                continue
+            start = offset + SLOT_HEADER.size
+            status = bytes(self._view[start:start + status_length])
+            encoded = bytes(self._view[start + status_length:start + status_length + value_length])
+            if SEQUENCE.unpack_from(self._view, offset)[0] != sequence:
+                continue
+            if kind == EMPTY or slot_generation is not None and current_generation != slot_generation:
+                return None
+            return self._decode(kind, encoded), status.decode("utf-8"), read_at, kind == OVERFLOW
+        raise TimeoutError(f"Slot {tag_id} of {self.path} stayed busy")
+
+    def close(self):
+        """Unmap the table"""
+        self._view.release()
+        self._buffer.close()
+
+    @staticmethod
+    def _retire(path: str):
+        try:
+            fd = os.open(path, os.O_RDWR)
+        except FileNotFoundError:
+            return
+        try:
+            if os.fstat(fd).st_size >= HEADER_SIZE:
+                with mmap.mmap(fd, HEADER_SIZE) as buffer:
+                    buffer[:len(MAGIC)] = b"\x00" * len(MAGIC)
+        finally:
+            os.close(fd)
+        os.unlink(path)
+
+    def _offset(self, tag_id: int) -> int:
+        if not 0 <= tag_id < self.capacity:
+            raise IndexError(f"Tag id {tag_id} is outside the table ({self.capacity} slots)")
+        return HEADER_SIZE + tag_id * self.slot_size
+
+    @staticmethod
+    def _encode(value: Any) -> Tuple[int, bytes]:
+        if value is None:
+            return NONE, b""
+        if isinstance(value, bool):
+            return BOOL, b"\x01" if value else b"\x00"
+        if isinstance(value, int) and -2 ** 63 <= value < 2 ** 63:
+            return INT, INT_VALUE.pack(value)
+        if isinstance(value, float):
+            return FLOAT, FLOAT_VALUE.pack(value)
+        if isinstance(value, str):
+            return TEXT, value.encode("utf-8")
+        return JSON, orjson.dumps(value, default=str)
+
+    @staticmethod
+    def _decode(kind: int, encoded: bytes) -> Any:
+        if kind == BOOL:
+            return encoded == b"\x01"
+        if kind == INT:
+            return INT_VALUE.unpack(encoded)[0]
+        if kind == FLOAT:
+            return FLOAT_VALUE.unpack(encoded)[0]
+        if kind == TEXT:
+            return encoded.decode("utf-8")
+        if kind == JSON:
+            return orjson.loads(encoded)
+        return None
+
+def iso_timestamp(read_at: float) -> str:
+    """ISO timestamp (UTC, naive) of a slot's read time, as the service formats them"""
+    return datetime.fromtimestamp(read_at, timezone.utc).replace(tzinfo=None).isoformat()
@@ -0,0 +1,451 @@
+from typing import Any, Callable, Dict, List, Optional
+from struct import pack, unpack_from
+import json
+import logging
+import os
+import re
+import threading
+import time
+from app.models.tag import PLCConnectionConfig
+from app.services.connection_pool import PLCConnectionPool, ConnectionKey
+from app.services import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the persisted layout changes so stale files are ignored
+CACHE_FORMAT_VERSION = 2
+
+# Logix controller object attributes that change whenever a download or
+# online edit alters the program or tag database
+CHANGE_DETECTION_CLASS = 0xAC
+CHANGE_DETECTION_ATTRIBUTES = (1, 2, 3, 4, 10)
+
+# Tag list service status meaning "more tags follow in another reply"
+PARTIAL_TRANSFER = 0x06
+
+# pylogix's conn.send returns the whole reply packet. The CIP reply to a
+# connected request starts after the encapsulation header (24 bytes), the
+# interface handle (4), timeout (2), item count (2), connected address item
+# (8), connected data item header (4) and sequence count (2); pylogix reads
+# the general status two bytes further on
+CONNECTED_REPLY_START = 46
+
+# pylogix internals the streamed upload drives one reply at a time (the
+# version is pinned in requirements.txt); without them stream() falls back
+# to a plain GetTagList
+STREAMING_METHODS = ("_build_tag_list_request", "_parse_packet", "_get_udt")
+
+# Tags per page when a streamed tag list is served from the cache
+STREAM_PAGE_SIZE = 500
+
+# Hidden members Logix adds to a UDT to host its BOOL members; not user data
+HIDDEN_MEMBER_PREFIX = "ZZZZZZZZZZ"
+
+class TagDatabase:
+    """Snapshot of a controller's tag list and UDT templates"""
+
+    def __init__(
+        self,
+        tags: List[Dict[str, Any]],
+        templates: Dict[int, Dict[str, Any]],
+        signature: Optional[str] = None,
+        uploaded_at: Optional[float] = None
+    ):
+        self.tags = tags
+        self.templates = templates
+        self.signature = signature
+        self.uploaded_at = uploaded_at or time.time()
+        self.tags_by_name = {tag["name"]: tag for tag in tags}
+        self._symbol_instances: Optional[Dict[str, int]] = None
+
+    @property
+    def symbol_instances(self) -> Dict[str, int]:
+        """Symbol instance ids of controller-scoped tags, by name"""
+        if self._symbol_instances is None:
+            self._symbol_instances = {
+                tag["name"]: tag["instance_id"]
+                for tag in self.tags
+                if not tag["name"].startswith("Program:") and tag["instance_id"] and tag["instance_id"] < 0x10000
+            }
+        return self._symbol_instances
+
+    @classmethod
+    def from_pylogix(cls, tag_list: list, udts: Dict[int, Any], signature: Optional[str]) -> "TagDatabase":
+        """
+        Build a tag database from a pylogix GetTagList result
+
+        Args:
+            tag_list: List of pylogix Tag objects
+            udts: pylogix ``PLC.UDT`` mapping of template id to UDT
+            signature: Controller change signature at upload time
+
+        Returns:
+            TagDatabase: The converted snapshot
+        """
+        tags = [cls._tag_record(tag_info) for tag_info in tag_list]
+        return cls(tags, cls._template_records(udts), signature)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TagDatabase":
+        templates = {int(template_id): template for template_id, template in data["templates"].items()}
+        return cls(data["tags"], templates, data.get("signature"), data.get("uploaded_at"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": CACHE_FORMAT_VERSION,
+            "signature": self.signature,
+            "uploaded_at": self.uploaded_at,
+            "tags": self.tags,
+            "templates": {str(template_id): template for template_id, template in self.templates.items()}
+        }
+
+    @classmethod
+    def _template_records(cls, udts: Dict[int, Any]) -> Dict[int, Dict[str, Any]]:
+        templates = {}
+        for template_id, udt in udts.items():
+            templates[int(template_id)] = {
+                "name": udt.Name,
+                "fields": [
+                    dict(cls._tag_record(field), offset=cls._field_offset(field), bit=cls._field_bit(field))
+                    for field in udt.Fields
+                ]
+            }
+        return templates
+
+    @staticmethod
+    def _tag_record(tag_info) -> Dict[str, Any]:
+        return {
+            "name": tag_info.TagName,
+            "type": tag_info.DataType,
+            "instance_id": tag_info.InstanceID,
+            "symbol_type": tag_info.SymbolType,
+            "data_type_value": tag_info.DataTypeValue,
+            "array": tag_info.Array,
+            "struct": tag_info.Struct,
+            "size": tag_info.Size
+        }
+
+    @staticmethod
+    def _field_offset(field) -> Optional[int]:
+        # The last 4 bytes of a template member definition hold its byte offset
+        raw = getattr(field, "Bytes", None)
+        if raw and len(raw) >= 8:
+            return unpack_from("<I", raw, 4)[0]
+        return None
+
+    @staticmethod
+    def _field_bit(field) -> Optional[int]:
+        # A BOOL member stores its bit position where other members store an array size
+        raw = getattr(field, "Bytes", None)
+        if field.SymbolType == 0xc1 and raw and len(raw) >= 2:
+            return unpack_from("<H", raw, 0)[0]
+        return None
+
+class TagCache:
+    """
+    Per-controller tag database cache persisted to disk
+
+    A full tag list upload walks every program and UDT template, which takes
+    seconds on large controllers. The cache keeps the last upload in memory
+    and on disk and only repeats it when the controller's change signature
+    differs, when a refresh is requested, or, for controllers that cannot
+    report a signature, when the cached copy is older than ``fallback_ttl``.
+    """
+
+    def __init__(
+        self,
+        pool: PLCConnectionPool,
+        cache_dir: Optional[str] = None,
+        signature_check_interval: float = 5.0,
+        fallback_ttl: float = 600.0
+    ):
+        self.pool = pool
+        self.cache_dir = cache_dir or os.getenv("SIGNALTAP_CACHE_DIR", os.path.join(".cache", "tags"))
+        self.signature_check_interval = signature_check_interval
+        self.fallback_ttl = fallback_ttl
+        self._databases: Dict[ConnectionKey, TagDatabase] = {}
+        self._checked_at: Dict[ConnectionKey, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, config: PLCConnectionConfig, refresh: bool = False) -> TagDatabase:
+        """
+        Get the tag database for a controller, uploading it only when needed
+
+        Args:
+            config: PLCConnectionConfig object with connection details
+            refresh: Force a fresh upload from the controller
+
+        Returns:
+            TagDatabase: Current tag database for the controller
+        """
+        key = self.pool.make_key(config)
+        cached = None if refresh else self.peek(config)
+
+        if cached and time.monotonic() - self._checked_at.get(key, 0) < self.signature_check_interval:
+            return cached
+
+        def load(plc):
+            signature = self.read_signature(plc)
+            if cached and self._is_current(cached, signature):
+                return cached
+            return self._get_tag_list(plc, signature)
+
+        database = self.pool.run(config, load)
+        self._checked_at[key] = time.monotonic()
+
+        if database is not cached:
+            logger.info(f"Uploaded {len(database.tags)} tags from PLC at {config.ip_address}")
+            self._store(key, database)
+        return database
+
+    def stream(
+        self,
+        config: PLCConnectionConfig,
+        on_page: Callable[[List[Dict[str, Any]]], None],
+        refresh: bool = False
+    ) -> TagDatabase:
+        """
+        Get the tag database for a controller, handing out tags as they arrive
+
+        Like ``get``, but ``on_page`` is called with each batch of tag records
+        as soon as it is known instead of only after the whole upload. When
+        the cached copy is current it is handed out in fixed-size pages; an
+        upload walks the controller's tag list service reply by reply,
+        resolving UDT names for each reply's new templates before passing it
+        on. The completed upload is cached like any other.
+
+        Args:
+            config: PLCConnectionConfig object with connection details
+            on_page: Called (on the calling thread) with each list of tag records
+            refresh: Force a fresh upload from the controller
+
+        Returns:
+            TagDatabase: Current tag database for the controller
+        """
+        key = self.pool.make_key(config)
+        cached = None if refresh else self.peek(config)
+        # tags already handed out, so a reconnect-and-retry does not repeat them
+        emitted = [0]
+
+        def emit(records: List[Dict[str, Any]], position: int):
+            fresh = records[max(emitted[0] - position, 0):]
+            if fresh:
+                emitted[0] = position + len(records)
+                on_page(fresh)
+
+        def load(plc):
+            if cached and (
+                time.monotonic() - self._checked_at.get(key, 0) < self.signature_check_interval
+                or self._is_current(cached, self.read_signature(plc))
+            ):
+                return cached
+            return self._upload(plc, emit)
+
+        database = self.pool.run(config, load)
+        self._checked_at[key] = time.monotonic()
+
+        if database is cached:
+            for start in range(0, len(database.tags), STREAM_PAGE_SIZE):
+                emit(database.tags[start:start + STREAM_PAGE_SIZE], start)
+        else:
+            logger.info(f"Uploaded {len(database.tags)} tags from PLC at {config.ip_address}")
+            self._store(key, database)
+        return database
+
+    @staticmethod
+    def _get_tag_list(plc, signature: Optional[str]) -> TagDatabase:
+        response = plc.GetTagList()
+        if response.Status != "Success":
+            raise Exception(f"Failed to get tag list: {response.Status}")
+        return TagDatabase.from_pylogix(response.Value, plc.UDT, signature)
+
+    def _upload(self, plc, emit: Callable[[List[Dict[str, Any]], int], None]) -> TagDatabase:
+        # Same requests as pylogix's GetTagList, one tag list reply at a time
+        opened, reason = plc.conn.connect()
+        if not opened:
+            # transport errors make the pool reconnect and retry once
+            raise OSError(f"Failed to connect: {reason}")
+        signature = self.read_signature(plc)
+
+        if not all(hasattr(plc, method) for method in STREAMING_METHODS):
+            logger.warning("This pylogix version cannot stream tag lists, uploading in one piece")
+            database = self._get_tag_list(plc, signature)
+            emit(database.tags, 0)
+            return database
+
+        plc.UDT, plc.UDTByName, plc.KnownTags, plc.ProgramNames = {}, {}, {}, []
+        udts: Dict[int, Any] = {}
+        tags: List[Dict[str, Any]] = []
+
+        scopes = [None]
+        while scopes:
+            program_name = scopes.pop(0)
+            plc.Offset = 0
+            status = PARTIAL_TRANSFER
+            while status == PARTIAL_TRANSFER:
+                status, ret_data = plc.conn.send(plc._build_tag_list_request(program_name))
+                if ret_data is None:
+                    # pylogix reports a socket error as a status without a reply
+                    raise OSError(f"No tag list reply: {metrics.cip_status_name(status)}")
+                if status not in (0, PARTIAL_TRANSFER):
+                    raise Exception(f"Failed to get tag list: {metrics.cip_status_name(status)}")
+                page = plc._parse_packet(ret_data, program_name)
+                plc.Offset += 1
+                records = [TagDatabase._tag_record(tag_info) for tag_info in self._resolve_types(plc, page, udts)]
+                emit(records, len(tags))
+                tags.extend(records)
+            if program_name is None:
+                # controller scope lists the programs; their tags come next
+                scopes.extend(plc.ProgramNames)
+
+        plc.UDT = udts
+        plc.UDTByName = {udt.Name: udt for udt in udts.values()}
+        return TagDatabase(tags, TagDatabase._template_records(udts), signature)
+
+    @staticmethod
+    def _resolve_types(plc, page: list, udts: Dict[int, Any]) -> list:
+        # Upload only templates not seen on earlier pages; pylogix starts its UDT map afresh per call
+        unseen = [tag_info for tag_info in page if tag_info.Struct and tag_info.DataTypeValue not in udts]
+        if unseen:
+            plc._get_udt(unseen)
+            udts.update(plc.UDT)
+
+        for tag_info in page:
+            if tag_info.Struct and tag_info.DataTypeValue in udts:
+                tag_info.DataType = udts[tag_info.DataTypeValue].Name
+            elif tag_info.SymbolType in plc.CIPTypes:
+                tag_info.DataType = plc.CIPTypes[tag_info.SymbolType][1]
+        return page
+
+    def verified(self, config: PLCConnectionConfig, plc) -> Optional[float]:
+        """
+        Check that the controller still matches its cached tag database
+
+        Instance ids change when a program is downloaded, so they are only
+        trusted while the controller's change signature matches the one the
+        database was uploaded with. The signature is read again once
+        ``signature_check_interval`` has passed since the last check.
+
+        Args:
+            config: PLCConnectionConfig object with connection details
+            plc: pylogix PLC object with an open session to the controller
+
+        Returns:
+            Optional[float]: Monotonic time until which the database can be
+            trusted, or None if it is missing, stale or cannot be checked
+        """
+        key = self.pool.make_key(config)
+        database = self.peek(config)
+        if database is None or database.signature is None:
+            return None
+
+        checked_at = self._checked_at.get(key, 0)
+        if time.monotonic() - checked_at >= self.signature_check_interval:
+            if self.read_signature(plc) != database.signature:
+                return None
+            checked_at = self._checked_at[key] = time.monotonic()
+        return checked_at + self.signature_check_interval
+
+    def peek(self, config: PLCConnectionConfig) -> Optional[TagDatabase]:
+        """
+        Get the cached tag database without contacting the controller
+
+        Args:
+            config: PLCConnectionConfig object with connection details
+
+        Returns:
+            Optional[TagDatabase]: Cached database, loading it from disk if needed
+        """
+        key = self.pool.make_key(config)
+        with self._lock:
+            database = self._databases.get(key)
+        if database is None:
+            database = self._load(key)
+            if database is not None:
+                with self._lock:
+                    self._databases[key] = database
+        return database
+
+    def invalidate(self, config: PLCConnectionConfig):
+        """Drop the cached tag database for a controller, in memory and on disk"""
+        key = self.pool.make_key(config)
+        with self._lock:
+            self._databases.pop(key, None)
+            self._checked_at.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def read_signature(plc) -> Optional[str]:
+        """
+        Read the controller's program/tag change counters
+
+        Args:
+            plc: pylogix PLC object
+
+        Returns:
+            Optional[str]: Hex signature, or None if the controller does not support it
+        """
+        if plc.Micro800:
+            return None
+
+        opened, _ = plc.conn.connect()
+        if not opened:
+            return None
+
+        # Get Attribute List, class 0xAC instance 1
+        request = pack(
+            f"<BBBBBBH{len(CHANGE_DETECTION_ATTRIBUTES)}H",
+            0x03, 0x02, 0x20, CHANGE_DETECTION_CLASS, 0x24, 0x01,
+            len(CHANGE_DETECTION_ATTRIBUTES),
+            *CHANGE_DETECTION_ATTRIBUTES
+        )
+        status, ret_data = plc.conn.send(request)
+        if status != 0 or not ret_data:
+            return None
+        # the attribute list follows the reply's service, reserved byte,
+        # general status and additional status (size in words, then words)
+        additional_status_words = ret_data[CONNECTED_REPLY_START + 3]
+        return ret_data[CONNECTED_REPLY_START + 4 + 2 * additional_status_words:].hex()
+
+    def _is_current(self, database: TagDatabase, signature: Optional[str]) -> bool:
+        if signature is None or database.signature is None:
+            return time.time() - database.uploaded_at < self.fallback_ttl
+        return database.signature == signature
+
+    def _store(self, key: ConnectionKey, database: TagDatabase):
+        with self._lock:
+            self._databases[key] = database
+
+        path = self._path(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{path}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(database.to_dict(), f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not persist tag cache to {path}: {str(e)}")
+
+    def _load(self, key: ConnectionKey) -> Optional[TagDatabase]:
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable tag cache {path}: {str(e)}")
+            return None
+
+        if data.get("version") != CACHE_FORMAT_VERSION:
+            return None
+        return TagDatabase.from_dict(data)
+
+    def _path(self, key: ConnectionKey) -> str:
+        ip, slot, micro800 = key
+        safe_ip = re.sub(r"[^A-Za-z0-9.-]", "_", ip)
+        return os.path.join(self.cache_dir, f"{safe_ip}_{slot}_{int(micro800)}.json")
@@ -0,0 +1,272 @@
+from typing import Any, Dict, List, Optional, Tuple
+from struct import unpack_from
+import re
+import numpy as np
+from app.services.tag_cache import TagDatabase, HIDDEN_MEMBER_PREFIX
+
+# Atomic CIP types: type code -> (struct format, size in bytes)
+ATOMIC_TYPES = {
+    0xc1: ("?", 1),  # BOOL
+    0xc2: ("b", 1),  # SINT
+    0xc3: ("h", 2),  # INT
+    0xc4: ("i", 4),  # DINT
+    0xc5: ("q", 8),  # LINT
+    0xc6: ("B", 1),  # USINT
+    0xc7: ("H", 2),  # UINT
+    0xc8: ("I", 4),  # UDINT
+    0xc9: ("Q", 8),  # LWORD
+    0xca: ("f", 4),  # REAL
+    0xcb: ("d", 8),  # LREAL
+    0xd1: ("B", 1),  # BYTE
+    0xd2: ("H", 2),  # WORD
+    0xd3: ("I", 4)   # DWORD, also how BOOL arrays are stored
+}
+BOOL_TYPE = 0xc1
+BOOL_ARRAY_TYPE = 0xd3
+
+# The built-in STRING is decoded by pylogix itself
+BUILTIN_STRING_TEMPLATE = "STRING"
+
+_INDEX_PATTERN = re.compile(r"\[[^\]]*\]$")
+
+# (tag name to request, element count)
+ReadPlan = Tuple[str, int]
+
+class TagDecoder:
+    """
+    Plans and decodes array and UDT reads from a controller's cached tag database
+
+    pylogix reads a whole array in one request (fragmenting it when the reply
+    is larger than the connection allows) if it is given an element count,
+    and returns a UDT as the raw bytes of the structure. The tag database
+    tells us which tags need that treatment and holds the template layout
+    needed to turn those bytes into nested values.
+    """
+
+    def __init__(self, database: TagDatabase):
+        self.database = database
+        self._structure_sizes: Dict[int, int] = {}
+
+    def plan(self, tag_name: str) -> Optional[ReadPlan]:
+        """
+        Work out how to request a tag that pylogix cannot read as a plain scalar
+
+        Args:
+            tag_name: Tag name as requested by the client
+
+        Returns:
+            Optional[ReadPlan]: Name and element count to read, or None when
+            the tag is a scalar (or unknown) and can go in a batched read
+        """
+        resolved = self.resolve(tag_name)
+        if resolved is None:
+            return None
+        record, indexed = resolved
+
+        if record["array"] and not indexed:
+            return f"{tag_name}[0]", max(1, record["size"] or 1)
+        if record["struct"] and not self._is_builtin_string(record):
+            return tag_name, 1
+        return None
+
+    def decode(self, tag_name: str, value: Any, count: int) -> Any:
+        """
+        Turn a planned read's reply into typed values
+
+        Args:
+            tag_name: Tag name as requested by the client
+            value: Value returned by pylogix for the planned read
+            count: Element count that was requested
+
+        Returns:
+            Any: A list for arrays, a dict of member values for UDTs
+        """
+        resolved = self.resolve(tag_name)
+        if resolved is None or not isinstance(value, (bytes, bytearray)):
+            # pylogix already decoded atomic and STRING values
+            if count > 1 and not isinstance(value, list):
+                return [value]
+            return value
+
+        record, _ = resolved
+        template_id = record["data_type_value"]
+        if count <= 1:
+            return self.decode_structure(template_id, bytes(value))
+
+        element_size = len(value) // count
+        return [
+            self.decode_structure(template_id, bytes(value), index * element_size)
+            for index in range(count)
+        ]
+
+    def decode_structure(self, template_id: int, raw: bytes, offset: int = 0) -> Any:
+        """
+        Decode one structure instance from raw bytes
+
+        Args:
+            template_id: UDT template instance id
+            raw: Raw structure data as read from the controller
+            offset: Byte offset of the instance within ``raw``
+
+        Returns:
+            Any: Member values by name (hidden BOOL host members left out),
+            or a str for string-like templates
+        """
+        template = self.database.templates.get(template_id)
+        if template is None:
+            raise ValueError(f"Unknown structure template {template_id}")
+
+        if self._is_string_template(template):
+            fields = {field["name"]: field for field in template["fields"]}
+            length = unpack_from("<i", raw, offset + fields["LEN"]["offset"])[0]
+            start = offset + fields["DATA"]["offset"]
+            length = max(0, min(length, fields["DATA"]["size"]))
+            return raw[start:start + length].decode("utf-8", errors="replace")
+
+        # the hidden BOOL host members only repeat the BOOL members' bits
+        return {
+            field["name"]: self.decode_field(field, raw, offset + field["offset"])
+            for field in template["fields"]
+            if not field["name"].startswith(HIDDEN_MEMBER_PREFIX)
+        }
+
+    def resolve(self, tag_name: str) -> Optional[Tuple[Dict[str, Any], bool]]:
+        """
+        Find the tag or UDT member record a tag name refers to
+
+        Args:
+            tag_name: Tag name, e.g. "Program:Main.Recipe[2].Steps"
+
+        Returns:
+            Optional[Tuple[Dict[str, Any], bool]]: The record and whether the
+            last segment was indexed, or None if the name cannot be resolved
+        """
+        segments = tag_name.split(".")
+        tags_by_name = self.database.tags_by_name
+
+        # Program-scoped names contain a dot, so match the longest known prefix
+        record = None
+        for split in range(len(segments), 0, -1):
+            base = _INDEX_PATTERN.sub("", ".".join(segments[:split]))
+            if base in tags_by_name:
+                record = tags_by_name[base]
+                last_segment = segments[split - 1]
+                segments = segments[split:]
+                break
+        if record is None:
+            return None
+
+        for segment in segments:
+            if segment.isdigit() or not record["struct"]:
+                # bit of a word, resolved by pylogix
+                return None
+            template = self.database.templates.get(record["data_type_value"])
+            if template is None:
+                return None
+            name = _INDEX_PATTERN.sub("", segment)
+            record = next((field for field in template["fields"] if field["name"] == name), None)
+            if record is None:
+                return None
+            last_segment = segment
+
+        return record, last_segment != _INDEX_PATTERN.sub("", last_segment)
+
+    def structure_size(self, template_id: int) -> int:
+        """Size in bytes of one instance of a template, including padding"""
+        size = self._structure_sizes.get(template_id)
+        if size is None:
+            template = self.database.templates.get(template_id)
+            if template is None:
+                raise ValueError(f"Unknown structure template {template_id}")
+            end, alignment = 0, 4
+            for field in template["fields"]:
+                field_size, field_alignment = self.field_size(field)
+                end = max(end, field["offset"] + field_size)
+                alignment = max(alignment, field_alignment)
+            size = self._structure_sizes[template_id] = -(-end // alignment) * alignment
+        return size
+
+    def decode_field(self, field: Dict[str, Any], raw: bytes, offset: int) -> Any:
+        """
+        Decode one member of a structure from raw bytes
+
+        Args:
+            field: Template field record (or a tag record) describing the member
+            raw: Raw structure data as read from the controller
+            offset: Byte offset of the member within ``raw``
+
+        Returns:
+            Any: The member value, a list for arrays
+        """
+        count = field["size"] if field["array"] else 0
+
+        if field["struct"]:
+            template_id = field["data_type_value"]
+            if not count:
+                return self.decode_structure(template_id, raw, offset)
+            size = self.structure_size(template_id)
+            return [self.decode_structure(template_id, raw, offset + index * size) for index in range(count)]
+
+        symbol_type = field["symbol_type"]
+        if symbol_type == BOOL_TYPE and not count:
+            # BOOL members are single bits of a hidden host SINT
+            return bool(raw[offset] >> (field.get("bit") or 0) & 1)
+        if symbol_type == BOOL_ARRAY_TYPE and count:
+            return unpack_bits(raw, offset, count)
+
+        if symbol_type not in ATOMIC_TYPES:
+            return None
+        fmt, _ = ATOMIC_TYPES[symbol_type]
+        if count:
+            return list(unpack_from(f"<{count}{fmt}", raw, offset))
+        return unpack_from(f"<{fmt}", raw, offset)[0]
+
+    def field_size(self, field: Dict[str, Any]) -> Tuple[int, int]:
+        """Size in bytes and alignment of a member, arrays included"""
+        count = max(1, field["size"] if field["array"] else 0)
+        if field["struct"]:
+            return self.structure_size(field["data_type_value"]) * count, 4
+
+        symbol_type = field["symbol_type"]
+        if symbol_type == BOOL_TYPE and not field["array"]:
+            return 1, 1
+        if symbol_type == BOOL_ARRAY_TYPE and field["array"]:
+            return -(-count // 32) * 4, 4
+        size = ATOMIC_TYPES.get(symbol_type, ("", 0))[1]
+        return size * count, max(size, 1)
+
+    def _is_builtin_string(self, record: Dict[str, Any]) -> bool:
+        template = self.database.templates.get(record["data_type_value"])
+        return template is not None and template["name"] == BUILTIN_STRING_TEMPLATE
+
+    @staticmethod
+    def _is_string_template(template: Dict[str, Any]) -> bool:
+        names = {field["name"]: field for field in template["fields"]}
+        return (
+            set(names) == {"LEN", "DATA"}
+            and names["LEN"]["symbol_type"] == 0xc4
+            and names["DATA"]["symbol_type"] == 0xc2
+            and bool(names["DATA"]["array"])
+        )
+
+def unpack_bits(raw: bytes, offset: int, count: int, first: int = 0) -> List[bool]:
+    """
+    Unpack bits of little-endian words, as BOOL arrays are stored
+
+    Only the bytes holding the requested bits are viewed, and numpy splits
+    all of them out in one vectorized call.
+
+    Args:
+        raw: Raw data holding the words
+        offset: Byte offset of the first word
+        count: Number of bits to unpack
+        first: Bit to start at, counted from the first word
+
+    Returns:
+        List[bool]: ``count`` bit values
+    """
+    if count <= 0:
+        return []
+    skip = first % 8
+    data = np.frombuffer(raw, np.uint8, count=-(-(skip + count) // 8), offset=offset + first // 8)
+    return np.unpackbits(data, bitorder="little")[skip:skip + count].astype(bool).tolist()
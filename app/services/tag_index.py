@@ -0,0 +1,180 @@
+from typing import Any, Dict, Iterable, List, Optional, Set
+from array import array
+from bisect import bisect_left
+import threading
+import weakref
+from app.services.tag_cache import TagDatabase, HIDDEN_MEMBER_PREFIX
+
+# Built-in types whose members are not worth listing
+OPAQUE_TEMPLATES = {"STRING"}
+
+# Upper bound on UDT member entries, so huge controllers keep a bounded index
+MAX_MEMBER_ENTRIES = 250000
+
+# Entry kinds
+TAG, PROGRAM, MEMBER = "tag", "program", "member"
+
+class TagIndex:
+    """
+    Search index over a controller's tag database
+
+    Controller tags, program-scoped tags, programs and the members of UDT
+    tags (walked from the cached templates, nested UDTs included) become one
+    flat list of entries sorted by lower-cased name, each knowing its parent.
+    Prefix queries are a bisect into that sorted list; substring queries
+    intersect trigram posting lists and then confirm the candidates. Entry
+    ids follow the sort order, so every result set comes out sorted and pages
+    are plain slices.
+    """
+
+    def __init__(self, database: TagDatabase, max_member_entries: int = MAX_MEMBER_ENTRIES):
+        self.database = database
+        entries = list(self._entries(database, max_member_entries))
+        entries.sort(key=lambda entry: entry["name"].lower())
+
+        self.entries = entries
+        self.keys = [entry["name"].lower() for entry in entries]
+        self.types = [entry["type"].lower() for entry in entries]
+        self.children: Dict[str, List[int]] = {}
+        for entry_id, entry in enumerate(entries):
+            self.children.setdefault(entry["parent"] or "", []).append(entry_id)
+
+        grams: Dict[str, array] = {}
+        for entry_id, key in enumerate(self.keys):
+            for gram in {key[i:i + 3] for i in range(len(key) - 2)}:
+                postings = grams.get(gram)
+                if postings is None:
+                    postings = grams[gram] = array("I")
+                postings.append(entry_id)
+        self.trigrams = grams
+
+    @classmethod
+    def for_database(cls, database: TagDatabase) -> "TagIndex":
+        """Get the index of a tag database, building it on first use"""
+        with _indexes_lock:
+            index = _indexes.get(database)
+        if index is None:
+            index = cls(database)
+            with _indexes_lock:
+                index = _indexes.setdefault(database, index)
+        return index
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        prefix: Optional[str] = None,
+        types: Optional[List[str]] = None,
+        parent: Optional[str] = None,
+        include_members: bool = True,
+        offset: int = 0,
+        limit: int = 100
+    ) -> Dict[str, Any]:
+        """
+        Find entries, sorted by name
+
+        Args:
+            query: Case-insensitive substring of the name
+            prefix: Case-insensitive start of the name
+            types: Data type names to keep (case-insensitive)
+            parent: Only direct children of this entry ("" for top level)
+            include_members: Whether UDT members can match
+            offset: Number of matches to skip
+            limit: Maximum number of matches to return
+
+        Returns:
+            Dict[str, Any]: "total" matches and the "items" of the requested page
+        """
+        candidates: Optional[Iterable[int]] = None
+
+        if parent is not None:
+            candidates = self.children.get(parent, [])
+        if prefix:
+            candidates = self._intersect(candidates, self._prefix_range(prefix.lower()))
+        if query:
+            candidates = self._intersect(candidates, self._substring(query.lower()))
+        if candidates is None:
+            candidates = range(len(self.entries))
+
+        wanted_types: Optional[Set[str]] = {t.lower() for t in types} if types else None
+        matches = [
+            entry_id for entry_id in candidates
+            if (wanted_types is None or self.types[entry_id] in wanted_types)
+            and (include_members or self.entries[entry_id]["kind"] != MEMBER)
+        ]
+
+        offset, limit = max(offset, 0), max(limit, 0)
+        return {
+            "total": len(matches),
+            "offset": offset,
+            "limit": limit,
+            "items": [self.entries[entry_id] for entry_id in matches[offset:offset + limit]]
+        }
+
+    def _prefix_range(self, prefix: str) -> range:
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + "￿", start)
+        return range(start, end)
+
+    def _substring(self, query: str) -> Iterable[int]:
+        if len(query) < 3:
+            return [entry_id for entry_id, key in enumerate(self.keys) if query in key]
+
+        grams = {query[i:i + 3] for i in range(len(query) - 2)}
+        postings = sorted((self.trigrams.get(gram, array("I")) for gram in grams), key=len)
+        candidates = set(postings[0])
+        for other in postings[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(other)
+        return [entry_id for entry_id in sorted(candidates) if query in self.keys[entry_id]]
+
+    @staticmethod
+    def _intersect(candidates: Optional[Iterable[int]], other: Iterable[int]) -> List[int]:
+        if candidates is None:
+            return list(other)
+        keep = set(other)
+        return [entry_id for entry_id in candidates if entry_id in keep]
+
+    def _entries(self, database: TagDatabase, max_member_entries: int) -> Iterable[Dict[str, Any]]:
+        budget = [max_member_entries]
+        for tag in database.tags:
+            name = tag["name"]
+            is_program = name.startswith("Program:") and "." not in name
+            parent = name.split(".", 1)[0] if name.startswith("Program:") and not is_program else None
+            members = [] if is_program else self._members(database, tag, name, budget)
+            yield self._entry(tag, name, parent, PROGRAM if is_program else TAG, bool(members) or is_program)
+            yield from members
+
+    def _members(self, database: TagDatabase, record: Dict[str, Any], path: str, budget: List[int]) -> List[Dict[str, Any]]:
+        # Members of single structures only; array elements are addressed by index
+        if not record["struct"] or record["array"]:
+            return []
+        template = database.templates.get(record["data_type_value"])
+        if template is None or template["name"] in OPAQUE_TEMPLATES:
+            return []
+
+        members = []
+        for field in template["fields"]:
+            if field["name"].startswith(HIDDEN_MEMBER_PREFIX) or budget[0] <= 0:
+                continue
+            budget[0] -= 1
+            member_path = f"{path}.{field['name']}"
+            nested = self._members(database, field, member_path, budget)
+            members.append(self._entry(field, member_path, path, MEMBER, bool(nested)))
+            members.extend(nested)
+        return members
+
+    @staticmethod
+    def _entry(record: Dict[str, Any], name: str, parent: Optional[str], kind: str, has_children: bool) -> Dict[str, Any]:
+        return {
+            "name": name,
+            "type": record["type"] or "",
+            "kind": kind,
+            "parent": parent,
+            "array_size": record["size"] if record["array"] else None,
+            "has_children": has_children
+        }
+
+# One index per tag database snapshot; dropped with the snapshot
+_indexes: "weakref.WeakKeyDictionary[TagDatabase, TagIndex]" = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
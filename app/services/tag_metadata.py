@@ -0,0 +1,118 @@
+from typing import List, Optional
+from struct import pack
+import functools
+import re
+import time
+from app.services.tag_cache import TagDatabase
+from app.services.tag_decoder import TagDecoder, ATOMIC_TYPES
+
+# Symbol object class: a controller tag can be addressed as class 0x6B, instance <id>
+SYMBOL_CLASS = 0x6b
+
+# Leading symbol of a tag name, before any member, index or bit
+_BASE_SYMBOL_PATTERN = re.compile(r"^[^.\[]+")
+_BIT_PATTERN = re.compile(r"\.\d+$")
+_INDEX_PATTERN = re.compile(r"\[[^\]]*\]$")
+
+def prime(plc, database: TagDatabase, tags: List[str], verified_until: Optional[float] = None):
+    """
+    Hand pylogix what the tag database already knows before a read or write
+
+    pylogix looks up the data type of every tag it has not seen on this PLC
+    object with an extra read before the real request. Types of atomic tags,
+    members and BOOL arrays are filled in from the database instead. When the
+    database is known to match the controller (``verified_until``), tags in
+    the controller scope are also addressed by symbol instance id rather than
+    by name, which makes requests smaller and spares the controller the name
+    lookup.
+
+    Args:
+        plc: pylogix PLC object
+        database: The controller's tag database
+        tags: Tag names about to be read or written
+        verified_until: Monotonic time up to which instance ids may be used,
+            or None to address tags by name
+    """
+    if not hasattr(plc, "SymbolInstances"):
+        address_by_instance(plc)
+    if verified_until is not None and not plc.Micro800:
+        plc.SymbolInstances, plc.SymbolInstancesUntil = database.symbol_instances, verified_until
+    else:
+        plc.SymbolInstances, plc.SymbolInstancesUntil = {}, 0.0
+
+    decoder = None
+    for tag_name in tags:
+        base_tag = _INDEX_PATTERN.sub("", _BIT_PATTERN.sub("", tag_name))
+        if base_tag in plc.KnownTags:
+            continue
+        decoder = decoder or TagDecoder(database)
+        resolved = decoder.resolve(base_tag)
+        if resolved is None:
+            continue
+        record, _ = resolved
+        # structures (STRING included) are left to pylogix, which needs their reply length
+        if not record["struct"] and record["symbol_type"] in ATOMIC_TYPES:
+            plc.KnownTags[base_tag] = (record["symbol_type"], 0)
+
+def address_by_instance(plc):
+    """
+    Make a pylogix PLC object address known controller tags by instance id
+
+    pylogix only builds symbolic request paths. This wraps the path builder
+    on the instance so the leading symbol of a tag listed in
+    ``plc.SymbolInstances`` is replaced by a logical class/instance segment
+    while the ids are still trusted (``plc.SymbolInstancesUntil``); members,
+    indexes and bits keep their usual encoding.
+
+    Args:
+        plc: pylogix PLC object
+    """
+    build_ioi = plc._build_ioi
+    plc.SymbolInstances = {}
+    plc.SymbolInstancesUntil = 0.0
+
+    @functools.wraps(build_ioi)
+    def instance_ioi(tag_name, data_type):
+        ioi = build_ioi(tag_name, data_type)
+        match = _BASE_SYMBOL_PATTERN.match(tag_name)
+        instance_id = plc.SymbolInstances.get(match.group(0)) if match else None
+        if instance_id is None or time.monotonic() >= plc.SymbolInstancesUntil:
+            return ioi
+        symbolic = symbolic_segment(match.group(0))
+        if not ioi.startswith(symbolic):
+            return ioi
+        return instance_segment(instance_id) + ioi[len(symbolic):]
+
+    plc._build_ioi = instance_ioi
+
+def symbolic_segment(name: str) -> bytes:
+    """ANSI extended symbolic segment for one name, padded to a whole word"""
+    encoded = name.encode("utf-8")
+    return pack("<BB", 0x91, len(encoded)) + encoded + b"\x00" * (len(encoded) % 2)
+
+def instance_segment(instance_id: int) -> bytes:
+    """Logical segments addressing a symbol object instance"""
+    if instance_id < 0x100:
+        return pack("<BBBB", 0x20, SYMBOL_CLASS, 0x24, instance_id)
+    return pack("<BBBBH", 0x20, SYMBOL_CLASS, 0x25, 0x00, instance_id)
+
+def path_size(plc, tag_name: str) -> int:
+    """Encoded size of a tag's request path as pylogix will send it"""
+    size = 0
+    segments = tag_name.split(".")
+    match = _BASE_SYMBOL_PATTERN.match(tag_name)
+    instance_id = None
+    if match and time.monotonic() < getattr(plc, "SymbolInstancesUntil", 0.0):
+        instance_id = plc.SymbolInstances.get(match.group(0))
+    for position, segment in enumerate(segments):
+        name = _INDEX_PATTERN.sub("", segment)
+        if name.isdigit():
+            # bit of a word is resolved locally, not sent to the controller
+            continue
+        if position == 0 and instance_id is not None:
+            size += len(instance_segment(instance_id))
+        else:
+            size += 2 + len(name) + (len(name) % 2)
+        if name != segment:
+            size += 6
+    return size
@@ -0,0 +1,182 @@
+from typing import Any, Dict
+import math
+import re
+from app.services.tag_cache import TagDatabase
+from app.services.tag_decoder import TagDecoder, ATOMIC_TYPES, BOOL_TYPE, BOOL_ARRAY_TYPE
+
+# Integer CIP types: type code -> (minimum, maximum)
+INTEGER_RANGES = {
+    0xc2: (-2 ** 7, 2 ** 7 - 1),     # SINT
+    0xc3: (-2 ** 15, 2 ** 15 - 1),   # INT
+    0xc4: (-2 ** 31, 2 ** 31 - 1),   # DINT
+    0xc5: (-2 ** 63, 2 ** 63 - 1),   # LINT
+    0xc6: (0, 2 ** 8 - 1),           # USINT
+    0xc7: (0, 2 ** 16 - 1),          # UINT
+    0xc8: (0, 2 ** 32 - 1),          # UDINT
+    0xc9: (0, 2 ** 64 - 1),          # LWORD
+    0xd1: (0, 2 ** 8 - 1),           # BYTE
+    0xd2: (0, 2 ** 16 - 1),          # WORD
+    0xd3: (-2 ** 31, 2 ** 32 - 1)    # DWORD, signed or unsigned bit patterns
+}
+
+# Floating point CIP types: type code -> largest finite magnitude
+FLOAT_RANGES = {
+    0xca: 3.4028234663852886e38,  # REAL
+    0xcb: 1.7976931348623157e308  # LREAL
+}
+
+_BIT_PATTERN = re.compile(r"^(.*)\.(\d+)$")
+_SINGLE_INDEX_PATTERN = re.compile(r"\[\s*(\d+)\s*\]$")
+
+class TagWrite:
+    """
+    A validated write: the value converted for its tag's data type
+
+    ``batchable`` writes go in Multiple Service Packets; whole-array and
+    STRING writes are sent on their own so pylogix can fragment them.
+    """
+
+    __slots__ = ("name", "value", "type_name", "batchable")
+
+    def __init__(self, name: str, value: Any, type_name: str, batchable: bool):
+        self.name = name
+        self.value = value
+        self.type_name = type_name
+        self.batchable = batchable
+
+class TagWriteValidator:
+    """
+    Checks values to write against a controller's cached tag database
+
+    Catches unknown tags, values of the wrong type, out-of-range integers,
+    over-long strings and arrays before anything is sent to the controller.
+    Whole structures are rejected; their members can be written one by one.
+    """
+
+    def __init__(self, database: TagDatabase):
+        self.database = database
+        self.decoder = TagDecoder(database)
+
+    def check(self, tag_name: str, value: Any) -> TagWrite:
+        """
+        Validate and convert a value for a tag
+
+        Args:
+            tag_name: Tag, member, array element or bit, e.g. "Recipe.Steps[2]" or "Flags.3"
+
+        Returns:
+            TagWrite: The value as it will be written
+
+        Raises:
+            ValueError: If the tag is unknown or the value does not fit its type
+        """
+        bit = _BIT_PATTERN.match(tag_name)
+        if bit and self.decoder.resolve(tag_name) is None:
+            return self._check_bit(tag_name, bit.group(1), int(bit.group(2)), value)
+
+        resolved = self.decoder.resolve(tag_name)
+        if resolved is None:
+            raise ValueError(f"Unknown tag {tag_name}")
+        record, indexed = resolved
+        type_name = self._type_name(record)
+
+        if record["array"] and (not indexed or isinstance(value, list)):
+            values = value if isinstance(value, list) else [value]
+            available = record["size"] - self._start_index(tag_name) if indexed else record["size"]
+            if not values or len(values) > available:
+                raise ValueError(f"{tag_name} takes 1 to {available} {type_name} elements, got {len(values)}")
+            converted = [self._convert(record, type_name, element) for element in values]
+            return TagWrite(tag_name, converted, type_name, False)
+
+        converted = self._convert(record, type_name, value)
+        # only the built-in STRING is a structure here; _convert rejects the others
+        return TagWrite(tag_name, converted, type_name, not record["struct"])
+
+    def _check_bit(self, tag_name: str, word_name: str, bit: int, value: Any) -> TagWrite:
+        resolved = self.decoder.resolve(word_name)
+        if resolved is None:
+            raise ValueError(f"Unknown tag {tag_name}")
+        record, indexed = resolved
+        if record["struct"] or (record["array"] and not indexed) or record["symbol_type"] not in INTEGER_RANGES:
+            raise ValueError(f"{tag_name} is not a bit of an integer tag")
+        width = ATOMIC_TYPES[record["symbol_type"]][1] * 8
+        if bit >= width:
+            raise ValueError(f"{tag_name}: bit {bit} is out of range for {self._type_name(record)}")
+        return TagWrite(tag_name, self._to_bool(tag_name, value), "BOOL", True)
+
+    def _convert(self, record: Dict[str, Any], type_name: str, value: Any) -> Any:
+        symbol_type = record["symbol_type"]
+
+        if record["struct"]:
+            template = self.database.templates.get(record["data_type_value"])
+            if template is None or not TagDecoder._is_string_template(template):
+                raise ValueError(f"Cannot write a whole {type_name} structure; write its members")
+            if not isinstance(value, str):
+                raise ValueError(f"Expected a string for {type_name}, got {type(value).__name__}")
+            capacity = next(field["size"] for field in template["fields"] if field["name"] == "DATA")
+            if len(value.encode("utf-8")) > capacity:
+                raise ValueError(f"String of {len(value)} characters does not fit {type_name} ({capacity} max)")
+            return value
+
+        if symbol_type in (BOOL_TYPE, BOOL_ARRAY_TYPE) and (symbol_type == BOOL_TYPE or record["array"]):
+            return self._to_bool(type_name, value)
+
+        if symbol_type in INTEGER_RANGES:
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+            if isinstance(value, bool) or not isinstance(value, int):
+                raise ValueError(f"Expected an integer for {type_name}, got {value!r}")
+            low, high = INTEGER_RANGES[symbol_type]
+            if not low <= value <= high:
+                raise ValueError(f"{value} is out of range for {type_name} ({low} to {high})")
+            return value
+
+        if symbol_type in FLOAT_RANGES:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"Expected a number for {type_name}, got {value!r}")
+            value = float(value)
+            if math.isfinite(value) and abs(value) > FLOAT_RANGES[symbol_type]:
+                raise ValueError(f"{value} is out of range for {type_name}")
+            return value
+
+        raise ValueError(f"Writing {type_name} values is not supported")
+
+    @staticmethod
+    def _to_bool(name: str, value: Any) -> bool:
+        if isinstance(value, bool) or value in (0, 1):
+            return bool(value)
+        raise ValueError(f"Expected true/false (or 1/0) for {name}, got {value!r}")
+
+    @staticmethod
+    def _start_index(tag_name: str) -> int:
+        match = _SINGLE_INDEX_PATTERN.search(tag_name)
+        if match is None:
+            raise ValueError(f"Writing a list to {tag_name} needs a single start index")
+        return int(match.group(1))
+
+    def _type_name(self, record: Dict[str, Any]) -> str:
+        if record["struct"]:
+            template = self.database.templates.get(record["data_type_value"])
+            if template is not None:
+                return template["name"]
+        return record["type"] or f"type 0x{record['symbol_type']:02x}"
+
+def read_back_matches(write: TagWrite, value: Any) -> bool:
+    """
+    Check a read-back value against what was written
+
+    REAL values round to single precision on the controller, so floats are
+    compared with a relative tolerance.
+    """
+    if isinstance(write.value, list):
+        return isinstance(value, list) and len(value) >= len(write.value) and all(
+            _same(expected, actual) for expected, actual in zip(write.value, value)
+        )
+    return _same(write.value, value)
+
+def _same(expected: Any, actual: Any) -> bool:
+    if isinstance(expected, float) and isinstance(actual, (int, float)):
+        return math.isclose(expected, actual, rel_tol=1e-6, abs_tol=1e-30) or (math.isnan(expected) and math.isnan(actual))
+    if isinstance(expected, bool):
+        return actual in (0, 1) and bool(actual) == expected
+    return expected == actual
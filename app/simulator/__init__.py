@@ -0,0 +1 @@
+# Simulator Package
\ No newline at end of file
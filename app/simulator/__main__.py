@@ -0,0 +1,48 @@
+"""
+Run the EtherNet/IP simulator on its own, e.g. to point the UI at it:
+
+    python -m app.simulator --host 127.0.0.1 --scalars 5000
+"""
+
+import argparse
+import logging
+import time
+from app.simulator.controller import build_demo_controller
+from app.simulator.eip_server import EIP_PORT, EIPSimulator
+
+def main():
+    parser = argparse.ArgumentParser(description="Loopback EtherNet/IP controller simulator")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (use 127.0.0.x for several controllers)")
+    parser.add_argument("--port", type=int, default=EIP_PORT)
+    parser.add_argument("--scalars", type=int, default=1000, help="Number of scalar tags")
+    parser.add_argument("--arrays", type=int, default=20, help="Number of array tags")
+    parser.add_argument("--array-length", type=int, default=100)
+    parser.add_argument("--udts", type=int, default=50, help="Number of MOTOR UDT tags")
+    parser.add_argument("--program-tags", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every reply")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of requests left unanswered")
+    parser.add_argument("--no-large-forward-open", action="store_true", help="Only accept 504-byte connections")
+    parser.add_argument("--tick-ms", type=float, default=1000.0, help="How often scalar values change (0 = never)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    controller = build_demo_controller(args.scalars, args.arrays, args.array_length, args.udts, args.program_tags)
+    simulator = EIPSimulator(
+        controller,
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        drop_rate=args.drop_rate,
+        large_forward_open=not args.no_large_forward_open,
+        tick_interval=args.tick_ms / 1000.0 if args.tick_ms else None
+    )
+
+    with simulator:
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+from typing import Dict, List, Optional, Tuple, Union
+from struct import pack, pack_into, unpack_from
+import math
+import threading
+
+# Atomic CIP types: type code -> (struct format, size in bytes)
+ATOMIC_TYPES = {
+    0xc1: ("B", 1),  # BOOL
+    0xc2: ("b", 1),  # SINT
+    0xc3: ("h", 2),  # INT
+    0xc4: ("i", 4),  # DINT
+    0xc5: ("q", 8),  # LINT
+    0xc6: ("B", 1),  # USINT
+    0xc7: ("H", 2),  # UINT
+    0xc8: ("I", 4),  # UDINT
+    0xca: ("f", 4),  # REAL
+    0xcb: ("d", 8),  # LREAL
+    0xd3: ("I", 4)   # DWORD, the storage of BOOL arrays
+}
+BOOL = 0xc1
+SINT = 0xc2
+INT = 0xc3
+DINT = 0xc4
+REAL = 0xca
+DWORD = 0xd3
+
+# Structure handle Logix uses for the built-in STRING type
+STRING_HANDLE = 0x0fce
+STRING_LENGTH = 82
+
+# Symbol type Logix reports for program entries in the controller tag list
+PROGRAM_SYMBOL_TYPE = 0x1068
+
+# A member or tag type: an atomic type code or a template
+TagType = Union[int, "SimulatedTemplate"]
+
+class TemplateMember:
+    """One member of a simulated UDT, laid out the way Logix stores it"""
+
+    def __init__(self, name: str, tag_type: TagType, count: int, offset: int, bit: int = 0):
+        self.name = name
+        self.tag_type = tag_type
+        self.count = count
+        self.offset = offset
+        self.bit = bit
+
+    @property
+    def type_word(self) -> int:
+        dimensions = 0x2000 if self.count else 0
+        if isinstance(self.tag_type, SimulatedTemplate):
+            return 0x8000 | dimensions | self.tag_type.template_id
+        if self.tag_type == BOOL and self.count:
+            return dimensions | DWORD
+        return dimensions | self.tag_type
+
+    def definition(self) -> bytes:
+        """8-byte member definition as returned by a template read"""
+        info = self.bit if self.tag_type == BOOL and not self.count else self.count
+        return pack("<HHI", info, self.type_word, self.offset)
+
+class SimulatedTemplate:
+    """
+    A UDT definition
+
+    Members are laid out like Logix does: each member aligned to its size
+    (four bytes for structures and arrays of BOOL), consecutive BOOL members
+    packed into hidden SINT hosts, and the structure padded to its largest
+    alignment.
+    """
+
+    def __init__(self, template_id: int, name: str, members: List[Tuple[str, TagType, int]], handle: Optional[int] = None):
+        self.template_id = template_id
+        self.name = name
+        self.handle = handle if handle is not None else template_id
+        self.members: List[TemplateMember] = []
+        self.hidden: List[TemplateMember] = []
+
+        offset, alignment = 0, 4
+        host: Optional[TemplateMember] = None
+        for member_name, tag_type, count in members:
+            if tag_type == BOOL and not count:
+                if host is None or host.bit == 7:
+                    host = TemplateMember(f"ZZZZZZZZZZ{name}{len(self.hidden)}", SINT, 0, offset, bit=-1)
+                    self.hidden.append(host)
+                    self.members.append(host)
+                    offset += 1
+                host.bit += 1
+                self.members.append(TemplateMember(member_name, BOOL, 0, host.offset, bit=host.bit))
+                continue
+
+            host = None
+            size, member_alignment = member_size(tag_type, count)
+            offset = align(offset, member_alignment)
+            self.members.append(TemplateMember(member_name, tag_type, count, offset))
+            offset += size
+            alignment = max(alignment, member_alignment)
+
+        self.size = align(offset, alignment)
+        self.alignment = alignment
+        self.by_name = {member.name: member for member in self.members}
+
+    def definition(self) -> bytes:
+        """Template object data: member definitions followed by the names"""
+        names = [self.name] + [member.name for member in self.members]
+        return b"".join(member.definition() for member in self.members) + b"".join(
+            name.encode("utf-8") + b"\x00" for name in names
+        )
+
+    @property
+    def definition_words(self) -> int:
+        # pylogix reads (words * 4 - 23) bytes of definition
+        return math.ceil((len(self.definition()) + 23) / 4)
+
+def member_size(tag_type: TagType, count: int) -> Tuple[int, int]:
+    """Size and alignment of a member or tag element run"""
+    if isinstance(tag_type, SimulatedTemplate):
+        return tag_type.size * max(count, 1), tag_type.alignment
+    if tag_type == BOOL and count:
+        return math.ceil(count / 32) * 4, 4
+    size = ATOMIC_TYPES[tag_type][1]
+    return size * max(count, 1), size
+
+def align(offset: int, alignment: int) -> int:
+    return -(-offset // alignment) * alignment
+
+STRING_TEMPLATE = SimulatedTemplate(
+    STRING_HANDLE, "STRING", [("LEN", DINT, 0), ("DATA", SINT, STRING_LENGTH)], handle=STRING_HANDLE
+)
+
+class SimulatedTag:
+    """A controller or program tag and its value storage"""
+
+    def __init__(self, name: str, tag_type: TagType, count: int = 0):
+        self.name = name
+        self.tag_type = tag_type
+        self.count = count
+        self.instance_id = 0
+        size, _ = member_size(tag_type, count)
+        self.data = bytearray(size)
+
+    @property
+    def short_name(self) -> str:
+        return self.name.split(".", 1)[1] if self.name.startswith("Program:") else self.name
+
+    @property
+    def program(self) -> Optional[str]:
+        return self.name.split(".", 1)[0] if self.name.startswith("Program:") else None
+
+    @property
+    def symbol_type(self) -> int:
+        return TemplateMember(self.name, self.tag_type, self.count, 0).type_word
+
+class SimulatedController:
+    """
+    In-memory tag database served by the EtherNet/IP simulator
+
+    Values are stored as raw little-endian bytes, exactly as a Logix
+    controller lays them out, so reads, writes and template decoding all
+    work on the same bytes.
+    """
+
+    def __init__(self, tags: List[SimulatedTag], product_name: str = "SignalTap Simulator"):
+        self.product_name = product_name
+        self.tags: Dict[str, SimulatedTag] = {}
+        self.templates: Dict[int, SimulatedTemplate] = {}
+        self.change_counter = 1
+        self.lock = threading.Lock()
+
+        for tag in tags:
+            self.tags[tag.name] = tag
+            self._collect_templates(tag.tag_type)
+
+        # Instance ids are numbered per scope, programs are listed as controller symbols
+        scopes: Dict[Optional[str], int] = {}
+        for tag in tags:
+            scopes[tag.program] = scopes.get(tag.program, 0) + 1
+            tag.instance_id = scopes[tag.program]
+        self._instances = {(tag.program, tag.instance_id): tag for tag in tags}
+        for program in sorted(name for name in scopes if name):
+            scopes[None] = scopes.get(None, 0) + 1
+            self.tags.setdefault(program, _ProgramEntry(program, scopes[None]))
+
+    def symbols(self, program: Optional[str]) -> List[SimulatedTag]:
+        """Tags listed by a tag list request for one scope, in instance order"""
+        return sorted(
+            (tag for tag in self.tags.values() if tag.program == program and tag.name != program),
+            key=lambda tag: tag.instance_id
+        )
+
+    def symbol(self, program: Optional[str], instance_id: int) -> Optional[SimulatedTag]:
+        """Tag of a scope by symbol instance id"""
+        return self._instances.get((program, instance_id))
+
+    def bump_change_counter(self):
+        """Simulate a download or online edit"""
+        with self.lock:
+            self.change_counter += 1
+
+    def tick(self):
+        """Advance every scalar DINT and REAL tag, so pushed updates have something to report"""
+        with self.lock:
+            for tag in self.tags.values():
+                if tag.count or isinstance(tag.tag_type, SimulatedTemplate):
+                    continue
+                if tag.tag_type == DINT:
+                    pack_into("<i", tag.data, 0, (unpack_from("<i", tag.data)[0] + 1) & 0x7fffffff)
+                elif tag.tag_type == REAL:
+                    pack_into("<f", tag.data, 0, (unpack_from("<f", tag.data)[0] + 0.5) % 1000)
+
+    def _collect_templates(self, tag_type: TagType):
+        if isinstance(tag_type, SimulatedTemplate) and tag_type.template_id not in self.templates:
+            self.templates[tag_type.template_id] = tag_type
+            for member in tag_type.members:
+                self._collect_templates(member.tag_type)
+
+class _ProgramEntry(SimulatedTag):
+    """The 'Program:Name' symbol listed in the controller scope"""
+
+    def __init__(self, name: str, instance_id: int):
+        super().__init__(name, DINT)
+        self.instance_id = instance_id
+
+    @property
+    def program(self) -> Optional[str]:
+        return None
+
+    @property
+    def symbol_type(self) -> int:
+        return PROGRAM_SYMBOL_TYPE
+
+def fill_value(tag_type: TagType, count: int, data: bytearray, offset: int, seed: int):
+    """Write deterministic, JSON-safe sample values for a type into a buffer"""
+    if isinstance(tag_type, SimulatedTemplate):
+        for index in range(max(count, 1)):
+            base = offset + index * tag_type.size
+            if tag_type.handle == STRING_HANDLE:
+                text = f"Item {seed + index}".encode("utf-8")
+                pack_into("<i", data, base, len(text))
+                data[base + 4:base + 4 + len(text)] = text
+                continue
+            for position, member in enumerate(tag_type.members):
+                if member in tag_type.hidden:
+                    continue
+                if member.tag_type == BOOL and not member.count:
+                    if (seed + index + position) % 2:
+                        data[base + member.offset] |= 1 << member.bit
+                    continue
+                fill_value(member.tag_type, member.count, data, base + member.offset, seed + index + position)
+        return
+
+    if tag_type == BOOL and count:
+        for bit in range(0, count, 3):
+            data[offset + bit // 8] |= 1 << (bit % 8)
+        return
+
+    fmt, size = ATOMIC_TYPES[tag_type]
+    for index in range(max(count, 1)):
+        value = seed + index
+        if fmt in "fd":
+            value = round(value * 0.25, 2)
+        elif fmt == "B" and tag_type == BOOL:
+            value = value % 2
+        elif fmt in "bB":
+            value = value % 100
+        elif fmt in "hH":
+            value = value % 30000
+        pack_into(f"<{fmt}", data, offset + index * size, value)
+
+def build_demo_controller(
+    scalar_count: int = 1000,
+    array_count: int = 20,
+    array_length: int = 100,
+    udt_count: int = 50,
+    program_tag_count: int = 100
+) -> SimulatedController:
+    """
+    Build a controller with a representative mix of tags
+
+    Args:
+        scalar_count: Controller-scope DINT/REAL/INT/BOOL tags
+        array_count: DINT, REAL and BOOL arrays
+        array_length: Elements per array
+        udt_count: MOTOR UDT instances (plus one array of them)
+        program_tag_count: Tags in the MainProgram scope
+
+    Returns:
+        SimulatedController: The populated controller
+    """
+    motor = SimulatedTemplate(0x101, "MOTOR", [
+        ("Speed", REAL, 0),
+        ("Current", REAL, 0),
+        ("Running", BOOL, 0),
+        ("Faulted", BOOL, 0),
+        ("Starts", DINT, 0),
+        ("Name", STRING_TEMPLATE, 0),
+        ("History", REAL, 10)
+    ])
+    line = SimulatedTemplate(0x102, "LINE", [
+        ("Enabled", BOOL, 0),
+        ("Rate", DINT, 0),
+        ("Motors", motor, 4),
+        ("Alarms", BOOL, 32)
+    ])
+
+    scalar_types = [("Counter", DINT), ("Level", REAL), ("Setpoint", INT), ("Switch", BOOL)]
+    tags = []
+    for index in range(scalar_count):
+        prefix, tag_type = scalar_types[index % len(scalar_types)]
+        tags.append(SimulatedTag(f"{prefix}_{index}", tag_type))
+
+    array_types = [("Counts", DINT), ("Trend", REAL), ("Flags", BOOL)]
+    for index in range(array_count):
+        prefix, tag_type = array_types[index % len(array_types)]
+        tags.append(SimulatedTag(f"{prefix}_{index}", tag_type, array_length))
+
+    for index in range(udt_count):
+        tags.append(SimulatedTag(f"Motor_{index}", motor))
+    tags.append(SimulatedTag("Motors", motor, max(udt_count, 1)))
+    tags.append(SimulatedTag("Line_1", line))
+    tags.append(SimulatedTag("Message", STRING_TEMPLATE))
+
+    for index in range(program_tag_count):
+        prefix, tag_type = scalar_types[index % len(scalar_types)]
+        tags.append(SimulatedTag(f"Program:MainProgram.{prefix}_{index}", tag_type))
+
+    for seed, tag in enumerate(tags):
+        fill_value(tag.tag_type, tag.count, tag.data, 0, seed)
+
+    return SimulatedController(tags)
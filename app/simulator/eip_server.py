@@ -0,0 +1,572 @@
+from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter
+from struct import pack, unpack_from
+import logging
+import random
+import socket
+import socketserver
+import threading
+import time
+from app.simulator.controller import (
+    BOOL, DWORD, SimulatedController, SimulatedTag, SimulatedTemplate, TagType, member_size
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+EIP_PORT = 44818
+ENCAPSULATION_HEADER_SIZE = 24
+
+# Encapsulation commands
+REGISTER_SESSION = 0x65
+UNREGISTER_SESSION = 0x66
+SEND_RR_DATA = 0x6f
+SEND_UNIT_DATA = 0x70
+
+# CIP general status codes
+SUCCESS = 0x00
+PATH_SEGMENT_ERROR = 0x04
+PATH_DESTINATION_UNKNOWN = 0x05
+PARTIAL_TRANSFER = 0x06
+SERVICE_NOT_SUPPORTED = 0x08
+REPLY_DATA_TOO_LARGE = 0x11
+NOT_ENOUGH_DATA = 0x13
+ATTRIBUTE_NOT_SUPPORTED = 0x14
+EMBEDDED_SERVICE_ERROR = 0x1e
+INVALID_PARAMETER = 0x20
+
+# Bytes of a connected reply taken by the CIP reply header and type code
+REPLY_OVERHEAD = 8
+
+# Symbol object class, and the tag services that may address a symbol by instance
+SYMBOL_CLASS = 0x6b
+TAG_SERVICES = {0x4c, 0x4d, 0x4e, 0x52, 0x53}
+
+class CIPError(Exception):
+    """A request the simulated controller rejects with a CIP general status"""
+
+    def __init__(self, status: int):
+        super().__init__(f"CIP status 0x{status:02x}")
+        self.status = status
+
+class TagLocation:
+    """Where a symbolic request path points inside a tag's storage"""
+
+    def __init__(self, tag: SimulatedTag, tag_type: TagType, offset: int, available: int, bit: Optional[int] = None):
+        self.tag = tag
+        self.tag_type = tag_type
+        self.offset = offset
+        self.available = available
+        self.bit = bit
+
+    @property
+    def element_size(self) -> int:
+        if self.tag_type == DWORD:
+            return 4
+        return member_size(self.tag_type, 0)[0]
+
+    @property
+    def type_header(self) -> bytes:
+        if isinstance(self.tag_type, SimulatedTemplate):
+            return pack("<BBH", 0xa0, 0x02, self.tag_type.handle)
+        return pack("<BB", self.tag_type, 0x00)
+
+class EIPSimulator:
+    """
+    Loopback EtherNet/IP server that answers like a Logix controller
+
+    It implements the subset of CIP that pylogix uses: session registration,
+    (Large) Forward Open, Read/Write Tag by symbol name or instance id
+    including fragmented and read-modify-write services, Multiple Service Packets, tag list and UDT
+    template uploads, the wall clock, identity and the change detection
+    counters. Latency and packet loss can be injected, and every request is
+    counted so benchmarks can report round trips.
+    """
+
+    def __init__(
+        self,
+        controller: SimulatedController,
+        host: str = "127.0.0.1",
+        port: int = EIP_PORT,
+        latency_ms: float = 0.0,
+        drop_rate: float = 0.0,
+        large_forward_open: bool = True,
+        tick_interval: Optional[float] = None
+    ):
+        self.controller = controller
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.drop_rate = drop_rate
+        self.large_forward_open = large_forward_open
+        self.tick_interval = tick_interval
+        self.request_count = 0
+        self.dropped_count = 0
+        self.connection_count = 0
+        self.service_counts: Counter = Counter()
+        self._stats_lock = threading.Lock()
+        self._server: Optional[socketserver.ThreadingTCPServer] = None
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+
+    def start(self) -> "EIPSimulator":
+        """Start serving in background threads"""
+        simulator = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                _Session(simulator, self.request).serve()
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        self._server = Server((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._server.serve_forever, name="eip-simulator", daemon=True)]
+        if self.tick_interval:
+            self._threads.append(threading.Thread(target=self._tick, name="eip-simulator-tick", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"EtherNet/IP simulator serving {len(self.controller.tags)} tags on {self.host}:{self.port}")
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket"""
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "EIPSimulator":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        """Request counters since start"""
+        with self._stats_lock:
+            return {
+                "requests": self.request_count,
+                "dropped": self.dropped_count,
+                "connections": self.connection_count,
+                "services": {f"0x{service:02x}": count for service, count in sorted(self.service_counts.items())}
+            }
+
+    def count(self, service: int):
+        with self._stats_lock:
+            self.request_count += 1
+            self.service_counts[service] += 1
+
+    def _tick(self):
+        while not self._stop.wait(self.tick_interval):
+            self.controller.tick()
+
+class _Session:
+    """One client TCP connection: an encapsulation session and its CIP connection"""
+
+    def __init__(self, simulator: EIPSimulator, sock: socket.socket):
+        self.simulator = simulator
+        self.controller = simulator.controller
+        self.sock = sock
+        self.session_handle = random.randrange(1, 0xffffffff)
+        self.connection_size = 504
+        self.connection_id = 0
+
+    def serve(self):
+        with self.simulator._stats_lock:
+            self.simulator.connection_count += 1
+        while True:
+            header = self._receive(ENCAPSULATION_HEADER_SIZE)
+            if header is None:
+                return
+            command, length = unpack_from("<HH", header, 0)
+            context = header[12:20]
+            body = self._receive(length) if length else b""
+            if body is None:
+                return
+
+            if command == REGISTER_SESSION:
+                self._reply(command, context, pack("<HH", 1, 0))
+            elif command == UNREGISTER_SESSION:
+                return
+            elif command in (SEND_RR_DATA, SEND_UNIT_DATA):
+                self._handle_data(command, context, body)
+            else:
+                logger.debug(f"Simulator ignoring encapsulation command 0x{command:02x}")
+
+    def _handle_data(self, command: int, context: bytes, body: bytes):
+        simulator = self.simulator
+        if simulator.drop_rate and random.random() < simulator.drop_rate:
+            with simulator._stats_lock:
+                simulator.dropped_count += 1
+            return
+
+        if command == SEND_UNIT_DATA:
+            # interface handle, timeout, item count, connected address item, data item, sequence
+            sequence = unpack_from("<H", body, 20)[0]
+            request = body[22:]
+        else:
+            request = body[16:]
+
+        simulator.count(request[0] if request else 0)
+        reply = self._dispatch(request, connected=command == SEND_UNIT_DATA)
+
+        if simulator.latency_ms:
+            time.sleep(simulator.latency_ms / 1000.0)
+
+        if command == SEND_UNIT_DATA:
+            items = pack("<IHHHHIHHH", 0, 0, 2, 0xa1, 4, self.connection_id, 0xb1, len(reply) + 2, sequence)
+        else:
+            items = pack("<IHHHHHH", 0, 0, 2, 0x00, 0, 0xb2, len(reply))
+        self._reply(command, context, items + reply)
+
+    def _dispatch(self, request: bytes, connected: bool) -> bytes:
+        service = request[0]
+        try:
+            path_size = request[1] * 2
+            segments = parse_path(request[2:2 + path_size])
+            data = request[2 + path_size:]
+
+            if segments and segments[0][0] == "class" and not (segments[0][1] == SYMBOL_CLASS and service in TAG_SERVICES):
+                return self._class_service(service, segments, data, request)
+            with self.controller.lock:
+                return self._tag_service(service, segments, data, connected)
+        except CIPError as e:
+            return cip_reply(service, e.status)
+        except (IndexError, ValueError) as e:
+            logger.debug(f"Simulator rejected malformed request: {str(e)}")
+            return cip_reply(service, NOT_ENOUGH_DATA)
+
+    def _class_service(self, service: int, segments: list, data: bytes, request: bytes) -> bytes:
+        cip_class = segments[0][1]
+        instance = segments[1][1] if len(segments) > 1 else 0
+
+        if cip_class == 0x06:
+            if service in (0x54, 0x5b):
+                return self._forward_open(service, request)
+            if service == 0x4e:
+                return cip_reply(service, SUCCESS, bytes(10))
+            if service == 0x52:
+                # Unconnected Send: unwrap the embedded request
+                size = unpack_from("<H", data, 2)[0]
+                return self._dispatch(data[4:4 + size], connected=False)
+        if cip_class == 0x02 and service == 0x0a:
+            with self.controller.lock:
+                return self._multiple_service(data)
+        if cip_class == 0x6c and service == 0x03:
+            return self._template_attributes(instance, data)
+        if cip_class == 0x6c and service == 0x4c:
+            return self._template_read(instance, data)
+        if cip_class == 0x8b and service == 0x03:
+            clock = int(time.time() * 1_000_000)
+            return cip_reply(service, SUCCESS, self._attribute_list(data, lambda attribute: pack("<Q", clock)))
+        if cip_class == 0xac and service == 0x03:
+            counter = self.controller.change_counter
+            return cip_reply(service, SUCCESS, self._attribute_list(data, lambda attribute: pack("<I", counter)))
+        if cip_class == 0x01 and service == 0x01:
+            return cip_reply(service, SUCCESS, self._identity())
+        if cip_class == 0x6b and service == 0x55:
+            return self._tag_list(None, instance, data)
+        raise CIPError(SERVICE_NOT_SUPPORTED)
+
+    def _tag_service(self, service: int, segments: list, data: bytes, connected: bool) -> bytes:
+        # Program-scoped tag list: symbolic program name, then class 0x6B
+        if service == 0x55:
+            program = segments[0][1]
+            instance = segments[2][1] if len(segments) > 2 else 0
+            return self._tag_list(program, instance, data)
+
+        location = self._resolve(segments)
+        if service == 0x4c:
+            return self._read(service, location, unpack_from("<H", data, 0)[0], 0)
+        if service == 0x52:
+            count, offset = unpack_from("<HI", data, 0)
+            return self._read(service, location, count, offset)
+        if service == 0x4d:
+            return self._write(service, location, data, fragmented=False)
+        if service == 0x53:
+            return self._write(service, location, data, fragmented=True)
+        if service == 0x4e:
+            return self._read_modify_write(service, location, data)
+        raise CIPError(SERVICE_NOT_SUPPORTED)
+
+    def _multiple_service(self, data: bytes) -> bytes:
+        count = unpack_from("<H", data, 0)[0]
+        offsets = list(unpack_from(f"<{count}H", data, 2)) + [len(data)]
+        replies = []
+        budget = self.connection_size - REPLY_OVERHEAD - 2 - 2 * count
+        for index in range(count):
+            embedded = data[offsets[index]:offsets[index + 1]]
+            reply = self._dispatch_embedded(embedded)
+            if len(reply) > budget:
+                reply = cip_reply(embedded[0], REPLY_DATA_TOO_LARGE)
+            budget -= len(reply)
+            replies.append(reply)
+
+        body = pack("<H", count)
+        position = 2 + 2 * count
+        for reply in replies:
+            body += pack("<H", position)
+            position += len(reply)
+        status = EMBEDDED_SERVICE_ERROR if any(reply[2] for reply in replies) else SUCCESS
+        return cip_reply(0x0a, status, body + b"".join(replies))
+
+    def _dispatch_embedded(self, request: bytes) -> bytes:
+        service = request[0]
+        try:
+            path_size = request[1] * 2
+            segments = parse_path(request[2:2 + path_size])
+            return self._tag_service(service, segments, request[2 + path_size:], connected=True)
+        except CIPError as e:
+            return cip_reply(service, e.status)
+
+    def _resolve(self, segments: list) -> TagLocation:
+        if segments[:1] == [("class", SYMBOL_CLASS)] and len(segments) > 1 and segments[1][0] == "instance":
+            # controller-scoped symbol addressed by instance id instead of name
+            tag = self.controller.symbol(None, segments[1][1])
+            rest = segments[2:]
+        elif not segments or segments[0][0] != "symbol":
+            raise CIPError(PATH_SEGMENT_ERROR)
+        else:
+            name = segments[0][1]
+            rest = segments[1:]
+            if name.startswith("Program:") and rest and rest[0][0] == "symbol":
+                name = f"{name}.{rest[0][1]}"
+                rest = rest[1:]
+            tag = self.controller.tags.get(name)
+        if tag is None:
+            raise CIPError(PATH_SEGMENT_ERROR)
+
+        tag_type: TagType = tag.tag_type
+        count = tag.count
+        offset = 0
+        bit = None
+        if tag_type == BOOL and count:
+            tag_type, count = DWORD, -(-count // 32)
+        location = TagLocation(tag, tag_type, 0, max(count, 1))
+
+        for kind, value in rest:
+            if kind == "element":
+                if not count or value >= count:
+                    raise CIPError(PATH_DESTINATION_UNKNOWN)
+                offset += value * location.element_size
+                location = TagLocation(tag, tag_type, offset, count - value)
+                count = 0
+            elif kind == "symbol":
+                if not isinstance(tag_type, SimulatedTemplate) or count:
+                    raise CIPError(PATH_SEGMENT_ERROR)
+                member = tag_type.by_name.get(value)
+                if member is None:
+                    raise CIPError(PATH_SEGMENT_ERROR)
+                offset += member.offset
+                tag_type, count = member.tag_type, member.count
+                bit = member.bit if tag_type == BOOL and not count else None
+                if tag_type == BOOL and count:
+                    tag_type, count = DWORD, -(-count // 32)
+                location = TagLocation(tag, tag_type, offset, max(count, 1), bit)
+            else:
+                raise CIPError(PATH_SEGMENT_ERROR)
+        return location
+
+    def _read(self, service: int, location: TagLocation, count: int, byte_offset: int) -> bytes:
+        if count < 1 or count > location.available:
+            raise CIPError(PATH_DESTINATION_UNKNOWN)
+
+        data = location.tag.data
+        if location.bit is not None:
+            value = bytes([1 if data[location.offset] >> location.bit & 1 else 0])
+        else:
+            start = location.offset
+            value = bytes(data[start:start + count * location.element_size])
+
+        header = location.type_header
+        limit = self.connection_size - REPLY_OVERHEAD - len(header)
+        if location.element_size <= limit:
+            # fragments end on element boundaries, like a controller's
+            limit -= limit % location.element_size
+        chunk = value[byte_offset:byte_offset + limit]
+        status = PARTIAL_TRANSFER if byte_offset + len(chunk) < len(value) else SUCCESS
+        return cip_reply(service, status, header + chunk)
+
+    def _write(self, service: int, location: TagLocation, data: bytes, fragmented: bool) -> bytes:
+        type_code, type_length = data[0], data[1]
+        position = 2 + (2 if type_length == 2 else 0)
+        if type_code != location.type_header[0]:
+            raise CIPError(INVALID_PARAMETER)
+        count = unpack_from("<H", data, position)[0]
+        position += 2
+        byte_offset = 0
+        if fragmented:
+            byte_offset = unpack_from("<I", data, position)[0]
+            position += 4
+        payload = data[position:]
+
+        if count > location.available:
+            raise CIPError(PATH_DESTINATION_UNKNOWN)
+        storage = location.tag.data
+        if location.bit is not None:
+            mask = 1 << location.bit
+            if payload and payload[0]:
+                storage[location.offset] |= mask
+            else:
+                storage[location.offset] &= ~mask & 0xff
+            return cip_reply(service, SUCCESS)
+
+        limit = count * location.element_size
+        start = location.offset + byte_offset
+        payload = payload[:max(0, limit - byte_offset)]
+        storage[start:start + len(payload)] = payload
+        return cip_reply(service, SUCCESS)
+
+    def _read_modify_write(self, service: int, location: TagLocation, data: bytes) -> bytes:
+        size = unpack_from("<H", data, 0)[0]
+        or_mask = int.from_bytes(data[2:2 + size], "little")
+        and_mask = int.from_bytes(data[2 + size:2 + 2 * size], "little")
+        storage = location.tag.data
+        start = location.offset
+        value = int.from_bytes(storage[start:start + size], "little")
+        value = (value | or_mask) & and_mask
+        storage[start:start + size] = value.to_bytes(size, "little")
+        return cip_reply(service, SUCCESS)
+
+    def _tag_list(self, program: Optional[str], start_instance: int, data: bytes) -> bytes:
+        entries = b""
+        status = SUCCESS
+        limit = self.connection_size - REPLY_OVERHEAD
+        for tag in self.controller.symbols(program):
+            if tag.instance_id < start_instance:
+                continue
+            name = (tag.short_name if program else tag.name).encode("utf-8")
+            entry = pack("<IH", tag.instance_id, len(name)) + name + pack("<HIII", tag.symbol_type, tag.count, 0, 0)
+            if len(entries) + len(entry) > limit:
+                status = PARTIAL_TRANSFER
+                break
+            entries += entry
+        return cip_reply(0x55, status, entries)
+
+    def _template_attributes(self, instance: int, data: bytes) -> bytes:
+        template = self.controller.templates.get(instance)
+        if template is None:
+            raise CIPError(PATH_DESTINATION_UNKNOWN)
+
+        def attribute_value(attribute: int) -> Optional[bytes]:
+            if attribute == 1:
+                return pack("<H", template.handle)
+            if attribute == 2:
+                return pack("<H", len(template.members))
+            if attribute == 3:
+                return pack("<H", 0)
+            if attribute == 4:
+                return pack("<I", template.definition_words)
+            if attribute == 5:
+                return pack("<I", template.size)
+            return None
+
+        return cip_reply(0x03, SUCCESS, self._attribute_list(data, attribute_value))
+
+    def _template_read(self, instance: int, data: bytes) -> bytes:
+        template = self.controller.templates.get(instance)
+        if template is None:
+            raise CIPError(PATH_DESTINATION_UNKNOWN)
+        offset, length = unpack_from("<IH", data, 0)
+        limit = self.connection_size - REPLY_OVERHEAD
+        limit -= limit % 4
+        definition = template.definition().ljust(offset + length, b"\x00")
+        chunk = definition[offset:offset + min(length, limit)]
+        status = PARTIAL_TRANSFER if len(chunk) < length else SUCCESS
+        return cip_reply(0x4c, status, chunk)
+
+    def _forward_open(self, service: int, request: bytes) -> bytes:
+        if service == 0x5b:
+            if not self.simulator.large_forward_open:
+                return cip_reply(service, SERVICE_NOT_SUPPORTED)
+            parameters = unpack_from("<I", request, 32)[0]
+            size = parameters & 0xffff
+        else:
+            parameters = unpack_from("<H", request, 32)[0]
+            size = parameters & 0x1ff
+        self.connection_size = size
+        self.connection_id = random.randrange(1, 0xffffffff)
+        to_connection_id = unpack_from("<I", request, 12)[0]
+        serial, vendor, originator = unpack_from("<HHI", request, 16)
+        return cip_reply(service, SUCCESS, pack(
+            "<IIHHIIIBB", self.connection_id, to_connection_id, serial, vendor, originator, 0x2000, 0x2000, 0, 0
+        ))
+
+    def _identity(self) -> bytes:
+        name = self.controller.product_name.encode("utf-8")
+        return pack("<HHHBBHIB", 1, 0x0e, 0x6c, 33, 11, 0x3060, 0x5157494d, len(name)) + name + pack("<B", 3)
+
+    @staticmethod
+    def _attribute_list(data: bytes, value_of) -> bytes:
+        count = unpack_from("<H", data, 0)[0]
+        body = pack("<H", count)
+        for attribute in unpack_from(f"<{count}H", data, 2):
+            value = value_of(attribute)
+            if value is None:
+                body += pack("<HH", attribute, ATTRIBUTE_NOT_SUPPORTED)
+            else:
+                body += pack("<HH", attribute, SUCCESS) + value
+        return body
+
+    def _reply(self, command: int, context: bytes, body: bytes):
+        header = pack("<HHII8sI", command, len(body), self.session_handle, 0, context, 0)
+        try:
+            self.sock.sendall(header + body)
+        except OSError:
+            pass
+
+    def _receive(self, size: int) -> Optional[bytes]:
+        data = b""
+        while len(data) < size:
+            try:
+                part = self.sock.recv(size - len(data))
+            except OSError:
+                return None
+            if not part:
+                return None
+            data += part
+        return data
+
+def cip_reply(service: int, status: int, data: bytes = b"") -> bytes:
+    """Message Router reply: reply service, reserved, general status, no extended status"""
+    return pack("<BBBB", service | 0x80, 0, status, 0) + data
+
+def parse_path(path: bytes) -> List[Tuple[str, Any]]:
+    """
+    Split an EPATH into logical and symbolic segments
+
+    Args:
+        path: Encoded request path
+
+    Returns:
+        List[Tuple[str, Any]]: ("symbol", name), ("element", index),
+        ("class", id) and ("instance", id) segments in order
+    """
+    segments = []
+    position = 0
+    while position < len(path):
+        segment = path[position]
+        if segment == 0x91:
+            length = path[position + 1]
+            name = path[position + 2:position + 2 + length].decode("utf-8")
+            segments.append(("symbol", name))
+            position += 2 + length + (length % 2)
+        elif segment in (0x28, 0x20, 0x24, 0x30):
+            kind = {0x28: "element", 0x20: "class", 0x24: "instance", 0x30: "attribute"}[segment]
+            segments.append((kind, path[position + 1]))
+            position += 2
+        elif segment in (0x29, 0x21, 0x25, 0x31):
+            kind = {0x29: "element", 0x21: "class", 0x25: "instance", 0x31: "attribute"}[segment]
+            segments.append((kind, unpack_from("<H", path, position + 2)[0]))
+            position += 4
+        elif segment == 0x2a:
+            segments.append(("element", unpack_from("<I", path, position + 2)[0]))
+            position += 6
+        else:
+            raise CIPError(PATH_SEGMENT_ERROR)
+    return segments
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for SignalTap against the bundled EtherNet/IP simulator
+
+No PLC hardware is needed: the simulator serves a generated tag database on
+loopback, the API runs in-process under uvicorn, and concurrent clients drive
+the service layer and the HTTP endpoints. Each scenario reports throughput,
+p50/p99 latency and PLC round trips per request.
+
+    python benchmark.py --concurrency 8 --requests 200 --latency-ms 2
+    python benchmark.py --save baseline.json
+    python benchmark.py --compare baseline.json --max-regression 0.25
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple
+import numpy as np
+
+# Keep benchmark runs away from the real tag cache and historian
+os.environ.setdefault("SIGNALTAP_CACHE_DIR", tempfile.mkdtemp(prefix="signaltap-bench-"))
+os.environ.setdefault("SIGNALTAP_HISTORIAN_ENABLED", "false")
+
+import uvicorn
+from app.main import app
+from app.services.pylogix_service import PylogixService
+from app.simulator.controller import build_demo_controller
+from app.simulator.eip_server import EIPSimulator
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_api() -> Tuple[uvicorn.Server, int]:
+    """Serve the FastAPI app on a free loopback port in a background thread"""
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, port
+
+class HTTPClient:
+    """Keep-alive HTTP connection per worker thread"""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.local = threading.local()
+
+    def request(self, method: str, path: str, body=None):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = self.local.connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+        payload = json.dumps(body) if body is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            self.local.connection = None
+            raise
+        if response.status != 200:
+            raise Exception(f"HTTP {response.status}: {data[:200]!r}")
+        return data
+
+def run_scenario(name, func, simulator, requests, concurrency):
+    """Run one scenario and collect its metrics"""
+    # Warm up connections and caches outside the measurement
+    func()
+    start_requests = simulator.request_count
+
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def call(_):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            func()
+            ok = True
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "name": name,
+        "requests": requests,
+        "errors": errors,
+        "throughput": round(requests / elapsed, 1),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 2),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 2),
+        "round_trips": round((simulator.request_count - start_requests) / requests, 2)
+    }
+
+def print_results(results):
+    print()
+    print(f"{'Scenario':<44} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'RT/req':>8} {'errors':>7}")
+    print("-" * 90)
+    for r in results:
+        print(f"{r['name']:<44} {r['throughput']:>9} {r['p50_ms']:>9} {r['p99_ms']:>9} {r['round_trips']:>8} {r['errors']:>7}")
+    print()
+
+def compare(results, baseline_path, max_regression):
+    """Compare against a saved run; returns the list of regressions"""
+    with open(baseline_path) as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+
+    regressions = []
+    for r in results:
+        previous = baseline.get(r["name"])
+        if previous is None:
+            continue
+        if r["p50_ms"] > previous["p50_ms"] * (1 + max_regression):
+            regressions.append(f"{r['name']}: p50 {previous['p50_ms']} -> {r['p50_ms']} ms")
+        if r["throughput"] < previous["throughput"] * (1 - max_regression):
+            regressions.append(f"{r['name']}: throughput {previous['throughput']} -> {r['throughput']} req/s")
+        if r["round_trips"] > previous["round_trips"]:
+            regressions.append(f"{r['name']}: round trips {previous['round_trips']} -> {r['round_trips']} per request")
+        if r["errors"] > previous["errors"]:
+            regressions.append(f"{r['name']}: errors {previous['errors']} -> {r['errors']}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SignalTap against the EtherNet/IP simulator")
+    parser.add_argument("--host", default="127.0.0.1", help="Loopback address for the simulated PLC (port 44818)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--tags", type=int, default=100, help="Tags per read request")
+    parser.add_argument("--poll-tags", type=int, default=2000, help="Tags per large poll request")
+    parser.add_argument("--scalars", type=int, default=5000, help="Scalar tags in the simulated controller")
+    parser.add_argument("--udts", type=int, default=100, help="UDT tags in the simulated controller")
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="Simulated network latency per request")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of PLC requests dropped")
+    parser.add_argument("--save", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Fail if results regress against this JSON file")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="Allowed fractional slowdown for --compare")
+    args = parser.parse_args()
+
+    print("🧪 Starting EtherNet/IP simulator and API...")
+    controller = build_demo_controller(scalar_count=args.scalars, udt_count=args.udts)
+    simulator = EIPSimulator(controller, host=args.host, latency_ms=args.latency_ms, drop_rate=args.drop_rate).start()
+    server, port = start_api()
+    client = HTTPClient(port)
+    ip = args.host
+
+    scalar_tags = [name for name, tag in controller.tags.items() if not tag.count and "_" in name and ":" not in name]
+    scalar_tags = [name for name in scalar_tags if not name.startswith(("Motor_", "Line_"))][:args.tags]
+    structured_tags = ["Counts_0", "Trend_1", "Flags_2", "Motors", "Line_1"] + [f"Motor_{i}" for i in range(min(args.udts, 10))]
+    poll_tags = [name for name, tag in controller.tags.items() if not tag.count and name.split("_")[0] in ("Counter", "Level", "Setpoint", "Switch")]
+    poll_tags = poll_tags[:args.poll_tags]
+    service = PylogixService()
+
+    scenarios = [
+        (f"service.read_tags ({len(scalar_tags)} scalars)",
+         lambda: service.read_tags(ip, scalar_tags), args.requests),
+        (f"POST /api/read-tags ({len(scalar_tags)} scalars)",
+         lambda: client.request("POST", "/api/read-tags", {"ip": ip, "tags": scalar_tags}), args.requests),
+        (f"POST /api/read-tags ({len(structured_tags)} arrays/UDTs)",
+         lambda: client.request("POST", "/api/read-tags", {"ip": ip, "tags": structured_tags}), args.requests),
+        (f"POST /api/read-tags ({len(poll_tags)} tag poll)",
+         lambda: client.request("POST", "/api/read-tags", {"ip": ip, "tags": poll_tags}), max(args.requests // 10, 5)),
+        (f"POST /api/read-tags/compact ({len(poll_tags)} tag poll)",
+         lambda: client.request("POST", "/api/read-tags/compact", {"ip": ip, "tags": poll_ids}), max(args.requests // 10, 5)),
+        ("GET /api/scan-simple (cached)",
+         lambda: client.request("GET", f"/api/scan-simple?ip={ip}"), args.requests),
+        ("GET /api/scan-simple?refresh=true",
+         lambda: client.request("GET", f"/api/scan-simple?ip={ip}&refresh=true"), max(args.requests // 20, 5))
+    ]
+
+    results = []
+    try:
+        # Upload the tag database once so reads can plan array and UDT requests
+        client.request("GET", f"/api/scan-simple?ip={ip}")
+        # Compact polls send the ids issued for the names on the first read
+        poll_ids = json.loads(client.request("POST", "/api/read-tags/compact", {"ip": ip, "tags": poll_tags}))["ids"]
+        for name, func, requests in scenarios:
+            print(f"▶️  {name}")
+            results.append(run_scenario(name, func, simulator, requests, args.concurrency))
+    finally:
+        server.should_exit = True
+        simulator.stop()
+
+    print_results(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+        print(f"💾 Results saved to {args.save}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.max_regression)
+        if regressions:
+            print("❌ Regressions against baseline:")
+            for regression in regressions:
+                print(f"   {regression}")
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+if __name__ == "__main__":
+    main()
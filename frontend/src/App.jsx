@@ -3,13 +3,13 @@ import Layout from './components/Layout';
 import PLCConnectForm from './components/PLCConnectForm';
 import TagTable from './components/TagTable';
 import Dashboard from './components/Dashboard';
-import { scanTags, readTags } from './services/api';
+import { streamTags, subscribeTags } from './services/api';
 
 export default function App() {
   const [ip, setIp] = useState('');
   const [slot, setSlot] = useState('0');
   const [tags, setTags] = useState([]);
-  const [tagValues, setTagValues] = useState([]);
+  const [tagValues, setTagValues] = useState({});
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
 
@@ -18,8 +18,11 @@ export default function App() {
     setError(null);
     try {
       const slotNumber = parseInt(slot) || 0;
-      const tags = await scanTags(ip.trim(), slotNumber);
-      setTags(tags);
+      // Show tags as the controller returns them instead of after the whole scan
+      setTags([]);
+      await streamTags(ip.trim(), slotNumber, (batch) => {
+        setTags(prev => prev.concat(batch));
+      });
     } catch (err) {
       setError(err.message || 'Failed to connect to PLC. Please check the IP and try again.');
     } finally {
@@ -28,28 +31,29 @@ export default function App() {
   };
 
   useEffect(() => {
-    let interval;
-    if (ip && tags.length > 0) {
-      const fetchTagValues = async () => {
-        try {
-          const tagNames = tags.map(tag => tag.name);
-          const values = await readTags(ip, tagNames);
-          setTagValues(values);
-        } catch (err) {
-          // Optionally handle error
-        }
+    // Subscribe once the scan has finished, not for every batch
+    if (ip && tags.length > 0 && !loading) {
+      const tagNames = tags.map(tag => tag.name);
+      const slotNumber = parseInt(slot) || 0;
+      // The server pushes every value once, then only tags that changed
+      const unsubscribe = subscribeTags(ip, slotNumber, tagNames, (values) => {
+        setTagValues(prev => {
+          const next = { ...prev };
+          values.forEach(v => { next[v.name] = v; });
+          return next;
+        });
+      });
+      return () => {
+        unsubscribe();
+        setTagValues({});
       };
-      fetchTagValues(); // Initial fetch
-      interval = setInterval(fetchTagValues, 2000); // Poll every 2 seconds
-    } else {
-      setTagValues([]);
     }
-    return () => interval && clearInterval(interval);
-  }, [ip, tags]);
+    setTagValues({});
+  }, [ip, tags, loading]);
 
   // Merge tags and tagValues for the table
   const tagsWithValues = tags.map(tag => {
-    const valueObj = tagValues.find(v => v.name === tag.name);
+    const valueObj = tagValues[tag.name];
     return {
       ...tag,
       value: valueObj ? valueObj.value : ''
@@ -16,6 +16,9 @@ import Checkbox from '@mui/material/Checkbox';
 
 const TAG_TYPES = ['BOOL', 'INT', 'DINT', 'REAL', 'TIMER', 'STRING'];
 
+// Arrays and UDTs come back as lists/objects
+const formatValue = (value) => (value !== null && typeof value === 'object' ? JSON.stringify(value) : value);
+
 export default function TagTable({ tags }) {
   const [filter, setFilter] = React.useState('');
   const [hideUnreadable, setHideUnreadable] = React.useState(false);
@@ -30,7 +33,7 @@ export default function TagTable({ tags }) {
         const matchesText = (
           tag.name.toLowerCase().includes(filter.toLowerCase()) ||
           (tag.type || '').toLowerCase().includes(filter.toLowerCase()) ||
-          (tag.value !== undefined && String(tag.value).toLowerCase().includes(filter.toLowerCase()))
+          (tag.value !== undefined && String(formatValue(tag.value)).toLowerCase().includes(filter.toLowerCase()))
         );
         const notUnreadable = !hideUnreadable || tag.value !== 'Unreadable';
         const matchesType = tag.type && typeFilters[tag.type.toUpperCase()];
@@ -91,7 +94,7 @@ export default function TagTable({ tags }) {
               <TableRow key={i}>
                 <TableCell>{tag.name}</TableCell>
                 <TableCell>{tag.type}</TableCell>
-                <TableCell>{tag.value}</TableCell>
+                <TableCell>{formatValue(tag.value)}</TableCell>
               </TableRow>
             ))}
           </TableBody>
@@ -14,6 +14,52 @@ export const scanTags = async (ip, slot = 0) => {
   }
 };
 
+// Scan tags progressively: onTags is called with each batch as the controller
+// returns it. Resolves with the total number of tags.
+export const streamTags = async (ip, slot = 0, onTags) => {
+  const response = await fetch(`${api.defaults.baseURL}/scan-stream?ip=${ip}&slot=${slot}`);
+  if (!response.ok) {
+    const body = await response.json().catch(() => ({}));
+    throw new Error(body.detail || 'Failed to scan PLC tags');
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+
+    const tags = [];
+    for (const line of lines.filter(Boolean)) {
+      const item = JSON.parse(line);
+      if (item.error) throw new Error(item.error);
+      if (item.done) return item.total;
+      tags.push(item);
+    }
+    if (tags.length > 0) onTags(tags);
+  }
+  throw new Error('Tag scan ended unexpectedly');
+};
+
+// Search the controller's tags server-side, one page at a time.
+// Options: q (substring), prefix, types (array), parent ('' for top level),
+// members (include UDT members), offset and limit.
+export const searchTags = async (ip, slot = 0, { q, prefix, types, parent, members = true, offset = 0, limit = 100 } = {}) => {
+  try {
+    const response = await api.get('/tags/search', {
+      params: { ip, slot, q, prefix, type: types, parent, members, offset, limit },
+      paramsSerializer: { indexes: null },
+    });
+    return response.data;
+  } catch (error) {
+    throw new Error(error.response?.data?.detail || 'Failed to search PLC tags');
+  }
+};
+
 export const readTags = async (ip, tags) => {
   try {
     const response = await api.post('/read-tags', { ip, tags });
@@ -23,4 +69,72 @@ export const readTags = async (ip, tags) => {
   }
 };
 
+// Write many tags in one request. writes: [{ tag, value }]. Options: verify
+// (read back and compare) and rollbackOnError (restore previous values if any
+// write fails). Resolves with { success, results } including per-tag status.
+export const writeTags = async (ip, slot = 0, writes, { verify = false, rollbackOnError = false } = {}) => {
+  try {
+    const response = await api.post('/write-tags', { ip, slot, writes, verify, rollback_on_error: rollbackOnError });
+    return response.data;
+  } catch (error) {
+    throw new Error(error.response?.data?.detail || 'Failed to write PLC tags');
+  }
+};
+
+// Poll for changes only: pass the version from the previous call as `since`
+// and get back just the tags whose value or status changed since then.
+export const readTagChanges = async (ip, tags, since = null) => {
+  try {
+    const response = await api.post('/read-tags', { ip, tags, since });
+    return { values: response.data, version: response.headers['x-tag-version'] };
+  } catch (error) {
+    throw new Error(error.response?.data?.detail || 'Failed to read PLC tags');
+  }
+};
+
+// Circuit breaker state per controller: [{ ip_address, slot, state, available, last_error, next_probe_seconds, ... }].
+// Requests to a controller that is not available fail fast with 503 until a background probe reaches it.
+export const getControllerHealth = async () => {
+  try {
+    const response = await api.get('/controllers/health');
+    return response.data;
+  } catch (error) {
+    throw new Error(error.response?.data?.detail || 'Failed to get controller health');
+  }
+};
+
+// Request queue per controller: [{ ip_address, slot, in_flight, queued, rejected, average_run_ms, ... }].
+// A full queue answers 429 with Retry-After; writes are queued ahead of reads, scans and tag uploads.
+export const getControllerLoad = async () => {
+  try {
+    const response = await api.get('/controllers/load');
+    return response.data;
+  } catch (error) {
+    throw new Error(error.response?.data?.detail || 'Failed to get controller load');
+  }
+};
+
+// Without rateMs each tag is scanned at the period of its server-side scan class
+export const subscribeTags = (ip, slot, tags, onUpdate, onError, rateMs = null) => {
+  const wsUrl = `${api.defaults.baseURL.replace(/^http/, 'ws')}/ws/tags`;
+  const socket = new WebSocket(wsUrl);
+
+  socket.onopen = () => {
+    socket.send(JSON.stringify({ ip, slot, tags, rate_ms: rateMs }));
+  };
+  socket.onmessage = (event) => {
+    const message = JSON.parse(event.data);
+    if (message.type === 'update') {
+      onUpdate(message.values);
+    } else if (message.type === 'error' && onError) {
+      onError(new Error(message.detail));
+    }
+  };
+  socket.onerror = () => {
+    if (onError) onError(new Error('Live tag stream failed'));
+  };
+
+  return () => socket.close();
+};
+
 export default api; 
\ No newline at end of file
@@ -14,7 +14,11 @@ def test_imports():
         'uvicorn',
         'pylogix',
         'pydantic',
-        'python-dotenv'
+        'python-dotenv',
+        'numpy',
+        'prometheus_client',
+        'orjson',
+        'msgpack'
     ]
     
     print("🔍 Testing package imports...")
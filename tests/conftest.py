@@ -0,0 +1,35 @@
+import pytest
+from app.models.tag import PLCConnectionConfig
+from app.services.connection_pool import PLCConnectionPool
+from app.services.pylogix_service import PylogixService
+from app.services.tag_cache import TagCache, TagDatabase
+from app.simulator.controller import build_demo_controller
+from app.simulator.eip_server import EIPSimulator
+
+# The simulator always listens on the EtherNet/IP port, so it gets a loopback address of its own
+SIMULATOR_HOST = "127.0.0.20"
+
+@pytest.fixture(scope="session")
+def simulator():
+    """In-repo EtherNet/IP simulator with a small demo controller"""
+    controller = build_demo_controller(scalar_count=40, array_count=6, array_length=100, udt_count=4, program_tag_count=4)
+    simulator = EIPSimulator(controller, host=SIMULATOR_HOST).start()
+    yield simulator
+    simulator.stop()
+
+@pytest.fixture(scope="session")
+def plc_config(simulator) -> PLCConnectionConfig:
+    return PLCConnectionConfig(ip_address=SIMULATOR_HOST, timeout=5)
+
+@pytest.fixture(scope="session")
+def plc_service(tmp_path_factory, simulator):
+    """Service reading from the simulator, with its tag cache in a temporary directory"""
+    pool = PLCConnectionPool()
+    service = PylogixService(pool, TagCache(pool, cache_dir=str(tmp_path_factory.mktemp("tags"))))
+    yield service
+    pool.close_all()
+
+@pytest.fixture(scope="session")
+def tag_database(plc_service, plc_config) -> TagDatabase:
+    """The simulator's tag database, uploaded over EtherNet/IP"""
+    return plc_service.tag_cache.get(plc_config)
@@ -0,0 +1,105 @@
+import msgpack
+import orjson
+import pytest
+from app.services.compact import TagIdRegistry, UnknownTagIdError, compact_payload, encode
+from app.services.pylogix_service import TagReadColumns
+
+CONTROLLER = "10.0.0.1/0"
+
+def test_ids_are_stable_per_controller():
+    registry = TagIdRegistry()
+
+    names, ids, issued = registry.resolve(CONTROLLER, ["Counter_0", "Level_1", "Counter_0"])
+    assert names == ["Counter_0", "Level_1", "Counter_0"]
+    assert ids[0] == ids[2] != ids[1]
+    assert issued == {ids[0]: "Counter_0", ids[1]: "Level_1"}
+
+    names, again, issued = registry.resolve(CONTROLLER, [ids[1], "Counter_0"])
+    assert names == ["Level_1", "Counter_0"] and again == [ids[1], ids[0]]
+    # names of tags requested by id are not sent again
+    assert issued == {ids[0]: "Counter_0"}
+
+def test_ids_of_other_controllers_are_unknown():
+    registry = TagIdRegistry()
+    _, ids, _ = registry.resolve(CONTROLLER, ["Counter_0"])
+
+    with pytest.raises(UnknownTagIdError) as error:
+        registry.resolve("10.0.0.2/0", ["Level_1", ids[0], 99])
+
+    assert error.value.tag_ids == [ids[0], 99]
+
+def test_least_recently_requested_tags_are_evicted():
+    registry = TagIdRegistry(max_tags_per_controller=3)
+    _, ids, _ = registry.resolve(CONTROLLER, ["A", "B", "C"])
+    registry.resolve(CONTROLLER, [ids[0]])
+
+    _, (d_id,), _ = registry.resolve(CONTROLLER, ["D"])
+
+    assert registry.resolve(CONTROLLER, [ids[0], ids[2], d_id])[0] == ["A", "C", "D"]
+    with pytest.raises(UnknownTagIdError):
+        registry.resolve(CONTROLLER, [ids[1]])
+    # a tag asked for again by name gets a new id, never an old one
+    _, (b_id,), _ = registry.resolve(CONTROLLER, ["B"])
+    assert b_id not in ids + [d_id]
+
+def test_least_recently_polled_controllers_are_evicted():
+    registry = TagIdRegistry(max_controllers=2)
+    _, first, _ = registry.resolve("10.0.0.1/0", ["Counter_0"])
+    _, second, _ = registry.resolve("10.0.0.2/0", ["Counter_0"])
+    registry.resolve("10.0.0.1/0", first)
+
+    registry.resolve("10.0.0.3/0", ["Counter_0"])
+
+    assert registry.resolve("10.0.0.1/0", first)[0] == ["Counter_0"]
+    with pytest.raises(UnknownTagIdError):
+        registry.resolve("10.0.0.2/0", second)
+
+def test_requests_larger_than_a_controller_keeps_are_refused():
+    registry = TagIdRegistry(max_tags_per_controller=2)
+
+    with pytest.raises(ValueError, match="At most 2 tags"):
+        registry.resolve(CONTROLLER, ["A", "B", "C"])
+
+def columns() -> TagReadColumns:
+    return TagReadColumns(
+        ["Counter_0", "Level_1", "Motor_0"],
+        [5, 2.5, object()],
+        ["Success", "Success", "Unknown tag"],
+        "2026-01-01T00:00:00",
+        timestamps=["2026-01-01T00:00:00", "2026-01-01T00:00:01", "2026-01-01T00:00:01"]
+    )
+
+def test_payload_is_columnar():
+    payload = compact_payload(CONTROLLER, columns(), [7, 8, 9], {8: "Level_1"})
+
+    assert payload == {
+        "controller": CONTROLLER,
+        "timestamp": "2026-01-01T00:00:00",
+        "delta": False,
+        "ids": [7, 8, 9],
+        "names": {"8": "Level_1"},
+        "values": [5, 2.5, "Unreadable"],
+        "status": [0, 0, 1],
+        "timestamps": ["2026-01-01T00:00:00", "2026-01-01T00:00:01", "2026-01-01T00:00:01"]
+    }
+
+def test_delta_payload_keeps_changed_tags():
+    payload = compact_payload(CONTROLLER, columns(), [7, 8, 9], {}, changed=[False, True, False])
+
+    assert payload["delta"] is True
+    assert (payload["ids"], payload["values"], payload["status"]) == ([8], [2.5], [0])
+    assert payload["timestamps"] == ["2026-01-01T00:00:01"]
+
+@pytest.mark.parametrize("accept, media_type, decode", [
+    ("application/msgpack", "application/msgpack", msgpack.unpackb),
+    ("application/json, application/x-msgpack;q=0.9", "application/msgpack", msgpack.unpackb),
+    ("application/json", "application/json", orjson.loads),
+    ("", "application/json", orjson.loads)
+])
+def test_payload_encoding_follows_the_accept_header(accept, media_type, decode):
+    payload = compact_payload(CONTROLLER, columns(), [7, 8, 9], {7: "Counter_0"})
+
+    body, encoded_as = encode(payload, accept)
+
+    assert encoded_as == media_type
+    assert decode(body) == payload
@@ -0,0 +1,158 @@
+import threading
+import time
+import pytest
+from pylogix.lgx_response import Response
+from app.models.tag import PLCConnectionConfig
+from app.services.connection_pool import LARGE_CONNECTION_SIZE, STANDARD_CONNECTION_SIZE, PLCConnectionPool
+from app.simulator.controller import build_demo_controller
+from app.simulator.eip_server import EIPSimulator
+from conftest import SIMULATOR_HOST
+
+# A controller that refuses the Large Forward Open, like older Logix firmware
+STANDARD_HOST = "127.0.0.26"
+
+@pytest.fixture
+def config(simulator) -> PLCConnectionConfig:
+    return PLCConnectionConfig(ip_address=SIMULATOR_HOST, timeout=5)
+
+@pytest.fixture
+def pool():
+    pool = PLCConnectionPool()
+    yield pool
+    pool.close_all()
+
+def read_counter(plc):
+    return plc.Read("Counter_0")
+
+def service_count(simulator, service: int) -> int:
+    return simulator.stats()["services"].get(f"0x{service:02x}", 0)
+
+def test_sessions_are_reused(pool, config, simulator):
+    connections = simulator.stats()["connections"]
+
+    first = pool.acquire(config)
+    assert pool.run(config, read_counter).Status == "Success"
+    assert pool.run(config, read_counter).Status == "Success"
+
+    assert pool.acquire(config) is first
+    assert simulator.stats()["connections"] == connections + 1
+    assert pool.stats()[0]["use_count"] == 4
+
+@pytest.mark.parametrize("failure", [
+    OSError("Connection reset by peer"),
+    Response("Counter_0", None, "Connection lost")
+])
+def test_operations_are_retried_once_on_a_fresh_session(pool, config, failure):
+    stale = pool.acquire(config).plc
+    calls = []
+
+    def fail_once(plc):
+        calls.append(plc)
+        if len(calls) == 1:
+            if isinstance(failure, Exception):
+                raise failure
+            return failure
+        return read_counter(plc)
+
+    assert pool.run(config, fail_once).Status == "Success"
+
+    assert calls[0] is stale and calls[1] is not stale
+    assert not stale.conn.SocketConnected
+    assert pool.acquire(config).plc is calls[1]
+
+def test_idle_sessions_are_closed(config):
+    pool = PLCConnectionPool(idle_timeout=0.05)
+    plc = pool.acquire(config).plc
+    time.sleep(0.1)
+
+    pool.evict_idle()
+
+    assert pool.stats() == [] and not plc.conn.SocketConnected
+
+def test_sessions_in_use_are_not_evicted(config):
+    pool = PLCConnectionPool(idle_timeout=0.05)
+    try:
+        with pool.session(config) as connection:
+            time.sleep(0.1)
+            # another request evicting while this one still holds the session
+            evictor = threading.Thread(target=pool.evict_idle)
+            evictor.start()
+            evictor.join()
+
+            assert connection.socket_connected
+            assert connection.plc.Read("Counter_0").Status == "Success"
+        assert len(pool.stats()) == 1
+    finally:
+        pool.close_all()
+
+def test_sessions_idle_past_the_health_check_interval_are_probed(config, simulator):
+    pool = PLCConnectionPool(health_check_interval=0.05)
+    try:
+        connection = pool.acquire(config)
+        probes = service_count(simulator, 0x03)
+
+        pool.acquire(config)
+        assert service_count(simulator, 0x03) == probes
+
+        time.sleep(0.1)
+        pool.acquire(config)
+        assert service_count(simulator, 0x03) == probes + 1
+
+        # a probe that fails replaces the session
+        time.sleep(0.1)
+        stale = connection.plc
+        stale.GetPLCTime = lambda raw=False: Response(None, None, "Connection lost")
+        assert pool.acquire(config).plc is not stale
+    finally:
+        pool.close_all()
+
+def test_controllers_refusing_large_forward_open_get_a_standard_connection(pool, config):
+    with EIPSimulator(build_demo_controller(scalar_count=4, array_count=1, udt_count=1), host=STANDARD_HOST, large_forward_open=False) as standard:
+        standard_config = PLCConnectionConfig(ip_address=STANDARD_HOST, timeout=5)
+
+        assert pool.run(standard_config, read_counter).Status == "Success"
+        assert pool.negotiated_size(standard_config) == STANDARD_CONNECTION_SIZE
+        assert pool.run(config, read_counter).Status == "Success"
+        assert pool.negotiated_size(config) == LARGE_CONNECTION_SIZE
+
+        # reconnects go straight to the size that worked
+        large_attempts = service_count(standard, 0x5b)
+        pool.invalidate(standard_config)
+        assert pool.run(standard_config, read_counter).Status == "Success"
+        assert service_count(standard, 0x5b) == large_attempts
+        assert service_count(standard, 0x54) == 2
+
+def test_micro800_controllers_get_a_standard_connection(pool, simulator):
+    micro800 = PLCConnectionConfig(ip_address=SIMULATOR_HOST, timeout=5, micro800=True)
+    large_attempts = service_count(simulator, 0x5b)
+
+    assert pool.run(micro800, read_counter).Status == "Success"
+
+    assert pool.negotiated_size(micro800) == STANDARD_CONNECTION_SIZE
+    assert service_count(simulator, 0x5b) == large_attempts
+
+def test_a_configured_connection_size_is_used_for_every_controller(config, monkeypatch):
+    monkeypatch.setenv("SIGNALTAP_CONNECTION_SIZE", "1400")
+    pool = PLCConnectionPool()
+    try:
+        assert pool.run(config, read_counter).Status == "Success"
+        assert pool.negotiated_size(config) == pool.stats()[0]["connection_size"] == 1400
+    finally:
+        pool.close_all()
+
+def test_the_size_is_negotiated_again_after_a_failed_connect(pool):
+    standard_config = PLCConnectionConfig(ip_address=STANDARD_HOST, timeout=1)
+    controller = build_demo_controller(scalar_count=4, array_count=1, udt_count=1)
+    with EIPSimulator(controller, host=STANDARD_HOST, large_forward_open=False):
+        pool.run(standard_config, read_counter)
+    pool.invalidate(standard_config)
+
+    with pytest.raises(Exception, match="Failed to connect"):
+        pool.run(standard_config, read_counter)
+    assert pool.negotiated_size(standard_config) is None
+
+    # the controller comes back with firmware that takes the Large Forward Open
+    pool.health.record_success(pool.make_key(standard_config))
+    with EIPSimulator(controller, host=STANDARD_HOST):
+        assert pool.run(standard_config, read_counter).Status == "Success"
+    assert pool.negotiated_size(standard_config) == LARGE_CONNECTION_SIZE
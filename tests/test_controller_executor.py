@@ -0,0 +1,155 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.services.controller_executor import (
+    ControllerBusy, ControllerExecutor, ControllerQueue, INTERACTIVE, SCAN, UPLOAD, WRITE
+)
+
+KEY = ("127.0.0.1", 0, False)
+LIMITS = {WRITE: 10, INTERACTIVE: 10, SCAN: 2, UPLOAD: 1}
+
+async def queue_up(queue: ControllerQueue, order: list, calls):
+    """Start waiting calls one by one, so each is queued before the next"""
+    async def call(priority, client, label):
+        await queue.acquire(priority, client)
+        order.append(label)
+
+    tasks = []
+    for priority, client, label in calls:
+        tasks.append(asyncio.create_task(call(priority, client, label)))
+        await asyncio.sleep(0)
+    return tasks
+
+async def drain(queue: ControllerQueue, tasks):
+    for _ in tasks:
+        queue.release()
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+
+def test_calls_run_at_once_until_the_queue_is_full():
+    async def scenario():
+        queue = ControllerQueue(KEY, 2, LIMITS)
+        await queue.acquire(SCAN, "a")
+        await queue.acquire(SCAN, "a")
+        assert queue.in_flight == 2
+
+        waiter = asyncio.create_task(queue.acquire(SCAN, "a"))
+        await asyncio.sleep(0)
+        assert not waiter.done() and queue.queued[SCAN] == 1
+
+        queue.release()
+        await waiter
+        assert queue.in_flight == 2 and queue.queued[SCAN] == 0
+
+        queue.release()
+        queue.release()
+        assert queue.in_flight == 0
+
+    asyncio.run(scenario())
+
+def test_most_urgent_class_goes_first():
+    async def scenario():
+        queue = ControllerQueue(KEY, 1, LIMITS)
+        await queue.acquire(INTERACTIVE, "a")
+        order = []
+        tasks = await queue_up(queue, order, [
+            (UPLOAD, "a", "upload"), (SCAN, "a", "scan"), (INTERACTIVE, "a", "read"), (WRITE, "a", "write")
+        ])
+        await drain(queue, tasks)
+        assert order == ["write", "read", "scan", "upload"]
+
+    asyncio.run(scenario())
+
+def test_clients_take_turns_within_a_class():
+    async def scenario():
+        queue = ControllerQueue(KEY, 1, LIMITS)
+        await queue.acquire(INTERACTIVE, "a")
+        order = []
+        tasks = await queue_up(queue, order, [
+            (INTERACTIVE, "a", "a1"), (INTERACTIVE, "a", "a2"), (INTERACTIVE, "a", "a3"),
+            (INTERACTIVE, "b", "b1"), (INTERACTIVE, "c", "c1"), (INTERACTIVE, "b", "b2")
+        ])
+        await drain(queue, tasks)
+        assert order == ["a1", "b1", "c1", "a2", "b2", "a3"]
+
+    asyncio.run(scenario())
+
+def test_full_class_turns_calls_away():
+    async def scenario():
+        queue = ControllerQueue(KEY, 1, LIMITS)
+        await queue.acquire(INTERACTIVE, "a")
+        queue.observe(0.5)
+        order = []
+        tasks = await queue_up(queue, order, [(SCAN, "a", "s1"), (SCAN, "b", "s2")])
+
+        with pytest.raises(ControllerBusy) as busy:
+            await queue.acquire(SCAN, "c")
+        assert busy.value.priority == SCAN and busy.value.queued == 2
+        assert busy.value.retry_after == pytest.approx(0.1 * 3)
+        assert queue.rejected == {WRITE: 0, INTERACTIVE: 0, SCAN: 1, UPLOAD: 0}
+
+        # other classes still have room
+        tasks += await queue_up(queue, order, [(WRITE, "c", "w")])
+        await drain(queue, tasks)
+        assert order == ["w", "s1", "s2"]
+
+    asyncio.run(scenario())
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def scenario():
+        queue = ControllerQueue(KEY, 1, LIMITS)
+        await queue.acquire(INTERACTIVE, "a")
+        order = []
+        tasks = await queue_up(queue, order, [(INTERACTIVE, "a", "gone"), (INTERACTIVE, "b", "b1")])
+
+        tasks[0].cancel()
+        await asyncio.gather(tasks[0], return_exceptions=True)
+        assert queue.queued[INTERACTIVE] == 1 and "a" not in queue.waiting[INTERACTIVE]
+
+        await drain(queue, tasks[1:])
+        assert order == ["b1"]
+        queue.release()
+        assert queue.in_flight == 0
+
+    asyncio.run(scenario())
+
+def test_executor_runs_writes_before_queued_scans():
+    async def scenario():
+        executor = ControllerExecutor(queue_limits=LIMITS)
+        gate = threading.Event()
+        order = []
+        try:
+            blocker = asyncio.create_task(executor.run(KEY, gate.wait, 5))
+            await asyncio.sleep(0.05)
+            calls = [
+                asyncio.create_task(executor.run(KEY, order.append, label, priority=priority, client="test"))
+                for priority, label in ((SCAN, "scan"), (INTERACTIVE, "read"), (WRITE, "write"))
+            ]
+            await asyncio.sleep(0.05)
+            assert executor.stats()[0]["queued"][SCAN] == 1
+            gate.set()
+            await asyncio.gather(blocker, *calls)
+        finally:
+            gate.set()
+            executor.shutdown()
+        assert order == ["write", "read", "scan"]
+
+    asyncio.run(scenario())
+
+def test_deadline_counts_time_spent_queued():
+    async def scenario():
+        executor = ControllerExecutor(queue_limits=LIMITS)
+        try:
+            blocker = asyncio.create_task(executor.run(KEY, time.sleep, 0.3))
+            await asyncio.sleep(0.05)
+            with pytest.raises(asyncio.TimeoutError):
+                await executor.run(KEY, time.time, deadline=0.1)
+            await blocker
+            # the slot of the call that gave up is free again
+            assert await executor.run(KEY, lambda: "done", deadline=1.0) == "done"
+            assert executor.stats()[0]["in_flight"] == 0
+        finally:
+            executor.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,147 @@
+import asyncio
+import time
+import pytest
+from app.models.tag import PLCConnectionConfig
+from app.services.cached_reader import CachedTagReader
+from app.services.connection_pool import PLCConnectionPool
+from app.services.controller_executor import ControllerExecutor
+from app.services.controller_health import CLOSED, OPEN, PROBING, ControllerHealth, ControllerUnavailable
+from app.simulator.controller import build_demo_controller
+from app.simulator.eip_server import EIPSimulator
+from conftest import SIMULATOR_HOST
+
+KEY = ("127.0.0.1", 0, False)
+
+# Nothing listens here until the test starts a simulator on it
+OUTAGE_HOST = "127.0.0.21"
+
+def state_of(health: ControllerHealth, key=KEY) -> str:
+    return next(entry["state"] for entry in health.stats() if (entry["ip_address"], entry["slot"]) == key[:2])
+
+def test_breaker_opens_after_consecutive_failures():
+    health = ControllerHealth(failure_threshold=2, initial_backoff=5.0)
+    health.check(KEY)
+
+    health.record_failure(KEY, "timed out")
+    health.check(KEY)
+    assert health.is_available(KEY)
+
+    health.record_failure(KEY, "timed out")
+    with pytest.raises(ControllerUnavailable) as unavailable:
+        health.check(KEY)
+    assert unavailable.value.last_error == "timed out"
+    assert 4.0 < unavailable.value.retry_after <= 5.0
+    assert state_of(health) == OPEN
+
+def test_success_resets_the_failure_count():
+    health = ControllerHealth(failure_threshold=2)
+    health.record_failure(KEY, "timed out")
+    health.record_success(KEY)
+    health.record_failure(KEY, "timed out")
+
+    assert health.is_available(KEY)
+
+def test_probes_back_off_until_one_succeeds():
+    health = ControllerHealth(failure_threshold=1, initial_backoff=0.01, max_backoff=0.04)
+    health.record_failure(KEY, "timed out")
+    time.sleep(0.02)
+
+    assert health.due_probes() == [KEY]
+    assert state_of(health) == PROBING
+    # a controller being probed is not due again, and still fails fast
+    assert health.due_probes() == []
+    with pytest.raises(ControllerUnavailable):
+        health.check(KEY)
+
+    # each failed probe doubles the wait for the next, up to max_backoff
+    intervals = []
+    for _ in range(3):
+        health.record_failure(KEY, "still down")
+        intervals.append(health._states[KEY].probe_interval)
+        assert health.due_probes() == []
+        time.sleep(intervals[-1] + 0.01)
+        assert health.due_probes() == [KEY]
+    assert intervals == [0.02, 0.04, 0.04]
+
+    health.record_success(KEY)
+    assert state_of(health) == CLOSED
+    health.check(KEY)
+
+def test_late_failures_do_not_push_back_the_probe():
+    health = ControllerHealth(failure_threshold=1, initial_backoff=2.0)
+    health.record_failure(KEY, "timed out")
+    next_probe_at = health._states[KEY].next_probe_at
+
+    # a request that started before the breaker opened
+    health.record_failure(KEY, "timed out")
+
+    assert health._states[KEY].next_probe_at == next_probe_at
+    assert health._states[KEY].probe_interval == 2.0
+
+def test_probe_that_raises_counts_as_a_failure():
+    async def scenario():
+        health = ControllerHealth(failure_threshold=1, initial_backoff=0.0)
+        health.record_failure(KEY, "timed out")
+        probed = []
+
+        async def probe(key):
+            probed.append(key)
+            raise asyncio.TimeoutError()
+
+        loop = asyncio.create_task(health.probe_loop(probe, interval=0.01))
+        await asyncio.sleep(0.05)
+        loop.cancel()
+        return health, probed
+
+    health, probed = asyncio.run(scenario())
+    assert probed and set(probed) == {KEY}
+    assert state_of(health) in (OPEN, PROBING)
+    assert health._states[KEY].last_error == "TimeoutError"
+
+def test_pool_fails_fast_while_a_controller_is_down():
+    health = ControllerHealth(failure_threshold=2, initial_backoff=0.0)
+    pool = PLCConnectionPool(health=health)
+    config = PLCConnectionConfig(ip_address=OUTAGE_HOST, timeout=1)
+    key = pool.make_key(config)
+    try:
+        for _ in range(2):
+            with pytest.raises(Exception, match="Failed to connect"):
+                pool.acquire(config)
+        with pytest.raises(ControllerUnavailable):
+            pool.acquire(config)
+
+        assert health.due_probes() == [key]
+        with pytest.raises(Exception, match="Failed to connect"):
+            pool.probe(config)
+        assert state_of(health, key) == OPEN
+
+        simulator = EIPSimulator(build_demo_controller(scalar_count=4, array_count=0, udt_count=0, program_tag_count=0), host=OUTAGE_HOST).start()
+        try:
+            assert health.due_probes() == [key]
+            pool.probe(config)
+            assert state_of(health, key) == CLOSED
+            assert pool.run(config, lambda plc: plc.Read("Counter_0").Status) == "Success"
+        finally:
+            pool.close_all()
+            simulator.stop()
+    finally:
+        pool.close_all()
+
+def test_reads_check_the_breaker_of_their_own_connection(plc_service):
+    micro800 = plc_service.pool.make_key(PLCConnectionConfig(ip_address=SIMULATOR_HOST, micro800=True))
+    for _ in range(plc_service.pool.health.failure_threshold):
+        plc_service.pool.health.record_failure(micro800, "timed out")
+
+    async def scenario():
+        reader = CachedTagReader(plc_service, ControllerExecutor())
+        try:
+            with pytest.raises(ControllerUnavailable):
+                await reader.read(SIMULATOR_HOST, ["Counter_0"], timeout=5, micro800=True)
+            return await reader.read(SIMULATOR_HOST, ["Counter_0"], timeout=5)
+        finally:
+            reader.executor.shutdown()
+
+    try:
+        assert asyncio.run(scenario()).statuses == ["Success"]
+    finally:
+        plc_service.pool.health.record_success(micro800)
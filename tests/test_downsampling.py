@@ -0,0 +1,88 @@
+import numpy as np
+from app.models.history import HistoryMode
+from app.routes.history import build_history
+from app.services.downsampling import aggregate_buckets, lttb
+
+def random_series(count: int, seed: int = 3):
+    rng = np.random.default_rng(seed)
+    timestamps = np.sort(rng.uniform(0.0, 100.0, count))
+    values = np.cumsum(rng.normal(0.0, 1.0, count))
+    return timestamps, values
+
+def test_aggregate_buckets_match_a_plain_loop():
+    timestamps, values = random_series(5000)
+    # a gap leaves some buckets empty, and samples without a value are skipped
+    keep = (timestamps < 40.0) | (timestamps > 55.0)
+    timestamps, values = timestamps[keep], values[keep]
+    values[::7] = np.nan
+
+    buckets = aggregate_buckets(timestamps, values, 0.0, 100.0, 50)
+
+    expected = {}
+    for ts, value in zip(timestamps, values):
+        if not np.isnan(value):
+            expected.setdefault(int(ts // 2.0), []).append(value)
+    assert buckets["timestamps"].tolist() == [index * 2.0 for index in sorted(expected)]
+    assert buckets["count"].tolist() == [len(expected[index]) for index in sorted(expected)]
+    assert np.allclose(buckets["min"], [min(expected[index]) for index in sorted(expected)])
+    assert np.allclose(buckets["max"], [max(expected[index]) for index in sorted(expected)])
+    assert np.allclose(buckets["avg"], [np.mean(expected[index]) for index in sorted(expected)])
+
+def test_aggregate_buckets_keep_the_range_end_in_the_last_bucket():
+    buckets = aggregate_buckets(np.array([0.0, 5.0, 10.0]), np.array([1.0, 2.0, 3.0]), 0.0, 10.0, 2)
+
+    assert buckets["timestamps"].tolist() == [0.0, 5.0]
+    assert buckets["count"].tolist() == [1, 2]
+
+def test_aggregate_buckets_without_values():
+    buckets = aggregate_buckets(np.array([1.0, 2.0]), np.array([np.nan, np.nan]), 0.0, 10.0, 5)
+
+    assert all(len(column) == 0 for column in buckets.values())
+
+def test_lttb_returns_threshold_points_of_the_series():
+    timestamps, values = random_series(10000)
+
+    sampled_timestamps, sampled_values = lttb(timestamps, values, 500)
+
+    assert len(sampled_timestamps) == len(sampled_values) == 500
+    assert sampled_timestamps[0] == timestamps[0] and sampled_timestamps[-1] == timestamps[-1]
+    assert np.all(np.diff(sampled_timestamps) > 0)
+    positions = np.searchsorted(timestamps, sampled_timestamps)
+    assert np.array_equal(values[positions], sampled_values)
+
+def test_lttb_keeps_spikes():
+    timestamps = np.arange(1000, dtype=np.float64)
+    values = np.zeros(1000)
+    values[[137, 612]] = [50.0, -50.0]
+
+    sampled_timestamps, sampled_values = lttb(timestamps, values, 20)
+
+    assert {137.0, 612.0} <= set(sampled_timestamps.tolist())
+    assert sampled_values.max() == 50.0 and sampled_values.min() == -50.0
+
+def test_lttb_short_series_come_back_without_missing_values():
+    timestamps = np.array([0.0, 1.0, 2.0, 3.0])
+    values = np.array([1.0, np.nan, 3.0, 4.0])
+
+    sampled_timestamps, sampled_values = lttb(timestamps, values, 10)
+
+    assert sampled_timestamps.tolist() == [0.0, 2.0, 3.0]
+    assert sampled_values.tolist() == [1.0, 3.0, 4.0]
+
+def test_raw_history_is_paged():
+    timestamps = np.arange(2032, dtype=np.float64)
+    values = timestamps * 0.5
+    values[3] = np.nan
+    pages, start = [], 0.0
+    while True:
+        keep = timestamps >= start
+        page = build_history("Level_1", timestamps[keep], values[keep], start, 3000.0, HistoryMode.RAW, 1000)
+        pages.append(page)
+        if not page.truncated:
+            break
+        start = page.next_start
+
+    assert [len(page.timestamps) for page in pages] == [1000, 1000, 32]
+    assert [page.next_start for page in pages] == [1000.0, 2000.0, None]
+    assert pages[0].values[3] is None
+    assert sum((page.timestamps for page in pages), []) == timestamps.tolist()
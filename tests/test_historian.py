@@ -0,0 +1,102 @@
+from datetime import datetime
+import random
+import numpy as np
+import pytest
+from app.services.historian import Historian, SwingingDoor, parse_deviations
+
+def compress(door: SwingingDoor, samples):
+    archived = []
+    for sample in samples:
+        archived.extend(door.add(sample))
+    return archived + door.flush()
+
+def numeric(points):
+    return [(float(ts), float(value), None, True) for ts, value in points]
+
+def test_first_sample_is_archived():
+    door = SwingingDoor(0.5, 600.0)
+
+    assert door.add((0.0, 1.0, None, True)) == [(0.0, 1.0, None, True)]
+
+def test_straight_line_keeps_its_end_points():
+    archived = compress(SwingingDoor(0.01, 600.0), numeric((ts, 2 * ts + 1) for ts in range(100)))
+
+    assert [sample[:2] for sample in archived] == [(0.0, 1.0), (99.0, 199.0)]
+
+def test_interpolation_stays_within_the_deviation():
+    rng = random.Random(7)
+    points, value = [], 0.0
+    for ts in range(2000):
+        value += rng.uniform(-1.0, 1.0)
+        points.append((ts, value))
+    deviation = 0.5
+
+    archived = compress(SwingingDoor(deviation, 600.0), numeric(points))
+
+    assert len(archived) < len(points) / 2
+    timestamps, values = np.array(points).T
+    restored = np.interp(timestamps, [sample[0] for sample in archived], [sample[1] for sample in archived])
+    assert np.max(np.abs(restored - values)) <= deviation + 1e-9
+
+def test_zero_deviation_keeps_every_change_of_slope():
+    archived = compress(SwingingDoor(0.0, 600.0), numeric([(0, 0), (1, 1), (2, 2), (3, 0), (4, 0), (5, 0), (6, 5)]))
+
+    assert [sample[:2] for sample in archived] == [(0.0, 0.0), (2.0, 2.0), (3.0, 0.0), (5.0, 0.0), (6.0, 5.0)]
+
+def test_flat_value_is_archived_every_max_interval():
+    archived = compress(SwingingDoor(0.5, 10.0), numeric((ts, 3.0) for ts in range(0, 35)))
+
+    assert [sample[0] for sample in archived] == [0.0, 9.0, 10.0, 19.0, 20.0, 29.0, 30.0, 34.0]
+
+def test_quality_change_archives_the_snapshot_first():
+    door = SwingingDoor(0.5, 600.0)
+    compress_so_far = [door.add(sample) for sample in numeric([(0, 1.0), (1, 1.0), (2, 1.0)])]
+
+    assert compress_so_far == [[(0.0, 1.0, None, True)], [], []]
+    assert door.add((3.0, 1.0, None, False)) == [(2.0, 1.0, None, True), (3.0, 1.0, None, False)]
+
+def test_text_values_are_archived_on_change():
+    samples = [(0.0, None, "idle", True), (1.0, None, "idle", True), (2.0, None, "run", True), (3.0, None, "run", True)]
+
+    assert compress(SwingingDoor(0.5, 600.0), samples) == [samples[0], samples[2]]
+
+def test_old_samples_are_ignored():
+    door = SwingingDoor(0.5, 600.0)
+    door.add((10.0, 1.0, None, True))
+
+    assert door.add((5.0, 9.0, None, True)) == []
+    assert door.snapshot is None
+
+def test_deviation_rules():
+    historian = Historian(path="unused.db", deviation=0.25, deviations=parse_deviations(" Level_*=0.5, Level_1=0 ,Counter_*=2"))
+
+    assert historian.deviation_for("Level_1") == 0.0
+    assert historian.deviation_for("Level_7") == 0.5
+    assert historian.deviation_for("Counter_0") == 2.0
+    assert historian.deviation_for("Switch_3") == 0.25
+
+@pytest.mark.parametrize("rules", ["Level_*", "=0.5", "Level_*=high"])
+def test_invalid_deviation_rules(rules):
+    with pytest.raises(ValueError):
+        parse_deviations(rules)
+
+def test_recorded_samples_come_back_from_a_query(tmp_path):
+    historian = Historian(path=str(tmp_path / "historian.db"), deviation=0.0, flush_interval=0.05)
+    historian.start()
+    start = datetime(2026, 1, 1).timestamp()
+    try:
+        for step in range(5):
+            historian.record("127.0.0.1/0", [
+                {"name": "Level_1", "value": [1.0, 4.0, 2.0, 8.0, 3.0][step], "status": "Success", "timestamp": datetime.utcfromtimestamp(start + step).isoformat()},
+                {"name": "Message", "value": "text", "status": "Success", "timestamp": datetime.utcfromtimestamp(start + step).isoformat()}
+            ])
+    finally:
+        historian.stop()
+
+    series = historian.query("127.0.0.1/0", ["Level_1", "Message", "Missing"], start, start + 10)
+
+    assert sorted(series) == ["Level_1", "Message"]
+    timestamps, values = series["Level_1"]
+    assert timestamps.tolist() == [start + step for step in range(5)]
+    assert values.tolist() == [1.0, 4.0, 2.0, 8.0, 3.0]
+    assert np.isnan(series["Message"][1]).all()
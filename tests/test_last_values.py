@@ -0,0 +1,122 @@
+import asyncio
+import pytest
+from app.services.cached_reader import CachedTagReader
+from app.services.controller_executor import ControllerExecutor
+from app.services.last_values import LastValueCache
+from app.services.pylogix_service import TagReadColumns
+from conftest import SIMULATOR_HOST
+
+CONTROLLER = "127.0.0.1/0"
+TAGS = ["Counter_0", "Level_1", "Switch_3"]
+
+def columns(values, tags=TAGS, statuses=None) -> TagReadColumns:
+    return TagReadColumns(list(tags), list(values), statuses or ["Success"] * len(tags), "2026-01-01T00:00:00")
+
+def test_version_only_moves_when_something_changes():
+    cache = LastValueCache()
+
+    assert cache.update(CONTROLLER, columns([1, 2.5, True])) == 1
+    assert cache.update(CONTROLLER, columns([1, 2.5, True])) == 1
+    assert cache.update(CONTROLLER, columns([1, 2.5, True], statuses=["Success", "Success", "Error"])) == 2
+    # True == 1 in Python, but not to a client
+    assert cache.update(CONTROLLER, columns([True, 2.5, True], statuses=["Success", "Success", "Error"])) == 3
+    assert cache.version("10.0.0.1/0") == 0
+
+def test_token_selects_the_tags_changed_since():
+    cache = LastValueCache()
+    token = cache.token(TAGS, cache.update(CONTROLLER, columns([1, 2.5, True])))
+
+    assert cache.changed_since(CONTROLLER, TAGS, token) == [False, False, False]
+
+    cache.update(CONTROLLER, columns([2, 2.5, True]))
+    assert cache.changed_since(CONTROLLER, TAGS, token) == [True, False, False]
+    # tags the cache has never seen always count as changed
+    assert cache.changed_since(CONTROLLER, TAGS[:1], cache.token(TAGS[:1], 1)) == [True]
+
+@pytest.mark.parametrize("token", [None, "", "garbage", "00000000.1.00000000"])
+def test_unusable_tokens_mean_a_full_response(token):
+    cache = LastValueCache()
+    cache.update(CONTROLLER, columns([1, 2.5, True]))
+
+    assert cache.changed_since(CONTROLLER, TAGS, token) is None
+
+def test_tokens_are_tied_to_the_process_tag_list_and_version():
+    cache = LastValueCache()
+    version = cache.update(CONTROLLER, columns([1, 2.5, True]))
+
+    assert cache.changed_since(CONTROLLER, TAGS[::-1], cache.token(TAGS, version)) is None
+    assert cache.changed_since(CONTROLLER, TAGS, cache.token(TAGS, version + 1)) is None
+    assert cache.changed_since("10.0.0.1/0", TAGS, cache.token(TAGS, version)) is None
+    assert LastValueCache().changed_since(CONTROLLER, TAGS, cache.token(TAGS, version)) is None
+
+def test_results_older_than_the_cache_hold_the_version_back():
+    cache = LastValueCache()
+    cache.update(CONTROLLER, columns([1, 2.5, True]))
+    stale = columns([1, 2.5, True])
+    # another read overtook this one before it was returned
+    cache.update(CONTROLLER, columns([2, 2.5, True]))
+
+    version = cache.version_of(CONTROLLER, stale)
+
+    assert version == 1
+    assert cache.changed_since(CONTROLLER, TAGS, cache.token(TAGS, version)) == [True, False, False]
+    assert cache.version_of(CONTROLLER, columns([2, 2.5, True])) == 2
+    assert cache.version_of(CONTROLLER, columns([2], ["Level_9"])) == 0
+
+def test_lookup_honours_max_age_and_expiry():
+    cache = LastValueCache()
+    cache.update(CONTROLLER, columns([1, 2.5, True]))
+
+    assert cache.lookup(CONTROLLER, "Level_1", 60.0) == (2.5, "Success", "2026-01-01T00:00:00")
+    assert cache.lookup(CONTROLLER, "Level_1", -1.0) is None
+    assert cache.lookup(CONTROLLER, "Level_9", 60.0) is None
+
+    cache.expire(CONTROLLER, ["Level_1", "Level_9"])
+    assert cache.lookup(CONTROLLER, "Level_1", 60.0) is None
+    assert cache.lookup(CONTROLLER, "Counter_0", 60.0) is not None
+
+def test_reader_serves_fresh_values_from_the_cache(plc_service, simulator):
+    async def scenario():
+        reader = CachedTagReader(plc_service, ControllerExecutor())
+        try:
+            first = await reader.read(SIMULATOR_HOST, TAGS, timeout=5)
+            requests = simulator.stats()["requests"]
+            cached = await reader.read(SIMULATOR_HOST, TAGS, timeout=5, max_age_ms=60000)
+            served_from_cache = simulator.stats()["requests"] == requests
+
+            await reader.expire(SIMULATOR_HOST, ["Level_1"])
+            await reader.read(SIMULATOR_HOST, TAGS, timeout=5, max_age_ms=60000)
+            return first, cached, served_from_cache, simulator.stats()["requests"] > requests
+        finally:
+            reader.executor.shutdown()
+
+    first, cached, served_from_cache, read_after_expiry = asyncio.run(scenario())
+    assert first.statuses == ["Success"] * 3
+    assert cached.values == first.values and cached.version == first.version
+    assert served_from_cache and read_after_expiry
+
+class CountingService:
+    """Passes reads through to the service, noting the tags of each controller read"""
+
+    def __init__(self, service):
+        self.service = service
+        self.pool = service.pool
+        self.reads = []
+
+    def read_tag_columns(self, ip, tags, *args, **kwargs):
+        self.reads.append(tags)
+        return self.service.read_tag_columns(ip, tags, *args, **kwargs)
+
+def test_reader_coalesces_concurrent_reads(plc_service):
+    service = CountingService(plc_service)
+
+    async def scenario():
+        reader = CachedTagReader(service, ControllerExecutor())
+        try:
+            return await asyncio.gather(*(reader.read(SIMULATOR_HOST, TAGS, timeout=5) for _ in range(5)))
+        finally:
+            reader.executor.shutdown()
+
+    results = asyncio.run(scenario())
+    assert service.reads == [TAGS]
+    assert all(result.values == results[0].values for result in results)
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from prometheus_client import REGISTRY
+from pylogix import PLC
+from app.services import metrics
+from conftest import SIMULATOR_HOST
+
+REPOSITORY = Path(__file__).resolve().parents[1]
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def test_every_round_trip_is_timed(simulator):
+    label = "instrumented/0"
+    plc = PLC(SIMULATOR_HOST)
+    metrics.instrument_plc(plc, label)
+    try:
+        # pylogix learns the tags' types on its first reads
+        assert plc.Read(["Counter_0", "Level_1", "Setpoint_2"])[0].Status == "Success"
+        before = sample("signaltap_plc_round_trip_seconds_count", controller=label)
+
+        plc.Read("Counter_0")
+        plc.Read(["Counter_0", "Level_1", "Setpoint_2"])
+        missing = plc.Read("NoSuchTag")
+
+        assert sample("signaltap_plc_round_trip_seconds_count", controller=label) == before + 3
+        assert sample("signaltap_plc_cip_errors_total", controller=label, status=missing.Status) == 1
+    finally:
+        plc.Close()
+
+def test_event_loop_lag_is_measured():
+    count = sample("signaltap_event_loop_lag_seconds_count")
+    total = sample("signaltap_event_loop_lag_seconds_sum")
+
+    async def scenario():
+        monitor = asyncio.create_task(metrics.monitor_event_loop(interval=0.01))
+        await asyncio.sleep(0.05)
+        # blocking call on the loop thread
+        time.sleep(0.2)
+        await asyncio.sleep(0.05)
+        monitor.cancel()
+
+    asyncio.run(scenario())
+    assert sample("signaltap_event_loop_lag_seconds_count") > count + 2
+    assert sample("signaltap_event_loop_lag_seconds_sum") - total >= 0.15
+    assert sample("signaltap_event_loop_lag_seconds_bucket", le="0.25") - sample("signaltap_event_loop_lag_seconds_bucket", le="0.1") >= 1
+
+def run_process(code: str, metrics_dir: Path) -> str:
+    environment = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(metrics_dir))
+    return subprocess.run(
+        [sys.executable, "-c", code], cwd=REPOSITORY, env=environment, check=True, capture_output=True, text=True
+    ).stdout
+
+def test_multiprocess_mode_combines_all_processes(tmp_path):
+    for queued, exits in ((2, True), (3, False)):
+        run_process(
+            "from app.services import metrics\n"
+            "metrics.TAGS_READ.labels('10.0.0.1/0').inc(10)\n"
+            f"metrics.EXECUTOR_QUEUE_DEPTH.labels('10.0.0.1/0', 'scan').set({queued})\n"
+            f"if {exits}: metrics.process_exited()\n",
+            tmp_path
+        )
+
+    exposition = run_process("from app.services import metrics\nprint(metrics.exposition().decode())", tmp_path)
+
+    assert 'signaltap_tags_read_total{controller="10.0.0.1/0"} 20.0' in exposition
+    # queue depths only count processes still running
+    assert 'signaltap_plc_queue_depth{controller="10.0.0.1/0",priority="scan"} 3.0' in exposition
@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+from app.poller.client import PollerClient
+from app.poller import server as poller_server
+from app.poller.server import Poller
+from app.services.cached_reader import CachedTagReader
+from app.services.controller_executor import ControllerExecutor
+from app.services.shared_values import SharedValueTable
+from conftest import SIMULATOR_HOST
+
+TAGS = ["Setpoint_6", "Level_5", "Motor_3", "Message"]
+
+def test_workers_read_through_the_poller_and_its_table(tmp_path, plc_service, simulator):
+    path = str(tmp_path / "values")
+
+    async def scenario():
+        table = SharedValueTable.create(path, capacity=64, slot_size=96)
+        reader = CachedTagReader(plc_service, ControllerExecutor())
+        poller = Poller(reader, table)
+        server = await poller.serve("127.0.0.1:0")
+        address = f"127.0.0.1:{server.sockets[0].getsockname()[1]}"
+        workers = [PollerClient(address, table_path=path) for _ in range(2)]
+        try:
+            direct = await reader.read(SIMULATOR_HOST, TAGS, timeout=5)
+            first = await workers[0].read(SIMULATOR_HOST, TAGS, timeout=5, max_age_ms=60000)
+
+            # the second worker learns the slot ids from the poller, then reads the table alone
+            await workers[1].read(SIMULATOR_HOST, TAGS, timeout=5, max_age_ms=60000)
+            requests = simulator.stats()["requests"]
+            await poller.stop()
+            server.close()
+            from_table = await workers[1].read(SIMULATOR_HOST, TAGS[:2], timeout=5, max_age_ms=60000)
+            assert simulator.stats()["requests"] == requests
+
+            server = await poller.serve(address)
+            written = plc_service.write_tags(SIMULATOR_HOST, [("Setpoint_6", first.values[0] + 1)], timeout=5)
+            assert written[0]["status"] == "Success"
+            await workers[0].expire(SIMULATOR_HOST, ["Setpoint_6"])
+            after_write = await workers[1].read(SIMULATOR_HOST, ["Setpoint_6"], timeout=5, max_age_ms=60000)
+            return direct, first, from_table, after_write
+        finally:
+            for worker in workers:
+                await worker.close()
+            await poller.stop()
+            server.close()
+            reader.executor.shutdown()
+            table.close()
+
+    direct, first, from_table, after_write = asyncio.run(scenario())
+    # Motor_3 does not fit a 96-byte slot and comes back in the poller's reply
+    assert first.values == direct.values and first.statuses == ["Success"] * 4
+    assert from_table.values == direct.values[:2]
+    assert after_write.values == [direct.values[0] + 1]
+
+def test_slots_of_idle_tags_are_reused(tmp_path, plc_service):
+    path = str(tmp_path / "values")
+
+    async def scenario():
+        table = SharedValueTable.create(path, capacity=2, slot_size=96)
+        reader = CachedTagReader(plc_service, ControllerExecutor())
+        poller = Poller(reader, table, idle_seconds=0.2)
+        server = await poller.serve("127.0.0.1:0")
+        worker = PollerClient(f"127.0.0.1:{server.sockets[0].getsockname()[1]}", table_path=path)
+        try:
+            before = await worker.read(SIMULATOR_HOST, ["Counter_4", "Level_5"], timeout=5)
+            level_slot = worker._ids[f"{SIMULATOR_HOST}/0"]["Level_5"]
+            with pytest.raises(ValueError, match="full"):
+                await poller.read(SIMULATOR_HOST, ["Setpoint_10"], timeout=5)
+
+            await asyncio.sleep(0.3)
+            await poller.read(SIMULATOR_HOST, ["Counter_4"], timeout=5)
+            reused = await poller.read(SIMULATOR_HOST, ["Setpoint_10"], timeout=5)
+
+            # the worker still holds Level_5's old slot, now Setpoint_10's
+            await asyncio.sleep(0.3)
+            after = await worker.read(SIMULATOR_HOST, ["Level_5"], timeout=5, max_age_ms=60000)
+            return before, level_slot, reused, after
+        finally:
+            await worker.close()
+            await poller.stop()
+            server.close()
+            reader.executor.shutdown()
+            table.close()
+
+    before, level_slot, reused, after = asyncio.run(scenario())
+    assert reused["ids"] == [level_slot[0]] and reused["slot_generations"] != [level_slot[1]]
+    assert after.values == before.values[1:] and after.statuses == ["Success"]
+
+class StalledWriter:
+    """A worker connection whose replies are never read"""
+
+    def __init__(self):
+        self.lines = []
+        self.closed = False
+
+    def write(self, data: bytes):
+        self.lines.append(data)
+
+    async def drain(self):
+        await asyncio.Event().wait()
+
+    def is_closing(self) -> bool:
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+def test_workers_that_stop_reading_are_dropped(tmp_path, plc_service, monkeypatch):
+    monkeypatch.setattr(poller_server, "DRAIN_TIMEOUT_SECONDS", 0.05)
+
+    async def scenario():
+        table = SharedValueTable.create(str(tmp_path / "values"), capacity=4, slot_size=96)
+        reader = CachedTagReader(plc_service, ControllerExecutor())
+        poller = Poller(reader, table)
+        writer = StalledWriter()
+        try:
+            await poller._answer({"op": "expire", "ip": SIMULATOR_HOST, "tags": ["Counter_4"], "id": 1}, writer)
+            closed_after_first = writer.closed
+            await poller._answer({"op": "expire", "ip": SIMULATOR_HOST, "tags": ["Counter_4"], "id": 2}, writer)
+            return writer, closed_after_first
+        finally:
+            reader.executor.shutdown()
+            table.close()
+
+    writer, closed_after_first = asyncio.run(scenario())
+    assert closed_after_first and len(writer.lines) == 1
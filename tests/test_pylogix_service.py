@@ -0,0 +1,82 @@
+import pytest
+from pylogix import PLC
+from app.services.tag_cache import CONNECTED_REPLY_START
+from conftest import SIMULATOR_HOST
+
+# Controller tags of every atomic type plus UDT members, in no particular order
+TAGS = [f"{prefix}_{index + offset}" for index in range(0, 40, 4) for offset, prefix in enumerate(("Counter", "Level", "Setpoint", "Switch"))] + [
+    f"Counts_0[{index}]" for index in range(0, 100, 3)
+] + [f"Motor_{index}.{member}" for index in range(4) for member in ("Speed", "Running", "Starts", "Current")]
+
+class RecordingPLC(PLC):
+    """pylogix PLC that keeps the size of every Multiple Service Packet and its reply"""
+
+    def __init__(self, connection_size: int):
+        super().__init__(SIMULATOR_HOST)
+        self.ConnectionSize = connection_size
+        self.exchanges = []
+        send = self.conn.send
+
+        def record(request, *args, **kwargs):
+            status, data = send(request, *args, **kwargs)
+            if request[:1] == b"\x0a":
+                self.exchanges.append((len(request), len(data) - CONNECTED_REPLY_START if data else 0))
+            return status, data
+
+        self.conn.send = record
+
+@pytest.fixture
+def plc(request, simulator) -> RecordingPLC:
+    plc = RecordingPLC(request.param)
+    # sizes are estimated from types pylogix has already seen
+    plc.Read(TAGS)
+    del plc.exchanges[:]
+    yield plc
+    plc.Close()
+
+@pytest.mark.parametrize("plc", [504, 4002], indirect=True)
+def test_batched_reads_fit_the_connection(plc, plc_service):
+    responses = plc_service._read_batched(plc, TAGS)
+
+    assert [response.TagName for response in responses] == TAGS
+    assert [response.Status for response in responses] == ["Success"] * len(TAGS)
+    assert len(plc.exchanges) > 1 if plc.ConnectionSize == 504 else len(plc.exchanges) == 1
+    # the reply counts its 2-byte sequence number against the connection size too
+    assert all(request <= plc.ConnectionSize and reply + 2 <= plc.ConnectionSize for request, reply in plc.exchanges)
+
+@pytest.mark.parametrize("plc", [504], indirect=True)
+def test_batches_of_long_names_stay_within_the_connection(plc, plc_service):
+    tags = [f"Program:MainProgram.{name}" for name in ("Counter_0", "Level_1", "Setpoint_2", "Switch_3")] * 20
+
+    responses = plc_service._read_batched(plc, tags)
+
+    assert [response.Status for response in responses] == ["Success"] * len(tags)
+    assert len(plc.exchanges) > 1
+    assert all(request <= plc.ConnectionSize for request, _ in plc.exchanges)
+
+@pytest.mark.parametrize("plc", [504], indirect=True)
+def test_a_failed_batch_is_read_tag_by_tag(plc, plc_service, monkeypatch):
+    read = plc.Read
+
+    def unparsable_list_read(tag, *args, **kwargs):
+        if isinstance(tag, list):
+            raise ValueError("unpack requires a buffer of 4 bytes")
+        return read(tag, *args, **kwargs)
+
+    monkeypatch.setattr(plc, "Read", unparsable_list_read)
+
+    responses = plc_service._read_batched(plc, TAGS[:5])
+
+    assert [response.TagName for response in responses] == TAGS[:5]
+    assert [response.Status for response in responses] == ["Success"] * 5
+
+@pytest.mark.parametrize("plc", [504], indirect=True)
+def test_a_tag_pylogix_fails_on_does_not_fail_its_neighbours(plc, plc_service):
+    # pylogix masks the bit out of the REAL it read, which raises
+    tags = ["Counter_0", "Trend_1[3].2", "Level_1"]
+
+    responses = plc_service._read_batched(plc, tags)
+
+    assert [response.TagName for response in responses] == tags
+    assert [response.Status for response in responses][::2] == ["Success", "Success"]
+    assert responses[1].Value is None and responses[1].Status.startswith("Read error")
@@ -0,0 +1,133 @@
+from types import SimpleNamespace
+import pytest
+from app.models.tag import PLCConnectionConfig
+from app.services.connection_pool import PLCConnectionPool
+from app.services.pylogix_service import PylogixService
+from app.services.read_planner import ReadPlanner
+from app.services.tag_cache import TagCache
+from app.services.tag_decoder import TagDecoder
+from conftest import SIMULATOR_HOST
+
+def connection(size: int = 4002, micro800: bool = False):
+    """The attributes of a pylogix PLC the planner looks at"""
+    return SimpleNamespace(ConnectionSize=size, Micro800=micro800)
+
+@pytest.fixture(scope="module")
+def planner(tag_database) -> ReadPlanner:
+    return ReadPlanner(TagDecoder(tag_database))
+
+def test_scalars_are_batched(planner):
+    plan = planner.plan(connection(), ["Counter_0", "Level_1", "Counter_0"])
+
+    assert plan.batched == ["Counter_0", "Level_1"]
+    assert plan.single == []
+    assert plan.sources["Counter_0"] == (("Counter_0", 0), None)
+
+def test_bits_of_a_word_share_one_read(planner):
+    plan = planner.plan(connection(), ["Counter_0.3", "Counter_0.5", "Counts_0[3].2"])
+
+    assert plan.batched == ["Counter_0", "Counts_0[3]"]
+    key, extract = plan.sources["Counter_0.3"]
+    assert key == ("Counter_0", 0)
+    assert extract(0b1000) is True
+    assert extract(0b0111) is False
+    assert plan.sources["Counter_0.5"][1](0b100000) is True
+
+def test_array_elements_fold_into_a_slice(planner):
+    tags = [f"Counts_0[{index}]" for index in range(10, 50)]
+    plan = planner.plan(connection(504), tags)
+
+    assert plan.batched == []
+    assert plan.single == [("Counts_0[10]", 40)]
+    key, extract = plan.sources["Counts_0[15]"]
+    assert key == ("Counts_0[10]", 40)
+    assert extract(list(range(100, 140))) == 105
+
+def test_bool_array_elements_fold_into_a_slice(planner):
+    plan = planner.plan(connection(504), [f"Flags_2[{index}]" for index in range(64)])
+
+    assert plan.single == [("Flags_2[0]", 64)]
+    assert plan.sources["Flags_2[2]"][1]([False, False, True]) is True
+
+def test_few_elements_stay_batched(planner):
+    plan = planner.plan(connection(), ["Counts_0[0]", "Counts_0[99]"])
+
+    assert plan.batched == ["Counts_0[0]", "Counts_0[99]"]
+    assert plan.single == []
+
+def test_requested_array_serves_its_elements(planner):
+    plan = planner.plan(connection(), ["Counts_0", "Counts_0[5]"])
+
+    assert plan.batched == []
+    assert plan.single == [("Counts_0[0]", 100)]
+    assert plan.sources["Counts_0[5]"][1](list(range(100))) == 5
+
+def test_requested_structure_serves_its_members(planner):
+    plan = planner.plan(connection(), ["Motor_1", "Motor_1.Speed"])
+
+    assert plan.batched == []
+    assert plan.single == [("Motor_1", 1)]
+
+def test_members_stay_batched_when_that_is_cheaper(planner):
+    plan = planner.plan(connection(), ["Motor_0.Speed", "Motor_0.Current", "Motor_0.Starts"])
+
+    assert plan.batched == ["Motor_0.Speed", "Motor_0.Current", "Motor_0.Starts"]
+    assert plan.single == []
+
+def test_micro800_members_fold_into_a_structure_read(planner):
+    # without Multiple Service Packets every member would cost a request of its own
+    plan = planner.plan(connection(micro800=True), ["Motors[1].Speed", "Motors[1].Starts", "Motor_0.Speed", "Motor_0.Current"])
+
+    assert plan.batched == []
+    assert plan.single == [("Motors[1]", 1), ("Motor_0", 1)]
+
+def test_unknown_tags_are_batched_as_is(planner):
+    plan = planner.plan(connection(), ["NoSuchTag", "NoSuchTag.3", "Counts_0[7"])
+
+    assert plan.batched == ["NoSuchTag", "NoSuchTag.3", "Counts_0[7"]
+
+def test_folded_reads_match_reading_each_tag(tmp_path, simulator):
+    # a small connection makes the planner fold elements and members into parent reads
+    pool = PLCConnectionPool(connection_size=504)
+    service = PylogixService(pool, TagCache(pool, cache_dir=str(tmp_path)))
+    service.tag_cache.get(PLCConnectionConfig(ip_address=SIMULATOR_HOST, timeout=5))
+    tags = (
+        [f"Counts_0[{index}]" for index in range(20, 60)]
+        + [f"Flags_2[{index}]" for index in range(30, 70)]
+        + ["Counter_4.0", "Counter_4.2", "Motor_2", "Motor_2.Speed", "Motor_2.History[3]", "Line_1.Motors[1].Starts"]
+    )
+    try:
+        folded = service.read_tag_columns(SIMULATOR_HOST, tags, timeout=5)
+        alone = [service.read_tag_columns(SIMULATOR_HOST, [tag_name], timeout=5) for tag_name in tags]
+    finally:
+        pool.close_all()
+
+    assert folded.statuses == ["Success"] * len(tags)
+    assert folded.values == [columns.values[0] for columns in alone]
+
+# Tags next to foldable ones that cannot be served from a parent read
+UNFOLDABLE = ["Counts_0[100]", "Trend_1[3].2", "Motor_0.NoSuchMember", "Line_1.Motors.Speed"]
+
+def test_tags_that_cannot_be_folded_are_read_as_is(planner):
+    elements = [f"Counts_0[{index}]" for index in range(20, 60)]
+    members = ["Motor_0.Speed", "Motor_0.Current", "Motor_0.Starts"]
+
+    plan = planner.plan(connection(504, micro800=True), elements + UNFOLDABLE + members)
+
+    assert plan.batched == UNFOLDABLE
+    assert plan.single == [("Counts_0[20]", 40), ("Motor_0", 1)]
+
+def test_tags_that_cannot_be_folded_report_their_own_status(tmp_path, simulator):
+    pool = PLCConnectionPool(connection_size=504)
+    service = PylogixService(pool, TagCache(pool, cache_dir=str(tmp_path)))
+    service.tag_cache.get(PLCConnectionConfig(ip_address=SIMULATOR_HOST, timeout=5))
+    tags = [f"Counts_0[{index}]" for index in range(20, 60)] + UNFOLDABLE
+    try:
+        together = service.read_tag_columns(SIMULATOR_HOST, tags, timeout=5)
+        alone = [service.read_tag_columns(SIMULATOR_HOST, [tag_name], timeout=5) for tag_name in UNFOLDABLE]
+    finally:
+        pool.close_all()
+
+    assert together.statuses[:40] == ["Success"] * 40
+    assert together.statuses[40:] == [columns.statuses[0] for columns in alone]
+    assert "Success" not in together.statuses[40:]
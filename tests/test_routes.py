@@ -0,0 +1,222 @@
+import asyncio
+import httpx
+import orjson
+import pytest
+from fastapi import HTTPException
+from app.main import app
+from app.routes import plc
+from app.services.controller_executor import ControllerBusy
+from conftest import SIMULATOR_HOST
+
+# Hosts nothing listens on; each test gets its own so breaker states do not mix
+OPEN_BREAKER_HOST = "127.0.0.22"
+REFUSING_HOST = "127.0.0.23"
+
+def call(method: str, url: str, **kwargs) -> httpx.Response:
+    """Send one request to the app, without a server"""
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.request(method, url, **kwargs)
+    return asyncio.run(scenario())
+
+def failing_read(error: BaseException):
+    async def read(*args, **kwargs):
+        raise error
+    return read
+
+def test_open_breaker_answers_503_on_every_endpoint():
+    key = (OPEN_BREAKER_HOST, 0, False)
+    for _ in range(plc.controller_health.failure_threshold):
+        plc.controller_health.record_failure(key, "timed out")
+    try:
+        read = call("POST", "/api/read-tags", json={"ip": OPEN_BREAKER_HOST, "tags": ["Counter_0"]})
+        info = call("GET", "/api/info", params={"ip_address": OPEN_BREAKER_HOST})
+    finally:
+        plc.controller_health.record_success(key)
+
+    for response in (read, info):
+        assert response.status_code == 503
+        assert "unreachable (timed out)" in response.json()["detail"]
+        assert int(response.headers["Retry-After"]) >= 1
+
+def test_full_queue_answers_429(monkeypatch):
+    busy = ControllerBusy((OPEN_BREAKER_HOST, 0, False), "interactive", 8, 0.2)
+    monkeypatch.setattr(plc.tag_reader, "read", failing_read(busy))
+
+    response = call("POST", "/api/read-tags", json={"ip": OPEN_BREAKER_HOST, "tags": ["Counter_0"]})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert "8 interactive requests waiting" in response.json()["detail"]
+
+def test_missed_deadline_answers_504(monkeypatch):
+    monkeypatch.setattr(plc.tag_reader, "read", failing_read(asyncio.TimeoutError()))
+
+    response = call("POST", "/api/read-tags/compact", json={"ip": OPEN_BREAKER_HOST, "tags": ["Counter_0"]})
+
+    assert response.status_code == 504
+    assert "deadline" in response.json()["detail"]
+
+def test_connection_failure_answers_400():
+    response = call("POST", "/api/read-tags", json={"ip": REFUSING_HOST, "tags": ["Counter_0"], "timeout": 1})
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("PLC connection failed")
+
+def test_other_errors_answer_500(monkeypatch):
+    monkeypatch.setattr(plc.tag_reader, "read", failing_read(KeyError("Counter_0")))
+
+    response = call("POST", "/api/read-tags", json={"ip": OPEN_BREAKER_HOST, "tags": ["Counter_0"]})
+
+    assert response.status_code == 500
+    assert response.json()["detail"] == "Error reading tags: 'Counter_0'"
+
+@pytest.mark.parametrize("error", [HTTPException(status_code=404), asyncio.TimeoutError()])
+def test_plc_error_passes_handled_exceptions_on(error):
+    assert plc.plc_error(error, "reading tags") is error
+
+def failing_upload(error: BaseException, pages=()):
+    """Stands in for run_on_controller: sends the pages to the stream's callback, then fails"""
+    async def run(config, func, upload_config, on_page, **kwargs):
+        for page in pages:
+            on_page(page)
+        raise error
+    return run
+
+def ndjson(response: httpx.Response) -> list:
+    return [orjson.loads(line) for line in response.content.splitlines()]
+
+def test_tag_stream(monkeypatch, tmp_path, tag_database):
+    monkeypatch.setattr(plc.plc_service.tag_cache, "cache_dir", str(tmp_path))
+
+    response = call("GET", "/api/scan-stream", params={"ip": SIMULATOR_HOST})
+
+    lines = ndjson(response)
+    assert response.status_code == 200
+    assert lines[:-1] == [{"name": tag["name"], "type": tag["type"]} for tag in tag_database.tags]
+    assert lines[-1] == {"done": True, "total": len(tag_database.tags)}
+
+@pytest.mark.parametrize("error, status", [
+    (OSError("Failed to connect: refused"), 400),
+    (ValueError("bad reply"), 500),
+    (asyncio.TimeoutError(), 504),
+    (asyncio.CancelledError(), 500)
+])
+def test_tag_stream_failing_before_the_first_page_gets_a_status(monkeypatch, error, status):
+    monkeypatch.setattr(plc, "run_on_controller", failing_upload(error))
+
+    response = call("GET", "/api/scan-stream", params={"ip": REFUSING_HOST})
+
+    assert response.status_code == status
+
+@pytest.mark.parametrize("error, message", [
+    (ValueError("bad reply"), "Error scanning PLC tags: bad reply"),
+    (asyncio.TimeoutError(), f"PLC at {REFUSING_HOST} did not respond before the request deadline"),
+    (asyncio.CancelledError(), "Error scanning PLC tags: the tag upload was cancelled")
+])
+def test_tag_stream_failing_later_ends_with_an_error_line(monkeypatch, error, message):
+    page = [{"name": "Counter_0", "type": "DINT"}]
+    monkeypatch.setattr(plc, "run_on_controller", failing_upload(error, [page]))
+
+    response = call("GET", "/api/scan-stream", params={"ip": REFUSING_HOST})
+
+    assert response.status_code == 200
+    assert ndjson(response) == [{"name": "Counter_0", "type": "DINT"}, {"error": message}]
+
+def test_compact_reads_refuse_more_tags_than_ids_are_kept_for(monkeypatch):
+    monkeypatch.setattr(plc.tag_ids, "max_tags_per_controller", 2)
+
+    response = call("POST", "/api/read-tags/compact", json={"ip": OPEN_BREAKER_HOST, "tags": ["A", "B", "C"]})
+
+    assert response.status_code == 400
+    assert "At most 2 tags" in response.json()["detail"]
+
+def test_bulk_reads_limit_controllers_in_flight_per_segment(monkeypatch):
+    in_flight, most_in_flight = {}, {}
+
+    async def read(ip, tags, slot, timeout, max_age_ms=0, micro800=False):
+        segment = ip.rsplit(".", 1)[0] if ip[0].isdigit() else ip
+        in_flight[segment] = in_flight.get(segment, 0) + 1
+        most_in_flight[segment] = max(most_in_flight.get(segment, 0), in_flight[segment])
+        await asyncio.sleep(0.05)
+        in_flight[segment] -= 1
+        if ip == "10.0.1.4":
+            raise OSError("Failed to connect: refused")
+        return [{"name": tags[0], "value": 1, "status": "Success", "timestamp": "2026-01-01T00:00:00"}]
+
+    monkeypatch.setattr(plc.tag_reader, "read", read)
+    ips = [f"10.0.1.{host}" for host in range(1, 6)] + ["10.0.2.1", "10.0.2.2", "plc-a"]
+
+    response = call("POST", "/api/read-tags/bulk", json={
+        "controllers": [{"ip": ip, "tags": ["Counter_0"]} for ip in ips],
+        "max_concurrency_per_segment": 2
+    })
+
+    body = response.json()
+    assert response.status_code == 200
+    assert most_in_flight == {"10.0.1": 2, "10.0.2": 2, "plc-a": 1}
+    # segments are read side by side: three rounds for the largest one, not eight in a row
+    assert body["elapsed_ms"] < 8 * 50
+    assert not body["success"]
+    assert [result["ip"] for result in body["results"]] == ips
+    assert [result["success"] for result in body["results"]] == [ip != "10.0.1.4" for ip in ips]
+    assert body["results"][3]["error"] == "Failed to connect: refused"
+    assert body["results"][0]["results"][0]["value"] == 1
+
+def test_reads_with_a_version_token_return_only_changes(monkeypatch, tmp_path, plc_service):
+    monkeypatch.setattr(plc.plc_service.tag_cache, "cache_dir", str(tmp_path))
+    tags = ["Counter_20", "Level_21", "Setpoint_22"]
+    read = {"ip": SIMULATOR_HOST, "tags": tags, "timeout": 5}
+
+    first = call("POST", "/api/read-tags", json=read)
+    unchanged = call("POST", "/api/read-tags", json=dict(read, since=first.headers["X-Tag-Version"]))
+    counter = first.json()[0]["value"] + 1
+    assert plc_service.write_tags(SIMULATOR_HOST, [("Counter_20", counter)], timeout=5)[0]["status"] == "Success"
+    changed = call("POST", "/api/read-tags", json=dict(read, since=unchanged.headers["X-Tag-Version"]))
+    # a token for another tag list gets everything
+    other_tags = call("POST", "/api/read-tags", json=dict(read, tags=tags[:2], since=changed.headers["X-Tag-Version"]))
+
+    assert [result["name"] for result in first.json()] == tags
+    assert unchanged.json() == []
+    assert [(result["name"], result["value"]) for result in changed.json()] == [("Counter_20", counter)]
+    assert changed.headers["X-Tag-Version"] != unchanged.headers["X-Tag-Version"]
+    assert [result["name"] for result in other_tags.json()] == tags[:2]
+
+def test_compact_reads_with_a_version_return_only_changes(monkeypatch, tmp_path, plc_service):
+    monkeypatch.setattr(plc.plc_service.tag_cache, "cache_dir", str(tmp_path))
+    tags = ["Counter_16", "Level_17"]
+
+    first = orjson.loads(call("POST", "/api/read-tags/compact", json={"ip": SIMULATOR_HOST, "tags": tags, "timeout": 5}).content)
+    ids = first["ids"]
+    level = first["values"][1] + 1.5
+    assert plc_service.write_tags(SIMULATOR_HOST, [("Level_17", level)], timeout=5)[0]["status"] == "Success"
+    delta = orjson.loads(call("POST", "/api/read-tags/compact", json={"ip": SIMULATOR_HOST, "tags": ids, "since": first["version"], "timeout": 5}).content)
+
+    assert first["delta"] is False and first["names"] == {str(ids[0]): "Counter_16", str(ids[1]): "Level_17"}
+    assert delta["delta"] is True and delta["names"] == {}
+    assert (delta["ids"], delta["values"]) == ([ids[1]], [level])
+
+def test_connection_test_reports_the_negotiated_size():
+    response = call("GET", "/api/test-connection", params={"ip_address": SIMULATOR_HOST, "timeout": 5})
+
+    assert response.status_code == 200
+    assert response.json()["connection_size"] == 4002
+
+def test_writes_open_micro800_sessions_when_asked(monkeypatch):
+    configs = []
+
+    async def run(config, func, *args, **kwargs):
+        configs.append((config, kwargs.get("micro800")))
+        if func == plc.plc_service.write_tags:
+            return [{"name": "Counter_0", "value": 1, "status": "Success", "error": None, "read_back": None}]
+        return True
+
+    monkeypatch.setattr(plc, "run_on_controller", run)
+
+    batched = call("POST", "/api/write-tags", json={"ip": REFUSING_HOST, "micro800": True, "writes": [{"tag": "Counter_0", "value": 1}]})
+    single = call("POST", "/api/write/Counter_0", params={"ip_address": REFUSING_HOST, "micro800": True, "value": 1})
+    default = call("POST", "/api/write-tags", json={"ip": REFUSING_HOST, "slot": None, "timeout": None, "writes": [{"tag": "Counter_0", "value": 1}]})
+
+    assert [response.status_code for response in (batched, single, default)] == [200, 200, 200]
+    assert [(config.micro800, micro800) for config, micro800 in configs] == [(True, True), (True, None), (False, False)]
+    assert (configs[2][0].slot, configs[2][0].timeout) == (0, 10)
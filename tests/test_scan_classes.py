@@ -0,0 +1,76 @@
+import pytest
+from app.services.scan_classes import DEFAULT_SCAN_CLASSES, ScanClassRegistry
+
+CLASSES = {"fast": 100, "normal": 1000, "slow": 10000, "alarm": 250}
+
+@pytest.fixture
+def registry(tmp_path) -> ScanClassRegistry:
+    registry = ScanClassRegistry(str(tmp_path / "scan_classes.json"))
+    registry.configure(CLASSES, [
+        {"pattern": "Motor_*", "scan_class": "slow"},
+        {"pattern": "Motor_*.Speed", "scan_class": "fast"},
+        {"pattern": "Motor_*", "scan_class": "alarm", "ip": "10.0.0.2"},
+        {"pattern": "Motor_1.Speed", "scan_class": "normal"},
+        {"pattern": "Motor_2.Speed", "scan_class": "fast", "ip": "10.0.0.2", "slot": 1},
+        {"pattern": "Program:Main.*", "scan_class": "fast"}
+    ], "normal")
+    return registry
+
+@pytest.mark.parametrize("ip, slot, tag_name, scan_class", [
+    # first matching pattern in rule order
+    ("10.0.0.1", 0, "Motor_0.Speed", "slow"),
+    ("10.0.0.1", 0, "Motor_0", "slow"),
+    # an exact name beats any pattern
+    ("10.0.0.1", 0, "Motor_1.Speed", "normal"),
+    ("10.0.0.2", 0, "Motor_1.Speed", "normal"),
+    # a controller's own pattern beats a global one listed before it
+    ("10.0.0.2", 0, "Motor_0.Speed", "alarm"),
+    # rules for another slot do not apply
+    ("10.0.0.2", 1, "Motor_2.Speed", "fast"),
+    ("10.0.0.2", 0, "Motor_2.Speed", "alarm"),
+    ("10.0.0.1", 0, "Motor_2.Speed", "slow"),
+    # patterns are case sensitive, like tag names on the controller
+    ("10.0.0.1", 0, "motor_0", "normal"),
+    ("10.0.0.1", 0, "Program:Main.Level_1", "fast"),
+    ("10.0.0.1", 0, "Counter_0", "normal")
+])
+def test_rule_precedence(registry, ip, slot, tag_name, scan_class):
+    assert registry.class_for(ip, slot, tag_name) == scan_class
+
+def test_partition_keeps_request_order(registry):
+    assert registry.partition("10.0.0.1", 0, ["Counter_0", "Motor_0", "Program:Main.A", "Level_1", "Motor_3"]) == {
+        "normal": ["Counter_0", "Level_1"],
+        "slow": ["Motor_0", "Motor_3"],
+        "fast": ["Program:Main.A"]
+    }
+    assert registry.period_ms("alarm") == 250
+    # a class that was removed falls back to the default period
+    assert registry.period_ms("retired") == 1000
+
+def test_configuration_survives_a_restart(registry):
+    reloaded = ScanClassRegistry(registry.path)
+
+    assert reloaded.to_dict() == registry.to_dict()
+    assert reloaded.class_for("10.0.0.2", 0, "Motor_0.Speed") == "alarm"
+
+@pytest.mark.parametrize("classes, assignments, default_class, message", [
+    (CLASSES, [{"pattern": "A*", "scan_class": "turbo"}], "normal", "Unknown scan class 'turbo'"),
+    (CLASSES, [], "turbo", "Unknown scan class 'turbo'"),
+    (dict(CLASSES, fast=0), [], "normal", "needs a positive period")
+])
+def test_invalid_configurations_are_refused_and_not_saved(registry, classes, assignments, default_class, message):
+    before = registry.to_dict()
+
+    with pytest.raises(ValueError, match=message):
+        registry.configure(classes, assignments, default_class)
+
+    assert registry.to_dict() == before
+    assert ScanClassRegistry(registry.path).to_dict() == before
+
+def test_unreadable_configurations_are_ignored(tmp_path):
+    path = tmp_path / "scan_classes.json"
+    path.write_text('{"classes": {"fast": 100}, "default_class": "normal"}')
+
+    registry = ScanClassRegistry(str(path))
+
+    assert registry.classes == DEFAULT_SCAN_CLASSES and registry.assignments == []
@@ -0,0 +1,101 @@
+import asyncio
+import pytest
+from app.services.scan_classes import ScanClassRegistry
+from app.services.scan_engine import MAX_BACKOFF, ScanEngine, ScanGroup, Subscription
+
+def result(name: str, value, status: str = "Success") -> dict:
+    return {"name": name, "value": value, "status": status, "timestamp": "2026-01-01T00:00:00"}
+
+class ScriptedReader:
+    """Stands in for the shared reader, returning one scripted reply per scan"""
+
+    historian = None
+
+    def __init__(self, replies: list):
+        self.replies = list(replies)
+
+    async def read(self, ip, tags, slot, timeout, max_age_ms, priority=None, client=None):
+        reply = self.replies.pop(0) if len(self.replies) > 1 else self.replies[0]
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+@pytest.fixture
+def engine_for(tmp_path):
+    def engine_for(replies: list) -> ScanEngine:
+        return ScanEngine(ScriptedReader(replies), ScanClassRegistry(str(tmp_path / "scan_classes.json")))
+    return engine_for
+
+def test_numeric_changes_within_the_deadband_are_not_sent():
+    subscription = Subscription(1, "10.0.0.1", 0, ["Level_1", "Switch_3", "Message"], None, deadband=0.5)
+
+    first = subscription.changes({"Level_1": result("Level_1", 1.0), "Switch_3": result("Switch_3", False)})
+    assert [change["name"] for change in first] == ["Level_1", "Switch_3"]
+
+    assert subscription.changes({"Level_1": result("Level_1", 1.4)}) == []
+    # measured from the last value sent, not the last value read
+    assert subscription.changes({"Level_1": result("Level_1", 1.6)}) == [result("Level_1", 1.6)]
+    assert subscription.changes({"Level_1": result("Level_1", 1.6, "Error")}) == [result("Level_1", 1.6, "Error")]
+    # booleans and strings change on any difference
+    assert subscription.changes({"Switch_3": result("Switch_3", True)}) == [result("Switch_3", True)]
+    assert subscription.changes({"Message": result("Message", "a")}) == [result("Message", "a")]
+    assert subscription.changes({"Message": result("Message", "b")}) == [result("Message", "b")]
+
+def test_overrunning_loops_back_off_up_to_the_limit_and_recover():
+    group = ScanGroup(("10.0.0.1", 0, 100), engine=None)
+
+    group._adapt(0.15)
+    assert group.backoff == pytest.approx(1.8)
+
+    for _ in range(10):
+        group._adapt(group.effective_period * 2)
+    assert group.backoff == MAX_BACKOFF and group.effective_period == pytest.approx(0.8)
+
+    # a cycle that fits but not comfortably keeps the current period
+    group._adapt(group.effective_period * 0.75)
+    assert group.backoff == MAX_BACKOFF
+
+    steps = 0
+    while group.backoff > 1.0:
+        group._adapt(0.01)
+        steps += 1
+    assert group.backoff == 1.0 and steps > 10
+
+def test_a_subscriber_that_falls_behind_gets_everything_again(engine_for):
+    async def scenario():
+        engine = engine_for([[result("Counter_0", 1)]])
+        subscription = Subscription(1, "10.0.0.1", 0, ["Counter_0", "Level_1"], 100, queue_size=1)
+        values = {"Counter_0": result("Counter_0", 1), "Level_1": result("Level_1", 2.0)}
+
+        engine.publish(subscription, subscription.changes(values))
+        values["Counter_0"] = result("Counter_0", 2)
+        engine.publish(subscription, subscription.changes(values))
+
+        assert subscription.queue.qsize() == 1
+        subscription.queue.get_nowait()
+        return subscription.changes(values)
+
+    assert [change["name"] for change in asyncio.run(scenario())] == ["Counter_0", "Level_1"]
+
+def test_scans_keep_running_after_an_unexpected_failure(engine_for):
+    async def scenario():
+        # the second reply is missing its value, which the scan does not expect
+        engine = engine_for([
+            [result("Counter_0", 1)],
+            [{"name": "Counter_0", "status": "Success", "timestamp": "2026-01-01T00:00:00"}],
+            [{"name": "Counter_0", "status": "Success", "timestamp": "2026-01-01T00:00:00"}],
+            [result("Counter_0", 2)]
+        ])
+        subscription = await engine.subscribe("10.0.0.1", ["Counter_0"], rate_ms=10)
+        messages = [await asyncio.wait_for(subscription.queue.get(), 1) for _ in range(3)]
+        group = engine.groups[("10.0.0.1", 0, 10)]
+        running = not group.task.done()
+        await engine.stop()
+        return messages, running, group.last_error
+
+    messages, running, last_error = asyncio.run(scenario())
+
+    assert running and last_error is None
+    assert [message["type"] for message in messages] == ["update", "error", "update"]
+    assert messages[1]["detail"] == "Scan of PLC at 10.0.0.1 failed: 'value'"
+    assert messages[2]["values"] == [{"name": "Counter_0", "value": 2, "status": "Success"}]
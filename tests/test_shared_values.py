@@ -0,0 +1,137 @@
+import threading
+import pytest
+from app.services.shared_values import SLOT_HEADER, SharedValueTable, iso_timestamp
+
+TIMESTAMP = "2026-01-01T12:00:00.250000"
+
+@pytest.fixture
+def table_path(tmp_path) -> str:
+    return str(tmp_path / "values")
+
+@pytest.fixture
+def table(table_path):
+    table = SharedValueTable.create(table_path, capacity=16, slot_size=128)
+    yield table
+    table.close()
+
+@pytest.mark.parametrize("value", [None, True, False, 42, -2 ** 63, 2.5, "running", [1, 2, 3], {"Speed": 1.5, "Running": True}])
+def test_values_round_trip(table, table_path, value):
+    assert table.write(3, value, "Success", TIMESTAMP)
+
+    reader = SharedValueTable.open(table_path)
+    try:
+        read_value, status, read_at, overflowed = reader.read(3)
+    finally:
+        reader.close()
+    assert read_value == value and type(read_value) is type(value)
+    assert status == "Success" and not overflowed
+    assert iso_timestamp(read_at) == TIMESTAMP
+
+def test_empty_slot(table):
+    assert table.read(0) is None
+
+def test_large_values_overflow(table):
+    assert not table.write(1, "x" * 200, "Success", TIMESTAMP)
+
+    value, status, _, overflowed = table.read(1)
+    assert value is None and status == "Success" and overflowed
+
+def test_unsigned_64_bit_integers_go_through_json(table):
+    # an LWORD with its top bit set does not fit the signed native encoding
+    assert table.write(1, 2 ** 64 - 1, "Success", TIMESTAMP)
+    assert table.read(1)[0] == 2 ** 64 - 1
+
+def test_tag_ids_outside_the_table(table):
+    with pytest.raises(IndexError):
+        table.write(16, 1, "Success", TIMESTAMP)
+    with pytest.raises(IndexError):
+        table.read(-1)
+
+def test_expired_values_stay_readable_but_old(table):
+    table.write(2, 7, "Success", TIMESTAMP)
+
+    table.expire(2)
+    table.expire(5)
+
+    assert table.read(2) == (7, "Success", 0.0, False)
+    assert table.read(5) is None
+
+def test_reader_never_sees_a_torn_value(table, table_path):
+    reader = SharedValueTable.open(table_path)
+    values = [("a" * 30, 1), ("b" * 70, 2)]
+    stop = threading.Event()
+
+    def write():
+        while not stop.is_set():
+            for text, number in values:
+                table.write(0, {"text": text, "number": number}, "Success", TIMESTAMP)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        seen = set()
+        for _ in range(20000):
+            slot = reader.read(0)
+            if slot is not None:
+                seen.add((slot[0]["text"], slot[0]["number"]))
+    finally:
+        stop.set()
+        writer.join()
+        reader.close()
+    assert seen and seen <= set(values)
+
+def test_reassigned_slots_do_not_serve_the_previous_tag(table, table_path):
+    first = table.assign(4)
+    table.write(4, 7, "Success", TIMESTAMP)
+    reader = SharedValueTable.open(table_path)
+    try:
+        assert reader.read(4, first)[0] == 7
+
+        second = table.assign(4)
+
+        assert second != first
+        assert reader.read(4, first) is None and reader.read(4, second) is None
+        table.write(4, 8, "Success", TIMESTAMP)
+        assert reader.read(4, first) is None and reader.read(4, second)[0] == 8
+        table.expire(4)
+        assert reader.read(4, second) == (8, "Success", 0.0, False)
+    finally:
+        reader.close()
+
+def test_slot_being_written_is_retried(table, table_path):
+    table.write(0, 1, "Success", TIMESTAMP)
+    # leave the sequence odd, as a writer stopped mid-update would
+    sequence = SLOT_HEADER.unpack_from(table._buffer, 64)[0]
+    table._buffer[64:68] = (sequence + 1).to_bytes(4, "little")
+
+    with pytest.raises(TimeoutError):
+        table.read(0)
+
+def test_recreated_table_has_a_new_generation(table_path):
+    first = SharedValueTable.create(table_path, capacity=4, slot_size=64)
+    reader = SharedValueTable.open(table_path)
+    try:
+        assert reader.is_current() and reader.generation == first.generation
+
+        second = SharedValueTable.create(table_path, capacity=4, slot_size=64)
+        try:
+            # the old mapping is marked retired rather than changed under the reader
+            assert not reader.is_current()
+            assert second.generation != first.generation
+            reopened = SharedValueTable.open(table_path)
+            assert reopened.is_current() and reopened.generation == second.generation
+            reopened.close()
+        finally:
+            second.close()
+    finally:
+        reader.close()
+        first.close()
+
+def test_opening_something_else_fails(tmp_path):
+    path = tmp_path / "not-a-table"
+    path.write_bytes(b"\x00" * 256)
+
+    with pytest.raises(ValueError):
+        SharedValueTable.open(str(path))
+    with pytest.raises(FileNotFoundError):
+        SharedValueTable.open(str(tmp_path / "missing"))
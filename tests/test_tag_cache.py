@@ -0,0 +1,143 @@
+import time
+from struct import pack
+import pytest
+from pylogix.lgx_comm import Connection
+from app.models.tag import PLCConnectionConfig
+from app.services.connection_pool import PLCConnectionPool
+from app.services import tag_cache
+from app.services.tag_cache import CHANGE_DETECTION_ATTRIBUTES, STREAM_PAGE_SIZE, TagCache
+from app.simulator.controller import build_demo_controller
+from app.simulator.eip_server import EIPSimulator
+
+# A controller of its own, with enough tags for several tag list replies
+LARGE_HOST = "127.0.0.24"
+
+@pytest.fixture(scope="module")
+def large_simulator():
+    controller = build_demo_controller(scalar_count=600, array_count=3, udt_count=2, program_tag_count=4)
+    simulator = EIPSimulator(controller, host=LARGE_HOST).start()
+    yield simulator
+    simulator.stop()
+
+@pytest.fixture
+def config(large_simulator) -> PLCConnectionConfig:
+    return PLCConnectionConfig(ip_address=LARGE_HOST, timeout=5)
+
+@pytest.fixture
+def pool():
+    pool = PLCConnectionPool()
+    yield pool
+    pool.close_all()
+
+def tag_list_requests(simulator) -> int:
+    return simulator.stats()["services"].get("0x55", 0)
+
+def test_signature_is_the_change_counter_attribute_list(pool, config, large_simulator):
+    counter = large_simulator.controller.change_counter
+    expected = pack("<H", len(CHANGE_DETECTION_ATTRIBUTES)) + b"".join(
+        pack("<HHI", attribute, 0, counter) for attribute in CHANGE_DETECTION_ATTRIBUTES
+    )
+
+    assert pool.run(config, TagCache.read_signature) == expected.hex()
+
+def test_upload_is_repeated_only_when_the_signature_changes(pool, config, large_simulator, tmp_path):
+    cache = TagCache(pool, cache_dir=str(tmp_path), signature_check_interval=0.0)
+    first = cache.get(config)
+    uploads = tag_list_requests(large_simulator)
+
+    assert cache.get(config) is first
+    assert tag_list_requests(large_simulator) == uploads
+
+    large_simulator.controller.bump_change_counter()
+    second = cache.get(config)
+
+    assert second is not first and second.signature != first.signature
+    assert tag_list_requests(large_simulator) > uploads
+    assert [tag["name"] for tag in second.tags] == [tag["name"] for tag in first.tags]
+
+def test_signature_checks_wait_for_the_interval(pool, config, large_simulator, tmp_path):
+    cache = TagCache(pool, cache_dir=str(tmp_path), signature_check_interval=60.0)
+    first = cache.get(config)
+
+    large_simulator.controller.bump_change_counter()
+
+    assert cache.get(config) is first
+    assert cache.get(config, refresh=True) is not first
+
+def test_controllers_without_a_signature_expire_after_the_ttl(pool, config, tmp_path, monkeypatch):
+    monkeypatch.setattr(TagCache, "read_signature", staticmethod(lambda plc: None))
+    cache = TagCache(pool, cache_dir=str(tmp_path), signature_check_interval=0.0, fallback_ttl=0.2)
+    first = cache.get(config)
+
+    assert cache.get(config) is first
+    # nothing to check instance ids against
+    assert pool.run(config, lambda plc: cache.verified(config, plc)) is None
+
+    time.sleep(0.25)
+    assert cache.get(config) is not first
+
+def test_databases_persist_across_caches(pool, config, tmp_path):
+    uploaded = TagCache(pool, cache_dir=str(tmp_path)).get(config)
+
+    loaded = TagCache(pool, cache_dir=str(tmp_path)).peek(config)
+
+    assert loaded.tags == uploaded.tags and loaded.signature == uploaded.signature
+    assert loaded.templates == uploaded.templates
+
+    TagCache(pool, cache_dir=str(tmp_path)).invalidate(config)
+    assert TagCache(pool, cache_dir=str(tmp_path)).peek(config) is None
+
+def test_stream_hands_out_each_tag_once_across_a_reconnect(pool, config, large_simulator, tmp_path, monkeypatch):
+    send = Connection.send
+    tag_list_replies = []
+
+    def drop_second_tag_list_reply(self, request, *args, **kwargs):
+        if request[:1] == b"\x55":
+            tag_list_replies.append(request)
+            if len(tag_list_replies) == 2:
+                # what pylogix reports for a socket error
+                return 1, None
+        return send(self, request, *args, **kwargs)
+
+    monkeypatch.setattr(Connection, "send", drop_second_tag_list_reply)
+    cache = TagCache(pool, cache_dir=str(tmp_path))
+    pages = []
+
+    database = cache.stream(config, pages.append)
+
+    streamed = [record["name"] for page in pages for record in page]
+    assert len(pages) > 2
+    assert streamed == [tag["name"] for tag in database.tags]
+    assert len(streamed) == len(set(streamed))
+
+def test_stream_serves_a_current_cache_in_pages(pool, config, large_simulator, tmp_path):
+    cache = TagCache(pool, cache_dir=str(tmp_path))
+    database = cache.get(config)
+    uploads = tag_list_requests(large_simulator)
+    pages = []
+
+    assert cache.stream(config, pages.append) is database
+
+    assert tag_list_requests(large_simulator) == uploads
+    assert [len(page) for page in pages][:-1] == [STREAM_PAGE_SIZE] * (len(pages) - 1)
+    assert sum(pages, []) == database.tags
+
+def test_stream_falls_back_to_one_piece_without_the_pylogix_internals(pool, config, tmp_path, monkeypatch):
+    monkeypatch.setattr(tag_cache, "STREAMING_METHODS", tag_cache.STREAMING_METHODS + ("_removed_in_a_later_release",))
+    pages = []
+
+    database = TagCache(pool, cache_dir=str(tmp_path)).stream(config, pages.append)
+
+    assert pages == [database.tags]
+    assert database.templates and database.signature
+
+def test_streamed_pages_carry_udt_names_as_they_arrive(pool, config, tmp_path):
+    pages = []
+
+    # copies, so names filled in after a page was handed out would show up as missing
+    database = TagCache(pool, cache_dir=str(tmp_path)).stream(config, lambda page: pages.append([dict(record) for record in page]))
+
+    streamed = sum(pages, [])
+    assert len(pages) > 2
+    assert {"MOTOR", "LINE"} <= {record["type"] for record in streamed}
+    assert [(record["name"], record["type"]) for record in streamed] == [(tag["name"], tag["type"]) for tag in database.tags]
@@ -0,0 +1,105 @@
+import random
+import pytest
+from app.services.tag_cache import HIDDEN_MEMBER_PREFIX
+from app.services.tag_decoder import TagDecoder, unpack_bits
+
+MOTOR_MEMBERS = ["Speed", "Current", "Running", "Faulted", "Starts", "Name", "History"]
+
+@pytest.fixture(scope="module")
+def decoder(tag_database) -> TagDecoder:
+    return TagDecoder(tag_database)
+
+@pytest.fixture(scope="module")
+def read_members(plc_service, plc_config):
+    """Read tags with plain pylogix reads, which decode atomic and STRING members themselves"""
+    def read(tags):
+        responses = plc_service.pool.run(plc_config, lambda plc: plc.Read(tags))
+        assert [response.Status for response in responses] == ["Success"] * len(tags)
+        return [response.Value for response in responses]
+    return read
+
+def raw_value(simulator, tag_name: str) -> bytes:
+    return bytes(simulator.controller.tags[tag_name].data)
+
+def template_id(tag_database, tag_name: str) -> int:
+    return tag_database.tags_by_name[tag_name]["data_type_value"]
+
+def test_plan(decoder):
+    assert decoder.plan("Counts_0") == ("Counts_0[0]", 100)
+    assert decoder.plan("Motors") == ("Motors[0]", 4)
+    assert decoder.plan("Motor_0") == ("Motor_0", 1)
+    assert decoder.plan("Line_1.Motors") == ("Line_1.Motors[0]", 4)
+    assert decoder.plan("Line_1.Motors[2]") == ("Line_1.Motors[2]", 1)
+    # scalars, elements, strings and unknown tags go in batched reads
+    assert decoder.plan("Counter_0") is None
+    assert decoder.plan("Counts_0[3]") is None
+    assert decoder.plan("Message") is None
+    assert decoder.plan("NoSuchTag") is None
+
+def test_structure_size_matches_the_controller_layout(decoder, simulator, tag_database):
+    for tag_name in ("Motor_0", "Line_1"):
+        assert decoder.structure_size(template_id(tag_database, tag_name)) == len(raw_value(simulator, tag_name))
+
+def test_structure_members_match_member_reads(decoder, simulator, tag_database, read_members):
+    value = decoder.decode_structure(template_id(tag_database, "Motor_0"), raw_value(simulator, "Motor_0"))
+
+    assert list(value) == MOTOR_MEMBERS
+    assert not any(name.startswith(HIDDEN_MEMBER_PREFIX) for name in value)
+    expected = read_members([f"Motor_0.{name}" for name in MOTOR_MEMBERS[:-1]] + [f"Motor_0.History[{i}]" for i in range(10)])
+    assert [value[name] for name in MOTOR_MEMBERS[:-1]] + value["History"] == expected
+
+def test_structure_array(decoder, simulator, read_members):
+    raw = raw_value(simulator, "Motors")
+    values = decoder.decode("Motors", raw, 4)
+
+    assert len(values) == 4
+    assert [motor["Starts"] for motor in values] == read_members([f"Motors[{i}].Starts" for i in range(4)])
+
+def test_nested_structures(decoder, simulator, read_members):
+    value = decoder.decode("Line_1", raw_value(simulator, "Line_1"), 1)
+
+    assert list(value) == ["Enabled", "Rate", "Motors", "Alarms"]
+    assert len(value["Motors"]) == 4 and len(value["Alarms"]) == 32
+    assert [value["Rate"], value["Motors"][1]["Speed"], value["Motors"][3]["Name"]] == read_members(
+        ["Line_1.Rate", "Line_1.Motors[1].Speed", "Line_1.Motors[3].Name"]
+    )
+    assert value["Alarms"] == read_members([f"Line_1.Alarms[{i}]" for i in range(32)])
+
+def test_decoded_values_pass_through(decoder):
+    assert decoder.decode("Counter_0", 7, 0) == 7
+    assert decoder.decode("Counts_0", 7, 100) == [7]
+    assert decoder.decode("Counts_0", [1, 2], 2) == [1, 2]
+
+def test_unknown_template(decoder):
+    with pytest.raises(ValueError):
+        decoder.decode_structure(0x7ff, b"\x00" * 8)
+
+def test_unpack_bits():
+    raw = (0x80000005).to_bytes(4, "little") + (1).to_bytes(4, "little")
+
+    assert unpack_bits(raw, 0, 4) == [True, False, True, False]
+    assert unpack_bits(raw, 0, 33)[31:] == [True, True]
+    assert unpack_bits(raw, 0, 3, first=31) == [True, True, False]
+    assert unpack_bits(raw, 4, 2) == [True, False]
+    assert unpack_bits(raw, 0, 0) == []
+
+def unpack_bits_from_int(raw: bytes, offset: int, count: int, first: int = 0) -> list:
+    """The previous implementation: one big integer formatted as a bit string"""
+    if count <= 0:
+        return []
+    end = offset + -(-(first + count) // 8)
+    value = int.from_bytes(raw[offset:end], "little") >> first
+    return list(map("1".__eq__, format(value & ((1 << count) - 1), f"0{count}b")[::-1]))
+
+def test_unpack_bits_matches_shifting_at_any_offset():
+    generator = random.Random(7)
+    raw = bytes(generator.randrange(256) for _ in range(64))
+
+    for offset in (0, 1, 3, 4, 7):
+        for first in (0, 1, 5, 8, 13, 31, 33):
+            for count in (0, 1, 3, 8, 9, 31, 32, 77, 200):
+                assert unpack_bits(raw, offset, count, first) == unpack_bits_from_int(raw, offset, count, first)
+
+def test_unpack_bits_needs_the_whole_range():
+    with pytest.raises(ValueError):
+        unpack_bits(b"\x01\x02", 0, 17)
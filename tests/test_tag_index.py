@@ -0,0 +1,69 @@
+import pytest
+from app.services.tag_cache import HIDDEN_MEMBER_PREFIX
+from app.services.tag_index import MEMBER, PROGRAM, TAG, TagIndex
+
+@pytest.fixture(scope="module")
+def index(tag_database) -> TagIndex:
+    return TagIndex.for_database(tag_database)
+
+def names(result) -> list:
+    return [item["name"] for item in result["items"]]
+
+def test_index_is_built_once_per_database(index, tag_database):
+    assert TagIndex.for_database(tag_database) is index
+
+def test_entries_are_sorted_with_their_parents(index):
+    keys = [entry["name"].lower() for entry in index.entries]
+    assert keys == sorted(keys)
+
+    by_name = {entry["name"]: entry for entry in index.entries}
+    assert by_name["Motor_0"]["kind"] == TAG and by_name["Motor_0"]["has_children"]
+    assert by_name["Motor_0.Speed"] == {
+        "name": "Motor_0.Speed", "type": "REAL", "kind": MEMBER, "parent": "Motor_0", "array_size": None, "has_children": False
+    }
+    assert by_name["Program:MainProgram"]["kind"] == PROGRAM
+    assert by_name["Program:MainProgram.Level_1"]["parent"] == "Program:MainProgram"
+    assert by_name["Trend_4"]["array_size"] == 100
+    # arrays of structures and strings are not walked
+    assert not by_name["Motors"]["has_children"] and "Message.LEN" not in by_name
+    assert not any(HIDDEN_MEMBER_PREFIX in name for name in by_name)
+
+def test_prefix_is_case_insensitive(index):
+    assert names(index.search(prefix="MOTOR_1")) == [
+        "Motor_1", "Motor_1.Current", "Motor_1.Faulted", "Motor_1.History",
+        "Motor_1.Name", "Motor_1.Running", "Motor_1.Speed", "Motor_1.Starts"
+    ]
+    assert names(index.search(prefix="motor_1", include_members=False)) == ["Motor_1"]
+    assert index.search(prefix="nothing")["total"] == 0
+
+@pytest.mark.parametrize("query", ["ee", "PEED", "unt", "ounter_1", "program:main", "_3", "xyz"])
+def test_substring_matches_a_plain_scan(index, query):
+    expected = [entry["name"] for entry in index.entries if query.lower() in entry["name"].lower()]
+
+    result = index.search(query=query, limit=1000)
+
+    assert names(result) == expected and result["total"] == len(expected)
+
+def test_filters_combine(index):
+    assert names(index.search(types=["motor"])) == ["Line_1.Motors", "Motor_0", "Motor_1", "Motor_2", "Motor_3", "Motors"]
+    assert names(index.search(parent="Line_1")) == ["Line_1.Alarms", "Line_1.Enabled", "Line_1.Motors", "Line_1.Rate"]
+    assert names(index.search(parent="Program:MainProgram", types=["REAL"])) == ["Program:MainProgram.Level_1"]
+    assert names(index.search(query="speed", prefix="motor_2")) == ["Motor_2.Speed"]
+
+    top_level = index.search(parent="", limit=1000)["items"]
+    assert top_level and all(item["parent"] is None for item in top_level)
+    assert {item["kind"] for item in top_level} == {TAG, PROGRAM}
+
+def test_pages_are_slices_of_the_matches(index):
+    everything = names(index.search(query="level", limit=1000))
+
+    pages = [index.search(query="level", offset=offset, limit=4) for offset in range(0, len(everything), 4)]
+
+    assert all(page["total"] == len(everything) for page in pages)
+    assert sum((names(page) for page in pages), []) == everything
+    assert index.search(query="level", offset=-5, limit=-1)["items"] == []
+
+def test_member_entries_are_bounded(tag_database):
+    index = TagIndex(tag_database, max_member_entries=5)
+
+    assert index.search(include_members=True, limit=1000)["total"] - index.search(include_members=False, limit=1000)["total"] == 5
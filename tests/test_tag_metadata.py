@@ -0,0 +1,91 @@
+import time
+import pytest
+from pylogix import PLC
+from pylogix.lgx_comm import Connection
+from app.models.tag import PLCConnectionConfig
+from app.services import tag_metadata
+from app.services.connection_pool import PLCConnectionPool
+from app.services.pylogix_service import PylogixService
+from app.services.tag_cache import TagCache
+from app.simulator.controller import build_demo_controller
+from app.simulator.eip_server import EIPSimulator
+
+# A controller of its own, so renumbering its tags does not disturb other tests
+RENUMBERED_HOST = "127.0.0.25"
+
+SIGNATURE_CHECK_INTERVAL = 0.2
+
+# Services that carry tag request paths: Read Tag and Multiple Service Packet
+TAG_SERVICES = (b"\x4c", b"\x0a")
+
+@pytest.fixture
+def simulator():
+    simulator = EIPSimulator(build_demo_controller(scalar_count=8, array_count=1, udt_count=1), host=RENUMBERED_HOST).start()
+    yield simulator
+    simulator.stop()
+
+@pytest.fixture
+def service(simulator, sent, tmp_path):
+    pool = PLCConnectionPool()
+    service = PylogixService(pool, TagCache(pool, cache_dir=str(tmp_path), signature_check_interval=SIGNATURE_CHECK_INTERVAL))
+    service.tag_cache.get(PLCConnectionConfig(ip_address=RENUMBERED_HOST, timeout=5))
+    service.write_tags(RENUMBERED_HOST, [("Counter_0", 100), ("Counter_4", 400)], timeout=5)
+    del sent[:]
+    yield service
+    pool.close_all()
+
+@pytest.fixture
+def sent(monkeypatch) -> list:
+    """Tag requests sent by sessions opened after this fixture"""
+    send = Connection.send
+    requests = []
+
+    def record(self, request, *args, **kwargs):
+        if request[:1] in TAG_SERVICES:
+            requests.append(request)
+        return send(self, request, *args, **kwargs)
+
+    monkeypatch.setattr(Connection, "send", record)
+    return requests
+
+def test_path_builder_replaces_the_leading_symbol():
+    plc = PLC()
+    tag_metadata.address_by_instance(plc)
+    plc.SymbolInstances, plc.SymbolInstancesUntil = {"Motor_0": 7, "Counts_0": 300}, float("inf")
+
+    assert plc._build_ioi("Motor_0.Speed", None) == (
+        tag_metadata.instance_segment(7) + tag_metadata.symbolic_segment("Speed")
+    )
+    assert plc._build_ioi("Counts_0[5]", None).startswith(bytes([0x20, 0x6b, 0x25, 0x00, 0x2c, 0x01]))
+    assert plc._build_ioi("Level_1", None) == tag_metadata.symbolic_segment("Level_1")
+
+    plc.SymbolInstancesUntil = 0.0
+    assert plc._build_ioi("Motor_0", None) == tag_metadata.symbolic_segment("Motor_0")
+
+def test_verified_tags_are_addressed_by_instance(service, simulator, sent):
+    counter = simulator.controller.tags["Counter_0"]
+
+    values = service.read_tag_columns(RENUMBERED_HOST, ["Counter_0", "Counter_4"], timeout=5).values
+
+    assert values == [100, 400]
+    paths = b"".join(sent)
+    assert tag_metadata.instance_segment(counter.instance_id) in paths
+    assert tag_metadata.symbolic_segment("Counter_0") not in paths
+
+def test_tags_are_addressed_by_name_once_the_change_counter_moves(service, simulator, sent):
+    controller = simulator.controller
+    # a download that gives two tags each other's instance ids
+    first, second = controller.tags["Counter_0"], controller.tags["Counter_4"]
+    with controller.lock:
+        first.instance_id, second.instance_id = second.instance_id, first.instance_id
+        controller._instances[(None, first.instance_id)] = first
+        controller._instances[(None, second.instance_id)] = second
+    controller.bump_change_counter()
+    time.sleep(SIGNATURE_CHECK_INTERVAL)
+
+    values = service.read_tag_columns(RENUMBERED_HOST, ["Counter_0", "Counter_4"], timeout=5).values
+
+    assert values == [100, 400]
+    paths = b"".join(sent)
+    assert tag_metadata.symbolic_segment("Counter_0") in paths
+    assert bytes([0x20, 0x6b]) not in paths
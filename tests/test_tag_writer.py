@@ -0,0 +1,102 @@
+import pytest
+from app.services.tag_writer import TagWrite, TagWriteValidator, read_back_matches
+from conftest import SIMULATOR_HOST
+
+@pytest.fixture(scope="module")
+def validator(tag_database) -> TagWriteValidator:
+    return TagWriteValidator(tag_database)
+
+@pytest.mark.parametrize("tag_name, value, expected", [
+    ("Counter_0", 5, 5),
+    ("Counter_0", 5.0, 5),
+    ("Counter_0", -2 ** 31, -2 ** 31),
+    ("Setpoint_2", 32767, 32767),
+    ("Level_1", 3, 3.0),
+    ("Level_1", float("nan"), None),
+    ("Switch_3", 1, True),
+    ("Switch_3", False, False),
+    ("Counter_0.31", True, True),
+    ("Counts_0[5].2", 0, False),
+    ("Message", "hello", "hello"),
+    ("Motor_0.Name", "pump", "pump"),
+    ("Motor_0.Speed", 1, 1.0),
+    ("Line_1.Motors[2].Starts", 9, 9)
+])
+def test_valid_values_are_converted(validator, tag_name, value, expected):
+    write = validator.check(tag_name, value)
+
+    assert write.name == tag_name
+    if expected is None:
+        assert write.value != write.value
+    else:
+        assert write.value == expected and type(write.value) is type(expected)
+
+@pytest.mark.parametrize("tag_name, value, message", [
+    ("NoSuchTag", 1, "Unknown tag"),
+    ("Counter_0", 5.5, "Expected an integer"),
+    ("Counter_0", True, "Expected an integer"),
+    ("Counter_0", "5", "Expected an integer"),
+    ("Counter_0", 2 ** 31, "out of range"),
+    ("Setpoint_2", -32769, "out of range"),
+    ("Level_1", 1e39, "out of range"),
+    ("Level_1", "1.5", "Expected a number"),
+    ("Switch_3", 2, "Expected true/false"),
+    ("Counter_0.32", True, "out of range"),
+    ("Level_1.3", True, "not a bit of an integer"),
+    ("Message", "x" * 83, "does not fit"),
+    ("Message", 5, "Expected a string"),
+    ("Motor_0", {"Speed": 1.0}, "Cannot write a whole MOTOR"),
+    ("Counts_0", [], "takes 1 to 100"),
+    ("Counts_0", list(range(101)), "takes 1 to 100"),
+    ("Counts_0[98]", [1, 2, 3], "takes 1 to 2"),
+    ("Flags_2", [True, 2], "Expected true/false")
+])
+def test_invalid_values_are_rejected(validator, tag_name, value, message):
+    with pytest.raises(ValueError, match=message):
+        validator.check(tag_name, value)
+
+def test_scalars_are_batched_and_arrays_and_strings_are_not(validator):
+    assert validator.check("Counter_0", 1).batchable
+    assert validator.check("Counts_0[5]", 1).batchable
+    assert validator.check("Counter_0.3", 1).batchable
+    assert not validator.check("Message", "hi").batchable
+
+    array = validator.check("Counts_0[98]", [1, 2])
+    assert not array.batchable and array.value == [1, 2]
+    assert validator.check("Flags_2", [1, 0, True]).value == [True, False, True]
+
+def test_read_back_comparison():
+    assert read_back_matches(TagWrite("Level_1", 0.1, "REAL", True), 0.10000000149011612)
+    assert not read_back_matches(TagWrite("Level_1", 0.1, "REAL", True), 0.2)
+    assert read_back_matches(TagWrite("Level_1", float("nan"), "REAL", True), float("nan"))
+    assert read_back_matches(TagWrite("Switch_3", True, "BOOL", True), 1)
+    assert not read_back_matches(TagWrite("Switch_3", True, "BOOL", True), 2)
+    assert read_back_matches(TagWrite("Counts_0", [1, 2], "DINT", False), [1, 2, 3])
+    assert not read_back_matches(TagWrite("Counts_0", [1, 2], "DINT", False), [1])
+
+def test_writes_are_verified_on_the_controller(plc_service):
+    writes = [
+        ("Counter_36", 1234), ("Level_37", 2.5), ("Setpoint_38", -7), ("Switch_39", True),
+        ("Counter_24.4", True), ("Counts_3[97]", [5, 6, 7]), ("Motors[3].Name", "feed pump")
+    ]
+
+    results = plc_service.write_tags(SIMULATOR_HOST, writes, timeout=5, verify=True)
+
+    assert [result["status"] for result in results] == ["Success"] * len(writes)
+    assert [result["read_back"] for result in results] == [1234, 2.5, -7, True, True, [5, 6, 7], "feed pump"]
+    assert plc_service.read_tag_columns(SIMULATOR_HOST, ["Counter_24"], timeout=5).values[0] & 0b10000
+
+def test_nothing_is_written_when_a_value_is_invalid(plc_service):
+    before = plc_service.read_tag_columns(SIMULATOR_HOST, ["Counter_32", "Level_33"], timeout=5).values
+
+    results = plc_service.write_tags(SIMULATOR_HOST, [("Counter_32", before[0] + 1), ("Level_33", "high")], timeout=5)
+
+    assert [result["status"] for result in results] == ["Skipped", "Invalid"]
+    assert "Expected a number" in results[1]["error"]
+    assert plc_service.read_tag_columns(SIMULATOR_HOST, ["Counter_32", "Level_33"], timeout=5).values == before
+
+def test_a_tag_is_written_once_per_request(plc_service):
+    results = plc_service.write_tags(SIMULATOR_HOST, [("Counter_28", 1), ("Counter_28", 2)], timeout=5)
+
+    assert [result["status"] for result in results] == ["Skipped", "Invalid"]
+    assert "more than once" in results[1]["error"]